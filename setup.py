@@ -53,6 +53,7 @@
 #==============================================================================
 import numpy
 import os
+import sys
 from os.path import abspath, dirname, isfile, join, relpath, splitext
 from setuptools import Extension, setup
 
@@ -92,10 +93,20 @@ ext_dir   = relpath(ext_dir,  SETUP_DIR)
 pyx_file  = relpath(pyx_file, SETUP_DIR)
 ext_file  = relpath(ext_file, SETUP_DIR)
 
+#OpenMP is used for multithreaded network generation, set OPENMP=0 to disable
+if bool(int(os.getenv("OPENMP", int(sys.platform.startswith("linux"))))):
+    omp_args = ["/openmp"] if sys.platform == "win32" else ["-fopenmp"]
+    omp_link = [] if sys.platform == "win32" else ["-fopenmp"]
+else:
+    omp_args = []
+    omp_link = []
+
 extensions = [
     Extension(EXT_NAME, [pyx_file],
         include_dirs=[numpy.get_include(), src_dir, ext_dir],
-        define_macros=[("NPY_NO_DEPRECATED_API", "NPY_1_7_API_VERSION")])
+        define_macros=[("NPY_NO_DEPRECATED_API", "NPY_1_7_API_VERSION")],
+        extra_compile_args=omp_args,
+        extra_link_args=omp_link)
     ]
 
 if not isfile(ext_file):
@@ -17,10 +17,20 @@
 
     Please contact with me by E-mail: shkolnick.kun@gmail.com
 **************************************************************************/
+/*clock_gettime for phase timings in strict C99 mode*/
+#if !defined(_POSIX_C_SOURCE) && !defined(_WIN32)
+#   define _POSIX_C_SOURCE 200112L
+#endif
+
 #include <malloc.h>
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <time.h>
+
+#ifdef _OPENMP
+#   include <omp.h>
+#endif/*_OPENMP*/
 
 #include "ccpm.h"
 
@@ -32,6 +42,7 @@
 #endif/*__GNUC__*/
 
 /*===========================================================================*/
+/*No shared state, CCPM_CFG_PRINTF must be reentrant when used from threads*/
 #ifndef CCPM_CFG_PRINTF
 #   define CCPM_LOG_PRINTF(...) do {} while (0)
 #   define CCPM_ERR(...)        fprintf(stderr, __VA_ARGS__)
@@ -103,6 +114,157 @@ do {                                                                          \
 #define CCPM_TRY_GOTO_END(exp) _CCPM_TRY_GOTO_END(exp, __FILE__, __func__, __LINE__)
 
 /*===========================================================================*/
+/*
+Reusable workspace: a list of memory chunks with a bump allocator.
+Buffers of a call are taken from chunks, when the outermost user
+releases the workspace all chunks are merged in one chunk of the peak
+size, so the next call of the same or smaller size does no allocations.
+*/
+typedef struct _ccpmChunkSt ccpmChunkSt;
+
+struct _ccpmChunkSt
+{
+    ccpmChunkSt * next;
+    size_t        size; /*Data size in bytes*/
+};
+
+struct _ccpmCtxSt
+{
+    ccpmChunkSt * chunk; /*Current chunk is the head*/
+    size_t        used;  /*Bytes used in current chunk*/
+    size_t        need;  /*Bytes requested by current call*/
+    size_t        peak;  /*Max bytes requested by a call*/
+    size_t        depth; /*Number of nested users*/
+};
+
+#define CCPM_ALIGN(sz) (((sz) + 15) & ~(size_t)15)
+#define CCPM_CHUNK_HDR CCPM_ALIGN(sizeof(ccpmChunkSt))
+#define CCPM_CHUNK_MIN ((size_t)1 << 16)
+
+static ccpmChunkSt * _ccpm_chunk_new(ccpmChunkSt * next, size_t size)
+{
+    ccpmChunkSt * chunk = (ccpmChunkSt *)malloc(CCPM_CHUNK_HDR + size);
+    CCPM_CHECK_RETURN(chunk, 0);
+
+    chunk->next = next;
+    chunk->size = size;
+    return chunk;
+}
+
+static void _ccpm_chunk_free_all(ccpmCtxSt * ctx)
+{
+    while (ctx->chunk)
+    {
+        ccpmChunkSt * next = ctx->chunk->next;
+        free(ctx->chunk);
+        ctx->chunk = next;
+    }
+    ctx->used = 0;
+}
+
+ccpmCtxSt * ccpm_ctx_new(void)
+{
+    ccpmCtxSt * ctx = (ccpmCtxSt *)malloc(sizeof(ccpmCtxSt));
+    CCPM_CHECK_RETURN(ctx, 0);
+
+    memset(ctx, 0, sizeof(ccpmCtxSt));
+    return ctx;
+}
+
+void ccpm_ctx_free(ccpmCtxSt * ctx)
+{
+    if (!ctx)
+    {
+        return;
+    }
+    _ccpm_chunk_free_all(ctx);
+    free(ctx);
+}
+
+void ccpm_ctx_shrink(ccpmCtxSt * ctx)
+{
+    /*Workspace in use can't be shrunk*/
+    if (!ctx || ctx->depth)
+    {
+        return;
+    }
+    _ccpm_chunk_free_all(ctx);
+    ctx->peak = 0;
+}
+
+size_t ccpm_ctx_size(const ccpmCtxSt * ctx)
+{
+    size_t sz = 0;
+
+    if (!ctx)
+    {
+        return 0;
+    }
+
+    for (ccpmChunkSt * chunk = ctx->chunk; chunk; chunk = chunk->next)
+    {
+        sz += chunk->size;
+    }
+    return sz;
+}
+
+static ccpmCtxSt * _ccpm_ctx_enter(ccpmCtxSt * ctx)
+{
+    if (ctx)
+    {
+        ctx->depth++;
+    }
+    return ctx;
+}
+
+static void _ccpm_ctx_leave(ccpmCtxSt * ctx)
+{
+    if (!ctx || --ctx->depth)
+    {
+        return;
+    }
+
+    if (ctx->need > ctx->peak)
+    {
+        ctx->peak = ctx->need;
+    }
+    ctx->need = 0;
+    ctx->used = 0;
+
+    /*Merge chunks, so the next call will fit in one chunk*/
+    if (ctx->chunk && ctx->chunk->next)
+    {
+        _ccpm_chunk_free_all(ctx);
+        ctx->chunk = _ccpm_chunk_new(0, ctx->peak);
+    }
+}
+
+static void * _ccpm_ctx_alloc(ccpmCtxSt * ctx, size_t sz)
+{
+    sz = CCPM_ALIGN(sz);
+
+    if (!ctx->chunk || (ctx->used + sz > ctx->chunk->size))
+    {
+        size_t size = ctx->chunk ? 2 * ctx->chunk->size : CCPM_CHUNK_MIN;
+        if (size < sz)
+        {
+            size = sz;
+        }
+
+        ccpmChunkSt * chunk = _ccpm_chunk_new(ctx->chunk, size);
+        CCPM_CHECK_RETURN(chunk, 0);
+
+        ctx->chunk = chunk;
+        ctx->used  = 0;
+    }
+
+    void * data = (char *)ctx->chunk + CCPM_CHUNK_HDR + ctx->used;
+    ctx->used += sz;
+    ctx->need += sz;
+    return data;
+}
+
+/*===========================================================================*/
 typedef struct _ccpmMemStackSt ccpmMemStackSt;
 
 struct _ccpmMemStackSt
@@ -112,12 +274,23 @@ struct _ccpmMemStackSt
     const char * name;
 };
 
-void * _ccpm_mem_alloc(ccpmMemStackSt * item, const char * name, ccpmMemStackSt ** stack, size_t sz)
+void * _ccpm_mem_alloc(ccpmMemStackSt * item, const char * name, ccpmMemStackSt ** stack,
+                       ccpmCtxSt * ctx, size_t sz)
 {
     CCPM_CHECK_RETURN(item,  0);
     CCPM_CHECK_RETURN(stack, 0);
 
     CCPM_LOG_PRINTF("Will allocate %s:", name);
+
+    /*Workspace buffers are released with the workspace*/
+    if (ctx)
+    {
+        void * _data = _ccpm_ctx_alloc(ctx, sz);
+        CCPM_CHECK_RETURN(_data, 0);
+
+        CCPM_LOG_PRINTF(" %p (workspace)\n", _data);
+        return _data;
+    }
 
     void * _data = malloc(sz);
     CCPM_CHECK_RETURN(_data, 0);
@@ -131,7 +304,7 @@ void * _ccpm_mem_alloc(ccpmMemStackSt * item, const char * name, ccpmMemStackSt
     return _data;
 }
 
-void _ccpm_mem_free(ccpmMemStackSt ** stack)
+void _ccpm_mem_free(ccpmMemStackSt ** stack, ccpmCtxSt * ctx)
 {
     while (*stack)
     {
@@ -139,24 +312,33 @@ void _ccpm_mem_free(ccpmMemStackSt ** stack)
         free((*stack)->data);
         *stack = (*stack)->next;
     }
+    _ccpm_ctx_leave(ctx);
 }
 
-#define CCPM_MEM_INIT() ccpmMemStackSt * mem_stack = 0
+#define CCPM_MEM_INIT() CCPM_MEM_INIT_CTX(0)
+
+/*Buffers will be taken from ctx workspace if it's not 0, mem_size counts allocated bytes*/
+#define CCPM_MEM_INIT_CTX(ctx)                  \
+    ccpmMemStackSt * mem_stack = 0;             \
+    size_t           mem_size  = 0;             \
+    ccpmCtxSt      * mem_ctx   = _ccpm_ctx_enter(ctx)
 
 #define _CCPM_MEM_ALLOC(type, var, n, l)                                                                        \
     ccpmMemStackSt CCPM_CAT(_item_,l);                                                                          \
     char * CCPM_CAT(_name,l) = #var;                                                                            \
-    type * var = (type *)_ccpm_mem_alloc(&CCPM_CAT(_item_,l), CCPM_CAT(_name,l), &mem_stack, (n) * sizeof(type)); \
+    type * var = (type *)_ccpm_mem_alloc(&CCPM_CAT(_item_,l), CCPM_CAT(_name,l), &mem_stack, mem_ctx,            \
+                                         (n) * sizeof(type));                                                   \
     if (CCPM_UNLIKELY(!var))                                                                                    \
     {                                                                                                           \
         CCPM_LOG_PRINTF("Not enough memory at %s, %d", __FILE__, l);                                            \
-        _ccpm_mem_free(&mem_stack);                                                                             \
+        _ccpm_mem_free(&mem_stack, mem_ctx);                                                                    \
         return CCPM_ENOMEM;                                                                                     \
     }                                                                                                           \
-    (void)mem_stack
+    mem_size += CCPM_ALIGN((n) * sizeof(type));                                                                 \
+    (void)mem_stack; (void)mem_size
 
 #define CCPM_MEM_ALLOC(type, var, n) _CCPM_MEM_ALLOC(type, var, n, __LINE__)
-#define CCPM_MEM_FREE_ALL() _ccpm_mem_free(&mem_stack)
+#define CCPM_MEM_FREE_ALL() _ccpm_mem_free(&mem_stack, mem_ctx)
 
 /*=========================================================================
 Merge sort based on:
@@ -218,16 +400,84 @@ static inline uint32_t * _merge_sort(uint32_t * tmp, uint32_t * key, uint32_t *
     return ret;
 }
 
+/*=========================================================================
+Stable LSD radix sort with 8-bit digits, passes for zero high digits
+of all values are skipped, so small values take one or two passes.
+=========================================================================*/
+static inline void _radix_sort(uint32_t * tmp, uint32_t * key, uint32_t * val, size_t n)
+{
+    size_t   cnt[256];
+    size_t   i;
+    uint32_t vmax = 0;
+
+    for (i = 0; i < n; i++)
+    {
+        if (val[key[i]] > vmax)
+        {
+            vmax = val[key[i]];
+        }
+    }
+
+    uint32_t * src = key;
+    uint32_t * dst = tmp;
+
+    for (size_t shift = 0; (shift < 32) && (vmax >> shift); shift += 8)
+    {
+        memset(cnt, 0, sizeof(cnt));
+        for (i = 0; i < n; i++)
+        {
+            cnt[(val[src[i]] >> shift) & 0xff]++;
+        }
+
+        /*Digit positions*/
+        size_t pos = 0;
+        for (i = 0; i < 256; i++)
+        {
+            size_t c = cnt[i];
+            cnt[i] = pos;
+            pos += c;
+        }
+
+        for (i = 0; i < n; i++)
+        {
+            dst[cnt[(val[src[i]] >> shift) & 0xff]++] = src[i];
+        }
+
+        uint32_t * t = src;
+        src = dst;
+        dst = t;
+    }
+
+    if (src != key)
+    {
+        memcpy(key, src, n * sizeof(uint32_t));
+    }
+}
+
+/*===========================================================================*/
 ccpmResultEn ccpm_sort(uint32_t * tmp, uint32_t * key, uint32_t * val, size_t n)
+{
+    return ccpm_sort_ex(tmp, key, val, n, CCPM_SORT_RADIX);
+}
+
+ccpmResultEn ccpm_sort_ex(uint32_t * tmp, uint32_t * key, uint32_t * val, size_t n, ccpmSortEn alg)
 {
     CCPM_CHECK_RETURN(tmp, CCPM_EINVAL);
     CCPM_CHECK_RETURN(key, CCPM_EINVAL);
     CCPM_CHECK_RETURN(val, CCPM_EINVAL);
+    CCPM_CHECK_RETURN((CCPM_SORT_RADIX == alg) || (CCPM_SORT_MERGE == alg), CCPM_EINVAL);
 
     if (!n)
     {
         return CCPM_OK;
     }
+
+    if (CCPM_SORT_RADIX == alg)
+    {
+        _radix_sort(tmp, key, val, n);
+        return CCPM_OK;
+    }
+
     uint32_t * ms = _merge_sort(tmp, key, val, n);
     if (ms != key)
     {
@@ -252,1589 +502,4692 @@ ccpmResultEn ccpm_sort(uint32_t * tmp, uint32_t * key, uint32_t * val, size_t n)
 
 
 /*===========================================================================*/
-#define CCPM_FAKE  (0xffff)
+#define CCPM_FAKE  CCPM_FAKE32
 
 /*===========================================================================*/
-ccpmResultEn ccpm_check_act_idss(uint16_t * act_ids)
+/*
+Open addressing hash tables of positions. A slot holds position + 1,
+zero marks an empty slot, keys are taken from the arrays which
+the positions refer to.
+*/
+static inline size_t _ccpm_hash_bits(size_t n)
+{
+    size_t bits = 4;
+    while (((size_t)1 << bits) < 2 * n)
+    {
+        bits++;
+    }
+    return bits;
+}
+
+#define CCPM_HASH_SZ(bits) ((size_t)1 << (bits))
+
+static inline size_t _ccpm_hash(uint64_t key, size_t bits)
+{
+    return (size_t)((key * 0x9E3779B97F4A7C15ull) >> (64 - bits));
+}
+
+/*Slot of id or an empty slot to insert it*/
+static inline size_t _ccpm_id_slot(uint32_t * act_ids, uint32_t * tbl, size_t bits, uint32_t id)
+{
+    size_t mask = CCPM_HASH_SZ(bits) - 1;
+    size_t h    = _ccpm_hash(id, bits);
+
+    while (tbl[h] && (CCPM_LITEM(act_ids, tbl[h] - 1) != id))
+    {
+        h = (h + 1) & mask;
+    }
+    return h;
+}
+
+/*Slot of a link or an empty slot to insert it*/
+static inline size_t _ccpm_lnk_slot(uint32_t * lnk_src, uint32_t * lnk_dst,
+                                    uint32_t * tbl, size_t bits,
+                                    uint32_t src, uint32_t dst)
+{
+    size_t mask = CCPM_HASH_SZ(bits) - 1;
+    size_t h    = _ccpm_hash(((uint64_t)src << 32) | dst, bits);
+
+    while (tbl[h] && ((lnk_src[tbl[h] - 1] != src) || (lnk_dst[tbl[h] - 1] != dst)))
+    {
+        h = (h + 1) & mask;
+    }
+    return h;
+}
+
+/*===========================================================================*/
+ccpmResultEn ccpm_check_act_idss(uint32_t * act_ids, uint32_t * tbl, size_t bits)
 {
     CCPM_CHECK_RETURN(act_ids, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(tbl,     CCPM_EINVAL);
 
     size_t n_act = CCPM_LLEN(act_ids);
 
     CCPM_CHECK_RETURN(n_act < CCPM_FAKE, CCPM_ELIM);
+    CCPM_CHECK_RETURN(CCPM_HASH_SZ(bits) >= n_act + 1, CCPM_EINVAL);
 
+    /*Fill ID table, so ccpm_links_prepare can use it*/
+    memset(tbl, 0, CCPM_HASH_SZ(bits) * sizeof(uint32_t));
     for (size_t i = 0; i < n_act; i++)
     {
-        for (size_t j = i + 1; j < n_act; j++)
-        {
-            CCPM_CHECK_RETURN(CCPM_LITEM(act_ids, i) != CCPM_LITEM(act_ids, j), CCPM_EINVAL);
-        }
+        size_t h = _ccpm_id_slot(act_ids, tbl, bits, CCPM_LITEM(act_ids, i));
+
+        CCPM_CHECK_RETURN(0 == tbl[h], CCPM_EINVAL);
+        tbl[h] = i + 1;
     }
     return CCPM_OK;
 }
 
 /*===========================================================================*/
-ccpmResultEn ccpm_check_links(uint16_t * lnk_src, uint16_t * lnk_dst, size_t n_lnk)
+ccpmResultEn ccpm_check_links(uint32_t * lnk_src, uint32_t * lnk_dst, size_t * n_lnk,
+                              uint32_t * tbl, size_t bits, bool dedup)
 {
     CCPM_CHECK_RETURN(lnk_src, CCPM_EINVAL);
     CCPM_CHECK_RETURN(lnk_dst, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(n_lnk,   CCPM_EINVAL);
+    CCPM_CHECK_RETURN(tbl,     CCPM_EINVAL);
 
-    CCPM_CHECK_RETURN(n_lnk < CCPM_FAKE, CCPM_ELIM);
+    CCPM_CHECK_RETURN(dedup || (*n_lnk < CCPM_FAKE), CCPM_ELIM);
+    CCPM_CHECK_RETURN(CCPM_HASH_SZ(bits) >= *n_lnk + 1, CCPM_EINVAL);
 
-    for (size_t i = 0; i < n_lnk; i++)
+    /*Repeated links are either errors or get removed in place*/
+    memset(tbl, 0, CCPM_HASH_SZ(bits) * sizeof(uint32_t));
+    size_t n = 0;
+    for (size_t i = 0; i < *n_lnk; i++)
     {
-        for (size_t j = i + 1; j < n_lnk; j++)
+        uint32_t src = lnk_src[i];
+        uint32_t dst = lnk_dst[i];
+        size_t   h   = _ccpm_lnk_slot(lnk_src, lnk_dst, tbl, bits, src, dst);
+
+        if (tbl[h])
         {
-            CCPM_CHECK_RETURN((lnk_src[i] != lnk_src[j]) || (lnk_dst[i] != lnk_dst[j]), CCPM_EINVAL);
+            CCPM_CHECK_RETURN(dedup, CCPM_EINVAL);
+            CCPM_LOG_PRINTF("Removed repeated link (%d,%d)\n", (int)src, (int)dst);
+            continue;
         }
+
+        lnk_src[n] = src;
+        lnk_dst[n] = dst;
+        tbl[h] = ++n;
     }
+
+    CCPM_CHECK_RETURN(n < CCPM_FAKE, CCPM_ELIM);
+    *n_lnk = n;
     return CCPM_OK;
 }
 
 /*===========================================================================*/
-static inline bool _ccpm_lookup_act_pos(uint16_t * link, uint16_t * act_ids)
-{
-    size_t n_act = CCPM_LLEN(act_ids);
-    for (size_t i = 0; i < n_act; i++)
-    {
-        if (0 == *link - CCPM_LITEM(act_ids, i))
-        {
-            *link = i;
-            return true;
-        }
-    }
-    return false;
-}
-
-ccpmResultEn ccpm_links_prepare(uint16_t * act_ids, uint16_t * lnk_src, uint16_t * lnk_dst, size_t n_lnk)
+ccpmResultEn ccpm_links_prepare(uint32_t * act_ids, uint32_t * lnk_src, uint32_t * lnk_dst, size_t n_lnk,
+                                uint32_t * tbl, size_t bits)
 {
     CCPM_CHECK_RETURN(act_ids,  CCPM_EINVAL);
     CCPM_CHECK_RETURN(lnk_src, CCPM_EINVAL);
     CCPM_CHECK_RETURN(lnk_dst, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(tbl,     CCPM_EINVAL);
 
+    /*tbl must be filled by ccpm_check_act_idss*/
     CCPM_LOG_PRINTF("Translate work indexes to work array positions...\n");
     for (size_t i = 0; i < n_lnk; i++)
     {
         CCPM_LOG_PRINTF("%d: (%d,%d)->", (int)i, (int)lnk_src[i], (int)lnk_dst[i]);
 
-        bool found_src = _ccpm_lookup_act_pos(lnk_src + i, act_ids);
-        bool found_dst = _ccpm_lookup_act_pos(lnk_dst + i, act_ids);
+        size_t src = tbl[_ccpm_id_slot(act_ids, tbl, bits, lnk_src[i])];
+        size_t dst = tbl[_ccpm_id_slot(act_ids, tbl, bits, lnk_dst[i])];
+
+        CCPM_CHECK_RETURN(src && dst, CCPM_EINVAL);
+
+        lnk_src[i] = src - 1;
+        lnk_dst[i] = dst - 1;
 
         CCPM_LOG_PRINTF("[%d,%d]\n", (int)lnk_src[i], (int)lnk_dst[i]);
-        CCPM_CHECK_RETURN(found_src && found_dst, CCPM_EINVAL);
     }
     return CCPM_OK;
 }
 
 /*===========================================================================*/
-ccpmResultEn ccpm_populate_dep_info(size_t   n_max,
-                                    size_t   n_lnk, uint16_t * lnk_src, uint16_t * lnk_dst,
-                                    uint32_t * dep, uint8_t * dep_map)
+/*
+Compressed sparse rows: row i is item[off[i]] ... item[off[i + 1] - 1].
+Used for link and event adjacency, so memory is linear in the number of items.
+*/
+typedef struct {
+    uint32_t * off;
+    uint32_t * item;
+} ccpmCsrSt;
+
+#define CCPM_CSR_LEN(csr, i) ((csr)->off[(i) + 1] - (csr)->off[i])
+
+/*Shift row offsets back after filling rows with item[off[i]++] = ...*/
+static inline void _ccpm_csr_rewind(ccpmCsrSt * csr, size_t n)
+{
+    for (size_t i = n; i > 0; i--)
+    {
+        csr->off[i] = csr->off[i - 1];
+    }
+    csr->off[0] = 0;
+}
+
+/*Exclusive prefix sums of row lengths stored at off[i + 1]*/
+static inline void _ccpm_csr_prefix(ccpmCsrSt * csr, size_t n)
+{
+    for (size_t i = 0; i < n; i++)
+    {
+        csr->off[i + 1] += csr->off[i];
+    }
+}
+
+/*===========================================================================*/
+/*
+Loop detection in O(n_act + n_lnk) with Kahn algorithm on links translated
+to positions. Activities left out of topological order have unprocessed
+dependencies, so walking from one of them over such dependencies always
+gets on a loop. Its activity IDs are written to the loop list in link
+order, the list must hold n_act items.
+*/
+ccpmResultEn ccpm_check_loops(size_t n_act, uint32_t * act_ids,
+                              uint32_t * lnk_src, uint32_t * lnk_dst, size_t n_lnk,
+                              uint32_t * deg,  ccpmCsrSt * succ,
+                              uint32_t * pred, uint32_t * queue,
+                              uint32_t * loop)
 {
     size_t i;
-    size_t j;
-
-    CCPM_CHECK_RETURN(lnk_src, CCPM_EINVAL);
+    size_t k;
+    size_t v;
+
+    CCPM_CHECK_RETURN(act_ids, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(lnk_src, CCPM_EINVAL);
     CCPM_CHECK_RETURN(lnk_dst, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(dep,     CCPM_EINVAL);
-    CCPM_CHECK_RETURN(dep_map, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(deg,     CCPM_EINVAL);
+    CCPM_CHECK_RETURN(succ,    CCPM_EINVAL);
+    CCPM_CHECK_RETURN(pred,    CCPM_EINVAL);
+    CCPM_CHECK_RETURN(queue,   CCPM_EINVAL);
 
-    for (i = 0; i < n_max; i++)
-    {
-        /*dep[i] = []*/
-        CCPM_LCLR(dep + n_max * i);
-        for (j = 0; j < n_max; j++)
+    CCPM_LOG_PRINTF("Checking for loops...\n");
+
+    /*Successor lists and numbers of dependencies*/
+    memset(deg,       0, n_act * sizeof(uint32_t));
+    memset(succ->off, 0, (n_act + 1) * sizeof(uint32_t));
+    for (k = 0; k < n_lnk; k++)
+    {
+        CCPM_CHECK_RETURN((lnk_src[k] < n_act) && (lnk_dst[k] < n_act), CCPM_EINVAL);
+
+        deg[lnk_dst[k]]++;
+        succ->off[lnk_src[k] + 1]++;
+    }
+    _ccpm_csr_prefix(succ, n_act);
+
+    for (k = 0; k < n_lnk; k++)
+    {
+        succ->item[succ->off[lnk_src[k]]++] = lnk_dst[k];
+    }
+    _ccpm_csr_rewind(succ, n_act);
+
+    /*Topological order*/
+    CCPM_LCLR(queue);
+    for (v = 0; v < n_act; v++)
+    {
+        if (0 == deg[v])
         {
-            dep_map[n_max * i + j] = false;
+            CCPM_LAPP(queue, v);
         }
     }
 
-    CCPM_LOG_PRINTF("Populate dependencies data...\n");
-    for (size_t l = 0; l < n_lnk; l++)
+    for (i = 0; i < CCPM_LLEN(queue); i++)
     {
-        i = lnk_src[l];
-        j = lnk_dst[l];
+        size_t u = CCPM_LITEM(queue, i);
+        for (k = succ->off[u]; k < succ->off[u + 1]; k++)
+        {
+            v = succ->item[k];
+            if (0 == --deg[v])
+            {
+                CCPM_LAPP(queue, v);
+            }
+        }
+    }
 
-        CCPM_CHECK_RETURN((i < n_max) && (j < n_max), CCPM_EINVAL);
+    if (CCPM_LLEN(queue) == n_act)
+    {
+        return CCPM_OK;
+    }
 
-        /*Populate dependency maps*/
-        /*dep_map[j, i] = True*/
-        dep_map[n_max * j + i] = true;
+    /*Some unprocessed dependency of each unprocessed activity*/
+    size_t start = n_act;
+    for (k = 0; k < n_lnk; k++)
+    {
+        if (deg[lnk_src[k]] && deg[lnk_dst[k]])
+        {
+            pred[lnk_dst[k]] = lnk_src[k];
+            start = lnk_dst[k];
+        }
+    }
+    CCPM_CHECK_RETURN(start < n_act, CCPM_EUNK);
 
-        /*Must check here to enable error tracking*/
-        CCPM_CHECK_RETURN(i != j, CCPM_ELOOP);
+    /*Walk back over dependencies until some activity is visited twice*/
+    memset(succ->off, 0, (n_act + 1) * sizeof(uint32_t));
+    CCPM_LCLR(queue);
+    for (v = start; 0 == succ->off[v]; v = pred[v])
+    {
+        CCPM_LAPP(queue, v);
+        succ->off[v] = CCPM_LLEN(queue);
+    }
 
-        /*Append dependencies*/
-        /*dep[j].append(i)*/
-        CCPM_LAPP(dep + n_max * j, i);
+    if (loop)
+    {
+        CCPM_LCLR(loop);
+        for (i = CCPM_LLEN(queue); i >= succ->off[v]; i--)
+        {
+            CCPM_LAPP(loop, CCPM_LITEM(act_ids, CCPM_LITEM(queue, i - 1)));
+        }
     }
 
-    return CCPM_OK;
+    CCPM_LOG_PRINTF("Links form a loop of %d activities\n", (int)(CCPM_LLEN(queue) - succ->off[v] + 1));
+    return CCPM_ELOOP;
 }
-
-/*===========================================================================*/
-ccpmResultEn ccpm_build_full_deps(size_t     n_act,    size_t  n_max,
-                                  uint32_t * full_act_dep, uint8_t * full_map)
-{
-    size_t i;
-    size_t j;
-    size_t k;
-    size_t l;
-    size_t m;
-    size_t p;
-    size_t q;
-
-    CCPM_CHECK_RETURN(full_map, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(full_act_dep, CCPM_EINVAL);
-
-    CCPM_LOG_PRINTF("Building full dependency arrays and maps:\n");
-    for (i = 0; i < n_act; i++)
-    {
-        /*len(full_act_dep[i])*/
-        for (j = 0; j < CCPM_LLEN(full_act_dep + n_max * i); j++)
-        {
-            /*k = full_act_dep[i][j]*/
-            k = CCPM_LITEM(full_act_dep + n_max * i, j);
-            /*len(full_act_dep[k])*/
-            q = CCPM_LLEN(full_act_dep + n_max * k);
-            for (l = 0; l < q; l++)
-            {
-                /*m = full_act_dep[k][l]*/
-                m = CCPM_LITEM(full_act_dep + n_max * k, l);
-                if (!full_map[n_max * i + m])
-                {
-                    /*Add a dependency to full map*/
-                    /*full_map[i,m] = True*/
-                    full_map[n_max * i + m] = true;
-
-                    /*Loop detection must be here for segfault protection*/
-                    CCPM_CHECK_RETURN(i != m, CCPM_ELOOP);
-
-                    /*Append a dependency*/
-                    /*full_act_dep[i].append(m)*/
-                    CCPM_LAPP(full_act_dep + n_max * i, m);
-                }
-            }
-        }
-    }
-    return CCPM_OK;
-}
-
-/*===========================================================================*/
-ccpmResultEn ccpm_optimize_deps(size_t     n_act,    size_t     n_max,
-                                uint32_t * act_pos,  uint32_t * full_n,
-                                uint32_t * dep,      uint8_t  * map,
-                                uint32_t * tmp)
-{
-    size_t i;
-    size_t j;
-    size_t k;
-    size_t l;
-    size_t m;
-    size_t p;
-    size_t q;
-
-    /*
-    This sorting gives as some cool features:
-    1. In place preprocessing of dependencies by ccpm_optimize_deps.
-    2. No need to look back: all current work dependencies after
-       ccpm_optimize_deps call are behind its position.
-    */
-    CCPM_LCLR(act_pos);
-    for (i = 0; i < n_act; i++)
+
+/*===========================================================================*/
+/*
+Weakly connected components of the link graph in O(n_act + n_lnk) with
+union-find on activity positions. Roots are attached to smaller roots,
+so parents precede their children and components are numbered in order
+of their first activities. Activities without links form one component.
+tbl must be filled by ccpm_check_act_idss, comp and mark must hold
+n_act items, comp gets component numbers of activities.
+*/
+static inline size_t _ccpm_uf_find(uint32_t * parent, size_t i)
+{
+    while (parent[i] != i)
     {
-        CCPM_LAPP(act_pos, i);
-    }
-    CCPM_CHECK_RETURN(CCPM_OK == ccpm_sort(tmp, act_pos + 1, full_n, n_act), CCPM_EUNK);
-
-    CCPM_LOG_PRINTF("Removing redundant dependencies\n");
-    /*
-    We are going backward here so if dependency processing is done inplace
-    then previous works have full dependencies untouched for any processed work.
-    */
-    for (p = n_act; p > 0; p--)
-    {
-        i = CCPM_LITEM(act_pos, p - 1);
-        /*len(full_act_dep[i])*/
-        q = CCPM_LLEN(dep + n_max * i);
-        for (l = 0; l < q; l++)
-        {
-            /*j = dep[i][l]*/
-            j = CCPM_LITEM(dep + n_max * i, l);
-            for (m = 0; m < q; m++)
-            {
-                /*k = dep[i][m]*/
-                k = CCPM_LITEM(dep + n_max * i, m);
-                if (k == j)
-                {
-                    continue;
-                }
-                if (map[n_max * k + j])
-                {
-                    map[n_max * i + j] = false;
-                }
-            }
-        }
-    }
-
-    /*Populate optimized dependency arrays*/
-    for (i = 0; i < n_act; i++)
-    {
-        /*dep[i] = []*/
-        CCPM_LCLR(dep + n_max * i);
-        for (j = 0; j < n_max; j++)
-        {
-            if (map[n_max * i + j])
-            {
-                /*Append a dependency*/
-                /*dep[i].append(j)*/
-                CCPM_LAPP(dep + n_max * i, j);
-            }
-        }
-    }
-    return CCPM_OK;
+        parent[i] = parent[parent[i]];
+        i = parent[i];
+    }
+    return i;
 }
 
-/*===========================================================================*/
-ccpmResultEn ccpm_handle_deps(uint32_t * min_deps, uint32_t target,
-                              size_t n_cur, size_t n_max,
-                              uint32_t *  min_act_dep, uint8_t *  min_dep_map,
-                              uint32_t * full_act_dep, uint8_t * full_dep_map)
+ccpmResultEn ccpm_find_components(uint32_t * act_ids, uint32_t * lnk_src, uint32_t * lnk_dst, size_t n_lnk,
+                                  uint32_t * tbl, size_t bits,
+                                  uint32_t * comp, uint8_t * mark, size_t * n_comp)
 {
     size_t i;
-    size_t d;
+    size_t n = 0;
 
-    CCPM_CHECK_RETURN(min_deps, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(min_act_dep, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(min_dep_map, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(full_act_dep, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(full_dep_map, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(target < n_max, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(n_cur < n_max, CCPM_EINVAL);
+    uint32_t single = CCPM_FAKE;
 
-    CCPM_LOG_PRINTF("Handling dependencies for target %d with dummy %d\n",
-                   (int)target, (int)n_cur);
+    CCPM_CHECK_RETURN(act_ids, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(lnk_src, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(lnk_dst, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(tbl,     CCPM_EINVAL);
+    CCPM_CHECK_RETURN(comp,    CCPM_EINVAL);
+    CCPM_CHECK_RETURN(mark,    CCPM_EINVAL);
+    CCPM_CHECK_RETURN(n_comp,  CCPM_EINVAL);
+
+    size_t n_act = CCPM_LLEN(act_ids);
 
-    /* Append to target predeceptors in full dependencies */
-    full_dep_map[n_max * target + n_cur] = true;
-    CCPM_LAPP(full_act_dep + n_max * target, n_cur);
+    for (i = 0; i < n_act; i++)
+    {
+        comp[i] = i;
+        mark[i] = 0;
+    }
 
-    /* Replace target min dependencies with dummy action */
-    for (i = 0; i < CCPM_LLEN(min_deps); i++)
+    for (i = 0; i < n_lnk; i++)
     {
-        d = CCPM_LITEM(min_deps, i);
+        size_t src = tbl[_ccpm_id_slot(act_ids, tbl, bits, lnk_src[i])];
+        size_t dst = tbl[_ccpm_id_slot(act_ids, tbl, bits, lnk_dst[i])];
 
-        /* Remove direct dependency on d */
-        min_dep_map[n_max * target + d] = false;
+        CCPM_CHECK_RETURN(src && dst, CCPM_EINVAL);
 
-        /* Add dependency on dummy */
-        min_dep_map[n_max * target + n_cur] = true;
+        mark[src - 1] = 1;
+        mark[dst - 1] = 1;
+
+        src = _ccpm_uf_find(comp, src - 1);
+        dst = _ccpm_uf_find(comp, dst - 1);
+        if (src < dst)
+        {
+            comp[dst] = src;
+        }
+        else
+        {
+            comp[src] = dst;
+        }
     }
 
-    /* Recompute target min dependencies */
-    CCPM_LCLR(min_act_dep + n_max * target);
-    for (i = 0; i < n_max; i++)
+    /*Parents precede children, so roots of parents are known*/
+    for (i = 0; i < n_act; i++)
     {
-        if (min_dep_map[n_max * target + i])
+        comp[i] = comp[comp[i]];
+    }
+
+    for (i = 0; i < n_act; i++)
+    {
+        if (!mark[i])
+        {
+            if (CCPM_FAKE == single)
+            {
+                single = n++;
+            }
+            comp[i] = single;
+        }
+        else if (comp[i] == i)
         {
-            CCPM_LAPP(min_act_dep + n_max * target, i);
+            comp[i] = n++;
+        }
+        else
+        {
+            comp[i] = comp[comp[i]];
         }
     }
 
+    CCPM_LOG_PRINTF("Found %d weakly connected components\n", (int)n);
+    *n_comp = n;
     return CCPM_OK;
 }
 
 /*===========================================================================*/
-ccpmResultEn ccpm_add_a_dummy(uint32_t * min_deps, uint32_t * deps, uint8_t * dep_map,
-                              size_t n_cur, size_t n_max,
-                              uint16_t * act_ids,      uint32_t * act_pos,
-                              uint32_t * min_act_dep,  uint8_t  * min_dep_map,
-                              uint32_t * full_act_dep, uint8_t  * full_dep_map)
-{
-    size_t i;
-    size_t d;
-
-    CCPM_CHECK_RETURN(min_deps, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(deps, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(dep_map, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(act_ids, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(act_pos, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(min_act_dep, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(min_dep_map, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(full_act_dep, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(full_dep_map, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(n_cur < n_max, CCPM_EINVAL);
-
-    CCPM_LOG_PRINTF("Adding dummy activity at position %d\n", (int)n_cur);
+/*
+Bit sets of 64-bit words, used as dependency maps.
+*/
+#define CCPM_BSET_WORDS(n) (((n) + 63) >> 6)
 
-    /* Add fake activity ID to act_ids list */
-    CCPM_LAPP(act_ids, CCPM_FAKE);
+static inline bool _ccpm_bset_has(const uint64_t * s, size_t i)
+{
+    return (s[i >> 6] >> (i & 63)) & 1;
+}
 
-    /* Add current position to act_pos list */
-    CCPM_LAPP(act_pos, n_cur);
+static inline void _ccpm_bset_set(uint64_t * s, size_t i)
+{
+    s[i >> 6] |= (uint64_t)1 << (i & 63);
+}
 
-    /*Check for limits*/
-    CCPM_CHECK_RETURN(CCPM_LLEN(act_pos) < CCPM_FAKE, CCPM_ELIM);
+static inline void _ccpm_bset_clr(uint64_t * s, size_t i)
+{
+    s[i >> 6] &= ~((uint64_t)1 << (i & 63));
+}
 
-    /* Set dummy minimal dependencies */
-    CCPM_LCLR(min_act_dep + n_max * n_cur);
-    for (i = 0; i < CCPM_LLEN(min_deps); i++)
+/*Number of trailing zeros, w must not be 0*/
+static inline size_t _ccpm_ctz64(uint64_t w)
+{
+#if defined(__GNUC__) || defined(__clang__)
+    return (size_t)__builtin_ctzll(w);
+#else
+    size_t n = 0;
+    while (!(w & 1))
     {
-        d = CCPM_LITEM(min_deps, i);
-        CCPM_LAPP(min_act_dep + n_max * n_cur, d); /*Copy deps to new dummy*/
-        min_dep_map[n_max * n_cur + d] = true;     /*Set dep map*/
+        w >>= 1;
+        n++;
     }
+    return n;
+#endif
+}
 
-    /* Set dummy full dependencies */
-    CCPM_LCLR(full_act_dep + n_max * n_cur);
-    for (i = 0; i < CCPM_LLEN(deps); i++)
+/*===========================================================================*/
+/*
+Dependency tables.
+
+CCPM_DEPS_DENSE mode uses n_max lists of n_max items and n_max * n_max maps,
+CCPM_DEPS_SPARSE mode uses sorted sets which grow with the number of
+dependencies, so memory usage is O(n_max + number of dependencies).
+Sparse rows of all tables of a build are charged to one ccpmRowMemSt,
+a row which would exceed its budget is not grown and CCPM_ENOMEM is returned.
+*/
+typedef struct {
+    size_t used; /*Bytes allocated for sparse rows*/
+    size_t peak;
+    size_t max;  /*Budget for sparse rows, 0 for no limit*/
+} ccpmRowMemSt;
+
+typedef struct {
+    uint32_t * item; /*Sorted dependency positions*/
+    uint32_t   len;
+    uint32_t   cap;
+} ccpmRowSt;
+
+typedef struct {
+    size_t      n_max;
+    ccpmDepsEn  mode;
+    size_t      n_w;   /*CCPM_DEPS_DENSE: bit set words per map row*/
+    uint32_t *  lst;   /*CCPM_DEPS_DENSE: n_max lists of n_max items*/
+    uint64_t *  map;   /*CCPM_DEPS_DENSE: n_max bit sets of n_max bits*/
+    ccpmRowSt * row;   /*CCPM_DEPS_SPARSE: n_max sorted sets*/
+    ccpmRowMemSt * mem; /*CCPM_DEPS_SPARSE: row memory counter*/
+} ccpmDepTblSt;
+
+/*len(t[i])*/
+static inline size_t _ccpm_tbl_len(ccpmDepTblSt * t, size_t i)
+{
+    if (CCPM_DEPS_SPARSE == t->mode)
     {
-        d = CCPM_LITEM(deps, i);
-        CCPM_LAPP(full_act_dep + n_max * n_cur, d);
+        return t->row[i].len;
     }
+    return CCPM_LLEN(t->lst + t->n_max * i);
+}
 
-    /* Also copy the dependency map for the dummy */
-    for (i = 0; i < n_max; i++)
+/*t[i][k]*/
+static inline size_t _ccpm_tbl_item(ccpmDepTblSt * t, size_t i, size_t k)
+{
+    if (CCPM_DEPS_SPARSE == t->mode)
     {
-        full_dep_map[n_max * n_cur + i] = dep_map[i];
+        return t->row[i].item[k];
     }
-
-    return CCPM_OK;
+    return CCPM_LITEM(t->lst + t->n_max * i, k);
 }
 
-/*===========================================================================*/
-ccpmResultEn ccpm_full_deps(uint32_t * min_deps,
-                            uint32_t * deps, uint8_t * dep_map,
-                            size_t n_max,
-                            uint32_t * full_act_dep, uint8_t * full_dep_map)
+/*Position of j in sparse row or position to insert j*/
+static inline size_t _ccpm_row_find(ccpmRowSt * row, size_t j, bool * found)
 {
-    size_t i;
-    size_t j;
-    size_t k;
-
-    CCPM_CHECK_RETURN(min_deps, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(deps, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(dep_map, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(full_act_dep, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(full_dep_map, CCPM_EINVAL);
+    size_t l = 0;
+    size_t r = row->len;
 
-    CCPM_LOG_PRINTF("Building full dependencies for given minimal dependencies\n");
-
-    /* Copy minimal dependencies to deps list */
-    CCPM_LCLR(deps);
-    for (i = 0; i < CCPM_LLEN(min_deps); i++)
+    while (l < r)
     {
-        j = CCPM_LITEM(min_deps, i);
-        CCPM_LAPP(deps, j);
+        size_t m = l + (r - l) / 2;
+        if (row->item[m] < j)
+        {
+            l = m + 1;
+        }
+        else
+        {
+            r = m;
+        }
     }
+    *found = (l < row->len) && (row->item[l] == j);
+    return l;
+}
 
-    /* Initialize dependency map */
-    for (i = 0; i < n_max; i++)
+/*j in t[i]*/
+static inline bool _ccpm_tbl_has(ccpmDepTblSt * t, size_t i, size_t j)
+{
+    if (CCPM_DEPS_SPARSE == t->mode)
     {
-        dep_map[i] = false;
+        bool found;
+        (void)_ccpm_row_find(t->row + i, j, &found);
+        return found;
     }
+    return _ccpm_bset_has(t->map + t->n_w * i, j);
+}
 
-    /* Build transitive closure of dependencies */
-    for (i = 0; i < CCPM_LLEN(deps); i++)
-    {
-        j = CCPM_LITEM(deps, i);
-
-        /* Process all dependencies of j */
-        for (k = 0; k < CCPM_LLEN(full_act_dep + n_max * j); k++)
-        {
-            uint16_t d = CCPM_LITEM(full_act_dep + n_max * j, k);
-
-            if (dep_map[d])
-            {
-                continue;
-            }
+/*Grow sparse row capacity to cap items within the memory budget*/
+static ccpmResultEn _ccpm_row_grow(ccpmDepTblSt * t, ccpmRowSt * row, size_t cap)
+{
+    size_t sz = (cap - row->cap) * sizeof(uint32_t);
 
-            dep_map[d] = true;
+    CCPM_CHECK_RETURN(!t->mem->max || (t->mem->used + sz <= t->mem->max), CCPM_ENOMEM);
 
-            /* Check for loop */
-            CCPM_CHECK_RETURN(j != d, CCPM_ELOOP);
+    uint32_t * item = (uint32_t *)realloc(row->item, cap * sizeof(uint32_t));
+    CCPM_CHECK_RETURN(item, CCPM_ENOMEM);
+    row->item = item;
+    row->cap  = (uint32_t)cap;
 
-            CCPM_LAPP(deps, d);
-        }
+    t->mem->used += sz;
+    if (t->mem->used > t->mem->peak)
+    {
+        t->mem->peak = t->mem->used;
     }
-
     return CCPM_OK;
 }
 
-/*===========================================================================*/
-ccpmResultEn ccpm_process_nested_deps(size_t n_act, size_t n_max,
-                                      uint32_t * act_pos,
-                                      uint32_t * min_act_dep,  uint8_t * min_dep_map,
-                                      uint32_t * full_act_dep, uint8_t * full_dep_map,
-                                      uint16_t * act_ids,
-                                      uint32_t * min_com_deps,
-                                      uint32_t * tmp_deps,     uint8_t * tmp_dep_map)
+/*t[i].append(j) for dense tables, sorted insertion for sparse ones*/
+static inline ccpmResultEn _ccpm_tbl_add(ccpmDepTblSt * t, size_t i, size_t j)
 {
-    size_t p;
-    size_t q;
-    size_t i;
-    size_t j;
-    size_t k;
-    size_t lcd;
-    size_t lmcd;
-    ccpmResultEn ret = CCPM_OK;
-
-    CCPM_CHECK_RETURN(act_pos, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(min_act_dep, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(min_dep_map, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(full_act_dep, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(full_dep_map, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(act_ids, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(tmp_deps, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(tmp_dep_map, CCPM_EINVAL);
-
-    CCPM_LOG_PRINTF("Processing nested dependencies\n");
-
-    for (p = 0; p < n_act; p++)
+    if (CCPM_DEPS_SPARSE == t->mode)
     {
-        i = CCPM_LITEM(act_pos, p);
+        ccpmResultEn ret = CCPM_OK;
+        ccpmRowSt * row = t->row + i;
+        bool found;
+        size_t k = _ccpm_row_find(row, j, &found);
 
-        /* Skip activities without dependencies */
-        if (0 == CCPM_LLEN(min_act_dep + n_max * i))
+        if (found)
         {
-            continue;
+            return CCPM_OK;
         }
 
-        /* Search for nested list */
-        CCPM_LCLR(min_com_deps);
-        bool found_nesting = false;
-
-        for (q = p + 1; q < n_act; q++)
+        if (row->len == row->cap)
         {
-            j = CCPM_LITEM(act_pos, q);
+            CCPM_TRY_RETURN(_ccpm_row_grow(t, row, row->cap ? 2 * (size_t)row->cap : 4));
+        }
 
-            /* Skip activities without dependencies */
-            if (0 == CCPM_LLEN(min_act_dep + n_max * j))
-            {
-                continue;
-            }
+        memmove(row->item + k + 1, row->item + k, (row->len - k) * sizeof(uint32_t));
+        row->item[k] = j;
+        row->len++;
+        return CCPM_OK;
+    }
 
-            /* Find common dependencies between i and j */
-            CCPM_LCLR(min_com_deps);
-            for (k = 0; k < CCPM_LLEN(min_act_dep + n_max * i); k++)
-            {
-                size_t d = CCPM_LITEM(min_act_dep + n_max * i, k);
-                if (min_dep_map[n_max * j + d])
-                {
-                    CCPM_LAPP(min_com_deps, d);
-                }
-            }
+    if (!_ccpm_bset_has(t->map + t->n_w * i, j))
+    {
+        _ccpm_bset_set(t->map + t->n_w * i, j);
+        CCPM_LAPP(t->lst + t->n_max * i, j);
+    }
+    return CCPM_OK;
+}
 
-            lcd = CCPM_LLEN(min_com_deps);
-            size_t len_i = CCPM_LLEN(min_act_dep + n_max * i);
-            size_t len_j = CCPM_LLEN(min_act_dep + n_max * j);
+/*t[i].remove(j), item order is preserved*/
+static inline void _ccpm_tbl_del(ccpmDepTblSt * t, size_t i, size_t j)
+{
+    uint32_t * item;
+    uint32_t * len;
+    size_t k;
 
-            if ((len_i == lcd || len_j == lcd) && (len_i != len_j))
-            {
-                /* Nested lists found, will reduce nested lists */
-                found_nesting = true;
-                break;
-            }
+    if (CCPM_DEPS_SPARSE == t->mode)
+    {
+        bool found;
+        k = _ccpm_row_find(t->row + i, j, &found);
+        if (!found)
+        {
+            return;
         }
-
-        if (!found_nesting)
+        item = t->row[i].item;
+        len  = &t->row[i].len;
+    }
+    else
+    {
+        if (!_ccpm_bset_has(t->map + t->n_w * i, j))
         {
-            /* No nested lists found, continue */
-            continue;
+            return;
         }
+        _ccpm_bset_clr(t->map + t->n_w * i, j);
 
-        /* Found nested lists, reduce them */
-        lmcd = CCPM_LLEN(min_com_deps);
-
-        /* Build full dependencies for common deps */
-        CCPM_TRY_RETURN(ccpm_full_deps(min_com_deps, tmp_deps, tmp_dep_map,
-                                          n_max, full_act_dep, full_dep_map));
-
-        /* Process all activities that have these common dependencies */
-        for (q = p + 1; q < n_act; q++)
+        item = &CCPM_LITEM(t->lst + t->n_max * i, 0);
+        len  = t->lst + t->n_max * i;
+        for (k = 0; item[k] != j; k++)
         {
-            j = CCPM_LITEM(act_pos, q);
+        }
+    }
 
-            size_t len_j = CCPM_LLEN(min_act_dep + n_max * j);
-            if (0 == len_j || len_j == lmcd)
-            {
-                /* Skip empty, equal, or non-nested lists */
-                continue;
-            }
+    memmove(item + k, item + k + 1, (*len - k - 1) * sizeof(uint32_t));
+    (*len)--;
+}
 
-            /* Check if j has all common dependencies */
-            size_t com_count = 0;
-            for (k = 0; k < lmcd; k++)
-            {
-                size_t d = CCPM_LITEM(min_com_deps, k);
-                if (min_dep_map[n_max * j + d])
-                {
-                    com_count++;
-                }
-            }
+/*t[i] = []*/
+static inline void _ccpm_tbl_clr(ccpmDepTblSt * t, size_t i)
+{
+    if (CCPM_DEPS_SPARSE == t->mode)
+    {
+        t->row[i].len = 0;
+        return;
+    }
 
-            if (com_count != lmcd)
-            {
-                /* Skip non-nested lists */
-                continue;
-            }
+    for (size_t k = 0; k < CCPM_LLEN(t->lst + t->n_max * i); k++)
+    {
+        _ccpm_bset_clr(t->map + t->n_w * i, CCPM_LITEM(t->lst + t->n_max * i, k));
+    }
+    CCPM_LCLR(t->lst + t->n_max * i);
+}
+
+static int _ccpm_u32_cmp(const void * a, const void * b)
+{
+    uint32_t x = *(const uint32_t *)a;
+    uint32_t y = *(const uint32_t *)b;
+    return (x > y) - (x < y);
+}
 
-            size_t nxt_id = CCPM_LLEN(act_ids);
+/*t[i] = items, items may be reordered*/
+static ccpmResultEn _ccpm_tbl_set(ccpmDepTblSt * t, size_t i, uint32_t * items, size_t n)
+{
+    ccpmResultEn ret = CCPM_OK;
 
-            /* Reduce nested lists */
-            CCPM_TRY_RETURN(ccpm_handle_deps(min_com_deps, j, nxt_id, n_max,
-                                            min_act_dep, min_dep_map,
-                                            full_act_dep, full_dep_map));
+    _ccpm_tbl_clr(t, i);
 
-            CCPM_TRY_RETURN(ccpm_add_a_dummy(min_com_deps, tmp_deps, tmp_dep_map,
-                                            nxt_id, n_max,
-                                            act_ids, act_pos,
-                                            min_act_dep, min_dep_map,
-                                            full_act_dep, full_dep_map));
+    if (CCPM_DEPS_SPARSE == t->mode)
+    {
+        /*Sort once, so the items will be appended to sorted set of exact capacity*/
+        qsort(items, n, sizeof(uint32_t), _ccpm_u32_cmp);
+        if (t->row[i].cap < n)
+        {
+            CCPM_TRY_RETURN(_ccpm_row_grow(t, t->row + i, n));
         }
     }
 
+    for (size_t k = 0; k < n; k++)
+    {
+        CCPM_TRY_RETURN(_ccpm_tbl_add(t, i, items[k]));
+    }
     return CCPM_OK;
 }
 
-/*===========================================================================*/
-ccpmResultEn ccpm_process_overlapping_deps(size_t n_max,
-                                          uint32_t * act_pos,
-                                          uint32_t * min_act_dep,  uint8_t * min_dep_map,
-                                          uint32_t * full_act_dep, uint8_t * full_dep_map,
-                                          uint16_t * act_ids,
-                                          uint32_t * min_com_deps,
-                                          uint32_t * tmp_deps,     uint8_t * tmp_dep_map)
+static void _ccpm_tbl_init(ccpmDepTblSt * t, ccpmDepsEn mode, size_t n_max,
+                           uint32_t * lst, uint64_t * map, ccpmRowSt * row, ccpmRowMemSt * mem)
 {
-    size_t p;
-    size_t q;
-    size_t i;
-    size_t j;
-    size_t k;
-    ccpmResultEn ret = CCPM_OK;
+    t->n_max = n_max;
+    t->n_w   = CCPM_BSET_WORDS(n_max);
+    t->mode  = mode;
+    t->lst   = lst;
+    t->map   = map;
+    t->row   = row;
+    t->mem   = mem;
+
+    if (CCPM_DEPS_SPARSE == mode)
+    {
+        memset(row, 0, n_max * sizeof(ccpmRowSt));
+    }
+}
 
-    CCPM_CHECK_RETURN(act_pos, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(min_act_dep, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(min_dep_map, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(full_act_dep, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(full_dep_map, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(act_ids, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(tmp_deps, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(tmp_dep_map, CCPM_EINVAL);
+static void _ccpm_tbl_free(ccpmDepTblSt * t)
+{
+    if (CCPM_DEPS_SPARSE != t->mode)
+    {
+        return;
+    }
 
-    CCPM_LOG_PRINTF("Processing overlapping dependencies\n");
+    for (size_t i = 0; i < t->n_max; i++)
+    {
+        t->mem->used -= t->row[i].cap * sizeof(uint32_t);
+        free(t->row[i].item);
+        t->row[i].item = 0;
+        t->row[i].len  = 0;
+        t->row[i].cap  = 0;
+    }
+}
 
-    size_t n_last = CCPM_LLEN(act_ids);
+/*===========================================================================*/
+ccpmResultEn ccpm_populate_dep_info(size_t n_lnk, uint32_t * lnk_src, uint32_t * lnk_dst,
+                                    ccpmDepTblSt * dep)
+{
+    ccpmResultEn ret = CCPM_OK;
+    size_t i;
+    size_t j;
+
+    CCPM_CHECK_RETURN(lnk_src, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(lnk_dst, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(dep,     CCPM_EINVAL);
 
-    for (p = 0; p < n_last; p++)
-    {
-        i = CCPM_LITEM(act_pos, p);
+    size_t n_max = dep->n_max;
 
-        /* Skip activities without dependencies */
-        if (0 == CCPM_LLEN(min_act_dep + n_max * i))
+    for (i = 0; i < n_max; i++)
+    {
+        /*dep[i] = []*/
+        if (CCPM_DEPS_SPARSE == dep->mode)
         {
+            _ccpm_tbl_clr(dep, i);
             continue;
         }
 
-        /* Search for overlapping lists */
-        bool found_overlap = false;
-        CCPM_LCLR(min_com_deps);
-
-        for (q = 0; q < n_last; q++)
-        {
-            j = CCPM_LITEM(act_pos, q);
+        CCPM_LCLR(dep->lst + n_max * i);
+        memset(dep->map + dep->n_w * i, 0, dep->n_w * sizeof(uint64_t));
+    }
 
-            /* Skip activities without dependencies */
-            if (0 == CCPM_LLEN(min_act_dep + n_max * j))
-            {
-                continue;
-            }
-
-            /* Find common dependencies between i and j */
-            CCPM_LCLR(min_com_deps);
-            for (k = 0; k < CCPM_LLEN(min_act_dep + n_max * i); k++)
-            {
-                size_t d = CCPM_LITEM(min_act_dep + n_max * i, k);
-                if (min_dep_map[n_max * j + d])
-                {
-                    CCPM_LAPP(min_com_deps, d);
-                }
-            }
+    CCPM_LOG_PRINTF("Populate dependencies data...\n");
+    for (size_t l = 0; l < n_lnk; l++)
+    {
+        i = lnk_src[l];
+        j = lnk_dst[l];
 
-            size_t lmcd = CCPM_LLEN(min_com_deps);
-            size_t len_i = CCPM_LLEN(min_act_dep + n_max * i);
-            size_t len_j = CCPM_LLEN(min_act_dep + n_max * j);
+        CCPM_CHECK_RETURN((i < n_max) && (j < n_max), CCPM_EINVAL);
 
-            if (lmcd > 0 && len_i != lmcd && len_j != lmcd)
-            {
-                /* Found overlapping lists */
-                found_overlap = true;
-                break;
-            }
-        }
+        /*Must check here to enable error tracking*/
+        CCPM_CHECK_RETURN(i != j, CCPM_ELOOP);
 
-        if (!found_overlap)
-        {
-            n_last = CCPM_LLEN(act_ids);//*n_cur;
-            continue;
-        }
+        /*Populate dependency maps and append dependencies*/
+        /*dep[j].append(i)*/
+        CCPM_TRY_RETURN(_ccpm_tbl_add(dep, j, i));
+    }
 
-        size_t lmcd = CCPM_LLEN(min_com_deps);
+    return CCPM_OK;
+}
+
+/*===========================================================================*/
+ccpmResultEn ccpm_build_full_deps(size_t n_act, ccpmDepTblSt * full,
+                                  uint32_t * tmp, uint8_t * mark)
+{
+    ccpmResultEn ret = CCPM_OK;
+    size_t i;
+    size_t j;
+    size_t k;
+    size_t l;
+    size_t m;
+    size_t q;
+
+    CCPM_CHECK_RETURN(full, CCPM_EINVAL);
 
-        /* Build full dependencies for common deps */
-        CCPM_TRY_RETURN(ccpm_full_deps(min_com_deps, tmp_deps, tmp_dep_map,
-                                          n_max, full_act_dep, full_dep_map));
+    size_t n_max = full->n_max;
+
+    CCPM_LOG_PRINTF("Building full dependency arrays and maps:\n");
+    if (CCPM_DEPS_SPARSE == full->mode)
+    {
+        CCPM_CHECK_RETURN(tmp,  CCPM_EINVAL);
+        CCPM_CHECK_RETURN(mark, CCPM_EINVAL);
 
-        /* Process all activities that have these common dependencies */
-        for (q = 0; q < n_last; q++)
+        for (i = 0; i < n_act; i++)
         {
-            j = CCPM_LITEM(act_pos, q);
-
-            /* Skip activities without dependencies */
-            if (0 == CCPM_LLEN(min_act_dep + n_max * j))
+            /*tmp = full_act_dep[i].copy()*/
+            CCPM_LCLR(tmp);
+            for (j = 0; j < _ccpm_tbl_len(full, i); j++)
             {
-                continue;
+                k = _ccpm_tbl_item(full, i, j);
+                mark[k] = true;
+                CCPM_LAPP(tmp, k);
             }
 
-            /* Check if j has all common dependencies */
-            size_t com_count = 0;
-            for (k = 0; k < lmcd; k++)
+            for (j = 0; j < CCPM_LLEN(tmp); j++)
             {
-                size_t d = CCPM_LITEM(min_com_deps, k);
-                if (min_dep_map[n_max * j + d])
+                k = CCPM_LITEM(tmp, j);
+                q = _ccpm_tbl_len(full, k);
+                for (l = 0; l < q; l++)
                 {
-                    com_count++;
+                    m = _ccpm_tbl_item(full, k, l);
+                    if (!mark[m])
+                    {
+                        mark[m] = true;
+
+                        /*Loop detection must be here for segfault protection*/
+                        CCPM_CHECK_RETURN(i != m, CCPM_ELOOP);
+
+                        CCPM_LAPP(tmp, m);
+                    }
                 }
             }
 
-            if (com_count == lmcd && CCPM_LLEN(min_act_dep + n_max * j) != lmcd)
+            for (j = 0; j < CCPM_LLEN(tmp); j++)
             {
-                /* Reduce overlapping dependencies */
-                size_t nxt_id = CCPM_LLEN(act_ids);
-                CCPM_TRY_RETURN(ccpm_handle_deps(min_com_deps, j, nxt_id, n_max,
-                                                min_act_dep, min_dep_map,
-                                                full_act_dep, full_dep_map));
-
-                CCPM_TRY_RETURN(ccpm_add_a_dummy(min_com_deps, tmp_deps, tmp_dep_map,
-                                                nxt_id, n_max,
-                                                act_ids, act_pos,
-                                                min_act_dep, min_dep_map,
-                                                full_act_dep, full_dep_map));
+                mark[CCPM_LITEM(tmp, j)] = false;
             }
-        }
 
-        n_last = CCPM_LLEN(act_ids);
+            CCPM_TRY_RETURN(_ccpm_tbl_set(full, i, &CCPM_LITEM(tmp, 0), CCPM_LLEN(tmp)));
+        }
+        return CCPM_OK;
     }
 
-    return CCPM_OK;
-}
+    uint32_t * full_act_dep = full->lst;
+    size_t     n_w          = full->n_w;
 
-/*===========================================================================*/
-ccpmResultEn ccpm_build_network(size_t n_max,
-                               uint16_t * act_ids,      uint32_t * act_pos,
-                               uint32_t * min_act_dep,  uint8_t  * min_dep_map,
-                               uint32_t * full_act_dep, uint8_t  * full_dep_map,
-                               uint32_t * act_src,      uint32_t * act_dst,
-                               uint32_t * started,      uint32_t * num_dep,
-                               uint32_t * events,       uint32_t * chk,
-                               uint32_t * start)
-{
-    size_t i;
-    size_t j;
-    size_t k;
-    size_t evt = 1;
-    size_t dum = CCPM_LLEN(act_ids);
+    for (i = 0; i < n_act; i++)
+    {
+        uint64_t * full_map = full->map + n_w * i;
 
-    CCPM_CHECK_RETURN(act_ids, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(act_pos, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(min_act_dep, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(min_dep_map, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(full_act_dep, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(full_dep_map, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(act_src, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(act_dst, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(started, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(num_dep, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(events, CCPM_EINVAL);
+        /*len(full_act_dep[i])*/
+        for (j = 0; j < CCPM_LLEN(full_act_dep + n_max * i); j++)
+        {
+            /*k = full_act_dep[i][j]*/
+            k = CCPM_LITEM(full_act_dep + n_max * i, j);
 
-    CCPM_LOG_PRINTF("Building network with %d activities\n", (int)dum);
+            /*full_map[i] |= full_map[k], a word at a time*/
+            uint64_t * dep_map = full->map + n_w * k;
+            for (q = 0; q < n_w; q++)
+            {
+                uint64_t add = dep_map[q] & ~full_map[q];
+                if (!add)
+                {
+                    continue;
+                }
 
-    /* Initialize arrays as lists */
-    CCPM_LCLR(started);
-    CCPM_LCLR(num_dep);
-    CCPM_LCLR(act_src);
-    CCPM_LCLR(act_dst);
-    CCPM_LCLR(events);
-    CCPM_LCLR(chk);
+                /*Add dependencies to full map*/
+                full_map[q] |= add;
 
-    /* Initialize started and num_dep lists */
-    for (i = 0; i < dum; i++)
+                for (; add; add &= add - 1)
+                {
+                    l = _ccpm_ctz64(add);
+                    m = (q << 6) + l;
+
+                    /*Loop detection must be here for segfault protection*/
+                    CCPM_CHECK_RETURN(i != m, CCPM_ELOOP);
+
+                    /*Append a dependency*/
+                    /*full_act_dep[i].append(m)*/
+                    CCPM_LAPP(full_act_dep + n_max * i, m);
+                }
+            }
+        }
+    }
+    return CCPM_OK;
+}
+
+/*===========================================================================*/
+/*
+Dense rows of different activities are independent, so loops over them
+may be spread over threads, each thread writes its own rows only,
+so results do not depend on the number of threads.
+*/
+size_t ccpm_n_threads(size_t n_threads)
+{
+#ifdef _OPENMP
+    size_t n_max = (size_t)omp_get_max_threads();
+
+    if (!n_threads || (n_threads > n_max))
     {
-        CCPM_LAPP(started, false);
-        CCPM_LAPP(num_dep, CCPM_LLEN(min_act_dep + n_max * i));
-        CCPM_LAPP(act_src, 0);
-        CCPM_LAPP(act_dst, 0);
+        return n_max;
     }
+    return n_threads;
+#else /*_OPENMP*/
+    (void)n_threads;
+    return 1;
+#endif/*_OPENMP*/
+}
 
-    /* Find initial activities without dependencies */
-    CCPM_LCLR(chk);
+/*===========================================================================*/
+ccpmResultEn ccpm_sort_act_pos(size_t n_act, uint32_t * act_pos, uint32_t * full_n,
+                               uint32_t * tmp, ccpmSortEn sort)
+{
+    size_t i;
 
-    for (i = 0; i < dum; i++)
+    CCPM_CHECK_RETURN(act_pos, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(full_n,  CCPM_EINVAL);
+    CCPM_CHECK_RETURN(tmp,     CCPM_EINVAL);
+
+    /*
+    This sorting gives as some cool features:
+    1. In place preprocessing of dependencies by ccpm_optimize_deps.
+    2. No need to look back: all current work dependencies after
+       ccpm_optimize_deps call are behind its position.
+    */
+    CCPM_LCLR(act_pos);
+    for (i = 0; i < n_act; i++)
     {
-        if ((0 == CCPM_LITEM(num_dep, i)) && (!CCPM_LITEM(started, i)))
-        {
-            /* started[i] = true */
-            CCPM_LITEM(started, i) = true;
-            /* act_src[i] = evt */
-            CCPM_LITEM(act_src, i) = evt;
-            CCPM_LAPP(chk, i);
-        }
+        CCPM_LAPP(act_pos, i);
     }
+    CCPM_CHECK_RETURN(CCPM_OK == ccpm_sort_ex(tmp, act_pos + 1, full_n, n_act, sort), CCPM_EUNK);
 
-    /* Add initial event */
-    CCPM_LAPP(events, evt);
-    evt++;
+    return CCPM_OK;
+}
 
-    /* Process activities in order */
-    for (i = 0; i < CCPM_LLEN(chk); i++)
+/*===========================================================================*/
+ccpmResultEn ccpm_optimize_deps(size_t n_act, uint32_t * act_pos, uint32_t * full_n,
+                                ccpmDepTblSt * full, ccpmDepTblSt * min,
+                                uint32_t * tmp, uint8_t * mark, ccpmSortEn sort,
+                                size_t n_threads)
+{
+    ccpmResultEn ret = CCPM_OK;
+    size_t i;
+    size_t j;
+    size_t k;
+    size_t l;
+    size_t m;
+    size_t q;
+
+    CCPM_CHECK_RETURN(act_pos, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(full_n,  CCPM_EINVAL);
+    CCPM_CHECK_RETURN(full,    CCPM_EINVAL);
+    CCPM_CHECK_RETURN(min,     CCPM_EINVAL);
+    CCPM_CHECK_RETURN(tmp,     CCPM_EINVAL);
+    CCPM_CHECK_RETURN(full->mode  == min->mode,  CCPM_EINVAL);
+    CCPM_CHECK_RETURN(full->n_max == min->n_max, CCPM_EINVAL);
+
+    size_t n_max = min->n_max;
+
+    CCPM_TRY_RETURN(ccpm_sort_act_pos(n_act, act_pos, full_n, tmp, sort));
+
+    CCPM_LOG_PRINTF("Removing redundant dependencies\n");
+    if (CCPM_DEPS_SPARSE == min->mode)
     {
-        size_t current_act = CCPM_LITEM(chk, i);
+        CCPM_CHECK_RETURN(mark, CCPM_EINVAL);
 
-        /* Decrement dependency counters for activities that depend on current activity */
-        for (j = 0; j < dum; j++)
+        /*
+        A dependency j of i is redundant when some other dependency k
+        of i depends on j, so mark all dependencies of dependencies.
+        */
+        for (i = 0; i < n_act; i++)
         {
-            if (min_dep_map[n_max * j + current_act])
+            CCPM_LCLR(tmp);
+            q = _ccpm_tbl_len(full, i);
+            for (l = 0; l < q; l++)
             {
-                /* num_dep[j]-- */
-                CCPM_LITEM(num_dep, j)--; //= CCPM_LITEM(num_dep, j) - 1;
+                k = _ccpm_tbl_item(full, i, l);
+                for (m = 0; m < _ccpm_tbl_len(full, k); m++)
+                {
+                    j = _ccpm_tbl_item(full, k, m);
+                    if (!mark[j])
+                    {
+                        mark[j] = true;
+                        CCPM_LAPP(tmp, j);
+                    }
+                }
             }
-        }
 
-        /* Find started activities */
-        CCPM_LCLR(start);
+            /*Full dependency sets are sorted, so are the minimal ones*/
+            _ccpm_tbl_clr(min, i);
+            for (l = 0; l < q; l++)
+            {
+                j = _ccpm_tbl_item(full, i, l);
+                if (!mark[j])
+                {
+                    CCPM_TRY_RETURN(_ccpm_tbl_add(min, i, j));
+                }
+            }
 
-        for (j = 0; j < dum; j++)
-        {
-            if ((0 == CCPM_LITEM(num_dep, j)) && (!CCPM_LITEM(started, j)))
+            for (l = 0; l < CCPM_LLEN(tmp); l++)
             {
-                CCPM_LITEM(started, j) = true;
-                CCPM_LITEM(act_src, j) = evt;
-                CCPM_LAPP(start, j);
+                mark[CCPM_LITEM(tmp, l)] = false;
             }
         }
+        return CCPM_OK;
+    }
 
-        /* Process newly started activities */
-        if (CCPM_LLEN(start) > 0)
-        {
-            /* All newly started activities have the same dependencies, use the first one*/
-            size_t first_act = CCPM_LITEM(start, 0);
-            for (k = 0; k < CCPM_LLEN(min_act_dep + n_max * first_act); k++)
-            {
-                size_t dep_act = CCPM_LITEM(min_act_dep + n_max * first_act, k);
+    uint32_t * dep = min->lst;
+    size_t     n_w = min->n_w;
 
-                if (CCPM_LITEM(act_dst, dep_act))
-                {
-                    /* Need to add a dummy activity */
-                    size_t nxt_pos = CCPM_LLEN(act_ids);
+    for (i = 0; i < n_max; i++)
+    {
+        CCPM_LCLR(dep + n_max * i);
+    }
+    memset(min->map, 0, n_max * n_w * sizeof(uint64_t));
 
-                    CCPM_LAPP(act_pos, nxt_pos);
-                    CCPM_LAPP(act_ids, CCPM_FAKE);
+    int n_thr = (int)ccpm_n_threads(n_threads);
+    (void)n_thr;
 
-                    /* Extend lists for new dummy activity */
-                    CCPM_LAPP(started, true);
-                    CCPM_LAPP(num_dep, 0);
-                    CCPM_LAPP(act_src, CCPM_LITEM(act_dst, dep_act));
-                    CCPM_LAPP(act_dst, evt);
-                }
-                else
-                {
-                    CCPM_LITEM(act_dst, dep_act) = evt;
-                }
-            }
+    /*
+    A dependency j of i is redundant when some other dependency k
+    of i depends on j, so collect dependencies of dependencies
+    a word at a time and remove them from full dependencies.
+    Full dependencies are final here, so activities are independent.
+    */
+    ptrdiff_t r;
+#pragma omp parallel for num_threads(n_thr) if (n_thr > 1) private(i, k, l, m, q) schedule(dynamic, 16)
+    for (r = (ptrdiff_t)n_act; r > 0; r--)
+    {
+        i = CCPM_LITEM(act_pos, r - 1);
 
-            /* Add new event */
-            CCPM_LAPP(events, evt);
-            evt++;
-            CCPM_CHECK_RETURN(evt < CCPM_FAKE, CCPM_ELIM);
-        }
+        uint64_t * map = min->map + n_w * i;
 
-        /* Add newly started activities to check list */
-        for (j = 0; j < CCPM_LLEN(start); j++)
-        {
-            CCPM_LAPP(chk, CCPM_LITEM(start, j));
+        q = CCPM_LLEN(full->lst + n_max * i);
+        for (l = 0; l < q; l++)
+        {
+            /*k = full_act_dep[i][l]*/
+            k = CCPM_LITEM(full->lst + n_max * i, l);
+            for (m = 0; m < n_w; m++)
+            {
+                map[m] |= full->map[n_w * k + m];
+            }
         }
-    }
 
-    /* Set destination for last started  activities*/
-    for (i = 0; i < CCPM_LLEN(act_ids); i++)
-    {
-        if (0 == CCPM_LITEM(act_dst, i))
+        for (m = 0; m < n_w; m++)
         {
-            CCPM_LITEM(act_dst, i) = evt;
-        }
-    }
+            map[m] = full->map[n_w * i + m] & ~map[m];
+        }
+    }
+
+    /*Populate optimized dependency arrays*/
+#pragma omp parallel for num_threads(n_thr) if (n_thr > 1) private(i, j, m) schedule(dynamic, 64)
+    for (r = 0; r < (ptrdiff_t)n_act; r++)
+    {
+        i = (size_t)r;
 
-    /* Add final event */
-    CCPM_LAPP(events, evt);
+        uint64_t * map = min->map + n_w * i;
 
+        /*dep[i] = []*/
+        CCPM_LCLR(dep + n_max * i);
+        for (m = 0; m < n_w; m++)
+        {
+            for (uint64_t w = map[m]; w; w &= w - 1)
+            {
+                /*Append a dependency*/
+                /*dep[i].append(j)*/
+                j = (m << 6) + _ccpm_ctz64(w);
+                CCPM_LAPP(dep + n_max * i, j);
+            }
+        }
+    }
     return CCPM_OK;
 }
 
 /*===========================================================================*/
-ccpmResultEn ccpm_do_glue(size_t n_cur,
-                          uint32_t * act_src, uint32_t * act_dst,
-                          uint32_t * events)
+/*
+Transitive closure and reduction in one pass over activities
+in topological order. On entry full holds direct dependencies.
+When activity v is processed all its direct dependencies w
+have full dependency sets, so:
+    full[v] = direct[v] | full[w] for all w
+    min[v]  = direct[v] & ~(full[w] for all w)
+This takes O(n_lnk * n_max / 64) word operations in dense mode.
+*/
+static inline void _ccpm_topo_row(ccpmDepTblSt * full, ccpmDepTblSt * min, size_t v)
 {
-    size_t k;
+    size_t l;
+    size_t m;
+    size_t u;
 
-    CCPM_CHECK_RETURN(act_src, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(act_dst, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(events, CCPM_EINVAL);
+    size_t n_max = full->n_max;
+    size_t n_w   = full->n_w;
+    size_t q     = CCPM_LLEN(full->lst + n_max * v);
 
-    CCPM_LOG_PRINTF("Applying event glueing to all activities\n");
+    uint64_t * acc = min->map  + n_w * v;
+    uint64_t * row = full->map + n_w * v;
 
-    /* Apply event glueing to all activities */
-    for (k = 0; k < n_cur; k++)
+    /*Dependencies of dependencies, a word at a time*/
+    for (l = 0; l < q; l++)
     {
-        /* Skip redundant activities */
-        if (CCPM_FAKE == CCPM_LITEM(act_src, k) || CCPM_FAKE == CCPM_LITEM(act_dst, k))
+        u = CCPM_LITEM(full->lst + n_max * v, l);
+        for (m = 0; m < n_w; m++)
         {
-            continue;
+            acc[m] |= full->map[n_w * u + m];
         }
+    }
 
-        /* Update source and destination events */
-        size_t src_evt = CCPM_LITEM(act_src, k) - 1;
-        size_t dst_evt = CCPM_LITEM(act_dst, k) - 1;
-
-        CCPM_LITEM(act_src, k) = CCPM_LITEM(events, src_evt);
-        CCPM_LITEM(act_dst, k) = CCPM_LITEM(events, dst_evt);
+    for (m = 0; m < n_w; m++)
+    {
+        uint64_t d = row[m];
+        row[m] = d | acc[m];
+        acc[m] = d & ~acc[m];
     }
 
-    return CCPM_OK;
+    /*Populate dependency arrays in ascending order*/
+    CCPM_LCLR(full->lst + n_max * v);
+    CCPM_LCLR(min->lst  + n_max * v);
+    for (m = 0; m < n_w; m++)
+    {
+        for (uint64_t w = row[m]; w; w &= w - 1)
+        {
+            CCPM_LAPP(full->lst + n_max * v, (m << 6) + _ccpm_ctz64(w));
+        }
+        for (uint64_t w = acc[m]; w; w &= w - 1)
+        {
+            CCPM_LAPP(min->lst + n_max * v, (m << 6) + _ccpm_ctz64(w));
+        }
+    }
 }
 
-/*===========================================================================*/
-ccpmResultEn ccpm_optimize_network_stage_1(size_t n_max,
-                                          uint16_t * act_ids,  uint32_t * act_src,     uint32_t * act_dst,
-                                          uint32_t * events,   uint8_t  * evt_dep_map,
-                                          uint32_t * evt_deps, uint32_t * evt_dins,    uint8_t * evt_real)
+ccpmResultEn ccpm_topo_deps(size_t n_act, ccpmDepTblSt * full, ccpmDepTblSt * min,
+                            uint32_t * order,    uint32_t * deg,
+                            uint32_t * succ_off, uint32_t * succ,
+                            uint32_t * tmp,      uint8_t  * mark,
+                            size_t n_threads)
 {
     ccpmResultEn ret = CCPM_OK;
-
     size_t i;
-    size_t j;
     size_t k;
-    size_t num_events = CCPM_LLEN(events);
-    size_t dum        = CCPM_LLEN(act_ids);
-
-    CCPM_CHECK_RETURN(act_ids, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(act_src, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(act_dst, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(events, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(evt_dep_map, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(evt_deps, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(evt_dins, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(evt_real, CCPM_EINVAL);
-
-    CCPM_LOG_PRINTF("Optimizing network stage 1: num_events=%d, num_act_ids=%d\n", (int)num_events, (int)dum);
+    size_t l;
+    size_t m;
+    size_t p;
+    size_t q;
+    size_t u;
+    size_t v;
+
+    CCPM_CHECK_RETURN(full,     CCPM_EINVAL);
+    CCPM_CHECK_RETURN(min,      CCPM_EINVAL);
+    CCPM_CHECK_RETURN(order,    CCPM_EINVAL);
+    CCPM_CHECK_RETURN(deg,      CCPM_EINVAL);
+    CCPM_CHECK_RETURN(succ_off, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(succ,     CCPM_EINVAL);
+    CCPM_CHECK_RETURN(tmp,      CCPM_EINVAL);
+    CCPM_CHECK_RETURN(mark,     CCPM_EINVAL);
+    CCPM_CHECK_RETURN(full->mode  == min->mode,  CCPM_EINVAL);
+    CCPM_CHECK_RETURN(full->n_max == min->n_max, CCPM_EINVAL);
+
+    size_t n_max = full->n_max;
+    size_t n_w   = full->n_w;
+
+    CCPM_LOG_PRINTF("Building full and minimal dependencies in topological order\n");
+
+    /*Successor lists*/
+    memset(succ_off, 0, (n_act + 1) * sizeof(uint32_t));
+    for (v = 0; v < n_act; v++)
+    {
+        deg[v] = _ccpm_tbl_len(full, v);
+        for (l = 0; l < deg[v]; l++)
+        {
+            u = _ccpm_tbl_item(full, v, l);
+            CCPM_CHECK_RETURN(u < n_act, CCPM_EINVAL);
+            succ_off[u + 1]++;
+        }
+    }
 
-    /* Initialize event data structures */
-    for (i = 0; i < num_events; i++)
+    for (v = 0; v < n_act; v++)
     {
-        CCPM_LCLR(evt_deps + 2 * n_max * i);
-        CCPM_LCLR(evt_dins + 2 * n_max * i);
-        evt_real[i] = false;
+        succ_off[v + 1] += succ_off[v];
     }
 
-    /* Clear full_dep_map for reuse */
-    for (i = 0; i < 2 * n_max; i++)
+    for (v = 0; v < n_act; v++)
     {
-        for (j = 0; j < 2 * n_max; j++)
+        for (l = 0; l < deg[v]; l++)
         {
-            evt_dep_map[2 * n_max * i + j] = false;
+            u = _ccpm_tbl_item(full, v, l);
+            succ[succ_off[u]++] = v;
         }
     }
 
-    /* Populate event dependencies and inputs */
-    for (k = 0; k < dum; k++)
+    for (v = n_act; v > 0; v--)
     {
-        size_t src_evt = CCPM_LITEM(act_src, k) - 1;
-        size_t dst_evt = CCPM_LITEM(act_dst, k) - 1;
+        succ_off[v] = succ_off[v - 1];
+    }
+    succ_off[0] = 0;
 
-        /*Skip events that were marked as fake*/
-        if (CCPM_FAKE != CCPM_LITEM(act_ids, k))
+    /*Topological order*/
+    CCPM_LCLR(order);
+    for (v = 0; v < n_act; v++)
+    {
+        if (0 == deg[v])
         {
-            evt_real[dst_evt] = true;
-            continue;
+            CCPM_LAPP(order, v);
         }
-
-        /* For dummy activities, record dependencies */
-        CCPM_LAPP(evt_dins + 2 * n_max * dst_evt, k);
-        CCPM_LAPP(evt_deps + 2 * n_max * dst_evt, src_evt);
-        evt_dep_map[2 * n_max * dst_evt + src_evt] = true;
     }
 
-    /*
-    If some events have only dummy inputs and have equal dependencies
-    (earlier events) then we can "glue" them together
-    */
-    for (i = 0; i < num_events; i++)
+    for (p = 0; p < CCPM_LLEN(order); p++)
     {
-        /*Skip events with real inputs*/
-        if (evt_real[i])
+        u = CCPM_LITEM(order, p);
+        for (k = succ_off[u]; k < succ_off[u + 1]; k++)
         {
-            continue;
+            v = succ[k];
+            if (0 == --deg[v])
+            {
+                CCPM_LAPP(order, v);
+            }
         }
+    }
 
-        /*Skip events without dummy inputs*/
-        if (0 == CCPM_LLEN(evt_deps + 2 * n_max * i))
+    /*Activities left out of the order are on loops*/
+    CCPM_CHECK_RETURN(CCPM_LLEN(order) == n_act, CCPM_ELOOP);
+
+    for (i = 0; i < n_max; i++)
+    {
+        if (CCPM_DEPS_SPARSE == min->mode)
         {
+            _ccpm_tbl_clr(min, i);
             continue;
         }
+        CCPM_LCLR(min->lst + n_max * i);
+    }
 
-        for (j = i + 1; j < num_events; j++)
+    if (CCPM_DEPS_DENSE == min->mode)
+    {
+        memset(min->map, 0, n_max * n_w * sizeof(uint64_t));
+
+        /*
+        Longest path levels, deg is not needed any more.
+        Activities of a level do not depend on each other
+        and the order lists levels one by one.
+        */
+        for (p = 0; p < n_act; p++)
         {
-            /*Skip events with real inputs*/
-            if (evt_real[j])
+            v = CCPM_LITEM(order, p);
+            q = CCPM_LLEN(full->lst + n_max * v);
+            deg[v] = 0;
+            for (l = 0; l < q; l++)
             {
-                continue;
+                u = CCPM_LITEM(full->lst + n_max * v, l);
+                if (deg[u] >= deg[v])
+                {
+                    deg[v] = deg[u] + 1;
+                }
             }
+        }
 
-            /*Skip events without dummy inputs*/
-            if (CCPM_LLEN(evt_deps + 2 * n_max * i) < 2)
-            {
-                continue;
-            }
+        int n_thr = (int)ccpm_n_threads(n_threads);
+        (void)n_thr;
 
-            /*Skip events with unequal dependencies lists*/
-            if (CCPM_LLEN(evt_deps + 2 * n_max * i) != CCPM_LLEN(evt_deps + 2 * n_max * j))
+#pragma omp parallel num_threads(n_thr) if (n_thr > 1) private(p, q)
+        {
+            for (p = 0; p < n_act; p = q)
             {
-                continue;
-            }
+                ptrdiff_t r;
+                uint32_t  lvl = deg[CCPM_LITEM(order, p)];
 
-            /* Check if events have same dependencies */
-            size_t match_count = 0;
-            for (k = 0; k < CCPM_LLEN(evt_deps + 2 * n_max * i); k++)
-            {
-                size_t dep = CCPM_LITEM(evt_deps + 2 * n_max * i, k);
-                if (evt_dep_map[2 * n_max * j + dep])
+                for (q = p + 1; (q < n_act) && (deg[CCPM_LITEM(order, q)] == lvl); q++)
                 {
-                    match_count++;
+                    /*Find the level end*/
                 }
-            }
-
-            /*
-            Will redirect _act_src later
-            (events[i] != (i + 1)) is feature of redundant event
-            */
-            if (match_count == CCPM_LLEN(evt_deps + 2 * n_max * i))
-            {
-                /* Glue events: redirect j to i */
-                CCPM_LITEM(events, j) = CCPM_LITEM(events, i);
 
-                /* Mark dummy activities for removal */
-                for (k = 0; k < CCPM_LLEN(evt_dins + 2 * n_max * j); k++)
+#pragma omp for schedule(dynamic, 16)
+                for (r = (ptrdiff_t)p; r < (ptrdiff_t)q; r++)
                 {
-                    size_t dummy_act = CCPM_LITEM(evt_dins + 2 * n_max * j, k);
-                    CCPM_LITEM(act_src, dummy_act) = CCPM_FAKE;
-                    CCPM_LITEM(act_dst, dummy_act) = CCPM_FAKE;
+                    _ccpm_topo_row(full, min, CCPM_LITEM(order, r));
                 }
             }
         }
+        return CCPM_OK;
     }
 
-    /*
-    Work with redundant events and dummies (part 2)
-    "Glue" events each of which has only one input which is dummy
-    to their predeceptors
-    */
-    for (i = 0; i < num_events; i++)
+    for (p = 0; p < n_act; p++)
     {
-        /*Skip events with real inputs*/
-        if (evt_real[i])
+        v = CCPM_LITEM(order, p);
+        q = _ccpm_tbl_len(full, v);
+
+        /*Mark dependencies of dependencies*/
+        CCPM_LCLR(tmp);
+        for (l = 0; l < q; l++)
         {
-            continue;
+            u = _ccpm_tbl_item(full, v, l);
+            for (m = 0; m < _ccpm_tbl_len(full, u); m++)
+            {
+                k = _ccpm_tbl_item(full, u, m);
+                if (!mark[k])
+                {
+                    mark[k] = true;
+                    CCPM_LAPP(tmp, k);
+                }
+            }
         }
 
-        if (1 == CCPM_LLEN(evt_deps + 2 * n_max * i))
+        /*Direct dependencies are sorted, so are the minimal ones*/
+        for (l = 0; l < q; l++)
         {
-            size_t dummy_act = CCPM_LITEM(evt_dins + 2 * n_max * i, 0);
-            CCPM_LITEM(events, i) = CCPM_LITEM(act_src, dummy_act);
+            u = _ccpm_tbl_item(full, v, l);
+            if (!mark[u])
+            {
+                CCPM_TRY_RETURN(_ccpm_tbl_add(min, v, u));
+            }
+        }
 
-            /* Mark dummy activity for removal */
-            CCPM_LITEM(act_src, dummy_act) = CCPM_FAKE;
-            CCPM_LITEM(act_dst, dummy_act) = CCPM_FAKE;
+        for (l = 0; l < q; l++)
+        {
+            u = _ccpm_tbl_item(full, v, l);
+            if (!mark[u])
+            {
+                mark[u] = true;
+                CCPM_LAPP(tmp, u);
+            }
         }
-    }
 
-    /* Apply event glueing to all activities */
-    CCPM_TRY_RETURN(ccpm_do_glue(dum, act_src, act_dst, events));
+        for (l = 0; l < CCPM_LLEN(tmp); l++)
+        {
+            mark[CCPM_LITEM(tmp, l)] = false;
+        }
 
-    return ret;
+        CCPM_TRY_RETURN(_ccpm_tbl_set(full, v, &CCPM_LITEM(tmp, 0), CCPM_LLEN(tmp)));
+    }
+
+    return CCPM_OK;
 }
+
 /*===========================================================================*/
-ccpmResultEn ccpm_optimize_network_stage_2(size_t n_max,
-                                          uint16_t * act_ids, uint32_t * act_src, uint32_t * act_dst,
-                                          uint32_t * events,
-                                          uint32_t * evt_douts, uint32_t * evt_nout)
+ccpmResultEn ccpm_handle_deps(uint32_t * min_deps, uint32_t target, size_t n_cur,
+                              ccpmDepTblSt * min, ccpmDepTblSt * inv)
 {
     ccpmResultEn ret = CCPM_OK;
     size_t i;
-    size_t k;
-    size_t num_events = CCPM_LLEN(events);
-    size_t dum        = CCPM_LLEN(act_ids);
+    size_t d;
 
-    CCPM_CHECK_RETURN(act_ids, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(act_src, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(act_dst, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(events, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(evt_douts, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(evt_nout, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(min_deps, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(min,      CCPM_EINVAL);
+    CCPM_CHECK_RETURN(inv,      CCPM_EINVAL);
+    CCPM_CHECK_RETURN(target < min->n_max, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(n_cur  < min->n_max, CCPM_EINVAL);
 
-    CCPM_LOG_PRINTF("Optimizing network stage 2\n");
+    CCPM_LOG_PRINTF("Handling dependencies for target %d with dummy %d\n",
+                   (int)target, (int)n_cur);
 
-    /* Initialize event data structures */
-    for (i = 0; i < num_events; i++)
+    /*
+    Full dependencies are not read after minimal ones are found,
+    so they are not updated for dummies
+    */
+    /* Replace target min dependencies with dummy action */
+    for (i = 0; i < CCPM_LLEN(min_deps); i++)
     {
-        CCPM_LCLR(evt_douts + 2 * n_max * i);
-        evt_nout[i] = 0;
+        d = CCPM_LITEM(min_deps, i);
+
+        /* Remove direct dependency on d */
+        _ccpm_tbl_del(min, target, d);
+        _ccpm_tbl_del(inv, d, target);
     }
 
-    /* Count outputs and collect dummy outputs for each event */
-    for (k = 0; k < dum; k++)
+    /* Add dependency on dummy, it has the greatest position, so min deps stay sorted */
+    if (CCPM_LLEN(min_deps))
     {
-        /* Skip redundant activities */
-        if (CCPM_FAKE == CCPM_LITEM(act_src, k) || CCPM_FAKE == CCPM_LITEM(act_dst, k))
-        {
-            continue;
-        }
+        CCPM_TRY_RETURN(_ccpm_tbl_add(min, target, n_cur));
+        CCPM_TRY_RETURN(_ccpm_tbl_add(inv, n_cur, target));
+    }
 
-        size_t src_evt = CCPM_LITEM(act_src, k) - 1;
-        evt_nout[src_evt]++;
+    return CCPM_OK;
+}
 
-        /* If this is a dummy activity, add to dummy outputs */
-        if (CCPM_FAKE == CCPM_LITEM(act_ids, k))
-        {
-            CCPM_LAPP(evt_douts + 2 * n_max * src_evt, k);
-        }
+/*===========================================================================*/
+ccpmResultEn ccpm_add_a_dummy(uint32_t * min_deps, size_t n_cur,
+                              uint32_t * act_ids, uint32_t * act_pos,
+                              ccpmDepTblSt * min, ccpmDepTblSt * inv)
+{
+    ccpmResultEn ret = CCPM_OK;
+    size_t i;
+
+    CCPM_CHECK_RETURN(min_deps, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_ids,  CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_pos,  CCPM_EINVAL);
+    CCPM_CHECK_RETURN(min,      CCPM_EINVAL);
+    CCPM_CHECK_RETURN(inv,      CCPM_EINVAL);
+    CCPM_CHECK_RETURN(n_cur < min->n_max, CCPM_EINVAL);
+
+    CCPM_LOG_PRINTF("Adding dummy activity at position %d\n", (int)n_cur);
+
+    /* Add fake activity ID to act_ids list */
+    CCPM_LAPP(act_ids, CCPM_FAKE);
+
+    /* Add current position to act_pos list */
+    CCPM_LAPP(act_pos, n_cur);
+
+    /*Check for limits*/
+    CCPM_CHECK_RETURN(CCPM_LLEN(act_pos) < CCPM_FAKE, CCPM_ELIM);
+
+    /* Set dummy minimal dependencies */
+    _ccpm_tbl_clr(min, n_cur);
+    for (i = 0; i < CCPM_LLEN(min_deps); i++)
+    {
+        /*Copy deps to new dummy*/
+        CCPM_TRY_RETURN(_ccpm_tbl_add(min, n_cur, CCPM_LITEM(min_deps, i)));
+        CCPM_TRY_RETURN(_ccpm_tbl_add(inv, CCPM_LITEM(min_deps, i), n_cur));
     }
 
-    /* Optimize: glue events with single dummy output to their successors */
-    for (i = 0; i < num_events; i++)
+    return CCPM_OK;
+}
+
+/*===========================================================================*/
+/*
+Inverted dependency index: inv[d] is a sorted set of activities which
+have d in their minimal dependencies. With this index common dependencies
+of some set and all other dependency sets are counted in O(sum of inv[d])
+instead of comparing the set with every other dependency set.
+*/
+ccpmResultEn ccpm_build_inv_deps(size_t n_act, ccpmDepTblSt * min, ccpmDepTblSt * inv)
+{
+    ccpmResultEn ret = CCPM_OK;
+
+    CCPM_CHECK_RETURN(min, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(inv, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(CCPM_DEPS_SPARSE == inv->mode, CCPM_EINVAL);
+
+    for (size_t i = 0; i < inv->n_max; i++)
     {
-        /* Skip if event has more than one output */
-        if (evt_nout[i] > 1)
-        {
-            continue;
-        }
+        _ccpm_tbl_clr(inv, i);
+    }
 
-        /* Skip if event has no dummy outputs */
-        if (0 == CCPM_LLEN(evt_douts + 2 * n_max * i))
+    for (size_t i = 0; i < n_act; i++)
+    {
+        for (size_t k = 0; k < _ccpm_tbl_len(min, i); k++)
         {
-            continue;
+            CCPM_TRY_RETURN(_ccpm_tbl_add(inv, _ccpm_tbl_item(min, i, k), i));
         }
+    }
+    return CCPM_OK;
+}
 
-        /* Get the dummy output activity */
-        size_t dummy_act = CCPM_LITEM(evt_douts + 2 * n_max * i, 0);
-
-        /* Glue event to its successor */
-        CCPM_LITEM(events, i) = CCPM_LITEM(act_dst, dummy_act);
+/*cnt[j] = len(set & min[j]) for all j in touched, returns the number of index items read*/
+static inline size_t _ccpm_count_common(ccpmDepTblSt * inv, uint32_t * set,
+                                        uint32_t * cnt, uint32_t * touched)
+{
+    size_t n = 0;
 
-        /* Mark dummy activity for removal */
-        CCPM_LITEM(act_src, dummy_act) = CCPM_FAKE;
-        CCPM_LITEM(act_dst, dummy_act) = CCPM_FAKE;
+    CCPM_LCLR(touched);
+    for (size_t k = 0; k < CCPM_LLEN(set); k++)
+    {
+        size_t d = CCPM_LITEM(set, k);
+        n += _ccpm_tbl_len(inv, d);
+        for (size_t l = 0; l < _ccpm_tbl_len(inv, d); l++)
+        {
+            size_t j = _ccpm_tbl_item(inv, d, l);
+            if (0 == cnt[j]++)
+            {
+                CCPM_LAPP(touched, j);
+            }
+        }
     }
+    return n;
+}
 
-    /* Apply event glueing to all activities */
-    CCPM_TRY_RETURN(ccpm_do_glue(dum, act_src, act_dst, events));
-
-    return ret;
+static inline void _ccpm_count_clear(uint32_t * cnt, uint32_t * touched)
+{
+    for (size_t k = 0; k < CCPM_LLEN(touched); k++)
+    {
+        cnt[CCPM_LITEM(touched, k)] = 0;
+    }
+    CCPM_LCLR(touched);
 }
 
 /*===========================================================================*/
-ccpmResultEn ccpm_add_needed_dummies(uint16_t * act_ids,     uint32_t * act_pos,
-                                     uint32_t * act_src,     uint32_t * act_dst,
-                                     uint32_t * to_do,       uint32_t * events,
-                                     uint32_t * sort_values, uint32_t * tmp)
+/*
+Failed searches of nested and overlapping sets grouped by dependency set
+signatures. Activities with equal dependency sets get equal results until
+some set which shares dependencies with them is changed, so a search is
+done once per group instead of scanning the inverted index for every
+activity with a high fan-out dependency. stamp[d] is the number of the last
+reduction which changed a set with dependency d, a failed search of a set
+is reused while its dependencies have no later stamps.
+*/
+typedef struct {
+    uint64_t key;   /*Order independent hash of the set*/
+    uint32_t act;   /*Position of the activity + 1, 0 for empty slots*/
+    uint32_t epoch; /*Number of reductions before the search*/
+} ccpmSigSt;
+
+typedef struct {
+    ccpmSigSt * slot;  /*Direct mapped, a new failed search replaces the old one*/
+    size_t      bits;
+    uint32_t *  stamp; /*n_max items*/
+    uint32_t    epoch; /*Number of reductions*/
+} ccpmSigCacheSt;
+
+static void _ccpm_sig_init(ccpmSigCacheSt * sc, ccpmSigSt * slot, size_t bits,
+                           uint32_t * stamp, size_t n_max)
 {
-    ccpmResultEn ret = CCPM_OK;
-    size_t i;
-    size_t j;
-    size_t d   = CCPM_LLEN(act_ids);
-    size_t evt = CCPM_LITEM(events, CCPM_LLEN(events) - 1); // Last event
+    sc->slot  = slot;
+    sc->bits  = bits;
+    sc->stamp = stamp;
+    sc->epoch = 0;
 
-    CCPM_CHECK_RETURN(act_ids, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(act_pos, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(act_src, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(act_dst, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(to_do, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(events, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(sort_values, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(tmp, CCPM_EINVAL);
+    memset(slot,  0, CCPM_HASH_SZ(bits) * sizeof(ccpmSigSt));
+    memset(stamp, 0, n_max * sizeof(uint32_t));
+}
 
-    CCPM_LOG_PRINTF("Adding needed dummies\n");
+static inline uint64_t _ccpm_sig_key(ccpmDepTblSt * min, size_t i)
+{
+    uint64_t key = 0;
 
-    /* Sort act_pos by act_dst and then by act_src */
-    /* First, sort by act_dst */
-    for (i = 0; i < CCPM_LLEN(act_pos); i++)
+    for (size_t k = 0; k < _ccpm_tbl_len(min, i); k++)
     {
-        sort_values[i] = CCPM_LITEM(act_dst, i);
+        uint64_t x = ((uint64_t)_ccpm_tbl_item(min, i, k) + 1) * 0x9E3779B97F4A7C15ull;
+        key += (x ^ (x >> 29)) * 0xBF58476D1CE4E5B9ull;
     }
+    return key;
+}
 
-    CCPM_TRY_RETURN(ccpm_sort(tmp, act_pos + 1, sort_values, CCPM_LLEN(act_pos)));
+/*A search for the set of activity i failed and its dependencies were not changed since*/
+static inline bool _ccpm_sig_failed(ccpmSigCacheSt * sc, ccpmDepTblSt * min, size_t i, uint64_t key)
+{
+    ccpmSigSt * s = sc->slot + _ccpm_hash(key, sc->bits);
+    size_t len = _ccpm_tbl_len(min, i);
 
-    /* Then, sort by act_src */
-    for (i = 0; i < CCPM_LLEN(act_pos); i++)
+    if (!s->act || (s->key != key) || (_ccpm_tbl_len(min, s->act - 1) != len))
     {
-        sort_values[i] = CCPM_LITEM(act_src, i);
+        return false;
     }
 
-    CCPM_TRY_RETURN(ccpm_sort(tmp, act_pos + 1, sort_values, CCPM_LLEN(act_pos)));
-
-    /* Process activities to add needed dummies */
-    for (i = 0; i < d; i++)
+    /*The set of s->act is not changed since the search when it is equal and not stamped*/
+    for (size_t k = 0; k < len; k++)
     {
-        /* Skip redundant activities */
-        if (CCPM_FAKE == CCPM_LITEM(act_src, i) || CCPM_FAKE == CCPM_LITEM(act_dst, i))
+        size_t d = _ccpm_tbl_item(min, i, k);
+        if ((sc->stamp[d] > s->epoch) || !_ccpm_tbl_has(min, s->act - 1, d))
         {
-            continue;
+            return false;
         }
+    }
+    return true;
+}
 
-        /* Skip done activities */
-        if (!CCPM_LITEM(to_do, i))
+static inline void _ccpm_sig_fail(ccpmSigCacheSt * sc, size_t i, uint64_t key)
+{
+    ccpmSigSt * s = sc->slot + _ccpm_hash(key, sc->bits);
+
+    s->key   = key;
+    s->act   = (uint32_t)i + 1;
+    s->epoch = sc->epoch;
+}
+
+/*Stamp dependencies of reduced activities at positions listed in cand and of new dummies*/
+static void _ccpm_sig_reduced(ccpmSigCacheSt * sc, ccpmDepTblSt * min, uint32_t * cand,
+                              uint32_t * act_pos, uint32_t * com)
+{
+    sc->epoch++;
+    for (size_t q = 0; q < CCPM_LLEN(cand); q++)
+    {
+        size_t j = CCPM_LITEM(act_pos, CCPM_LITEM(cand, q));
+        for (size_t k = 0; k < _ccpm_tbl_len(min, j); k++)
         {
-            continue;
+            sc->stamp[_ccpm_tbl_item(min, j, k)] = sc->epoch;
         }
+    }
 
-        for (j = i + 1; j < d; j++)
+    for (size_t k = 0; k < CCPM_LLEN(com); k++)
+    {
+        sc->stamp[CCPM_LITEM(com, k)] = sc->epoch;
+    }
+}
+
+/*
+Dependency of set with the shortest inverted index row,
+all supersets of set are listed in that row.
+*/
+static inline size_t _ccpm_rarest_dep(ccpmDepTblSt * inv, uint32_t * set)
+{
+    size_t best = CCPM_LITEM(set, 0);
+
+    for (size_t k = 1; k < CCPM_LLEN(set); k++)
+    {
+        size_t d = CCPM_LITEM(set, k);
+        if (_ccpm_tbl_len(inv, d) < _ccpm_tbl_len(inv, best))
         {
+            best = d;
+        }
+    }
+    return best;
+}
 
-            /* Skip redundant activities */
-            if (CCPM_FAKE == CCPM_LITEM(act_src, j) || CCPM_FAKE == CCPM_LITEM(act_dst, j))
+/*All items of set are dependencies of activity j*/
+static inline bool _ccpm_tbl_has_all(ccpmDepTblSt * min, size_t j, uint32_t * set)
+{
+    for (size_t k = 0; k < CCPM_LLEN(set); k++)
+    {
+        if (!_ccpm_tbl_has(min, j, CCPM_LITEM(set, k)))
+        {
+            return false;
+        }
+    }
+    return true;
+}
+
+/*
+List positions in [r_lo, r_hi) of activities which dependencies are
+strict supersets of set in cand, returns the number of index items read.
+*/
+static size_t _ccpm_find_supersets(ccpmDepTblSt * inv, ccpmDepTblSt * min, uint32_t * rank,
+                                   uint32_t * set, size_t r_lo, size_t r_hi, uint32_t * cand)
+{
+    size_t d = _ccpm_rarest_dep(inv, set);
+
+    CCPM_LCLR(cand);
+    for (size_t l = 0; l < _ccpm_tbl_len(inv, d); l++)
+    {
+        size_t j = _ccpm_tbl_item(inv, d, l);
+        size_t r = rank[j];
+
+        if ((r < r_lo) || (r >= r_hi) || (_ccpm_tbl_len(min, j) <= CCPM_LLEN(set)))
+        {
+            continue;
+        }
+
+        if (_ccpm_tbl_has_all(min, j, set))
+        {
+            CCPM_LAPP(cand, r);
+        }
+    }
+    return _ccpm_tbl_len(inv, d);
+}
+
+/*
+Subsets anchors: every activity with dependencies is listed in anc[d] for
+one of its dependencies d, so all subsets of some set are listed in the
+anc rows of its items. Activities are anchored at their rarest
+dependencies and are moved when their anchors are replaced with dummies.
+*/
+static ccpmResultEn _ccpm_anchor(ccpmDepTblSt * inv, ccpmDepTblSt * min,
+                                 ccpmDepTblSt * anc, uint32_t * anc_of,
+                                 size_t j, uint32_t * tmp)
+{
+    ccpmResultEn ret = CCPM_OK;
+
+    CCPM_LCLR(tmp);
+    for (size_t k = 0; k < _ccpm_tbl_len(min, j); k++)
+    {
+        CCPM_LAPP(tmp, _ccpm_tbl_item(min, j, k));
+    }
+
+    anc_of[j] = (uint32_t)_ccpm_rarest_dep(inv, tmp);
+    CCPM_TRY_RETURN(_ccpm_tbl_add(anc, anc_of[j], j));
+
+    return CCPM_OK;
+}
+
+/*
+Replace com dependencies of activities at positions listed in cand
+with dummies, positions are processed in ascending order.
+*/
+static ccpmResultEn _ccpm_reduce_deps(uint32_t * cand, uint32_t * com,
+                                      uint32_t * act_pos, uint32_t * rank,
+                                      ccpmDepTblSt * min, ccpmDepTblSt * inv,
+                                      uint32_t * act_ids)
+{
+    ccpmResultEn ret = CCPM_OK;
+
+    qsort(&CCPM_LITEM(cand, 0), CCPM_LLEN(cand), sizeof(uint32_t), _ccpm_u32_cmp);
+
+    for (size_t q = 0; q < CCPM_LLEN(cand); q++)
+    {
+        size_t j      = CCPM_LITEM(act_pos, CCPM_LITEM(cand, q));
+        size_t nxt_id = CCPM_LLEN(act_ids);
+
+        CCPM_TRY_RETURN(ccpm_handle_deps(com, j, nxt_id, min, inv));
+
+        CCPM_TRY_RETURN(ccpm_add_a_dummy(com, nxt_id, act_ids, act_pos, min, inv));
+
+        rank[nxt_id] = CCPM_LLEN(act_pos) - 1;
+    }
+    return CCPM_OK;
+}
+
+/*===========================================================================*/
+/*
+Supersets of the set of i are taken from the inverted index row of its
+rarest dependency and subsets from the anchor rows of its dependencies,
+so the search reads a few short rows instead of all rows of the set.
+Only real activities are searched, so dummies are not anchored.
+*/
+ccpmResultEn ccpm_process_nested_deps(size_t n_act,
+                                      uint32_t * act_pos,    uint32_t * rank,
+                                      ccpmDepTblSt * min,
+                                      ccpmDepTblSt * inv,
+                                      ccpmDepTblSt * anc, uint32_t * anc_of,
+                                      uint32_t * act_ids,
+                                      uint32_t * min_com_deps,
+                                      uint32_t * cand, uint32_t * tmp,
+                                      ccpmSigCacheSt * sig, size_t * n_iter)
+{
+    size_t p;
+    size_t i;
+    size_t j;
+    size_t k;
+    size_t l;
+    size_t n_scan = 0;
+    ccpmResultEn ret = CCPM_OK;
+
+    CCPM_CHECK_RETURN(act_pos, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(rank, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(min, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(inv, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(anc, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(anc_of, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_ids, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(cand, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(tmp, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(sig, CCPM_EINVAL);
+
+    CCPM_LOG_PRINTF("Processing nested dependencies\n");
+
+    for (i = 0; i < n_act; i++)
+    {
+        if (_ccpm_tbl_len(min, i))
+        {
+            CCPM_TRY_RETURN(_ccpm_anchor(inv, min, anc, anc_of, i, tmp));
+        }
+    }
+
+    for (p = 0; p < n_act; p++)
+    {
+        i = CCPM_LITEM(act_pos, p);
+
+        size_t len_i = _ccpm_tbl_len(min, i);
+
+        /* Skip activities without dependencies */
+        if (0 == len_i)
+        {
+            continue;
+        }
+
+        /*Activities after an equal set are after it in the search range too*/
+        uint64_t key = _ccpm_sig_key(min, i);
+        if (_ccpm_sig_failed(sig, min, i, key))
+        {
+            continue;
+        }
+
+        /*
+        Search for nested list: the first activity after i
+        which dependencies are a strict subset or superset of i ones.
+        */
+        CCPM_LCLR(cand);
+        for (k = 0; k < len_i; k++)
+        {
+            CCPM_LAPP(cand, _ccpm_tbl_item(min, i, k));
+        }
+
+        size_t found = n_act;
+        size_t d     = _ccpm_rarest_dep(inv, cand);
+
+        n_scan += _ccpm_tbl_len(inv, d);
+        for (l = 0; l < _ccpm_tbl_len(inv, d); l++)
+        {
+            j = _ccpm_tbl_item(inv, d, l);
+
+            size_t r = rank[j];
+            if ((r > p) && (r < found) && (_ccpm_tbl_len(min, j) > len_i) &&
+                _ccpm_tbl_has_all(min, j, cand))
             {
-                continue;
+                found = r;
             }
+        }
 
-            /* Check if activities have same source and destination */
-            if ((CCPM_LITEM(act_dst, i) == CCPM_LITEM(act_dst, j)) &&
-                (CCPM_LITEM(act_src, i) == CCPM_LITEM(act_src, j)))
+        for (k = 0; k < len_i; k++)
+        {
+            d = CCPM_LITEM(cand, k);
+
+            n_scan += _ccpm_tbl_len(anc, d);
+            for (l = 0; l < _ccpm_tbl_len(anc, d); l++)
             {
-                /* Mark second activity as not to_do */
-                CCPM_LITEM(to_do, j) = false;
+                j = _ccpm_tbl_item(anc, d, l);
 
-                /* Create new event */
-                evt++;
-                CCPM_LITEM(act_dst, j) = evt;
+                size_t r     = rank[j];
+                size_t len_j = _ccpm_tbl_len(min, j);
+                if ((r <= p) || (r >= found) || (len_j >= len_i))
+                {
+                    continue;
+                }
 
-                /* Add dummy activity */
-                size_t nxt_pos = CCPM_LLEN(act_ids);
-                CCPM_LAPP(act_pos, nxt_pos);
-                CCPM_LAPP(act_ids, CCPM_FAKE);
-                CCPM_LAPP(act_src, evt);
-                CCPM_LAPP(act_dst, CCPM_LITEM(act_dst, i));
-                CCPM_LAPP(to_do, false);
+                size_t m;
+                for (m = 0; m < len_j; m++)
+                {
+                    if (!_ccpm_tbl_has(min, i, _ccpm_tbl_item(min, j, m)))
+                    {
+                        break;
+                    }
+                }
+                if (m == len_j)
+                {
+                    found = r;
+                }
+            }
+        }
 
-                /*Check for limits*/
-                CCPM_CHECK_RETURN(evt < CCPM_FAKE, CCPM_ELIM);
-                CCPM_CHECK_RETURN(CCPM_LLEN(act_pos) < CCPM_FAKE, CCPM_ELIM);
+        if (found == n_act)
+        {
+            /* No nested lists found, continue */
+            _ccpm_sig_fail(sig, i, key);
+            continue;
+        }
 
-                /* Add new event to events list */
-                CCPM_LAPP(events, evt);
+        /* Find common dependencies between i and j */
+        j = CCPM_LITEM(act_pos, found);
+
+        CCPM_LCLR(min_com_deps);
+        for (k = 0; k < len_i; k++)
+        {
+            d = _ccpm_tbl_item(min, i, k);
+            if (_ccpm_tbl_has(min, j, d))
+            {
+                CCPM_LAPP(min_com_deps, d);
             }
         }
+
+        /* Reduce all activities after i which have all common and some other dependencies */
+        n_scan += _ccpm_find_supersets(inv, min, rank, min_com_deps, p + 1, n_act, cand);
+
+        CCPM_TRY_RETURN(_ccpm_reduce_deps(cand, min_com_deps, act_pos, rank,
+                                          min, inv, act_ids));
+        _ccpm_sig_reduced(sig, min, cand, act_pos, min_com_deps);
+
+        /* Move reduced activities to their new dummies, they are the rarest */
+        for (k = 0; k < CCPM_LLEN(cand); k++)
+        {
+            j = CCPM_LITEM(act_pos, CCPM_LITEM(cand, k));
+            _ccpm_tbl_del(anc, anc_of[j], j);
+            CCPM_TRY_RETURN(_ccpm_anchor(inv, min, anc, anc_of, j, tmp));
+        }
     }
-    return ret;
+
+    if (n_iter)
+    {
+        *n_iter += n_scan;
+    }
+    return CCPM_OK;
 }
 
 /*===========================================================================*/
-ccpmResultEn ccpm_finalize_network(uint16_t * act_ids, uint32_t * act_pos,
-                                   uint32_t * act_src, uint32_t * act_dst,
-                                   uint32_t * events,
-                                   uint16_t * final_act_ids, uint16_t * final_act_src, uint16_t * final_act_dst
-                                   )
+ccpmResultEn ccpm_process_overlapping_deps(uint32_t * act_pos, uint32_t * rank,
+                                          ccpmDepTblSt * min,
+                                          ccpmDepTblSt * inv,
+                                          uint32_t * act_ids,
+                                          uint32_t * min_com_deps,
+                                          uint32_t * cnt, uint32_t * touched, uint32_t * cand,
+                                          ccpmSigCacheSt * sig, size_t * n_iter)
 {
-    ccpmResultEn ret = CCPM_OK;
-
+    size_t p;
     size_t i;
-    size_t num_events = CCPM_LLEN(events);
-    size_t evt = 1;
+    size_t j;
+    size_t k;
+    size_t n_scan = 0;
+    ccpmResultEn ret = CCPM_OK;
 
-    CCPM_CHECK_RETURN(act_ids, CCPM_EINVAL);
     CCPM_CHECK_RETURN(act_pos, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(act_src, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(act_dst, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(events, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(final_act_ids, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(final_act_src, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(final_act_dst, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(rank, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(min, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(inv, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_ids, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(cnt, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(touched, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(cand, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(sig, CCPM_EINVAL);
 
-    CCPM_LOG_PRINTF("Finalizing network\n");
+    CCPM_LOG_PRINTF("Processing overlapping dependencies\n");
 
-    /* Initialize final output lists */
-    CCPM_LCLR(final_act_ids);
-    CCPM_LCLR(final_act_src);
-    CCPM_LCLR(final_act_dst);
+    size_t n_last = CCPM_LLEN(act_ids);
 
-    /*Renumerate events*/
-    for (i = 0; i < num_events; i++)
+    for (p = 0; p < n_last; p++)
     {
-        if (CCPM_LITEM(events, i) != (i + 1))
+        i = CCPM_LITEM(act_pos, p);
+
+        size_t len_i = _ccpm_tbl_len(min, i);
+
+        /* Skip activities without dependencies */
+        if (0 == len_i)
         {
-            CCPM_LITEM(events, i) = CCPM_FAKE;
+            continue;
         }
-        else
+
+        /*All activities are searched, so equal sets get the same result*/
+        uint64_t key = _ccpm_sig_key(min, i);
+        if (_ccpm_sig_failed(sig, min, i, key))
         {
-            CCPM_LITEM(events, i) = evt;
-            evt++;
+            n_last = CCPM_LLEN(act_ids);
+            continue;
         }
-    }
 
-    /* Update activity source and destination events */
-    for (i = 0; i < CCPM_LLEN(act_ids); i++)
-    {
-        /* Skip redundant activities */
-        if (CCPM_FAKE == CCPM_LITEM(act_src, i) || CCPM_FAKE == CCPM_LITEM(act_dst, i))
+        /*
+        Search for overlapping lists: the first activity which has
+        some but not all of i dependencies and some other ones.
+        */
+        CCPM_LCLR(cand);
+        for (k = 0; k < len_i; k++)
         {
-            continue;
+            CCPM_LAPP(cand, _ccpm_tbl_item(min, i, k));
         }
+        n_scan += _ccpm_count_common(inv, cand, cnt, touched);
 
-        size_t src_evt = CCPM_LITEM(act_src, i) - 1;
-        size_t dst_evt = CCPM_LITEM(act_dst, i) - 1;
+        size_t found = n_last;
+        for (k = 0; k < CCPM_LLEN(touched); k++)
+        {
+            j = CCPM_LITEM(touched, k);
 
-        /* Skip if events are invalid */
-        if (CCPM_FAKE == CCPM_LITEM(events, src_evt) || CCPM_FAKE == CCPM_LITEM(events, dst_evt))
+            size_t r = rank[j];
+            if (r >= found)
+            {
+                continue;
+            }
+
+            size_t lmcd  = cnt[j];
+            size_t len_j = _ccpm_tbl_len(min, j);
+
+            if (lmcd > 0 && len_i != lmcd && len_j != lmcd)
+            {
+                found = r;
+            }
+        }
+        _ccpm_count_clear(cnt, touched);
+
+        if (found == n_last)
         {
+            _ccpm_sig_fail(sig, i, key);
+            n_last = CCPM_LLEN(act_ids);//*n_cur;
             continue;
         }
 
-        /* Update source and destination */
-        CCPM_LITEM(act_src, i) = CCPM_LITEM(events, src_evt);
-        CCPM_LITEM(act_dst, i) = CCPM_LITEM(events, dst_evt);
+        /* Find common dependencies between i and j */
+        j = CCPM_LITEM(act_pos, found);
+
+        CCPM_LCLR(min_com_deps);
+        for (k = 0; k < len_i; k++)
+        {
+            size_t d = _ccpm_tbl_item(min, i, k);
+            if (_ccpm_tbl_has(min, j, d))
+            {
+                CCPM_LAPP(min_com_deps, d);
+            }
+        }
+
+        /* Reduce all activities which have all common and some other dependencies */
+        n_scan += _ccpm_find_supersets(inv, min, rank, min_com_deps, 0, n_last, cand);
+
+        CCPM_TRY_RETURN(_ccpm_reduce_deps(cand, min_com_deps, act_pos, rank,
+                                          min, inv, act_ids));
+        _ccpm_sig_reduced(sig, min, cand, act_pos, min_com_deps);
+
+        n_last = CCPM_LLEN(act_ids);
     }
 
-    /* Build final output lists */
-    for (i = 0; i < CCPM_LLEN(act_pos); i++)
+    if (n_iter)
     {
-        size_t idx = CCPM_LITEM(act_pos, i);
+        *n_iter += n_scan;
+    }
+    return CCPM_OK;
+}
 
-        /* Real actions go first, skip dummies */
-        if (CCPM_FAKE == CCPM_LITEM(act_ids, idx))
+/*===========================================================================*/
+/*
+Activities with equal dependency sets are grouped, grp[i] is the position
+of the first activity with the set of i. Takes O(sum of set sizes).
+*/
+static void _ccpm_dep_groups(ccpmDepTblSt * min, size_t n, uint32_t * grp,
+                             ccpmSigSt * slot, size_t bits)
+{
+    size_t mask = CCPM_HASH_SZ(bits) - 1;
+
+    memset(slot, 0, CCPM_HASH_SZ(bits) * sizeof(ccpmSigSt));
+    for (size_t i = 0; i < n; i++)
+    {
+        size_t   len = _ccpm_tbl_len(min, i);
+        uint64_t key = _ccpm_sig_key(min, i);
+        size_t   h   = _ccpm_hash(key, bits);
+
+        grp[i] = (uint32_t)i;
+        if (0 == len)
         {
             continue;
         }
 
-        /* Add to final output */
-        CCPM_LAPP(final_act_ids, CCPM_LITEM(act_ids, idx));
-        CCPM_LAPP(final_act_src, CCPM_LITEM(act_src, idx));
-        CCPM_LAPP(final_act_dst, CCPM_LITEM(act_dst, idx));
+        for (; slot[h].act; h = (h + 1) & mask)
+        {
+            size_t j = slot[h].act - 1;
+            size_t k;
+
+            if ((slot[h].key != key) || (_ccpm_tbl_len(min, j) != len))
+            {
+                continue;
+            }
+            for (k = 0; (k < len) && _ccpm_tbl_has(min, j, _ccpm_tbl_item(min, i, k)); k++);
+            if (k == len)
+            {
+                grp[i] = (uint32_t)j;
+                break;
+            }
+        }
+
+        if (grp[i] == i)
+        {
+            slot[h].key = key;
+            slot[h].act = (uint32_t)i + 1;
+        }
     }
+}
+
+/*Activities which depend on act have different dependency sets*/
+static inline bool _ccpm_dep_mixed(ccpmDepTblSt * inv, uint32_t * grp, size_t act)
+{
+    for (size_t k = 1; k < _ccpm_tbl_len(inv, act); k++)
+    {
+        if (grp[_ccpm_tbl_item(inv, act, k)] != grp[_ccpm_tbl_item(inv, act, 0)])
+        {
+            return true;
+        }
+    }
+    return false;
+}
+
+/*
+Every dependency set starts at an event of its own. An activity ends at
+the start event of its dependent activities when all of them have the same
+set, otherwise it ends at an event of its own and dummies lead from it to
+the start events of the sets. Nested and overlapping processing leaves
+equal or disjoint sets in most cases, then no own events are added, but
+some overlapping sets remain, e.g. when they form a ring.
+grp and slot are work buffers of n_max and 2 * n_max items,
+grp_evt is a work buffer of n_max zeros, it is left zeroed.
+*/
+ccpmResultEn ccpm_build_network(uint32_t * act_ids, uint32_t * act_pos,
+                               ccpmDepTblSt * min, ccpmDepTblSt * inv,
+                               uint32_t * act_src,      uint32_t * act_dst,
+                               uint32_t * started,      uint32_t * num_dep,
+                               uint32_t * events,       uint32_t * chk,
+                               uint32_t * start,
+                               uint32_t * grp,          uint32_t * grp_evt,
+                               ccpmSigSt * slot,        size_t bits)
+{
+    size_t i;
+    size_t j;
+    size_t k;
+    size_t evt = 1;
+    size_t dum = CCPM_LLEN(act_ids);
+
+    CCPM_CHECK_RETURN(act_ids, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_pos, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(min, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(inv, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_src, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_dst, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(started, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(num_dep, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(events, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(grp, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(grp_evt, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(slot, CCPM_EINVAL);
+
+    CCPM_LOG_PRINTF("Building network with %d activities\n", (int)dum);
+
+    _ccpm_dep_groups(min, dum, grp, slot, bits);
+
+    /* Initialize arrays as lists */
+    CCPM_LCLR(started);
+    CCPM_LCLR(num_dep);
+    CCPM_LCLR(act_src);
+    CCPM_LCLR(act_dst);
+    CCPM_LCLR(events);
+    CCPM_LCLR(chk);
+
+    /* Initialize started and num_dep lists */
+    for (i = 0; i < dum; i++)
+    {
+        CCPM_LAPP(started, false);
+        CCPM_LAPP(num_dep, _ccpm_tbl_len(min, i));
+        CCPM_LAPP(act_src, 0);
+        CCPM_LAPP(act_dst, 0);
+    }
+
+    /* Find initial activities without dependencies */
+    CCPM_LCLR(chk);
+
+    for (i = 0; i < dum; i++)
+    {
+        if ((0 == CCPM_LITEM(num_dep, i)) && (!CCPM_LITEM(started, i)))
+        {
+            /* started[i] = true */
+            CCPM_LITEM(started, i) = true;
+            /* act_src[i] = evt */
+            CCPM_LITEM(act_src, i) = evt;
+            CCPM_LAPP(chk, i);
+        }
+    }
+
+    /* Add initial event */
+    CCPM_LAPP(events, evt);
+    evt++;
+
+    /* Process activities in order */
+    for (i = 0; i < CCPM_LLEN(chk); i++)
+    {
+        size_t current_act = CCPM_LITEM(chk, i);
+
+        /* Shared by different sets, end at an own event */
+        if (_ccpm_dep_mixed(inv, grp, current_act))
+        {
+            CCPM_LITEM(act_dst, current_act) = evt;
+            CCPM_LAPP(events, evt);
+            evt++;
+            CCPM_CHECK_RETURN(evt < CCPM_FAKE, CCPM_ELIM);
+        }
+
+        /*
+        Decrement dependency counters for activities that depend on current activity,
+        only they may start, inv rows are sorted, so they start in ascending order
+        */
+        CCPM_LCLR(start);
+
+        for (k = 0; k < _ccpm_tbl_len(inv, current_act); k++)
+        {
+            j = _ccpm_tbl_item(inv, current_act, k);
+
+            /* num_dep[j]-- */
+            if ((0 == --CCPM_LITEM(num_dep, j)) && (!CCPM_LITEM(started, j)))
+            {
+                CCPM_LITEM(started, j) = true;
+                CCPM_LAPP(start, j);
+            }
+        }
+
+        /* Process newly started activities, a new event per dependency set */
+        for (j = 0; j < CCPM_LLEN(start); j++)
+        {
+            size_t first_act = CCPM_LITEM(start, j);
+            size_t g         = grp[first_act];
+
+            if (grp_evt[g])
+            {
+                CCPM_LITEM(act_src, first_act) = grp_evt[g];
+                continue;
+            }
+            grp_evt[g] = (uint32_t)evt;
+            CCPM_LITEM(act_src, first_act) = evt;
+
+            for (k = 0; k < _ccpm_tbl_len(min, first_act); k++)
+            {
+                size_t dep_act = _ccpm_tbl_item(min, first_act, k);
+
+                if (CCPM_LITEM(act_dst, dep_act))
+                {
+                    /* Need to add a dummy activity */
+                    size_t nxt_pos = CCPM_LLEN(act_ids);
+
+                    CCPM_CHECK_RETURN(nxt_pos < min->n_max, CCPM_ELIM);
+                    CCPM_LAPP(act_pos, nxt_pos);
+                    CCPM_LAPP(act_ids, CCPM_FAKE);
+
+                    /* Extend lists for new dummy activity */
+                    CCPM_LAPP(started, true);
+                    CCPM_LAPP(num_dep, 0);
+                    CCPM_LAPP(act_src, CCPM_LITEM(act_dst, dep_act));
+                    CCPM_LAPP(act_dst, evt);
+                }
+                else
+                {
+                    CCPM_LITEM(act_dst, dep_act) = evt;
+                }
+            }
+
+            /* Add new event */
+            CCPM_LAPP(events, evt);
+            evt++;
+            CCPM_CHECK_RETURN(evt < CCPM_FAKE, CCPM_ELIM);
+        }
+
+        for (j = 0; j < CCPM_LLEN(start); j++)
+        {
+            grp_evt[grp[CCPM_LITEM(start, j)]] = 0;
+        }
+
+        /* Add newly started activities to check list */
+        for (j = 0; j < CCPM_LLEN(start); j++)
+        {
+            CCPM_LAPP(chk, CCPM_LITEM(start, j));
+        }
+    }
+
+    /* Set destination for last started  activities*/
+    for (i = 0; i < CCPM_LLEN(act_ids); i++)
+    {
+        if (0 == CCPM_LITEM(act_dst, i))
+        {
+            CCPM_LITEM(act_dst, i) = evt;
+        }
+    }
+
+    /* Add final event */
+    CCPM_LAPP(events, evt);
+
+    return CCPM_OK;
+}
+
+/*===========================================================================*/
+ccpmResultEn ccpm_do_glue(size_t n_cur,
+                          uint32_t * act_src, uint32_t * act_dst,
+                          uint32_t * events)
+{
+    size_t k;
+
+    CCPM_CHECK_RETURN(act_src, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_dst, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(events, CCPM_EINVAL);
+
+    CCPM_LOG_PRINTF("Applying event glueing to all activities\n");
+
+    /* Apply event glueing to all activities */
+    for (k = 0; k < n_cur; k++)
+    {
+        /* Skip redundant activities */
+        if (CCPM_FAKE == CCPM_LITEM(act_src, k) || CCPM_FAKE == CCPM_LITEM(act_dst, k))
+        {
+            continue;
+        }
+
+        /* Update source and destination events */
+        size_t src_evt = CCPM_LITEM(act_src, k) - 1;
+        size_t dst_evt = CCPM_LITEM(act_dst, k) - 1;
+
+        CCPM_LITEM(act_src, k) = CCPM_LITEM(events, src_evt);
+        CCPM_LITEM(act_dst, k) = CCPM_LITEM(events, dst_evt);
+    }
+
+    return CCPM_OK;
+}
+
+/*===========================================================================*/
+ccpmResultEn ccpm_optimize_network_stage_1(uint32_t * act_ids,  uint32_t * act_src, uint32_t * act_dst,
+                                          uint32_t * events,
+                                          ccpmCsrSt * dins,     uint32_t * deps,
+                                          ccpmCsrSt * udeps,    ccpmCsrSt * post,
+                                          uint8_t  * evt_real,  uint8_t  * mark,
+                                          uint32_t * cnt,       uint32_t * touched)
+{
+    ccpmResultEn ret = CCPM_OK;
+
+    size_t i;
+    size_t j;
+    size_t k;
+    size_t x;
+    size_t y;
+    size_t num_events = CCPM_LLEN(events);
+    size_t dum        = CCPM_LLEN(act_ids);
+
+    CCPM_CHECK_RETURN(act_ids, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_src, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_dst, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(events, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(dins, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(deps, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(udeps, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(post, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(evt_real, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(mark, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(cnt, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(touched, CCPM_EINVAL);
+
+    CCPM_LOG_PRINTF("Optimizing network stage 1: num_events=%d, num_act_ids=%d\n", (int)num_events, (int)dum);
+
+    /* Initialize event data structures */
+    memset(dins->off, 0, (num_events + 1) * sizeof(uint32_t));
+    for (i = 0; i < num_events; i++)
+    {
+        evt_real[i] = false;
+    }
+
+    /* Count dummy inputs of events */
+    for (k = 0; k < dum; k++)
+    {
+        size_t dst_evt = CCPM_LITEM(act_dst, k) - 1;
+
+        /*Skip events that were marked as fake*/
+        if (CCPM_FAKE != CCPM_LITEM(act_ids, k))
+        {
+            evt_real[dst_evt] = true;
+            continue;
+        }
+        dins->off[dst_evt + 1]++;
+    }
+    _ccpm_csr_prefix(dins, num_events);
+
+    /* Populate event dependencies and inputs in activity order */
+    for (k = 0; k < dum; k++)
+    {
+        if (CCPM_FAKE != CCPM_LITEM(act_ids, k))
+        {
+            continue;
+        }
+
+        size_t src_evt = CCPM_LITEM(act_src, k) - 1;
+        size_t dst_evt = CCPM_LITEM(act_dst, k) - 1;
+
+        /* For dummy activities, record dependencies */
+        x = dins->off[dst_evt]++;
+        dins->item[x] = k;
+        deps[x]       = src_evt;
+    }
+    _ccpm_csr_rewind(dins, num_events);
+
+    /* Unique dependencies of events */
+    udeps->off[0] = 0;
+    for (i = 0, y = 0; i < num_events; i++)
+    {
+        for (x = dins->off[i]; x < dins->off[i + 1]; x++)
+        {
+            if (!mark[deps[x]])
+            {
+                mark[deps[x]] = true;
+                udeps->item[y++] = deps[x];
+            }
+        }
+
+        udeps->off[i + 1] = y;
+        for (x = udeps->off[i]; x < y; x++)
+        {
+            mark[udeps->item[x]] = false;
+        }
+    }
+
+    /* Events which may be glued, listed by their dependencies */
+    memset(post->off, 0, (num_events + 1) * sizeof(uint32_t));
+    for (i = 0; i < num_events; i++)
+    {
+        if (evt_real[i] || (CCPM_CSR_LEN(dins, i) < 2))
+        {
+            continue;
+        }
+
+        for (x = udeps->off[i]; x < udeps->off[i + 1]; x++)
+        {
+            post->off[udeps->item[x] + 1]++;
+        }
+    }
+    _ccpm_csr_prefix(post, num_events);
+
+    for (i = 0; i < num_events; i++)
+    {
+        if (evt_real[i] || (CCPM_CSR_LEN(dins, i) < 2))
+        {
+            continue;
+        }
+
+        for (x = udeps->off[i]; x < udeps->off[i + 1]; x++)
+        {
+            post->item[post->off[udeps->item[x]]++] = i;
+        }
+    }
+    _ccpm_csr_rewind(post, num_events);
+
+    /*
+    If some events have only dummy inputs and have equal dependencies
+    (earlier events) then we can "glue" them together
+    */
+    for (i = 0; i < num_events; i++)
+    {
+        /*Skip events with real inputs*/
+        if (evt_real[i])
+        {
+            continue;
+        }
+
+        /*Skip events without dummy inputs*/
+        size_t len_i = CCPM_CSR_LEN(dins, i);
+        if (len_i < 2)
+        {
+            continue;
+        }
+
+        /*Count dependencies of i which later events have*/
+        CCPM_LCLR(touched);
+        for (x = udeps->off[i]; x < udeps->off[i + 1]; x++)
+        {
+            size_t dep = udeps->item[x];
+            for (y = post->off[dep]; y < post->off[dep + 1]; y++)
+            {
+                j = post->item[y];
+                if ((j > i) && (0 == cnt[j]++))
+                {
+                    CCPM_LAPP(touched, j);
+                }
+            }
+        }
+
+        for (k = 0; k < CCPM_LLEN(touched); k++)
+        {
+            j = CCPM_LITEM(touched, k);
+
+            /*
+            Will redirect _act_src later
+            (events[i] != (i + 1)) is feature of redundant event
+            */
+            if ((CCPM_CSR_LEN(dins, j) == len_i) && (cnt[j] == CCPM_CSR_LEN(udeps, i)))
+            {
+                /* Glue events: redirect j to i */
+                CCPM_LITEM(events, j) = CCPM_LITEM(events, i);
+
+                /* Mark dummy activities for removal */
+                for (x = dins->off[j]; x < dins->off[j + 1]; x++)
+                {
+                    size_t dummy_act = dins->item[x];
+                    CCPM_LITEM(act_src, dummy_act) = CCPM_FAKE;
+                    CCPM_LITEM(act_dst, dummy_act) = CCPM_FAKE;
+                }
+            }
+            cnt[j] = 0;
+        }
+        CCPM_LCLR(touched);
+    }
+
+    /*
+    Work with redundant events and dummies (part 2)
+    "Glue" events each of which has only one input which is dummy
+    to their predeceptors
+    */
+    for (i = 0; i < num_events; i++)
+    {
+        /*Skip events with real inputs*/
+        if (evt_real[i])
+        {
+            continue;
+        }
+
+        if (1 == CCPM_CSR_LEN(dins, i))
+        {
+            size_t dummy_act = dins->item[dins->off[i]];
+            CCPM_LITEM(events, i) = CCPM_LITEM(act_src, dummy_act);
+
+            /* Mark dummy activity for removal */
+            CCPM_LITEM(act_src, dummy_act) = CCPM_FAKE;
+            CCPM_LITEM(act_dst, dummy_act) = CCPM_FAKE;
+        }
+    }
+
+    /* Apply event glueing to all activities */
+    CCPM_TRY_RETURN(ccpm_do_glue(dum, act_src, act_dst, events));
+
+    return ret;
+}
+/*===========================================================================*/
+ccpmResultEn ccpm_optimize_network_stage_2(uint32_t * act_ids, uint32_t * act_src, uint32_t * act_dst,
+                                          uint32_t * events,
+                                          uint32_t * evt_dout, uint32_t * evt_nout)
+{
+    ccpmResultEn ret = CCPM_OK;
+    size_t i;
+    size_t k;
+    size_t num_events = CCPM_LLEN(events);
+    size_t dum        = CCPM_LLEN(act_ids);
+
+    CCPM_CHECK_RETURN(act_ids, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_src, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_dst, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(events, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(evt_dout, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(evt_nout, CCPM_EINVAL);
+
+    CCPM_LOG_PRINTF("Optimizing network stage 2\n");
+
+    /* Initialize event data structures, evt_dout[i] is the first dummy output + 1 */
+    for (i = 0; i < num_events; i++)
+    {
+        evt_dout[i] = 0;
+        evt_nout[i] = 0;
+    }
+
+    /* Count outputs and find the first dummy output of each event */
+    for (k = 0; k < dum; k++)
+    {
+        /* Skip redundant activities */
+        if (CCPM_FAKE == CCPM_LITEM(act_src, k) || CCPM_FAKE == CCPM_LITEM(act_dst, k))
+        {
+            continue;
+        }
+
+        size_t src_evt = CCPM_LITEM(act_src, k) - 1;
+        evt_nout[src_evt]++;
+
+        /* If this is a dummy activity, remember it */
+        if ((CCPM_FAKE == CCPM_LITEM(act_ids, k)) && (0 == evt_dout[src_evt]))
+        {
+            evt_dout[src_evt] = k + 1;
+        }
+    }
+
+    /* Optimize: glue events with single dummy output to their successors */
+    for (i = 0; i < num_events; i++)
+    {
+        /* Skip if event has more than one output */
+        if (evt_nout[i] > 1)
+        {
+            continue;
+        }
+
+        /* Skip if event has no dummy outputs */
+        if (0 == evt_dout[i])
+        {
+            continue;
+        }
+
+        /* Get the dummy output activity */
+        size_t dummy_act = evt_dout[i] - 1;
+
+        /* Glue event to its successor */
+        CCPM_LITEM(events, i) = CCPM_LITEM(act_dst, dummy_act);
+
+        /* Mark dummy activity for removal */
+        CCPM_LITEM(act_src, dummy_act) = CCPM_FAKE;
+        CCPM_LITEM(act_dst, dummy_act) = CCPM_FAKE;
+    }
+
+    /* Apply event glueing to all activities */
+    CCPM_TRY_RETURN(ccpm_do_glue(dum, act_src, act_dst, events));
+
+    return ret;
+}
+
+/*===========================================================================*/
+ccpmResultEn ccpm_add_needed_dummies(uint32_t * act_ids,     uint32_t * act_pos,
+                                     uint32_t * act_src,     uint32_t * act_dst,
+                                     uint32_t * to_do,       uint32_t * events,
+                                     uint32_t * sort_values, uint32_t * tmp,
+                                     ccpmSortEn sort, size_t * n_iter)
+{
+    ccpmResultEn ret = CCPM_OK;
+    size_t i;
+    size_t j;
+    size_t n_cmp = 0;
+    size_t d   = CCPM_LLEN(act_ids);
+    size_t evt = CCPM_LITEM(events, CCPM_LLEN(events) - 1); // Last event
+
+    CCPM_CHECK_RETURN(act_ids, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_pos, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_src, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_dst, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(to_do, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(events, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(sort_values, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(tmp, CCPM_EINVAL);
+
+    CCPM_LOG_PRINTF("Adding needed dummies\n");
+
+    /* Sort act_pos by act_dst and then by act_src */
+    /* First, sort by act_dst */
+    for (i = 0; i < CCPM_LLEN(act_pos); i++)
+    {
+        sort_values[i] = CCPM_LITEM(act_dst, i);
+    }
+
+    CCPM_TRY_RETURN(ccpm_sort_ex(tmp, act_pos + 1, sort_values, CCPM_LLEN(act_pos), sort));
+
+    /* Then, sort by act_src */
+    for (i = 0; i < CCPM_LLEN(act_pos); i++)
+    {
+        sort_values[i] = CCPM_LITEM(act_src, i);
+    }
+
+    CCPM_TRY_RETURN(ccpm_sort_ex(tmp, act_pos + 1, sort_values, CCPM_LLEN(act_pos), sort));
+
+    /* Process activities to add needed dummies */
+    for (i = 0; i < d; i++)
+    {
+        /* Skip redundant activities */
+        if (CCPM_FAKE == CCPM_LITEM(act_src, i) || CCPM_FAKE == CCPM_LITEM(act_dst, i))
+        {
+            continue;
+        }
+
+        /* Skip done activities */
+        if (!CCPM_LITEM(to_do, i))
+        {
+            continue;
+        }
+
+        n_cmp += d - i - 1;
+        for (j = i + 1; j < d; j++)
+        {
+
+            /* Skip redundant activities */
+            if (CCPM_FAKE == CCPM_LITEM(act_src, j) || CCPM_FAKE == CCPM_LITEM(act_dst, j))
+            {
+                continue;
+            }
+
+            /* Check if activities have same source and destination */
+            if ((CCPM_LITEM(act_dst, i) == CCPM_LITEM(act_dst, j)) &&
+                (CCPM_LITEM(act_src, i) == CCPM_LITEM(act_src, j)))
+            {
+                /* Mark second activity as not to_do */
+                CCPM_LITEM(to_do, j) = false;
+
+                /* Create new event */
+                evt++;
+                CCPM_LITEM(act_dst, j) = evt;
+
+                /* Add dummy activity */
+                size_t nxt_pos = CCPM_LLEN(act_ids);
+                CCPM_LAPP(act_pos, nxt_pos);
+                CCPM_LAPP(act_ids, CCPM_FAKE);
+                CCPM_LAPP(act_src, evt);
+                CCPM_LAPP(act_dst, CCPM_LITEM(act_dst, i));
+                CCPM_LAPP(to_do, false);
+
+                /*Check for limits*/
+                CCPM_CHECK_RETURN(evt < CCPM_FAKE, CCPM_ELIM);
+                CCPM_CHECK_RETURN(CCPM_LLEN(act_pos) < CCPM_FAKE, CCPM_ELIM);
+
+                /* Add new event to events list */
+                CCPM_LAPP(events, evt);
+            }
+        }
+    }
+
+    if (n_iter)
+    {
+        *n_iter += n_cmp;
+    }
+    return ret;
+}
+
+/*===========================================================================*/
+ccpmResultEn ccpm_finalize_network(uint32_t * act_ids, uint32_t * act_pos,
+                                   uint32_t * act_src, uint32_t * act_dst,
+                                   uint32_t * events,
+                                   uint32_t * final_act_ids, uint32_t * final_act_src, uint32_t * final_act_dst
+                                   )
+{
+    ccpmResultEn ret = CCPM_OK;
+
+    size_t i;
+    size_t num_events = CCPM_LLEN(events);
+    size_t evt = 1;
+
+    CCPM_CHECK_RETURN(act_ids, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_pos, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_src, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_dst, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(events, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(final_act_ids, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(final_act_src, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(final_act_dst, CCPM_EINVAL);
+
+    CCPM_LOG_PRINTF("Finalizing network\n");
+
+    /* Initialize final output lists */
+    CCPM_LCLR(final_act_ids);
+    CCPM_LCLR(final_act_src);
+    CCPM_LCLR(final_act_dst);
+
+    /*Renumerate events*/
+    for (i = 0; i < num_events; i++)
+    {
+        if (CCPM_LITEM(events, i) != (i + 1))
+        {
+            CCPM_LITEM(events, i) = CCPM_FAKE;
+        }
+        else
+        {
+            CCPM_LITEM(events, i) = evt;
+            evt++;
+        }
+    }
+
+    /* Update activity source and destination events */
+    for (i = 0; i < CCPM_LLEN(act_ids); i++)
+    {
+        /* Skip redundant activities */
+        if (CCPM_FAKE == CCPM_LITEM(act_src, i) || CCPM_FAKE == CCPM_LITEM(act_dst, i))
+        {
+            continue;
+        }
+
+        size_t src_evt = CCPM_LITEM(act_src, i) - 1;
+        size_t dst_evt = CCPM_LITEM(act_dst, i) - 1;
+
+        /* Skip if events are invalid */
+        if (CCPM_FAKE == CCPM_LITEM(events, src_evt) || CCPM_FAKE == CCPM_LITEM(events, dst_evt))
+        {
+            continue;
+        }
+
+        /* Update source and destination */
+        CCPM_LITEM(act_src, i) = CCPM_LITEM(events, src_evt);
+        CCPM_LITEM(act_dst, i) = CCPM_LITEM(events, dst_evt);
+    }
+
+    /* Build final output lists */
+    for (i = 0; i < CCPM_LLEN(act_pos); i++)
+    {
+        size_t idx = CCPM_LITEM(act_pos, i);
+
+        /* Real actions go first, skip dummies */
+        if (CCPM_FAKE == CCPM_LITEM(act_ids, idx))
+        {
+            continue;
+        }
+
+        /* Add to final output */
+        CCPM_LAPP(final_act_ids, CCPM_LITEM(act_ids, idx));
+        CCPM_LAPP(final_act_src, CCPM_LITEM(act_src, idx));
+        CCPM_LAPP(final_act_dst, CCPM_LITEM(act_dst, idx));
+    }
+
+    for (i = 0; i < CCPM_LLEN(act_pos); i++)
+    {
+        size_t idx = CCPM_LITEM(act_pos, i);
+
+        /* Skip real actions and deleted dummies */
+        if (CCPM_FAKE != CCPM_LITEM(act_ids, idx) ||
+            CCPM_FAKE == CCPM_LITEM(act_src, idx) ||
+            CCPM_FAKE == CCPM_LITEM(act_dst, idx))
+        {
+            continue;
+        }
+
+        /* Add to final output */
+        CCPM_LAPP(final_act_src, CCPM_LITEM(act_src, idx));
+        CCPM_LAPP(final_act_dst, CCPM_LITEM(act_dst, idx));
+    }
+
+    return ret;
+}
+
+/*===========================================================================*/
+#ifdef CCPM_CFG_PRINTF
+#define _CCPM_PRINT_DEPS(n_act, tbl)                                           \
+do {                                                                           \
+    CCPM_LOG_PRINTF("Dependencies:\n");                                        \
+    for (size_t i = 0; i < n_act; i++)                                         \
+    {                                                                          \
+        CCPM_LOG_PRINTF("%5d: [", (int)i);                                     \
+        for (size_t j = 0; j < _ccpm_tbl_len(tbl, i); j++)                     \
+        {                                                                      \
+            CCPM_LOG_PRINTF("%5d ", (int)_ccpm_tbl_item(tbl, i, j));           \
+        }                                                                      \
+        CCPM_LOG_PRINTF("]\n");                                                \
+    }                                                                          \
+} while (0)
+
+#define _CCPM_PRINT_NET(act_src, act_dst)                                                                 \
+do {                                                                                                      \
+    CCPM_LOG_PRINTF("Network:\n");                                                                        \
+    for (size_t i = 0; i < CCPM_LLEN(act_src); i++)                                                       \
+    {                                                                                                     \
+        CCPM_LOG_PRINTF("%5d: [%5d %5d]\n", (int)i, (int)CCPM_LITEM(act_src, i), (int)CCPM_LITEM(act_dst, i)); \
+    }                                                                                                     \
+} while (0)
+
+#define _CCPM_PRINT_ACT_POS(act_id, act_pos)                                                    \
+do {                                                                                            \
+    CCPM_LOG_PRINTF("Activities:\n");                                                           \
+    for (size_t i = 0; i < CCPM_LLEN(act_pos); i++)                                             \
+    {                                                                                           \
+        CCPM_LOG_PRINTF("%5d: %5d\n", (int)CCPM_LITEM(act_id, i), (int)CCPM_LITEM(act_pos, i)); \
+    }                                                                                           \
+} while (0)
+
+
+#define _CCPM_PRINT_ACT_IDS(act_id)                                        \
+do {                                                                       \
+    CCPM_LOG_PRINTF("Activities:\n");                                      \
+    for (size_t i = 0; i < CCPM_LLEN(act_id); i++)                         \
+    {                                                                      \
+        CCPM_LOG_PRINTF("%5d: %5d\n", (int)i, (int)CCPM_LITEM(act_id, i)); \
+    }                                                                      \
+} while (0)
+
+#else/*CCPM_CFG_PRINTF*/
+#define _CCPM_PRINT_DEPS(n_act, tbl) do {} while (0)
+
+#define _CCPM_PRINT_NET(act_src, act_dst) do {} while (0)
+
+#define _CCPM_PRINT_ACT_POS(act_id, act_pos)  do {} while (0)
+
+#define _CCPM_PRINT_ACT_IDS(act_id)  do {} while (0)
+
+#endif/*CCPM_CFG_PRINTF*/
+
+/*===========================================================================*/
+/*Monotonic wall time in seconds, processor time when not available*/
+static double _ccpm_time(void)
+{
+#ifdef CLOCK_MONOTONIC
+    struct timespec ts;
+
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (double)ts.tv_sec + 1e-9 * (double)ts.tv_nsec;
+#else /*CLOCK_MONOTONIC*/
+    return (double)clock() / CLOCKS_PER_SEC;
+#endif/*CLOCK_MONOTONIC*/
+}
+
+static size_t _ccpm_tbl_total(ccpmDepTblSt * t, size_t n)
+{
+    size_t sz = 0;
+
+    for (size_t i = 0; i < n; i++)
+    {
+        sz += _ccpm_tbl_len(t, i);
+    }
+    return sz;
+}
+
+/*Close a phase started at t, stat may be 0*/
+#define CCPM_STAT_PHASE(stat, ph, t, n)        \
+do {                                           \
+    if (stat)                                  \
+    {                                          \
+        double _now = _ccpm_time();            \
+        (stat)->time[ph] += _now - (t);        \
+        (stat)->iter[ph] += (n);               \
+        (t) = _now;                            \
+    }                                          \
+} while (0)
+
+/*===========================================================================*/
+void ccpm_opt_init(ccpmOptSt * opt)
+{
+    if (!opt)
+    {
+        return;
+    }
+    opt->deps    = CCPM_DEPS_DENSE;
+    opt->closure = CCPM_CLOSURE_TOPO;
+    opt->dedup   = false;
+    opt->ctx     = 0;
+    opt->max_mem = 0;
+    opt->sort    = CCPM_SORT_RADIX;
+    opt->loop    = 0;
+    opt->n_threads = 1;
+    opt->stat    = 0;
+    opt->split   = false;
+    opt->level   = CCPM_LEVEL_FULL;
+}
+
+/*===========================================================================*/
+/*
+Peak memory estimates, must follow allocations in ccpm_make_aoa32.
+Sparse dependency rows grow with the number of dependencies which is not
+known before closure, so they are counted as three rows per link with
+doubled capacity, the estimate is a lower bound for sparse mode.
+*/
+#define CCPM_MEM_ITEM(type, n) CCPM_ALIGN((n) * sizeof(type))
+
+size_t ccpm_make_aoa32_mem(size_t n_act, size_t n_lnk, const ccpmOptSt * opt)
+{
+    size_t sz = 0;
+
+    if (!opt)
+    {
+        return 0;
+    }
+
+    /*Hash tables*/
+    sz += CCPM_MEM_ITEM(uint32_t, CCPM_HASH_SZ(_ccpm_hash_bits(n_act)));
+    sz += CCPM_MEM_ITEM(uint32_t, CCPM_HASH_SZ(_ccpm_hash_bits(n_lnk)));
+
+    /*Loop detection*/
+    sz += 2 * CCPM_MEM_ITEM(uint32_t, n_act);
+    sz += 2 * CCPM_MEM_ITEM(uint32_t, n_act + 1);
+    sz += CCPM_MEM_ITEM(uint32_t, n_lnk + 1);
+
+    if (CCPM_LEVEL_FAST == opt->level)
+    {
+        size_t n_nod = 3 * n_act;
+        size_t n_arc = 2 * n_act + n_lnk;
+
+        /*Link degrees, nodes and arcs*/
+        sz += 2 * CCPM_MEM_ITEM(uint32_t, n_act);
+        sz += CCPM_MEM_ITEM(uint32_t, n_nod);
+        sz += 2 * CCPM_MEM_ITEM(uint32_t, n_arc);
+        sz += CCPM_MEM_ITEM(uint32_t, CCPM_HASH_SZ(_ccpm_hash_bits(n_arc)));
+
+        /*Event order*/
+        sz += 2 * CCPM_MEM_ITEM(uint32_t, n_nod + 1);
+        sz += CCPM_MEM_ITEM(uint32_t, n_arc);
+        sz += CCPM_MEM_ITEM(uint32_t, n_nod);
+        return sz;
+    }
+
+    size_t n_max = n_act + ((n_lnk > n_act) ? n_lnk : n_act);
+    size_t n_w   = CCPM_BSET_WORDS(n_max);
+
+    bool   dense = (CCPM_DEPS_DENSE == opt->deps);
+    size_t n_tbl = dense ? n_max * n_max : 1;
+    size_t n_map = dense ? n_max * n_w : 1;
+    size_t n_row = dense ? 1 : n_max;
+
+    bool   topo   = (CCPM_CLOSURE_TOPO == opt->closure);
+    size_t n_topo = topo ? n_max : 1;
+    size_t n_succ = topo ? n_lnk : 0;
+
+    /*Activity lists*/
+    sz += 4 * CCPM_MEM_ITEM(uint32_t, n_max + 1);
+
+    /*Full and minimal dependency tables*/
+    sz += CCPM_MEM_ITEM(uint32_t,  n_max);
+    sz += 2 * CCPM_MEM_ITEM(uint32_t,  n_tbl);
+    sz += 2 * CCPM_MEM_ITEM(uint64_t,  n_map);
+    sz += 2 * CCPM_MEM_ITEM(ccpmRowSt, n_row);
+
+    sz += CCPM_MEM_ITEM(uint32_t, 2 * n_max + 1);
+    sz += CCPM_MEM_ITEM(uint8_t,  n_max);
+
+    /*Topological closure*/
+    sz += CCPM_MEM_ITEM(uint32_t, n_topo);
+    sz += CCPM_MEM_ITEM(uint32_t, n_topo + 1);
+    sz += CCPM_MEM_ITEM(uint32_t, n_succ + 1);
+
+    /*Network building*/
+    sz += 4 * CCPM_MEM_ITEM(uint32_t, n_max + 1);
+
+    /*Nested and overlapping dependencies*/
+    sz += 5 * CCPM_MEM_ITEM(uint32_t,  n_max);
+    sz += CCPM_MEM_ITEM(ccpmSigSt, CCPM_HASH_SZ(_ccpm_hash_bits(n_max)));
+    sz += 3 * CCPM_MEM_ITEM(uint32_t,  n_max + 1);
+    sz += 2 * CCPM_MEM_ITEM(ccpmRowSt, n_max);
+
+    /*Network optimization*/
+    sz += 3 * CCPM_MEM_ITEM(uint32_t, n_max + 1);
+    sz += 6 * CCPM_MEM_ITEM(uint32_t, n_max);
+    sz += CCPM_MEM_ITEM(uint8_t,  n_max);
+
+    sz += CCPM_MEM_ITEM(uint32_t, 2 * n_max + 1);
+
+    /*Sparse rows: full, minimal and inverted dependencies, full ones may grow up to n_max^2*/
+    if (!dense)
+    {
+        sz += 3 * 2 * n_lnk * sizeof(uint32_t);
+    }
+    else
+    {
+        /*Inverted dependencies are always sparse*/
+        sz += 2 * n_lnk * sizeof(uint32_t);
+    }
+
+    return sz;
+}
+
+size_t ccpm_make_aoa_mem(size_t n_act, size_t n_lnk, const ccpmOptSt * opt)
+{
+    if (!opt)
+    {
+        return 0;
+    }
+
+    size_t n_max = n_act + ((n_lnk > n_act) ? n_lnk : n_act);
+
+    /*16-bit data are converted to 32-bit buffers*/
+    return ccpm_make_aoa32_mem(n_act, n_lnk, opt)
+         + 3 * CCPM_MEM_ITEM(uint32_t, n_max + 1)
+         + 2 * CCPM_MEM_ITEM(uint32_t, n_lnk + 1);
+}
+
+/*===========================================================================*/
+ccpmResultEn ccpm_make_aoa(uint16_t * act_ids, uint16_t * lnk_src, uint16_t * lnk_dst, size_t n_lnk, uint16_t * act_src, uint16_t * act_dst)
+{
+    ccpmOptSt opt;
+
+    ccpm_opt_init(&opt);
+    return ccpm_make_aoa_ex(act_ids, lnk_src, lnk_dst, n_lnk, act_src, act_dst, &opt);
+}
+
+/*===========================================================================*/
+/*
+16-bit ID interface, converts data to and from 32-bit IDs.
+Activity number, link number and event numbers must be less than CCPM_FAKE16.
+*/
+ccpmResultEn ccpm_make_aoa_ex(uint16_t * act_ids, uint16_t * lnk_src, uint16_t * lnk_dst, size_t n_lnk,
+                              uint16_t * act_src, uint16_t * act_dst, const ccpmOptSt * opt)
+{
+    ccpmResultEn ret = CCPM_OK;
+
+    /*Statistics of failed checks are zero too*/
+    if (opt && opt->stat)
+    {
+        memset(opt->stat, 0, sizeof(ccpmStatSt));
+    }
+
+    size_t i;
+
+    CCPM_CHECK_RETURN(act_ids,  CCPM_EINVAL);
+
+    size_t n_act = CCPM_LLEN(act_ids);
+    CCPM_CHECK_RETURN(n_act,   CCPM_EINVAL);
+
+    CCPM_CHECK_RETURN(act_src, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_dst, CCPM_EINVAL);
+
+    CCPM_CHECK_RETURN(lnk_src, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(lnk_dst, CCPM_EINVAL);
+
+    CCPM_CHECK_RETURN(opt, CCPM_EINVAL);
+
+    CCPM_CHECK_RETURN(n_act < CCPM_FAKE16, CCPM_ELIM);
+    CCPM_CHECK_RETURN(opt->dedup || (n_lnk < CCPM_FAKE16), CCPM_ELIM);
+
+    size_t n_max = n_act + ((n_lnk > n_act) ? n_lnk : n_act);
+
+    /*Conversion buffers are taken from memory budget*/
+    ccpmOptSt _opt = *opt;
+    if (_opt.max_mem)
+    {
+        size_t n_cvt = ccpm_make_aoa_mem(n_act, n_lnk, opt) - ccpm_make_aoa32_mem(n_act, n_lnk, opt);
+        CCPM_CHECK_RETURN(n_cvt < _opt.max_mem, CCPM_ENOMEM);
+        _opt.max_mem -= n_cvt;
+    }
+
+    CCPM_MEM_INIT_CTX(opt->ctx);
+
+    CCPM_MEM_ALLOC(uint32_t   ,_act_ids      ,n_max + 1   );
+    CCPM_MEM_ALLOC(uint32_t   ,_lnk_src      ,n_lnk + 1   );
+    CCPM_MEM_ALLOC(uint32_t   ,_lnk_dst      ,n_lnk + 1   );
+    CCPM_MEM_ALLOC(uint32_t   ,_act_src      ,n_max + 1   );
+    CCPM_MEM_ALLOC(uint32_t   ,_act_dst      ,n_max + 1   );
+
+    for (i = 0; i <= n_act; i++)
+    {
+        _act_ids[i] = act_ids[i];
+    }
+
+    for (i = 0; i < n_lnk; i++)
+    {
+        _lnk_src[i] = lnk_src[i];
+        _lnk_dst[i] = lnk_dst[i];
+    }
+
+    CCPM_TRY_GOTO_END(ccpm_make_aoa32(_act_ids, _lnk_src, _lnk_dst, n_lnk, _act_src, _act_dst, &_opt));
+
+    /*Dummies may push activity and event numbers over the 16-bit limit*/
+    CCPM_CHECK_GOTO_END(CCPM_LLEN(_act_src) < CCPM_FAKE16, CCPM_ELIM);
+    for (i = 0; i < CCPM_LLEN(_act_src); i++)
+    {
+        CCPM_CHECK_GOTO_END(CCPM_LITEM(_act_src, i) < CCPM_FAKE16, CCPM_ELIM);
+        CCPM_CHECK_GOTO_END(CCPM_LITEM(_act_dst, i) < CCPM_FAKE16, CCPM_ELIM);
+    }
+
+    for (i = 0; i <= CCPM_LLEN(_act_ids); i++)
+    {
+        act_ids[i] = _act_ids[i];
+    }
+
+    for (i = 0; i <= CCPM_LLEN(_act_src); i++)
+    {
+        act_src[i] = _act_src[i];
+        act_dst[i] = _act_dst[i];
+    }
+
+end:
+    if (opt->stat)
+    {
+        opt->stat->mem += mem_size;
+    }
+    CCPM_MEM_FREE_ALL();
+    return ret;
+}
+
+/*===========================================================================*/
+/*
+Near-linear network construction of CCPM_LEVEL_FAST. Every activity gets
+start and end nodes, every link gets a dummy from the end node of its
+source to the start node of its destination. Nodes are merged with
+union-find where dependencies are kept: start nodes of activities without
+predecessors, end nodes of activities without successors and both nodes
+of a dummy which is the only input of its destination or the only output
+of its source. Parallel real activities get own end events with dummies,
+repeated and looped dummies are dropped, events are numbered in
+topological order. Redundant links are not removed, so networks have more
+dummies than networks of higher levels: about 1.2 times when most links
+are minimal, 2-3 times on hub-shaped and dense random link graphs and up
+to 4.5 times on chains with many redundant links, events grow by up to
+10 %. A network which does not fit output lists, e.g. with many activities
+without links next to a dense component, is built with CCPM_LEVEL_DEPS.
+*/
+static ccpmResultEn _ccpm_make_aoa32_one(uint32_t * act_ids, uint32_t * lnk_src, uint32_t * lnk_dst, size_t n_lnk,
+                                         uint32_t * act_src, uint32_t * act_dst, const ccpmOptSt * opt);
+
+/*Attach the larger root to the smaller one, so roots are minimal nodes of sets*/
+static inline void _ccpm_uf_join(uint32_t * parent, size_t i, size_t j)
+{
+    i = _ccpm_uf_find(parent, i);
+    j = _ccpm_uf_find(parent, j);
+    if (i < j)
+    {
+        parent[j] = i;
+    }
+    else
+    {
+        parent[i] = j;
+    }
+}
+
+static ccpmResultEn _ccpm_make_aoa32_fast(uint32_t * act_ids, uint32_t * lnk_src, uint32_t * lnk_dst, size_t n_lnk,
+                                          uint32_t * act_src, uint32_t * act_dst, const ccpmOptSt * opt)
+{
+    ccpmResultEn ret = CCPM_OK;
+
+    size_t i;
+    size_t j;
+
+    size_t _n_lnk = n_lnk;
+    bool   deps   = false; /*Build with CCPM_LEVEL_DEPS*/
+
+    CCPM_CHECK_RETURN(act_ids,  CCPM_EINVAL);
+
+    size_t n_act = CCPM_LLEN(act_ids);
+    CCPM_CHECK_RETURN(n_act,   CCPM_EINVAL);
+
+    CCPM_CHECK_RETURN(act_src, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_dst, CCPM_EINVAL);
+
+    CCPM_CHECK_RETURN(lnk_src, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(lnk_dst, CCPM_EINVAL);
+
+    CCPM_CHECK_RETURN(opt, CCPM_EINVAL);
+
+    ccpmStatSt * stat = opt->stat;
+    double       t_ph = 0.0;
+    if (stat)
+    {
+        memset(stat, 0, sizeof(ccpmStatSt));
+        stat->n_comp = 1;
+        t_ph = _ccpm_time();
+    }
+
+    /*Start and end nodes of activities and end nodes of parallel ones*/
+    CCPM_CHECK_RETURN(n_act < CCPM_FAKE / 3, CCPM_ELIM);
+    CCPM_CHECK_RETURN(opt->dedup || (_n_lnk < CCPM_FAKE), CCPM_ELIM);
+    CCPM_CHECK_RETURN(!opt->max_mem || (ccpm_make_aoa32_mem(n_act, _n_lnk, opt) <= opt->max_mem), CCPM_ENOMEM);
+
+    CCPM_MEM_INIT_CTX(opt->ctx);
+
+    /*=======================================================================*/
+    size_t id_bits  = _ccpm_hash_bits(n_act);
+    size_t lnk_bits = _ccpm_hash_bits(_n_lnk);
+
+    CCPM_MEM_ALLOC(uint32_t   ,_id_tbl       ,CCPM_HASH_SZ(id_bits) );
+    CCPM_MEM_ALLOC(uint32_t   ,_lnk_tbl      ,CCPM_HASH_SZ(lnk_bits));
+
+    CCPM_TRY_GOTO_END(ccpm_check_act_idss(act_ids, _id_tbl, id_bits));
+    CCPM_TRY_GOTO_END(ccpm_check_links(lnk_src, lnk_dst, &_n_lnk, _lnk_tbl, lnk_bits, opt->dedup));
+    CCPM_TRY_GOTO_END(ccpm_links_prepare(act_ids, lnk_src, lnk_dst, _n_lnk, _id_tbl, id_bits));
+
+    CCPM_MEM_ALLOC(uint32_t   ,_loop_deg     ,n_act        );
+    CCPM_MEM_ALLOC(uint32_t   ,_loop_off     ,n_act + 1    );
+    CCPM_MEM_ALLOC(uint32_t   ,_loop_succ    ,_n_lnk + 1   );
+    CCPM_MEM_ALLOC(uint32_t   ,_loop_pred    ,n_act        );
+    CCPM_MEM_ALLOC(uint32_t   ,_loop_queue   ,n_act + 1    );
+
+    ccpmCsrSt loop_succ = {_loop_off, _loop_succ};
+
+    CCPM_TRY_GOTO_END(ccpm_check_loops(n_act, act_ids, lnk_src, lnk_dst, _n_lnk,
+                                       _loop_deg, &loop_succ, _loop_pred, _loop_queue,
+                                       opt->loop));
+    CCPM_STAT_PHASE(stat, CCPM_PHASE_CHECK, t_ph, n_act + _n_lnk);
+
+    size_t n_max    = n_act + ((_n_lnk > n_act) ? _n_lnk : n_act);
+    size_t n_nod    = 3 * n_act;
+    size_t n_arc    = 2 * n_act + _n_lnk;
+    size_t arc_bits = _ccpm_hash_bits(n_arc);
+
+    /*=======================================================================*/
+    CCPM_MEM_ALLOC(uint32_t   ,_n_in         ,n_act        ); /*Link degrees*/
+    CCPM_MEM_ALLOC(uint32_t   ,_n_out        ,n_act        );
+    CCPM_MEM_ALLOC(uint32_t   ,_node         ,n_nod        ); /*Union-find parents, then events of nodes*/
+    CCPM_MEM_ALLOC(uint32_t   ,_arc_src      ,n_arc        );
+    CCPM_MEM_ALLOC(uint32_t   ,_arc_dst      ,n_arc        );
+    CCPM_MEM_ALLOC(uint32_t   ,_arc_tbl      ,CCPM_HASH_SZ(arc_bits));
+    CCPM_MEM_ALLOC(uint32_t   ,_evt_off      ,n_nod + 1    ); /*Output arcs of events*/
+    CCPM_MEM_ALLOC(uint32_t   ,_evt_out      ,n_arc        );
+    CCPM_MEM_ALLOC(uint32_t   ,_evt_deg      ,n_nod        ); /*Unprocessed inputs, then event numbers*/
+    CCPM_MEM_ALLOC(uint32_t   ,_evt_order    ,n_nod + 1    );
+
+    memset(_n_in,    0, n_act * sizeof(uint32_t));
+    memset(_n_out,   0, n_act * sizeof(uint32_t));
+    memset(_arc_tbl, 0, CCPM_HASH_SZ(arc_bits) * sizeof(uint32_t));
+    CCPM_STAT_PHASE(stat, CCPM_PHASE_ALLOC, t_ph, n_nod);
+
+    for (i = 0; i < _n_lnk; i++)
+    {
+        _n_out[lnk_src[i]]++;
+        _n_in[lnk_dst[i]]++;
+    }
+
+    /*Activity i has start node 2 * i and end node 2 * i + 1*/
+    for (i = 0; i < 2 * n_act; i++)
+    {
+        _node[i] = i;
+    }
+
+    size_t start  = CCPM_FAKE;
+    size_t finish = CCPM_FAKE;
+    for (i = 0; i < n_act; i++)
+    {
+        if (!_n_in[i])
+        {
+            start = (CCPM_FAKE == start) ? 2 * i : start;
+            _ccpm_uf_join(_node, start, 2 * i);
+        }
+
+        if (!_n_out[i])
+        {
+            finish = (CCPM_FAKE == finish) ? 2 * i + 1 : finish;
+            _ccpm_uf_join(_node, finish, 2 * i + 1);
+        }
+    }
+
+    for (i = 0; i < _n_lnk; i++)
+    {
+        if ((1 == _n_out[lnk_src[i]]) || (1 == _n_in[lnk_dst[i]]))
+        {
+            _ccpm_uf_join(_node, 2 * lnk_src[i] + 1, 2 * lnk_dst[i]);
+        }
+    }
+
+    /*Roots precede other nodes of their sets*/
+    size_t n_evt = 0;
+    for (i = 0; i < 2 * n_act; i++)
+    {
+        _node[i] = _node[_node[i]];
+    }
+
+    for (i = 0; i < 2 * n_act; i++)
+    {
+        _node[i] = (_node[i] == i) ? n_evt++ : _node[_node[i]];
+    }
+    CCPM_STAT_PHASE(stat, CCPM_PHASE_DEPS, t_ph, n_act + _n_lnk);
+
+    /*=======================================================================*/
+    /*Real activities, parallel ones get new end events*/
+    size_t k = 0;
+    for (i = 0; i < n_act; i++)
+    {
+        uint32_t src = _node[2 * i];
+        uint32_t dst = _node[2 * i + 1];
+        size_t   h   = _ccpm_lnk_slot(_arc_src, _arc_dst, _arc_tbl, arc_bits, src, dst);
+
+        if (_arc_tbl[h])
+        {
+            dst = n_evt++;
+        }
+        else
+        {
+            _arc_tbl[h] = k + 1;
+        }
+        _arc_src[k] = src;
+        _arc_dst[k] = dst;
+        k++;
+    }
+
+    /*New end events are connected to original ones*/
+    for (i = 0; i < n_act; i++)
+    {
+        if (_arc_dst[i] != _node[2 * i + 1])
+        {
+            _arc_src[k] = _arc_dst[i];
+            _arc_dst[k] = _node[2 * i + 1];
+            k++;
+        }
+    }
+
+    /*Dummies of links which nodes were not merged*/
+    for (i = 0; i < _n_lnk; i++)
+    {
+        uint32_t src = _node[2 * lnk_src[i] + 1];
+        uint32_t dst = _node[2 * lnk_dst[i]];
+
+        if (src == dst)
+        {
+            continue;
+        }
+
+        size_t h = _ccpm_lnk_slot(_arc_src, _arc_dst, _arc_tbl, arc_bits, src, dst);
+        if (_arc_tbl[h])
+        {
+            continue;
+        }
+        _arc_tbl[h] = k + 1;
+        _arc_src[k] = src;
+        _arc_dst[k] = dst;
+        k++;
+    }
+    CCPM_STAT_PHASE(stat, CCPM_PHASE_NETWORK, t_ph, k);
+
+    if (k > n_max)
+    {
+        CCPM_LOG_PRINTF("Network does not fit output lists, will build it with dependency processing\n");
+        deps = true;
+        goto end;
+    }
+
+    /*=======================================================================*/
+    /*Number events in topological order, the start event gets 1*/
+    ccpmCsrSt evt_out = {_evt_off, _evt_out};
+
+    memset(_evt_off, 0, (n_evt + 1) * sizeof(uint32_t));
+    memset(_evt_deg, 0, n_evt * sizeof(uint32_t));
+    for (i = 0; i < k; i++)
+    {
+        _evt_off[_arc_src[i] + 1]++;
+        _evt_deg[_arc_dst[i]]++;
+    }
+    _ccpm_csr_prefix(&evt_out, n_evt);
+    for (i = 0; i < k; i++)
+    {
+        _evt_out[_evt_off[_arc_src[i]]++] = i;
+    }
+    _ccpm_csr_rewind(&evt_out, n_evt);
+
+    CCPM_LCLR(_evt_order);
+    for (i = 0; i < n_evt; i++)
+    {
+        if (!_evt_deg[i])
+        {
+            CCPM_LAPP(_evt_order, i);
+        }
+    }
+    CCPM_CHECK_GOTO_END(1 == CCPM_LLEN(_evt_order), CCPM_EUNK);
+
+    for (i = 0; i < CCPM_LLEN(_evt_order); i++)
+    {
+        size_t e = CCPM_LITEM(_evt_order, i);
+
+        for (j = _evt_off[e]; j < _evt_off[e + 1]; j++)
+        {
+            size_t d = _arc_dst[_evt_out[j]];
+
+            if (!--_evt_deg[d])
+            {
+                CCPM_LAPP(_evt_order, d);
+            }
+        }
+    }
+    CCPM_CHECK_GOTO_END(n_evt == CCPM_LLEN(_evt_order), CCPM_EUNK);
+
+    for (i = 0; i < n_evt; i++)
+    {
+        _evt_deg[CCPM_LITEM(_evt_order, i)] = i + 1;
+    }
+
+    /*Real activities keep their order and go first*/
+    CCPM_LCLR(act_src);
+    CCPM_LCLR(act_dst);
+    for (i = 0; i < k; i++)
+    {
+        CCPM_LAPP(act_src, _evt_deg[_arc_src[i]]);
+        CCPM_LAPP(act_dst, _evt_deg[_arc_dst[i]]);
+    }
+    _CCPM_PRINT_NET(act_src, act_dst);
+
+    if (stat)
+    {
+        stat->n_dummy = k - n_act;
+        stat->n_evt   = n_evt;
+        CCPM_STAT_PHASE(stat, CCPM_PHASE_FINALIZE, t_ph, k);
+    }
+end:
+    if (stat)
+    {
+        stat->mem = mem_size;
+    }
+    CCPM_MEM_FREE_ALL();
+
+    if (deps)
+    {
+        ccpmOptSt o = *opt;
+        o.level = CCPM_LEVEL_DEPS;
+
+        /*Links were translated to positions*/
+        for (i = 0; i < _n_lnk; i++)
+        {
+            lnk_src[i] = CCPM_LITEM(act_ids, lnk_src[i]);
+            lnk_dst[i] = CCPM_LITEM(act_ids, lnk_dst[i]);
+        }
+        return _ccpm_make_aoa32_one(act_ids, lnk_src, lnk_dst, _n_lnk, act_src, act_dst, &o);
+    }
+    return ret;
+}
+
+/*===========================================================================*/
+/*to DeepSeek: All allocation must in the function below*/
+static ccpmResultEn _ccpm_make_aoa32_one(uint32_t * act_ids, uint32_t * lnk_src, uint32_t * lnk_dst, size_t n_lnk,
+                                         uint32_t * act_src, uint32_t * act_dst, const ccpmOptSt * opt)
+{
+    ccpmResultEn ret = CCPM_OK;
+
+    size_t i;
+
+    size_t _n_lnk = n_lnk;
+
+    ccpmDepTblSt full = {0};
+    ccpmDepTblSt min  = {0};
+    ccpmDepTblSt inv  = {0};
+    ccpmDepTblSt anc  = {0};
+
+    ccpmRowMemSt row_mem = {0};
+    ccpmSigCacheSt sig;
+
+    CCPM_CHECK_RETURN(act_ids,  CCPM_EINVAL);
+
+    size_t n_act = CCPM_LLEN(act_ids);
+    CCPM_CHECK_RETURN(n_act,   CCPM_EINVAL);
+
+    CCPM_CHECK_RETURN(act_src, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_dst, CCPM_EINVAL);
+
+    CCPM_CHECK_RETURN(lnk_src, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(lnk_dst, CCPM_EINVAL);
+
+    CCPM_CHECK_RETURN(opt, CCPM_EINVAL);
+
+    if (CCPM_LEVEL_FAST == opt->level)
+    {
+        return _ccpm_make_aoa32_fast(act_ids, lnk_src, lnk_dst, n_lnk, act_src, act_dst, opt);
+    }
+
+    ccpmStatSt * stat = opt->stat;
+    double       t_ph = 0.0;
+    if (stat)
+    {
+        memset(stat, 0, sizeof(ccpmStatSt));
+        stat->n_comp = 1;
+        t_ph = _ccpm_time();
+    }
+
+    CCPM_CHECK_RETURN((CCPM_DEPS_DENSE  == opt->deps) ||
+                      (CCPM_DEPS_SPARSE == opt->deps), CCPM_EINVAL);
+    CCPM_CHECK_RETURN((CCPM_CLOSURE_ITER == opt->closure) ||
+                      (CCPM_CLOSURE_TOPO == opt->closure), CCPM_EINVAL);
+    CCPM_CHECK_RETURN((CCPM_SORT_RADIX == opt->sort) ||
+                      (CCPM_SORT_MERGE == opt->sort), CCPM_EINVAL);
+    CCPM_CHECK_RETURN((CCPM_LEVEL_DEPS == opt->level) ||
+                      (CCPM_LEVEL_FULL == opt->level), CCPM_EINVAL);
+
+    CCPM_CHECK_RETURN(n_act < CCPM_FAKE, CCPM_ELIM);
+    CCPM_CHECK_RETURN(opt->dedup || (_n_lnk < CCPM_FAKE), CCPM_ELIM);
+
+    /*Check memory budget before any allocation, fall back to sparse storage*/
+    ccpmDepsEn deps = opt->deps;
+    if (opt->max_mem && (ccpm_make_aoa32_mem(n_act, _n_lnk, opt) > opt->max_mem))
+    {
+        ccpmOptSt lean = *opt;
+        lean.deps = CCPM_DEPS_SPARSE;
+
+        CCPM_CHECK_RETURN(ccpm_make_aoa32_mem(n_act, _n_lnk, &lean) <= opt->max_mem, CCPM_ENOMEM);
+        CCPM_LOG_PRINTF("Memory budget exceeded, will use sparse dependency storage\n");
+        deps = CCPM_DEPS_SPARSE;
+    }
+
+    CCPM_MEM_INIT_CTX(opt->ctx);
+
+    /*=======================================================================*/
+    /*Hash tables for input validation and ID lookup*/
+    size_t id_bits  = _ccpm_hash_bits(n_act);
+    size_t lnk_bits = _ccpm_hash_bits(_n_lnk);
+
+    CCPM_MEM_ALLOC(uint32_t   ,_id_tbl       ,CCPM_HASH_SZ(id_bits) );
+    CCPM_MEM_ALLOC(uint32_t   ,_lnk_tbl      ,CCPM_HASH_SZ(lnk_bits));
+
+    CCPM_TRY_GOTO_END(ccpm_check_act_idss(act_ids, _id_tbl, id_bits));
+    CCPM_TRY_GOTO_END(ccpm_check_links(lnk_src, lnk_dst, &_n_lnk, _lnk_tbl, lnk_bits, opt->dedup));
+
+    /*Prepare links for computing dependency info*/
+    CCPM_TRY_GOTO_END(ccpm_links_prepare(act_ids, lnk_src, lnk_dst, _n_lnk, _id_tbl, id_bits));
+
+    /*=======================================================================*/
+    /*Reject loops before large allocations*/
+    CCPM_MEM_ALLOC(uint32_t   ,_loop_deg     ,n_act        );
+    CCPM_MEM_ALLOC(uint32_t   ,_loop_off     ,n_act + 1    );
+    CCPM_MEM_ALLOC(uint32_t   ,_loop_succ    ,_n_lnk + 1   );
+    CCPM_MEM_ALLOC(uint32_t   ,_loop_pred    ,n_act        );
+    CCPM_MEM_ALLOC(uint32_t   ,_loop_queue   ,n_act + 1    );
+
+    ccpmCsrSt loop_succ = {_loop_off, _loop_succ};
+
+    CCPM_TRY_GOTO_END(ccpm_check_loops(n_act, act_ids, lnk_src, lnk_dst, _n_lnk,
+                                       _loop_deg, &loop_succ, _loop_pred, _loop_queue,
+                                       opt->loop));
+    CCPM_STAT_PHASE(stat, CCPM_PHASE_CHECK, t_ph, n_act + _n_lnk);
+
+    size_t n_max = n_act + ((_n_lnk > n_act) ? _n_lnk : n_act);
+
+    /*Dependency tables are n_max * n_max in dense mode only*/
+    bool   dense = (CCPM_DEPS_DENSE == deps);
+    size_t n_tbl = dense ? n_max * n_max : 1;
+    size_t n_map = dense ? n_max * CCPM_BSET_WORDS(n_max) : 1;
+    size_t n_row = dense ? 1 : n_max;
+
+    /*Successor lists are needed for topological closure only*/
+    bool   topo   = (CCPM_CLOSURE_TOPO == opt->closure);
+    size_t n_topo = topo ? n_max  : 1;
+    size_t n_succ = topo ? _n_lnk : 0;
+
+    CCPM_LOG_PRINTF("n_act: %5d\nn_max: %5d\n",  (int)n_act, (int)n_max);
+
+    /*=======================================================================*/
+    CCPM_MEM_ALLOC(uint32_t   ,_act_ids      ,n_max + 1   );
+    CCPM_MEM_ALLOC(uint32_t   ,_act_pos      ,n_max + 1   ); /*Works positions in sorted lists*/
+    CCPM_MEM_ALLOC(uint32_t   ,_act_src      ,n_max + 1   );
+    CCPM_MEM_ALLOC(uint32_t   ,_act_dst      ,n_max + 1   );
+
+    /*=======================================================================*/
+    CCPM_MEM_ALLOC(uint32_t   ,_full_act_ndep ,n_max        ); /*Number of dependencies*/
+    CCPM_MEM_ALLOC(uint32_t   ,_full_act_dep  ,n_tbl        ); /*Array of dependencies*/
+    CCPM_MEM_ALLOC(uint64_t   ,_full_dep_map  ,n_map        ); /*Work dependency map*/
+    CCPM_MEM_ALLOC(ccpmRowSt  ,_full_dep_row  ,n_row        ); /*Work dependency sets*/
+
+    /*=======================================================================*/
+    //CCPM_MEM_ALLOC(uint32_t   ,_min_act_ndep ,n_max        ); /*Number of dependencies*/
+    CCPM_MEM_ALLOC(uint32_t   ,_min_act_dep  ,n_tbl        ); /*Array of dependencies*/
+    CCPM_MEM_ALLOC(uint64_t   ,_min_dep_map  ,n_map        ); /*Work dependency map*/
+    CCPM_MEM_ALLOC(ccpmRowSt  ,_min_dep_row  ,n_row        ); /*Work dependency sets*/
+
+    /*=======================================================================*/
+    CCPM_MEM_ALLOC(uint32_t   ,_tmp          ,2 * n_max + 1);
+    CCPM_MEM_ALLOC(uint8_t    ,_mark         ,n_max        );
+
+    /*=======================================================================*/
+    CCPM_MEM_ALLOC(uint32_t   ,_topo_deg     ,n_topo       ); /*Number of unprocessed dependencies*/
+    CCPM_MEM_ALLOC(uint32_t   ,_topo_off     ,n_topo + 1   ); /*Successor list offsets*/
+    CCPM_MEM_ALLOC(uint32_t   ,_topo_succ    ,n_succ + 1   ); /*Successor lists*/
+
+    /*=======================================================================*/
+    /* Additional allocations for new functions */
+    CCPM_MEM_ALLOC(uint32_t   ,_started     ,n_max + 1   );
+    CCPM_MEM_ALLOC(uint32_t   ,_num_dep     ,n_max + 1   );
+    CCPM_MEM_ALLOC(uint32_t   ,_events      ,n_max + 1   );
+    CCPM_MEM_ALLOC(uint32_t   ,_chk         ,n_max + 1   );
+
+    /* For nested and overlapping dependencies */
+    CCPM_MEM_ALLOC(uint32_t   ,_min_com_deps ,n_max       );
+    CCPM_MEM_ALLOC(uint32_t   ,_tmp_deps     ,n_max + 1   );
+    CCPM_MEM_ALLOC(ccpmRowSt  ,_inv_dep_row  ,n_max       ); /*Inverted dependency index*/
+    CCPM_MEM_ALLOC(ccpmRowSt  ,_anc_row      ,n_max       ); /*Subset search anchors*/
+    CCPM_MEM_ALLOC(uint32_t   ,_anc_of       ,n_max       );
+    CCPM_MEM_ALLOC(uint32_t   ,_act_rank     ,n_max       ); /*Activity positions in _act_pos*/
+    CCPM_MEM_ALLOC(uint32_t   ,_com_cnt      ,n_max       ); /*Common dependency counters*/
+    CCPM_MEM_ALLOC(uint32_t   ,_com_touched  ,n_max + 1   );
+    CCPM_MEM_ALLOC(uint32_t   ,_com_cand     ,n_max + 1   );
+    size_t sig_bits = _ccpm_hash_bits(n_max);
+    CCPM_MEM_ALLOC(ccpmSigSt  ,_sig_slot     ,CCPM_HASH_SZ(sig_bits)); /*Failed search cache*/
+    CCPM_MEM_ALLOC(uint32_t   ,_sig_stamp    ,n_max       );
+
+    /* For optimize_network_stage_1, there are at most n_max events and dummies */
+    CCPM_MEM_ALLOC(uint32_t   ,_evt_din_off ,n_max + 1   ); /*Dummy input offsets*/
+    CCPM_MEM_ALLOC(uint32_t   ,_evt_dins    ,n_max       ); /*Dummy inputs*/
+    CCPM_MEM_ALLOC(uint32_t   ,_evt_deps    ,n_max       ); /*Source events of dummy inputs*/
+    CCPM_MEM_ALLOC(uint32_t   ,_evt_udep_off,n_max + 1   );
+    CCPM_MEM_ALLOC(uint32_t   ,_evt_udeps   ,n_max       ); /*Unique source events*/
+    CCPM_MEM_ALLOC(uint32_t   ,_evt_post_off,n_max + 1   );
+    CCPM_MEM_ALLOC(uint32_t   ,_evt_post    ,n_max       ); /*Events listed by source events*/
+    CCPM_MEM_ALLOC(uint8_t    ,_evt_real    ,n_max       );
+
+    /* For optimize_network_stage_2 */
+    CCPM_MEM_ALLOC(uint32_t   ,_evt_dout    ,n_max       );
+    CCPM_MEM_ALLOC(uint32_t   ,_evt_nout    ,n_max       );
+
+    /* For add_needed_dummies */
+    //CCPM_MEM_ALLOC(uint32_t   ,_sorted_activities, 2 * n_max + 1);
+    CCPM_MEM_ALLOC(uint32_t   ,_sort_values      , 2 * n_max + 1);
+
+    /*=======================================================================*/
+    /*Sparse rows get the rest of the budget, they grow with dependency closure*/
+    if (opt->max_mem)
+    {
+        CCPM_CHECK_GOTO_END(mem_size < opt->max_mem, CCPM_ENOMEM);
+        row_mem.max = opt->max_mem - mem_size;
+    }
+
+    _ccpm_tbl_init(&full, deps, n_max, _full_act_dep, _full_dep_map, _full_dep_row, &row_mem);
+    _ccpm_tbl_init(&min,  deps, n_max, _min_act_dep,  _min_dep_map,  _min_dep_row,  &row_mem);
+    _ccpm_tbl_init(&inv,  CCPM_DEPS_SPARSE, n_max, 0, 0, _inv_dep_row, &row_mem);
+    _ccpm_tbl_init(&anc,  CCPM_DEPS_SPARSE, n_max, 0, 0, _anc_row,     &row_mem);
+
+    memset(_mark,        0, n_max * sizeof(uint8_t));
+    memset(_com_cnt,     0, n_max * sizeof(uint32_t));
+    CCPM_LCLR(_tmp_deps);
+
+    for (i = 0; i <= CCPM_LLEN(act_ids); i++)
+    {
+        _act_ids[i] = act_ids[i];
+    }
+    CCPM_STAT_PHASE(stat, CCPM_PHASE_ALLOC, t_ph, n_max);
+
+    /*Compute dependency info as is*/
+    CCPM_TRY_GOTO_END(ccpm_populate_dep_info(_n_lnk, lnk_src, lnk_dst, &full));
+    _CCPM_PRINT_DEPS(n_act, &full);
+    CCPM_STAT_PHASE(stat, CCPM_PHASE_DEPS, t_ph, _n_lnk);
+
+    if (CCPM_CLOSURE_TOPO == opt->closure)
+    {
+        /*Compute full and minimal dependency info at once*/
+        CCPM_TRY_GOTO_END(ccpm_topo_deps(n_act, &full, &min, _act_pos, _topo_deg,
+                                         _topo_off, _topo_succ, _tmp, _mark,
+                                         opt->n_threads));
+        _CCPM_PRINT_DEPS(n_act, &full);
+
+        for (i = 0; i < n_max; i++)
+        {
+            _full_act_ndep[i] = _ccpm_tbl_len(&full, i);
+        }
+
+        CCPM_TRY_GOTO_END(ccpm_sort_act_pos(n_act, _act_pos, _full_act_ndep, _tmp, opt->sort));
+    }
+    else
+    {
+        /*Compute full dependency info*/
+        CCPM_TRY_GOTO_END(ccpm_build_full_deps(n_act, &full, _tmp, _mark));
+        _CCPM_PRINT_DEPS(n_act, &full);
+
+        for (i = 0; i < n_max; i++)
+        {
+            _full_act_ndep[i] = _ccpm_tbl_len(&full, i);
+        }
+
+        CCPM_TRY_GOTO_END(ccpm_optimize_deps(n_act, _act_pos, _full_act_ndep, &full, &min, _tmp, _mark,
+                                             opt->sort, opt->n_threads));
+    }
+
+    if (stat)
+    {
+        /*Topological closure merges a row per link, iterative one merges a row per dependency twice*/
+        stat->n_full = _ccpm_tbl_total(&full, n_act);
+        stat->n_min  = _ccpm_tbl_total(&min,  n_act);
+        CCPM_STAT_PHASE(stat, CCPM_PHASE_CLOSURE, t_ph, topo ? _n_lnk : 2 * stat->n_full);
+    }
+    _CCPM_PRINT_DEPS(n_act, &min);
+    _CCPM_PRINT_ACT_POS(_act_ids, _act_pos);
+
+    /*Full dependencies are not used after this point, give their rows to later phases*/
+    _ccpm_tbl_free(&full);
+
+    for (i = 0; i < n_act; i++)
+    {
+        _act_rank[CCPM_LITEM(_act_pos, i)] = i;
+    }
+    CCPM_TRY_GOTO_END(ccpm_build_inv_deps(n_act, &min, &inv));
+
+    /* Process nested dependencies, iterations are index items read */
+    _ccpm_sig_init(&sig, _sig_slot, sig_bits, _sig_stamp, n_max);
+    CCPM_TRY_GOTO_END(ccpm_process_nested_deps(n_act, _act_pos, _act_rank,
+                                              &min, &inv, &anc, _anc_of,
+                                              _act_ids,
+                                              _min_com_deps,
+                                              _com_cand, _tmp_deps,
+                                              &sig, stat ? stat->iter + CCPM_PHASE_NESTED : 0));
+    _CCPM_PRINT_DEPS(CCPM_LLEN(_act_ids), &min);
+    _CCPM_PRINT_ACT_POS(_act_ids, _act_pos);
+    CCPM_STAT_PHASE(stat, CCPM_PHASE_NESTED, t_ph, 0);
+
+    /* Process overlapping dependencies */
+    _ccpm_sig_init(&sig, _sig_slot, sig_bits, _sig_stamp, n_max);
+    CCPM_TRY_GOTO_END(ccpm_process_overlapping_deps(_act_pos, _act_rank,
+                                                   &min, &inv,
+                                                   _act_ids,
+                                                   _min_com_deps,
+                                                   _com_cnt, _com_touched, _com_cand,
+                                                   &sig, stat ? stat->iter + CCPM_PHASE_OVERLAPPING : 0));
+    _CCPM_PRINT_DEPS(CCPM_LLEN(_act_ids), &min);
+    _CCPM_PRINT_ACT_POS(_act_ids, _act_pos);
+    CCPM_STAT_PHASE(stat, CCPM_PHASE_OVERLAPPING, t_ph, 0);
+
+    /* Build network */
+    CCPM_TRY_GOTO_END(ccpm_build_network(_act_ids, _act_pos,
+                                        &min, &inv,
+                                        _act_src, _act_dst,
+                                        _started, _num_dep,
+                                        _events, _chk, _tmp_deps,
+                                        _anc_of, _com_cnt, _sig_slot, sig_bits));
+    _CCPM_PRINT_NET(_act_src, _act_dst);
+    _CCPM_PRINT_ACT_POS(_act_ids, _act_pos);
+    CCPM_STAT_PHASE(stat, CCPM_PHASE_NETWORK, t_ph, CCPM_LLEN(_act_ids));
+
+    /* Optimize network stage 1 */
+    ccpmCsrSt evt_dins  = {_evt_din_off,  _evt_dins};
+    ccpmCsrSt evt_udeps = {_evt_udep_off, _evt_udeps};
+    ccpmCsrSt evt_post  = {_evt_post_off, _evt_post};
+
+    if (CCPM_LEVEL_FULL == opt->level)
+    {
+        CCPM_TRY_GOTO_END(ccpm_optimize_network_stage_1(_act_ids, _act_src, _act_dst,
+                                                       _events,
+                                                       &evt_dins, _evt_deps,
+                                                       &evt_udeps, &evt_post,
+                                                       _evt_real, _mark,
+                                                       _com_cnt, _com_touched));
+        _CCPM_PRINT_NET(_act_src, _act_dst);
+        _CCPM_PRINT_ACT_POS(_act_ids, _act_pos);
+        CCPM_STAT_PHASE(stat, CCPM_PHASE_STAGE_1, t_ph, CCPM_LLEN(_act_src));
+
+        /* Optimize network stage 2 */
+        CCPM_TRY_GOTO_END(ccpm_optimize_network_stage_2(_act_ids, _act_src, _act_dst,
+                                                       _events, _evt_dout, _evt_nout));
+        _CCPM_PRINT_NET(_act_src, _act_dst);
+        _CCPM_PRINT_ACT_POS(_act_ids, _act_pos);
+        CCPM_STAT_PHASE(stat, CCPM_PHASE_STAGE_2, t_ph, CCPM_LLEN(_act_src));
+    }
+
+    /* Add needed dummies */
+    //n_events = CCPM_LLEN(_events);
+    CCPM_TRY_GOTO_END(ccpm_add_needed_dummies(_act_ids, _act_pos,
+                                             _act_src, _act_dst, _started, _events,
+                                             _sort_values, _tmp, opt->sort,
+                                             stat ? stat->iter + CCPM_PHASE_DUMMIES : 0));
+    _CCPM_PRINT_NET(_act_src, _act_dst);
+    _CCPM_PRINT_ACT_POS(_act_ids, _act_pos);
+    CCPM_STAT_PHASE(stat, CCPM_PHASE_DUMMIES, t_ph, 0);
+
+    /* Finalize network */
+    CCPM_TRY_GOTO_END(ccpm_finalize_network(_act_ids, _act_pos,
+                                           _act_src, _act_dst, _events,
+                                           act_ids, act_src, act_dst));
+    _CCPM_PRINT_NET(_act_src, _act_dst);
+    _CCPM_PRINT_ACT_POS(_act_ids, _act_pos);
+    _CCPM_PRINT_NET(act_src, act_dst);
+    _CCPM_PRINT_ACT_IDS(act_ids);
+
+    if (stat)
+    {
+        stat->n_dummy = CCPM_LLEN(act_src) - CCPM_LLEN(act_ids);
+        for (i = 0; i < CCPM_LLEN(act_src); i++)
+        {
+            if (CCPM_LITEM(act_dst, i) > stat->n_evt)
+            {
+                stat->n_evt = CCPM_LITEM(act_dst, i);
+            }
+        }
+        CCPM_STAT_PHASE(stat, CCPM_PHASE_FINALIZE, t_ph, CCPM_LLEN(act_src));
+    }
+end:
+    if (stat)
+    {
+        stat->mem = mem_size + row_mem.peak;
+    }
+    _ccpm_tbl_free(&anc);
+    _ccpm_tbl_free(&inv);
+    _ccpm_tbl_free(&min);
+    _ccpm_tbl_free(&full);
+    CCPM_MEM_FREE_ALL();
+    return ret;
+}
+
+/*===========================================================================*/
+/*
+Networks of components are joined at common start and finish events:
+start events become event 1, finish events become the last event, other
+events are numbered in component order. Real activities of components
+go first, then dummies of components. Only activities without links may
+span from start to finish, they are built together, so at most one such
+arc is expected, other ones are moved to new events with dummies
+to the finish. When joined dummies do not fit output lists the network
+is built at once. Statistics are summed over components.
+*/
+ccpmResultEn ccpm_make_aoa32(uint32_t * act_ids, uint32_t * lnk_src, uint32_t * lnk_dst, size_t n_lnk,
+                             uint32_t * act_src, uint32_t * act_dst, const ccpmOptSt * opt)
+{
+    ccpmResultEn ret = CCPM_OK;
+
+    /*Statistics of failed checks are zero too*/
+    if (opt && opt->stat)
+    {
+        memset(opt->stat, 0, sizeof(ccpmStatSt));
+    }
+
+    size_t i;
+    size_t g;
+
+    bool whole = false;
+
+    CCPM_CHECK_RETURN(act_ids,  CCPM_EINVAL);
+
+    size_t n_act = CCPM_LLEN(act_ids);
+    CCPM_CHECK_RETURN(n_act,   CCPM_EINVAL);
+
+    CCPM_CHECK_RETURN(act_src, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_dst, CCPM_EINVAL);
+
+    CCPM_CHECK_RETURN(lnk_src, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(lnk_dst, CCPM_EINVAL);
+
+    CCPM_CHECK_RETURN(opt, CCPM_EINVAL);
+
+    /*Activities without links are built together anyway*/
+    if (!opt->split || (n_act < 2) || !n_lnk)
+    {
+        return _ccpm_make_aoa32_one(act_ids, lnk_src, lnk_dst, n_lnk, act_src, act_dst, opt);
+    }
+
+    CCPM_CHECK_RETURN(n_act < CCPM_FAKE, CCPM_ELIM);
+    CCPM_CHECK_RETURN(opt->dedup || (n_lnk < CCPM_FAKE), CCPM_ELIM);
+
+    ccpmStatSt * stat = opt->stat;
+    double       t_ph = 0.0;
+    size_t       mem  = 0; /*Peak memory of components*/
+    if (stat)
+    {
+        memset(stat, 0, sizeof(ccpmStatSt));
+        t_ph = _ccpm_time();
+    }
+
+    CCPM_MEM_INIT_CTX(opt->ctx);
+
+    /*=======================================================================*/
+    size_t id_bits = _ccpm_hash_bits(n_act);
+    size_t n_comp  = 0;
+
+    CCPM_MEM_ALLOC(uint32_t   ,_id_tbl       ,CCPM_HASH_SZ(id_bits));
+    CCPM_MEM_ALLOC(uint32_t   ,_comp         ,n_act        ); /*Component numbers of activities*/
+    CCPM_MEM_ALLOC(uint8_t    ,_mark         ,n_act        );
+
+    CCPM_TRY_GOTO_END(ccpm_check_act_idss(act_ids, _id_tbl, id_bits));
+    CCPM_TRY_GOTO_END(ccpm_find_components(act_ids, lnk_src, lnk_dst, n_lnk, _id_tbl, id_bits,
+                                           _comp, _mark, &n_comp));
+    if (n_comp < 2)
+    {
+        whole = true;
+        goto end;
+    }
+
+    /*=======================================================================*/
+    /*Activity lists, links and networks of components go one after another*/
+    CCPM_MEM_ALLOC(uint32_t   ,_act_off      ,n_comp + 1   );
+    CCPM_MEM_ALLOC(uint32_t   ,_lnk_off      ,n_comp + 1   );
+    CCPM_MEM_ALLOC(uint32_t   ,_net_off      ,n_comp + 1   );
+    CCPM_MEM_ALLOC(ccpmResultEn,_comp_ret    ,n_comp       );
+    CCPM_MEM_ALLOC(ccpmStatSt ,_comp_stat    ,stat ? n_comp : 1);
+
+    ccpmCsrSt comp_lnk = {_lnk_off, 0};
+
+    memset(_act_off, 0, (n_comp + 1) * sizeof(uint32_t));
+    memset(_lnk_off, 0, (n_comp + 1) * sizeof(uint32_t));
+
+    for (i = 0; i < n_act; i++)
+    {
+        _act_off[_comp[i] + 1]++;
+    }
+
+    for (i = 0; i < n_lnk; i++)
+    {
+        _lnk_off[_comp[_id_tbl[_ccpm_id_slot(act_ids, _id_tbl, id_bits, lnk_src[i])] - 1] + 1]++;
+    }
+
+    size_t n_loc = 0; /*Max network length of a component*/
+
+    _net_off[0] = 0;
+    for (g = 0; g < n_comp; g++)
+    {
+        size_t n = _act_off[g + 1];
+        size_t l = _lnk_off[g + 1];
+        size_t m = n + ((l > n) ? l : n);
+
+        _net_off[g + 1] = _net_off[g] + m + 1;
+        n_loc  = (m > n_loc) ? m : n_loc;
+
+        _act_off[g + 1] += _act_off[g];
+    }
+    _ccpm_csr_prefix(&comp_lnk, n_comp);
+
+    CCPM_MEM_ALLOC(uint32_t   ,_comp_ids     ,n_act + n_comp); /*Activity lists of components*/
+    CCPM_MEM_ALLOC(uint32_t   ,_comp_loop    ,n_act + n_comp); /*Loop lists of components*/
+    CCPM_MEM_ALLOC(uint32_t   ,_comp_src     ,n_lnk        );
+    CCPM_MEM_ALLOC(uint32_t   ,_comp_dst     ,n_lnk        );
+    CCPM_MEM_ALLOC(uint32_t   ,_net_src      ,_net_off[n_comp]);
+    CCPM_MEM_ALLOC(uint32_t   ,_net_dst      ,_net_off[n_comp]);
+
+    for (g = 0; g < n_comp; g++)
+    {
+        CCPM_LCLR(_comp_ids + _act_off[g] + g);
+    }
+
+    for (i = 0; i < n_act; i++)
+    {
+        CCPM_LAPP(_comp_ids + _act_off[_comp[i]] + _comp[i], CCPM_LITEM(act_ids, i));
+    }
+
+    for (i = 0; i < n_lnk; i++)
+    {
+        size_t k = _lnk_off[_comp[_id_tbl[_ccpm_id_slot(act_ids, _id_tbl, id_bits, lnk_src[i])] - 1]]++;
+
+        _comp_src[k] = lnk_src[i];
+        _comp_dst[k] = lnk_dst[i];
+    }
+    _ccpm_csr_rewind(&comp_lnk, n_comp);
+    CCPM_STAT_PHASE(stat, CCPM_PHASE_CHECK, t_ph, n_act + n_lnk);
+
+    /*=======================================================================*/
+    ccpmOptSt copt = *opt;
+    copt.loop  = 0;
+    copt.stat  = 0;
+    copt.split = false;
+
+    int n_thr = (int)ccpm_n_threads(opt->n_threads);
+    if (opt->max_mem)
+    {
+        CCPM_CHECK_GOTO_END(mem_size < opt->max_mem, CCPM_ENOMEM);
+        copt.max_mem = opt->max_mem - mem_size;
+
+        /*
+        Sparse rows may outgrow the estimates, so components are built
+        one at a time with own buffers, each one gets the whole budget
+        */
+        n_thr    = 1;
+        copt.ctx = 0;
+    }
+
+    ptrdiff_t c;
+#pragma omp parallel for num_threads(n_thr) if (n_thr > 1) schedule(dynamic, 1)
+    for (c = 0; c < (ptrdiff_t)n_comp; c++)
+    {
+        ccpmOptSt o = copt;
+
+        /*Workspace can't be shared between threads*/
+        if (n_thr > 1)
+        {
+            o.ctx       = 0;
+            o.n_threads = 1;
+        }
+        o.loop = _comp_loop + _act_off[c] + c;
+        o.stat = stat ? _comp_stat + c : 0;
+
+        _comp_ret[c] = _ccpm_make_aoa32_one(_comp_ids + _act_off[c] + c,
+                                            _comp_src + _lnk_off[c], _comp_dst + _lnk_off[c],
+                                            _lnk_off[c + 1] - _lnk_off[c],
+                                            _net_src + _net_off[c], _net_dst + _net_off[c], &o);
+    }
+
+    if (stat)
+    {
+        for (g = 0; g < n_comp; g++)
+        {
+            for (i = 0; i < CCPM_PHASE_NUM; i++)
+            {
+                stat->time[i] += _comp_stat[g].time[i];
+                stat->iter[i] += _comp_stat[g].iter[i];
+            }
+            stat->n_full += _comp_stat[g].n_full;
+            stat->n_min  += _comp_stat[g].n_min;
+
+            if ((n_thr > 1) || copt.ctx)
+            {
+                mem += _comp_stat[g].mem;
+            }
+            else if (_comp_stat[g].mem > mem)
+            {
+                mem = _comp_stat[g].mem;
+            }
+        }
+        stat->n_comp = n_comp;
+        t_ph = _ccpm_time();
+    }
+
+    /*The first failed component is reported*/
+    for (g = 0; g < n_comp; g++)
+    {
+        if ((CCPM_ELOOP == _comp_ret[g]) && opt->loop)
+        {
+            uint32_t * loop = _comp_loop + _act_off[g] + g;
+            memcpy(opt->loop, loop, (CCPM_LLEN(loop) + 1) * sizeof(uint32_t));
+        }
+        CCPM_TRY_GOTO_END(_comp_ret[g]);
+    }
+
+    /*=======================================================================*/
+    /*Map events of components, start and finish events are marked by 1 and 2*/
+    CCPM_MEM_ALLOC(uint32_t   ,_evt_map      ,n_loc + 2    );
+    CCPM_MEM_ALLOC(uint32_t   ,_evt_extra    ,_net_off[n_comp] + 1);
+
+    CCPM_LCLR(_evt_extra);
+
+    size_t n_evt  = 1; /*The start event*/
+    size_t n_net  = 0;
+    bool   direct = false;
+    for (g = 0; g < n_comp; g++)
+    {
+        uint32_t * src = _net_src + _net_off[g];
+        uint32_t * dst = _net_dst + _net_off[g];
+        size_t     n   = CCPM_LLEN(src);
+        size_t     n_s = 0;
+        size_t     n_f = 0;
+
+        memset(_evt_map, 0, (n + 2) * sizeof(uint32_t));
+        for (i = 0; i < n; i++)
+        {
+            CCPM_CHECK_GOTO_END(CCPM_LITEM(src, i) <= n + 1, CCPM_EUNK);
+            CCPM_CHECK_GOTO_END(CCPM_LITEM(dst, i) <= n + 1, CCPM_EUNK);
+
+            _evt_map[CCPM_LITEM(src, i)] |= 1;
+            _evt_map[CCPM_LITEM(dst, i)] |= 2;
+        }
+
+        for (i = 1; i <= n + 1; i++)
+        {
+            switch (_evt_map[i])
+            {
+            case 1:
+                n_s++;
+                _evt_map[i] = 1;
+                break;
+            case 2:
+                n_f++;
+                _evt_map[i] = CCPM_FAKE;
+                break;
+            case 3:
+                _evt_map[i] = ++n_evt;
+                break;
+            default:
+                break;
+            }
+        }
+        CCPM_CHECK_GOTO_END((1 == n_s) && (1 == n_f), CCPM_EUNK);
+
+        for (i = 0; i < n; i++)
+        {
+            CCPM_LITEM(src, i) = _evt_map[CCPM_LITEM(src, i)];
+            CCPM_LITEM(dst, i) = _evt_map[CCPM_LITEM(dst, i)];
+
+            if ((1 != CCPM_LITEM(src, i)) || (CCPM_FAKE != CCPM_LITEM(dst, i)))
+            {
+                continue;
+            }
+
+            if (direct)
+            {
+                CCPM_LITEM(dst, i) = ++n_evt;
+                CCPM_LAPP(_evt_extra, n_evt);
+            }
+            direct = true;
+        }
+        n_net += n;
+    }
+
+    /*Output lists hold n_max items*/
+    if (n_net + CCPM_LLEN(_evt_extra) > n_act + ((n_lnk > n_act) ? n_lnk : n_act))
+    {
+        CCPM_LOG_PRINTF("Joined network does not fit output lists, will build it at once\n");
+        whole = true;
+        goto end;
+    }
+
+    uint32_t fin = ++n_evt; /*The finish event*/
+    CCPM_CHECK_GOTO_END(fin < CCPM_FAKE, CCPM_ELIM);
+
+    /*=======================================================================*/
+    CCPM_LCLR(act_ids);
+    CCPM_LCLR(act_src);
+    CCPM_LCLR(act_dst);
+
+    /*Real activities go first*/
+    for (g = 0; g < n_comp; g++)
+    {
+        uint32_t * ids = _comp_ids + _act_off[g] + g;
+        uint32_t * src = _net_src + _net_off[g];
+        uint32_t * dst = _net_dst + _net_off[g];
+
+        for (i = 0; i < CCPM_LLEN(ids); i++)
+        {
+            CCPM_LAPP(act_ids, CCPM_LITEM(ids, i));
+            CCPM_LAPP(act_src, CCPM_LITEM(src, i));
+            CCPM_LAPP(act_dst, (CCPM_FAKE == CCPM_LITEM(dst, i)) ? fin : CCPM_LITEM(dst, i));
+        }
+    }
+
+    for (g = 0; g < n_comp; g++)
+    {
+        uint32_t * ids = _comp_ids + _act_off[g] + g;
+        uint32_t * src = _net_src + _net_off[g];
+        uint32_t * dst = _net_dst + _net_off[g];
+
+        for (i = CCPM_LLEN(ids); i < CCPM_LLEN(src); i++)
+        {
+            CCPM_LAPP(act_src, CCPM_LITEM(src, i));
+            CCPM_LAPP(act_dst, (CCPM_FAKE == CCPM_LITEM(dst, i)) ? fin : CCPM_LITEM(dst, i));
+        }
+    }
+
+    for (i = 0; i < CCPM_LLEN(_evt_extra); i++)
+    {
+        CCPM_LAPP(act_src, CCPM_LITEM(_evt_extra, i));
+        CCPM_LAPP(act_dst, fin);
+    }
+
+    if (stat)
+    {
+        stat->n_dummy = CCPM_LLEN(act_src) - CCPM_LLEN(act_ids);
+        stat->n_evt   = fin;
+        CCPM_STAT_PHASE(stat, CCPM_PHASE_FINALIZE, t_ph, n_net);
+    }
+end:
+    if (stat)
+    {
+        stat->mem = mem_size + mem;
+    }
+    CCPM_MEM_FREE_ALL();
+
+    if (whole)
+    {
+        return _ccpm_make_aoa32_one(act_ids, lnk_src, lnk_dst, n_lnk, act_src, act_dst, opt);
+    }
+    return ret;
+}
+
+/*===========================================================================*/
+/*
+Independent networks are built by a pool of threads, one network per
+thread at a time, so throughput grows with the number of threads. Each
+network is built by ccpm_make_aoa32 with opt, its status is written to
+ret[k], failed networks do not stop other ones. Loop lists and statistics
+are not reported, with several threads networks are built with own
+buffers in one thread each.
+*/
+ccpmResultEn ccpm_make_aoa32_many(size_t n_net, uint32_t ** act_ids,
+                                  uint32_t ** lnk_src, uint32_t ** lnk_dst, const size_t * n_lnk,
+                                  uint32_t ** act_src, uint32_t ** act_dst,
+                                  ccpmResultEn * ret, const ccpmOptSt * opt)
+{
+    CCPM_CHECK_RETURN(act_ids, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(lnk_src, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(lnk_dst, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(n_lnk,   CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_src, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_dst, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(ret,     CCPM_EINVAL);
+    CCPM_CHECK_RETURN(opt,     CCPM_EINVAL);
+
+    ccpmOptSt copt = *opt;
+    copt.loop = 0;
+    copt.stat = 0;
+
+    int n_thr = (int)ccpm_n_threads(opt->n_threads);
+    if (n_thr > 1)
+    {
+        /*Workspace can't be shared between threads*/
+        copt.ctx       = 0;
+        copt.n_threads = 1;
+    }
+
+    ptrdiff_t k;
+#pragma omp parallel for num_threads(n_thr) if (n_thr > 1) schedule(dynamic, 1)
+    for (k = 0; k < (ptrdiff_t)n_net; k++)
+    {
+        ret[k] = ccpm_make_aoa32(act_ids[k], lnk_src[k], lnk_dst[k], n_lnk[k],
+                                 act_src[k], act_dst[k], &copt);
+    }
+    return CCPM_OK;
+}
+
+/*===========================================================================*/
+ccpmResultEn ccpm_make_full_map(uint16_t * act_ids,
+                                uint16_t * lnk_src,      uint16_t * lnk_dst,
+                                size_t     n_lnk,        size_t     n_max,
+                                uint32_t * full_act_dep, uint8_t  * full_dep_map)
+{
+    ccpmResultEn ret = CCPM_OK;
+
+    size_t i;
+
+    CCPM_CHECK_RETURN(act_ids, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(lnk_src, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(lnk_dst, CCPM_EINVAL);
+
+    size_t n_act = CCPM_LLEN(act_ids);
+
+    CCPM_CHECK_RETURN(n_act < CCPM_FAKE16, CCPM_ELIM);
+
+    CCPM_MEM_INIT();
+
+    CCPM_MEM_ALLOC(uint32_t   ,_act_ids      ,n_act + 1   );
+    CCPM_MEM_ALLOC(uint32_t   ,_lnk_src      ,n_lnk + 1   );
+    CCPM_MEM_ALLOC(uint32_t   ,_lnk_dst      ,n_lnk + 1   );
+
+    for (i = 0; i <= n_act; i++)
+    {
+        _act_ids[i] = act_ids[i];
+    }
+
+    for (i = 0; i < n_lnk; i++)
+    {
+        _lnk_src[i] = lnk_src[i];
+        _lnk_dst[i] = lnk_dst[i];
+    }
+
+    ret = ccpm_make_full_map32(_act_ids, _lnk_src, _lnk_dst, n_lnk, n_max, full_act_dep, full_dep_map);
+
+    CCPM_MEM_FREE_ALL();
+    return ret;
+}
+
+/*===========================================================================*/
+ccpmResultEn ccpm_make_full_map32(uint32_t * act_ids,
+                                  uint32_t * lnk_src,      uint32_t * lnk_dst,
+                                  size_t     n_lnk,        size_t     n_max,
+                                  uint32_t * full_act_dep, uint8_t  * full_dep_map)
+{
+    ccpmResultEn ret = CCPM_OK;
+
+    CCPM_CHECK_RETURN(act_ids, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(lnk_src, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(lnk_dst, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(full_act_dep, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(full_dep_map, CCPM_EINVAL);
+
+    size_t n_act = CCPM_LLEN(act_ids);
+
+    // Verify that n_max is sufficient
+    CCPM_CHECK_RETURN(n_max >= n_act, CCPM_EINVAL);
+
+    CCPM_LOG_PRINTF("Building full dependency map for %d activities\n", (int)n_act);
+
+    CCPM_MEM_INIT();
+
+    /* Prepare links for computing dependency info */
+    size_t id_bits = _ccpm_hash_bits(n_act);
+    CCPM_MEM_ALLOC(uint32_t, _id_tbl, CCPM_HASH_SZ(id_bits));
+
+    CCPM_TRY_GOTO_END(ccpm_check_act_idss(act_ids, _id_tbl, id_bits));
+    CCPM_TRY_GOTO_END(ccpm_links_prepare(act_ids, lnk_src, lnk_dst, n_lnk, _id_tbl, id_bits));
+
+    /* Bit set map, will be unpacked to full_dep_map */
+    CCPM_MEM_ALLOC(uint64_t, _full_dep_bits, n_max * CCPM_BSET_WORDS(n_max));
+
+    ccpmDepTblSt full;
+    _ccpm_tbl_init(&full, CCPM_DEPS_DENSE, n_max, full_act_dep, _full_dep_bits, 0, 0);
+
+    /* Compute dependency info as is */
+    CCPM_TRY_GOTO_END(ccpm_populate_dep_info(n_lnk, lnk_src, lnk_dst, &full));
+
+    #ifdef CCPM_CFG_PRINTF
+    CCPM_LOG_PRINTF("Initial dependencies:\n");
+    for (size_t i = 0; i < n_act; i++) {
+        CCPM_LOG_PRINTF("%5d: [", (int)i);
+        for (size_t j = 0; j < CCPM_LLEN(full_act_dep + n_max * i); j++) {
+            CCPM_LOG_PRINTF("%5d ", (int)CCPM_LITEM(full_act_dep + n_max * i, j));
+        }
+        CCPM_LOG_PRINTF("]\n");
+    }
+    #endif
+
+    /* Compute full dependency info */
+    CCPM_TRY_GOTO_END(ccpm_build_full_deps(n_act, &full, 0, 0));
+
+    for (size_t i = 0; i < n_max; i++)
+    {
+        for (size_t j = 0; j < n_max; j++)
+        {
+            full_dep_map[n_max * i + j] = _ccpm_bset_has(_full_dep_bits + full.n_w * i, j);
+        }
+    }
+
+    #ifdef CCPM_CFG_PRINTF
+    CCPM_LOG_PRINTF("Full dependency map (%dx%d):\n", (int)n_act, (int)n_act);
+    for (size_t i = 0; i < n_act; i++) {
+        CCPM_LOG_PRINTF("%5d: [", (int)i);
+        for (size_t j = 0; j < n_act; j++) {
+            CCPM_LOG_PRINTF("%d ", (int)full_dep_map[n_max * i + j]);
+        }
+        CCPM_LOG_PRINTF("]\n");
+    }
+    #endif
+
+end:
+    CCPM_MEM_FREE_ALL();
+    return ret;
+}
+
+/*===========================================================================*/
+/*
+Full dependency map as packed bit sets in O(n_lnk * n_act / 64) without
+n_max * n_max dependency lists: maps of activities are merged along links
+in topological order. Row i of full_dep_bits has (n_act + 7) / 8 bytes,
+bit j of a row is the bit 0x80 >> (j % 8) of byte j / 8 like in
+numpy.packbits, it is set when activity i depends on activity j.
+Links are translated to positions in place.
+*/
+ccpmResultEn ccpm_make_full_bits32(uint32_t * act_ids,
+                                   uint32_t * lnk_src, uint32_t * lnk_dst, size_t n_lnk,
+                                   uint8_t  * full_dep_bits)
+{
+    ccpmResultEn ret = CCPM_OK;
+
+    size_t i;
+    size_t k;
+    size_t q;
+
+    CCPM_CHECK_RETURN(act_ids,       CCPM_EINVAL);
+    CCPM_CHECK_RETURN(lnk_src,       CCPM_EINVAL);
+    CCPM_CHECK_RETURN(lnk_dst,       CCPM_EINVAL);
+    CCPM_CHECK_RETURN(full_dep_bits, CCPM_EINVAL);
+
+    size_t n_act = CCPM_LLEN(act_ids);
+    size_t n_b   = CCPM_BITS_BYTES(n_act);
+
+    CCPM_CHECK_RETURN(n_act < CCPM_FAKE, CCPM_ELIM);
+    CCPM_CHECK_RETURN(n_lnk < CCPM_FAKE, CCPM_ELIM);
+
+    CCPM_LOG_PRINTF("Building packed full dependency map for %d activities\n", (int)n_act);
+
+    CCPM_MEM_INIT();
+
+    size_t id_bits = _ccpm_hash_bits(n_act);
+    CCPM_MEM_ALLOC(uint32_t, _id_tbl, CCPM_HASH_SZ(id_bits));
+
+    CCPM_TRY_GOTO_END(ccpm_check_act_idss(act_ids, _id_tbl, id_bits));
+    CCPM_TRY_GOTO_END(ccpm_links_prepare(act_ids, lnk_src, lnk_dst, n_lnk, _id_tbl, id_bits));
+
+    /*Topological order of activities*/
+    CCPM_MEM_ALLOC(uint32_t, _deg,   n_act + 1   );
+    CCPM_MEM_ALLOC(uint32_t, _off,   n_act + 1   );
+    CCPM_MEM_ALLOC(uint32_t, _succ,  n_lnk + 1   );
+    CCPM_MEM_ALLOC(uint32_t, _pred,  n_act + 1   );
+    CCPM_MEM_ALLOC(uint32_t, _queue, n_act + 1   );
+
+    ccpmCsrSt succ = {_off, _succ};
+
+    CCPM_TRY_GOTO_END(ccpm_check_loops(n_act, act_ids, lnk_src, lnk_dst, n_lnk,
+                                       _deg, &succ, _pred, _queue, 0));
+
+    /*Rows of whole words, bits are in numpy.packbits order, so words are merged as is*/
+    size_t n_w = CCPM_BSET_WORDS(n_act);
+    CCPM_MEM_ALLOC(uint64_t, _map, n_act * n_w + 1);
+    memset(_map, 0, n_act * n_w * sizeof(uint64_t));
+
+    for (i = 0; i < n_act; i++)
+    {
+        size_t     u   = CCPM_LITEM(_queue, i);
+        uint64_t * src = _map + n_w * u;
+
+        for (k = succ.off[u]; k < succ.off[u + 1]; k++)
+        {
+            uint64_t * dst = _map + n_w * succ.item[k];
+            for (q = 0; q < n_w; q++)
+            {
+                dst[q] |= src[q];
+            }
+            ((uint8_t *)dst)[u >> 3] |= (uint8_t)(0x80 >> (u & 7));
+        }
+    }
+
+    for (i = 0; i < n_act; i++)
+    {
+        memcpy(full_dep_bits + n_b * i, _map + n_w * i, n_b);
+    }
+
+end:
+    CCPM_MEM_FREE_ALL();
+    return ret;
+}
+
+/*
+CSR rows of packed full dependency map of ccpm_make_full_bits32: row i has
+sorted positions full_dep_idx[full_dep_off[i]] ... full_dep_idx[full_dep_off[i + 1] - 1].
+When full_dep_idx is 0 only full_dep_off is filled, so the caller can
+allocate full_dep_off[n_act] items and call again.
+*/
+ccpmResultEn ccpm_full_bits_csr(const uint8_t * full_dep_bits, size_t n_act,
+                                uint32_t * full_dep_off, uint32_t * full_dep_idx)
+{
+    size_t i;
+    size_t j;
+
+    CCPM_CHECK_RETURN(full_dep_bits, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(full_dep_off,  CCPM_EINVAL);
 
-    for (i = 0; i < CCPM_LLEN(act_pos); i++)
-    {
-        size_t idx = CCPM_LITEM(act_pos, i);
+    size_t n_b = CCPM_BITS_BYTES(n_act);
+    size_t n   = 0;
 
-        /* Skip real actions and deleted dummies */
-        if (CCPM_FAKE != CCPM_LITEM(act_ids, idx) ||
-            CCPM_FAKE == CCPM_LITEM(act_src, idx) ||
-            CCPM_FAKE == CCPM_LITEM(act_dst, idx))
+    full_dep_off[0] = 0;
+    for (i = 0; i < n_act; i++)
+    {
+        const uint8_t * row = full_dep_bits + n_b * i;
+        for (j = 0; j < n_b; j++)
         {
-            continue;
+            uint8_t b = row[j];
+            for (size_t l = 0; b; l++, b <<= 1)
+            {
+                if (b & 0x80)
+                {
+                    CCPM_CHECK_RETURN(n < CCPM_FAKE, CCPM_ELIM);
+                    if (full_dep_idx)
+                    {
+                        full_dep_idx[n] = (uint32_t)(8 * j + l);
+                    }
+                    n++;
+                }
+            }
         }
-
-        /* Add to final output */
-        CCPM_LAPP(final_act_src, CCPM_LITEM(act_src, idx));
-        CCPM_LAPP(final_act_dst, CCPM_LITEM(act_dst, idx));
+        full_dep_off[i + 1] = (uint32_t)n;
     }
-
-    return ret;
+    return CCPM_OK;
 }
 
 /*===========================================================================*/
-#ifdef CCPM_CFG_PRINTF
-#define _CCPM_PRINT_DEPS(n_act, n_max, dep, dep_map)                      \
-do {                                                                      \
-    CCPM_LOG_PRINTF("Dependencies:\n");                                   \
-    for (size_t i = 0; i < n_act; i++)                                    \
-    {                                                                     \
-        CCPM_LOG_PRINTF("%5d: [", (int)i);                                \
-        for (size_t j = 0; j < CCPM_LLEN(dep + n_max * i); j++)           \
-        {                                                                 \
-            CCPM_LOG_PRINTF("%5d ", (int)CCPM_LITEM(dep + n_max * i, j)); \
-        }                                                                 \
-        CCPM_LOG_PRINTF("]\n");                                           \
-    }                                                                     \
-    CCPM_LOG_PRINTF("Dependcy map:\n");                                   \
-    for (size_t i = 0; i < n_act; i++)                                    \
-    {                                                                     \
-        CCPM_LOG_PRINTF("%5d: [", (int)i);                                \
-        for (size_t j = 0; j < n_max; j++)                                \
-        {                                                                 \
-            CCPM_LOG_PRINTF("%d ", (int)dep_map[n_max * i + j]);          \
-        }                                                                 \
-        CCPM_LOG_PRINTF("]\n");                                           \
-    }                                                                     \
-} while (0)
+/*
+Time parameters follow NetworkModel._compute_target: events are taken in
+Kahn order from the start event, from the finish event for late times,
+activities of an event are taken in activity order, so uncertain times
+are mixed in the same order. In Python an event time and the activity
+time it was taken from are one array, so the event time owner is tracked
+to clamp both of them.
+*/
+static inline int _ccpm_choice(double * t, const double * old, const double * val, double delta)
+{
+    double e = val[CCPM_T_ERR] + old[CCPM_T_ERR];
 
-#define _CCPM_PRINT_NET(act_src, act_dst)                                                                 \
-do {                                                                                                      \
-    CCPM_LOG_PRINTF("Network:\n");                                                                        \
-    for (size_t i = 0; i < CCPM_LLEN(act_src); i++)                                                       \
-    {                                                                                                     \
-        CCPM_LOG_PRINTF("%5d: [%5d %5d]\n", (int)i, (int)CCPM_LITEM(act_src, i), (int)CCPM_LITEM(act_dst, i)); \
-    }                                                                                                     \
-} while (0)
+    if (delta >= e)
+    {
+        /*Certain result*/
+        t[CCPM_T_RES] = val[CCPM_T_RES];
+        t[CCPM_T_VAR] = val[CCPM_T_VAR];
+        t[CCPM_T_ERR] = val[CCPM_T_ERR];
+        return 1;
+    }
 
-#define _CCPM_PRINT_ACT_POS(act_id, act_pos)                                                    \
-do {                                                                                            \
-    CCPM_LOG_PRINTF("Activities:\n");                                                           \
-    for (size_t i = 0; i < CCPM_LLEN(act_pos); i++)                                             \
-    {                                                                                           \
-        CCPM_LOG_PRINTF("%5d: %5d\n", (int)CCPM_LITEM(act_id, i), (int)CCPM_LITEM(act_pos, i)); \
-    }                                                                                           \
-} while (0)
+    if (delta >= -e)
+    {
+        /*Uncertain result, use mixing*/
+        t[CCPM_T_RES] = 0.5 * (val[CCPM_T_RES] + old[CCPM_T_RES]);
+        t[CCPM_T_VAR] = (old[CCPM_T_VAR] < val[CCPM_T_VAR]) ? val[CCPM_T_VAR] : old[CCPM_T_VAR];
+        t[CCPM_T_ERR] = 0.5 * e;
+        return 2;
+    }
 
+    /*Certain result*/
+    t[CCPM_T_RES] = old[CCPM_T_RES];
+    t[CCPM_T_VAR] = old[CCPM_T_VAR];
+    t[CCPM_T_ERR] = old[CCPM_T_ERR];
+    return 0;
+}
 
-#define _CCPM_PRINT_ACT_IDS(act_id)                                        \
-do {                                                                       \
-    CCPM_LOG_PRINTF("Activities:\n");                                      \
-    for (size_t i = 0; i < CCPM_LLEN(act_id); i++)                         \
-    {                                                                      \
-        CCPM_LOG_PRINTF("%5d: %5d\n", (int)i, (int)CCPM_LITEM(act_id, i)); \
-    }                                                                      \
-} while (0)
+static inline void _ccpm_own(uint32_t * own, size_t evt, size_t act, int choice)
+{
+    if (1 == choice)
+    {
+        own[evt] = act;
+    }
+    else if (2 == choice)
+    {
+        own[evt] = CCPM_FAKE;
+    }
+}
 
-#else/*CCPM_CFG_PRINTF*/
-#define _CCPM_PRINT_DEPS(n_act, n_max, dep, dep_map) do {} while (0)
+/*Kahn order of events from the only event without rev activities*/
+static ccpmResultEn _ccpm_evt_order(size_t n_evt, ccpmCsrSt * fwd, ccpmCsrSt * rev,
+                                    const uint32_t * act_next, uint32_t * deg, uint32_t * order)
+{
+    size_t i;
+    size_t j;
 
-#define _CCPM_PRINT_NET(act_src, act_dst) do {} while (0)
+    CCPM_LCLR(order);
+    for (i = 0; i < n_evt; i++)
+    {
+        deg[i] = CCPM_CSR_LEN(rev, i);
+        if (!deg[i])
+        {
+            CCPM_LAPP(order, i);
+        }
+    }
+    CCPM_CHECK_RETURN(1 == CCPM_LLEN(order), CCPM_EINVAL);
 
-#define _CCPM_PRINT_ACT_POS(act_id, act_pos)  do {} while (0)
+    for (i = 0; i < CCPM_LLEN(order); i++)
+    {
+        size_t e = CCPM_LITEM(order, i);
 
-#define _CCPM_PRINT_ACT_IDS(act_id)  do {} while (0)
+        for (j = fwd->off[e]; j < fwd->off[e + 1]; j++)
+        {
+            size_t n = act_next[fwd->item[j]];
 
-#endif/*CCPM_CFG_PRINTF*/
+            if (!--deg[n])
+            {
+                CCPM_LAPP(order, n);
+            }
+        }
+    }
+    CCPM_CHECK_RETURN(n_evt == CCPM_LLEN(order), CCPM_ELOOP);
+    return CCPM_OK;
+}
 
-/*===========================================================================*/
-/*to DeepSeek: All allocation must in the function below*/
-ccpmResultEn ccpm_make_aoa(uint16_t * act_ids, uint16_t * lnk_src, uint16_t * lnk_dst, size_t n_lnk, uint16_t * act_src, uint16_t * act_dst)
+ccpmResultEn ccpm_compute_times(size_t n_evt, size_t n_act,
+                                const uint32_t * act_src, const uint32_t * act_dst,
+                                const double * expected,
+                                const double * optimistic, const double * pessimistic,
+                                bool is_pert, ccpmTimesSt * times)
 {
     ccpmResultEn ret = CCPM_OK;
 
     size_t i;
+    size_t j;
+    size_t k;
 
-    const size_t _n_lnk = n_lnk;
-
-    CCPM_CHECK_RETURN(act_ids,  CCPM_EINVAL);
-
-    size_t n_act = CCPM_LLEN(act_ids);
-    CCPM_CHECK_RETURN(n_act,   CCPM_EINVAL);
-
-    CCPM_CHECK_RETURN(act_src, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(act_dst, CCPM_EINVAL);
-
-    CCPM_CHECK_RETURN(lnk_src, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(lnk_dst, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_src,     CCPM_EINVAL);
+    CCPM_CHECK_RETURN(act_dst,     CCPM_EINVAL);
+    CCPM_CHECK_RETURN(expected,    CCPM_EINVAL);
+    CCPM_CHECK_RETURN(optimistic,  CCPM_EINVAL);
+    CCPM_CHECK_RETURN(pessimistic, CCPM_EINVAL);
+    CCPM_CHECK_RETURN(times,       CCPM_EINVAL);
 
-    CCPM_TRY_RETURN(ccpm_check_act_idss(act_ids));
-    CCPM_TRY_RETURN(ccpm_check_links(lnk_src, lnk_dst, _n_lnk));
+    CCPM_CHECK_RETURN(n_evt, CCPM_EINVAL);
+    CCPM_CHECK_RETURN((n_evt < CCPM_FAKE) && (n_act < CCPM_FAKE), CCPM_ELIM);
 
-    size_t n_max = n_act + ((_n_lnk > n_act) ? _n_lnk : n_act);
+    for (i = 0; i < n_act; i++)
+    {
+        CCPM_CHECK_RETURN((act_src[i] < n_evt) && (act_dst[i] < n_evt), CCPM_EINVAL);
+    }
 
-    CCPM_LOG_PRINTF("n_act: %5d\nn_max: %5d\n",  (int)n_act, (int)n_max);
+    ccpmTimesSt * t = times;
 
     CCPM_MEM_INIT();
 
-    /*=======================================================================*/
-    CCPM_MEM_ALLOC(uint16_t   ,_act_ids      ,n_max + 1   );
-    CCPM_MEM_ALLOC(uint32_t   ,_act_pos      ,n_max + 1   ); /*Works positions in sorted lists*/
-    CCPM_MEM_ALLOC(uint32_t   ,_act_src      ,n_max + 1   );
-    CCPM_MEM_ALLOC(uint32_t   ,_act_dst      ,n_max + 1   );
+    CCPM_MEM_ALLOC(uint32_t   ,_out_off      ,n_evt + 1    ); /*Output activities of events*/
+    CCPM_MEM_ALLOC(uint32_t   ,_out          ,n_act + 1    );
+    CCPM_MEM_ALLOC(uint32_t   ,_in_off       ,n_evt + 1    ); /*Input activities of events*/
+    CCPM_MEM_ALLOC(uint32_t   ,_in           ,n_act + 1    );
+    CCPM_MEM_ALLOC(uint32_t   ,_deg          ,n_evt        );
+    CCPM_MEM_ALLOC(uint32_t   ,_order        ,n_evt + 1    );
+    CCPM_MEM_ALLOC(uint32_t   ,_early_own    ,n_evt        ); /*Activities which early times are taken*/
+    CCPM_MEM_ALLOC(uint32_t   ,_late_own     ,n_evt        ); /*Activities which late times are taken*/
+
+    ccpmCsrSt out = {_out_off, _out};
+    ccpmCsrSt in  = {_in_off,  _in};
+
+    /*Rows keep activity order*/
+    memset(_out_off, 0, (n_evt + 1) * sizeof(uint32_t));
+    memset(_in_off,  0, (n_evt + 1) * sizeof(uint32_t));
+    for (i = 0; i < n_act; i++)
+    {
+        _out_off[act_src[i] + 1]++;
+        _in_off[act_dst[i] + 1]++;
+    }
+    _ccpm_csr_prefix(&out, n_evt);
+    _ccpm_csr_prefix(&in,  n_evt);
+    for (i = 0; i < n_act; i++)
+    {
+        _out[_out_off[act_src[i]]++] = i;
+        _in[_in_off[act_dst[i]]++]   = i;
+    }
+    _ccpm_csr_rewind(&out, n_evt);
+    _ccpm_csr_rewind(&in,  n_evt);
 
     /*=======================================================================*/
-    CCPM_MEM_ALLOC(uint32_t   ,_full_act_ndep ,n_max        ); /*Number of dependencies*/
-    CCPM_MEM_ALLOC(uint32_t   ,_full_act_dep  ,n_max * n_max); /*Array of dependencies*/
-    CCPM_MEM_ALLOC(uint8_t    ,_full_dep_map  ,n_max * n_max); /*Work dependency map*/
+    /*Forward pass: stages, early, optimistic and pessimistic times*/
+    CCPM_TRY_GOTO_END(_ccpm_evt_order(n_evt, &out, &in, act_dst, _deg, _order));
+
+    memset(t->evt_stage, 0, n_evt * sizeof(uint32_t));
+    memset(t->evt_early, 0, 3 * n_evt * sizeof(double));
+    memset(t->evt_opt,   0, n_evt * sizeof(double));
+    memset(t->evt_pes,   0, n_evt * sizeof(double));
+    memset(t->opt_start, 0, n_act * sizeof(double));
+    memset(t->opt_end,   0, n_act * sizeof(double));
+    memset(t->pes_start, 0, n_act * sizeof(double));
+    memset(t->pes_end,   0, n_act * sizeof(double));
+
+    for (i = 0; i < n_evt; i++)
+    {
+        _early_own[i] = CCPM_FAKE;
+        _late_own[i]  = CCPM_FAKE;
+    }
 
-    /*=======================================================================*/
-    //CCPM_MEM_ALLOC(uint16_t   ,_min_act_ndep ,n_max        ); /*Number of dependencies*/
-    CCPM_MEM_ALLOC(uint32_t   ,_min_act_dep  ,n_max * n_max); /*Array of dependencies*/
-    CCPM_MEM_ALLOC(uint8_t    ,_min_dep_map  ,n_max * n_max); /*Work dependency map*/
+    for (k = 0; k < n_evt; k++)
+    {
+        size_t   e    = CCPM_LITEM(_order, k);
+        double * base = t->evt_early + 3 * e;
 
-    /*=======================================================================*/
-    CCPM_MEM_ALLOC(uint32_t   ,_tmp          ,2 * n_max + 1);
+        for (j = out.off[e]; j < out.off[e + 1]; j++)
+        {
+            size_t   a     = out.item[j];
+            size_t   d     = act_dst[a];
+            double * start = t->early_start + 3 * a;
+            double * end   = t->early_end   + 3 * a;
+            double * next  = t->evt_early   + 3 * d;
 
-    /*=======================================================================*/
-    /* Additional allocations for new functions */
-    CCPM_MEM_ALLOC(uint32_t   ,_started     ,n_max + 1   );
-    CCPM_MEM_ALLOC(uint32_t   ,_num_dep     ,n_max + 1   );
-    CCPM_MEM_ALLOC(uint32_t   ,_events      ,n_max + 1   );
-    CCPM_MEM_ALLOC(uint32_t   ,_chk         ,n_max + 1   );
+            for (i = 0; i < 3; i++)
+            {
+                start[i] = base[i];
+                end[i]   = base[i] + expected[3 * a + i];
+            }
+            _ccpm_own(_early_own, d, a, _ccpm_choice(next, next, end, end[CCPM_T_RES] - next[CCPM_T_RES]));
 
-    /* For nested and overlapping dependencies */
-    CCPM_MEM_ALLOC(uint32_t   ,_min_com_deps ,n_max       );
-    CCPM_MEM_ALLOC(uint32_t   ,_tmp_deps     ,n_max + 1   );
-    CCPM_MEM_ALLOC(uint8_t    ,_tmp_dep_map  ,n_max       );
+            if (t->evt_stage[d] < t->evt_stage[e] + 1)
+            {
+                t->evt_stage[d] = t->evt_stage[e] + 1;
+            }
 
-    /* For optimize_network_stage_1 */
-    CCPM_MEM_ALLOC(uint8_t    ,_evt_dep_map ,4 * n_max * n_max);
-    CCPM_MEM_ALLOC(uint32_t   ,_evt_deps    ,4 * n_max * n_max);
-    CCPM_MEM_ALLOC(uint32_t   ,_evt_dins    ,4 * n_max * n_max);
-    CCPM_MEM_ALLOC(uint8_t    ,_evt_real    ,2 * n_max        );
+            if (!is_pert)
+            {
+                continue;
+            }
 
-    /* For optimize_network_stage_2 */
-    CCPM_MEM_ALLOC(uint32_t   ,_evt_douts   ,4 * n_max * n_max);
-    CCPM_MEM_ALLOC(uint32_t   ,_evt_nout    ,2 * n_max        );
+            t->opt_start[a] = t->evt_opt[e];
+            t->opt_end[a]   = t->evt_opt[e] + optimistic[a];
+            if (t->opt_end[a] > t->evt_opt[d])
+            {
+                t->evt_opt[d] = t->opt_end[a];
+            }
 
-    /* For add_needed_dummies */
-    //CCPM_MEM_ALLOC(uint16_t   ,_sorted_activities, 2 * n_max + 1);
-    CCPM_MEM_ALLOC(uint32_t   ,_sort_values      , 2 * n_max + 1);
+            t->pes_start[a] = t->evt_pes[e];
+            t->pes_end[a]   = t->evt_pes[e] + pessimistic[a];
+            if (t->pes_end[a] > t->evt_pes[d])
+            {
+                t->evt_pes[d] = t->pes_end[a];
+            }
+        }
+    }
 
     /*=======================================================================*/
-
-    for (i = 0; i <= CCPM_LLEN(act_ids); i++)
+    /*Late times start from the first latest event in stage order*/
+    size_t fin = CCPM_FAKE;
+    double max = 0.0;
+    for (i = 0; i < n_evt; i++)
     {
-        _act_ids[i] = act_ids[i];
-    }
-
-    /*Prepare links for computing dependency info*/
-    CCPM_TRY_GOTO_END(ccpm_links_prepare(_act_ids, lnk_src, lnk_dst, _n_lnk));
-
-    /*Compute dependency info as is*/
-    CCPM_TRY_GOTO_END(ccpm_populate_dep_info(n_max, _n_lnk, lnk_src, lnk_dst, _full_act_dep, _full_dep_map));
-    _CCPM_PRINT_DEPS(n_act, n_max, _full_act_dep, _full_dep_map);
+        double early = t->evt_early[3 * i + CCPM_T_RES];
 
-    /*Compute full dependency info*/
-    CCPM_TRY_GOTO_END(ccpm_build_full_deps(n_act, n_max, _full_act_dep, _full_dep_map));
-    _CCPM_PRINT_DEPS(n_act, n_max, _full_act_dep, _full_dep_map);
+        if ((early > max) ||
+            ((CCPM_FAKE != fin) && (early == max) && (t->evt_stage[i] < t->evt_stage[fin])))
+        {
+            fin = i;
+            max = early;
+        }
+    }
 
-    for (i = 0; i < n_max; i++)
+    for (i = 0; i < n_evt; i++)
     {
-        _full_act_ndep[i] = CCPM_LLEN(_full_act_dep + n_max * i);
+        for (j = 0; j < 3; j++)
+        {
+            t->evt_late[3 * i + j] = (CCPM_FAKE == fin) ? 0.0 : t->evt_early[3 * fin + j];
+        }
     }
 
-    memcpy(_min_act_dep, _full_act_dep, n_max * n_max * sizeof(uint16_t));
-    memcpy(_min_dep_map, _full_dep_map, n_max * n_max * sizeof(bool)    );
+    /*Backward pass*/
+    CCPM_TRY_GOTO_END(_ccpm_evt_order(n_evt, &in, &out, act_src, _deg, _order));
 
-    CCPM_TRY_GOTO_END(ccpm_optimize_deps(n_act, n_max, _act_pos, _full_act_ndep, _min_act_dep, _min_dep_map, _tmp));
-    _CCPM_PRINT_DEPS(n_act, n_max, _min_act_dep, _min_dep_map);
-    _CCPM_PRINT_ACT_POS(_act_ids, _act_pos);
+    for (k = 0; k < n_evt; k++)
+    {
+        size_t   e    = CCPM_LITEM(_order, k);
+        double * base = t->evt_late + 3 * e;
 
-    /* Process nested dependencies */
-    CCPM_TRY_GOTO_END(ccpm_process_nested_deps(n_act, n_max, _act_pos,
-                                              _min_act_dep, _min_dep_map,
-                                              _full_act_dep, _full_dep_map,
-                                              _act_ids,
-                                              _min_com_deps,
-                                              _tmp_deps, _tmp_dep_map));
-    _CCPM_PRINT_DEPS(CCPM_LLEN(_act_ids), n_max, _min_act_dep, _min_dep_map);
-    _CCPM_PRINT_ACT_POS(_act_ids, _act_pos);
+        for (j = in.off[e]; j < in.off[e + 1]; j++)
+        {
+            size_t   a     = in.item[j];
+            size_t   s     = act_src[a];
+            double * end   = t->late_end   + 3 * a;
+            double * start = t->late_start + 3 * a;
+            double * next  = t->evt_late   + 3 * s;
 
-    /* Process overlapping dependencies */
-    CCPM_TRY_GOTO_END(ccpm_process_overlapping_deps(n_max, _act_pos,
-                                                   _min_act_dep, _min_dep_map,
-                                                   _full_act_dep, _full_dep_map,
-                                                   _act_ids,
-                                                   _min_com_deps,
-                                                   _tmp_deps, _tmp_dep_map));
-    _CCPM_PRINT_DEPS(CCPM_LLEN(_act_ids), n_max, _min_act_dep, _min_dep_map);
-    _CCPM_PRINT_ACT_POS(_act_ids, _act_pos);
+            for (i = 0; i < 3; i++)
+            {
+                end[i] = base[i];
+            }
+            start[CCPM_T_RES] = base[CCPM_T_RES] - expected[3 * a + CCPM_T_RES];
+            start[CCPM_T_VAR] = base[CCPM_T_VAR] + expected[3 * a + CCPM_T_VAR];
+            start[CCPM_T_ERR] = base[CCPM_T_ERR] + expected[3 * a + CCPM_T_ERR];
 
-    /* Build network */
-    CCPM_TRY_GOTO_END(ccpm_build_network(n_max, _act_ids, _act_pos,
-                                        _min_act_dep, _min_dep_map,
-                                        _full_act_dep, _full_dep_map,
-                                        _act_src, _act_dst,
-                                        _started, _num_dep,
-                                        _events, _chk, _tmp_deps));
-    _CCPM_PRINT_NET(_act_src, _act_dst);
-    _CCPM_PRINT_ACT_POS(_act_ids, _act_pos);
+            _ccpm_own(_late_own, s, a, _ccpm_choice(next, next, start, next[CCPM_T_RES] - start[CCPM_T_RES]));
+        }
+    }
 
-    /* Optimize network stage 1 */
-    CCPM_TRY_GOTO_END(ccpm_optimize_network_stage_1(n_max, _act_ids, _act_src, _act_dst,
-                                                   _events, _evt_dep_map,
-                                                   _evt_deps, _evt_dins, _evt_real));
-    _CCPM_PRINT_NET(_act_src, _act_dst);
-    _CCPM_PRINT_ACT_POS(_act_ids, _act_pos);
+    /*=======================================================================*/
+    /*Reserves, insignificant values are rounded off*/
+    for (i = 0; i < n_evt; i++)
+    {
+        double * early = t->evt_early   + 3 * i;
+        double * late  = t->evt_late    + 3 * i;
+        double * res   = t->evt_reserve + 3 * i;
+        double   r     = late[CCPM_T_RES] - early[CCPM_T_RES];
 
-    /* Optimize network stage 2 */
-    CCPM_TRY_GOTO_END(ccpm_optimize_network_stage_2(n_max, _act_ids, _act_src, _act_dst,
-                                                   _events, _evt_douts, _evt_nout));
-    _CCPM_PRINT_NET(_act_src, _act_dst);
-    _CCPM_PRINT_ACT_POS(_act_ids, _act_pos);
+        res[CCPM_T_VAR] = late[CCPM_T_VAR] + early[CCPM_T_VAR];
+        res[CCPM_T_ERR] = late[CCPM_T_ERR] + early[CCPM_T_ERR];
+        res[CCPM_T_RES] = ((r > res[CCPM_T_ERR]) || (r < -res[CCPM_T_ERR])) ? r : 0.0;
 
-    /* Add needed dummies */
-    //n_events = CCPM_LLEN(_events);
-    CCPM_TRY_GOTO_END(ccpm_add_needed_dummies(_act_ids, _act_pos,
-                                             _act_src, _act_dst, _started, _events,
-                                             _sort_values, _tmp));
-    _CCPM_PRINT_NET(_act_src, _act_dst);
-    _CCPM_PRINT_ACT_POS(_act_ids, _act_pos);
+        CCPM_CHECK_GOTO_END(r >= -res[CCPM_T_ERR], CCPM_EUNK);
 
-    /* Finalize network */
-    CCPM_TRY_GOTO_END(ccpm_finalize_network(_act_ids, _act_pos,
-                                           _act_src, _act_dst, _events,
-                                           act_ids, act_src, act_dst));
-    _CCPM_PRINT_NET(_act_src, _act_dst);
-    _CCPM_PRINT_ACT_POS(_act_ids, _act_pos);
-    _CCPM_PRINT_NET(act_src, act_dst);
-    _CCPM_PRINT_ACT_IDS(act_ids);
-end:
-    CCPM_MEM_FREE_ALL();
-    return ret;
-}
+        /*Time params lower limit*/
+        if (early[CCPM_T_RES] < 0.0)
+        {
+            early[CCPM_T_RES] = 0.0;
+            if (CCPM_FAKE != _early_own[i])
+            {
+                t->early_end[3 * _early_own[i] + CCPM_T_RES] = 0.0;
+            }
+        }
 
-/*===========================================================================*/
-ccpmResultEn ccpm_make_full_map(uint16_t * act_ids,
-                                uint16_t * lnk_src,      uint16_t * lnk_dst,
-                                size_t     n_lnk,        size_t     n_max,
-                                uint32_t * full_act_dep, uint8_t  * full_dep_map)
-{
-    ccpmResultEn ret = CCPM_OK;
+        if (late[CCPM_T_RES] < 0.0)
+        {
+            late[CCPM_T_RES] = 0.0;
+            if (CCPM_FAKE != _late_own[i])
+            {
+                t->late_start[3 * _late_own[i] + CCPM_T_RES] = 0.0;
+            }
+        }
+    }
 
-    CCPM_CHECK_RETURN(act_ids, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(lnk_src, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(lnk_dst, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(full_act_dep, CCPM_EINVAL);
-    CCPM_CHECK_RETURN(full_dep_map, CCPM_EINVAL);
+    for (i = 0; i < n_act; i++)
+    {
+        double * es  = t->early_start + 3 * i;
+        double * ee  = t->early_end   + 3 * i;
+        double * ls  = t->late_start  + 3 * i;
+        double * le  = t->late_end    + 3 * i;
+        double * res = t->reserve     + 3 * i;
 
-    uint16_t n_act = CCPM_LLEN(act_ids);
+        /*Start and end event times*/
+        es[CCPM_T_RES] = t->evt_early[3 * act_src[i] + CCPM_T_RES];
+        le[CCPM_T_RES] = t->evt_late[3 * act_dst[i] + CCPM_T_RES];
 
-    // Verify that n_max is sufficient
-    CCPM_CHECK_RETURN(n_max >= n_act, CCPM_EINVAL);
+        double start_res[3];
+        double end_res[3];
 
-    CCPM_LOG_PRINTF("Building full dependency map for %d activities\n", (int)n_act);
+        start_res[CCPM_T_RES] = ls[CCPM_T_RES] - es[CCPM_T_RES];
+        start_res[CCPM_T_VAR] = ls[CCPM_T_VAR] + es[CCPM_T_VAR];
+        start_res[CCPM_T_ERR] = ls[CCPM_T_ERR] + es[CCPM_T_ERR];
 
-    /* Prepare links for computing dependency info */
-    CCPM_TRY_RETURN(ccpm_links_prepare(act_ids, lnk_src, lnk_dst, n_lnk));
+        end_res[CCPM_T_RES] = le[CCPM_T_RES] - ee[CCPM_T_RES];
+        end_res[CCPM_T_VAR] = le[CCPM_T_VAR] + ee[CCPM_T_VAR];
+        end_res[CCPM_T_ERR] = le[CCPM_T_ERR] + ee[CCPM_T_ERR];
 
-    /* Compute dependency info as is */
-    CCPM_TRY_RETURN(ccpm_populate_dep_info(n_max, n_lnk, lnk_src, lnk_dst,
-                                          full_act_dep,  full_dep_map));
+        /*Choose minimum reserve value*/
+        _ccpm_choice(res, start_res, end_res, start_res[CCPM_T_RES] - end_res[CCPM_T_RES]);
 
-    #ifdef CCPM_CFG_PRINTF
-    CCPM_LOG_PRINTF("Initial dependencies:\n");
-    for (size_t i = 0; i < n_act; i++) {
-        CCPM_LOG_PRINTF("%5d: [", (int)i);
-        for (size_t j = 0; j < CCPM_LLEN(full_act_dep + n_max * i); j++) {
-            CCPM_LOG_PRINTF("%5d ", (int)CCPM_LITEM(full_act_dep + n_max * i, j));
-        }
-        CCPM_LOG_PRINTF("]\n");
-    }
-    #endif
+        double r = res[CCPM_T_RES];
+        res[CCPM_T_RES] = ((r > res[CCPM_T_ERR]) || (r < -res[CCPM_T_ERR])) ? r : 0.0;
 
-    /* Compute full dependency info */
-    CCPM_TRY_RETURN(ccpm_build_full_deps(n_act, n_max, full_act_dep, full_dep_map));
+        CCPM_CHECK_GOTO_END(r >= -res[CCPM_T_ERR], CCPM_EUNK);
 
-    #ifdef CCPM_CFG_PRINTF
-    CCPM_LOG_PRINTF("Full dependency map (%dx%d):\n", (int)n_act, (int)n_act);
-    for (size_t i = 0; i < n_act; i++) {
-        CCPM_LOG_PRINTF("%5d: [", (int)i);
-        for (size_t j = 0; j < n_act; j++) {
-            CCPM_LOG_PRINTF("%d ", (int)full_dep_map[n_max * i + j]);
+        for (j = 0; j < 4; j++)
+        {
+            double * tm = (0 == j) ? es : (1 == j) ? ls : (2 == j) ? ee : le;
+
+            if (tm[CCPM_T_RES] < 0.0)
+            {
+                tm[CCPM_T_RES] = 0.0;
+            }
         }
-        CCPM_LOG_PRINTF("]\n");
     }
-    #endif
 
-    return CCPM_OK;
+end:
+    CCPM_MEM_FREE_ALL();
+    return ret;
 }
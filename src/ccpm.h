@@ -21,6 +21,7 @@
 #define CCMP_H
 
 /*===========================================================================*/
+#include <stddef.h>
 #include <stdint.h>
 #include <stdbool.h>
 
@@ -39,20 +40,206 @@ typedef enum {
     CCPM_EUNK
 }ccpmResultEn;
 
+/*Dummy activity IDs, also the limits of IDs, activity and event numbers*/
+#define CCPM_FAKE16 (0xffff)
+#define CCPM_FAKE32 (0xffffffff)
+
 #define CCPM_DEP_BUF(id, ...) \
 static const uint16_t _ccpm_dep_buf##id[] = {__VA_ARGS__};
 
 /*===========================================================================*/
+typedef enum {
+    CCPM_DEPS_DENSE = 0, /*n_max * n_max dependency lists and bit set maps*/
+    CCPM_DEPS_SPARSE     /*Per activity sorted sets, grow with dependency number*/
+}ccpmDepsEn;
+
+typedef enum {
+    CCPM_CLOSURE_ITER = 0, /*Grow full dependencies, then remove redundant ones*/
+    CCPM_CLOSURE_TOPO      /*Full and minimal dependencies in one topological pass*/
+}ccpmClosureEn;
+
+typedef enum {
+    CCPM_SORT_RADIX = 0, /*Stable LSD radix sort, O(n)*/
+    CCPM_SORT_MERGE      /*Stable merge sort, O(n log(n))*/
+}ccpmSortEn;
+
+typedef enum {
+    CCPM_LEVEL_FAST = 0, /*Near-linear construction with union-find, extra dummies and events*/
+    CCPM_LEVEL_DEPS,     /*Nested and overlapping dependency processing*/
+    CCPM_LEVEL_FULL      /*Also network optimization stages 1 and 2*/
+}ccpmLevelEn;
+
+/*Reusable workspace for repeated network builds, must not be shared between threads*/
+typedef struct _ccpmCtxSt ccpmCtxSt;
+
+ccpmCtxSt * ccpm_ctx_new(void);
+void        ccpm_ctx_free(ccpmCtxSt * ctx);
+void        ccpm_ctx_shrink(ccpmCtxSt * ctx);     /*Release all reserved memory*/
+size_t      ccpm_ctx_size(const ccpmCtxSt * ctx); /*Reserved memory in bytes*/
+
+/*===========================================================================*/
+typedef enum {
+    CCPM_PHASE_CHECK = 0,    /*Input checks, link preparation and loop detection*/
+    CCPM_PHASE_ALLOC,        /*Buffer allocation and initialization*/
+    CCPM_PHASE_DEPS,         /*Direct dependencies*/
+    CCPM_PHASE_CLOSURE,      /*Full and minimal dependencies*/
+    CCPM_PHASE_NESTED,       /*Nested dependencies*/
+    CCPM_PHASE_OVERLAPPING,  /*Overlapping dependencies*/
+    CCPM_PHASE_NETWORK,      /*Network building*/
+    CCPM_PHASE_STAGE_1,      /*Network optimization stage 1*/
+    CCPM_PHASE_STAGE_2,      /*Network optimization stage 2*/
+    CCPM_PHASE_DUMMIES,      /*Needed dummies*/
+    CCPM_PHASE_FINALIZE,     /*Network finalization*/
+    CCPM_PHASE_NUM
+}ccpmPhaseEn;
+
+/*Network generation statistics, phases after an error are left zero*/
+typedef struct {
+    double time[CCPM_PHASE_NUM]; /*Wall time of phases in seconds*/
+    size_t iter[CCPM_PHASE_NUM]; /*Main loop iterations of phases*/
+    size_t n_full;               /*Full dependencies*/
+    size_t n_min;                /*Minimal dependencies*/
+    size_t n_dummy;              /*Dummy activities in the network*/
+    size_t n_evt;                /*Events in the network*/
+    size_t mem;                  /*Peak bytes allocated*/
+    size_t n_comp;               /*Weakly connected components built separately*/
+}ccpmStatSt;
+
+/*===========================================================================*/
+typedef struct {
+    ccpmDepsEn    deps;    /*Dependency storage mode*/
+    ccpmClosureEn closure; /*Transitive closure and reduction algorithm*/
+    bool          dedup;   /*Remove repeated links instead of CCPM_EINVAL*/
+    ccpmCtxSt *   ctx;     /*Workspace to take buffers from, 0 for malloc/free*/
+    size_t        max_mem; /*Memory budget in bytes, 0 for no limit*/
+    ccpmSortEn    sort;    /*Sort algorithm*/
+    uint32_t *    loop;    /*Optional list of n_act + 1 items, gets activity IDs on a loop on CCPM_ELOOP*/
+    size_t        n_threads; /*OpenMP threads for dense closure and reduction, 0 for all cores*/
+    ccpmStatSt *  stat;    /*Optional statistics of ccpm_make_aoa32 call*/
+    bool          split;   /*Build weakly connected components separately and join them*/
+    ccpmLevelEn   level;   /*Network optimization level*/
+}ccpmOptSt;
+
+/*Number of threads used for n_threads option, 1 when built without OpenMP*/
+size_t ccpm_n_threads(size_t n_threads);
+
+void ccpm_opt_init(ccpmOptSt * opt);
+
+/*===========================================================================*/
+/*Stable sort of keys by val[key], tmp must hold n items*/
 ccpmResultEn ccpm_sort(uint32_t * tmp, uint32_t * key, uint32_t * val, size_t n);
+ccpmResultEn ccpm_sort_ex(uint32_t * tmp, uint32_t * key, uint32_t * val, size_t n, ccpmSortEn alg);
 
 /*===========================================================================*/
 ccpmResultEn ccpm_make_aoa(uint16_t * act_ids,
                            uint16_t * lnk_src, uint16_t * lnk_dst, size_t n_lnk,
                            uint16_t * act_src, uint16_t * act_dst);
 
+ccpmResultEn ccpm_make_aoa_ex(uint16_t * act_ids,
+                              uint16_t * lnk_src, uint16_t * lnk_dst, size_t n_lnk,
+                              uint16_t * act_src, uint16_t * act_dst,
+                              const ccpmOptSt * opt);
+
+/*
+Peak memory estimates in bytes for ccpm_make_aoa_ex and ccpm_make_aoa32.
+When opt->max_mem is set and the estimate exceeds it, dense storage is
+replaced with sparse one if it fits, otherwise CCPM_ENOMEM is returned
+before any large allocation.
+Sparse rows are estimated for minimal dependencies only, they grow with
+the dependency closure, so the estimates are lower bounds for sparse
+storage. The rest of opt->max_mem is the budget for sparse rows,
+CCPM_ENOMEM is returned when they would exceed it.
+*/
+size_t ccpm_make_aoa_mem(size_t n_act, size_t n_lnk, const ccpmOptSt * opt);
+size_t ccpm_make_aoa32_mem(size_t n_act, size_t n_lnk, const ccpmOptSt * opt);
+
+/*
+32-bit IDs, CCPM_FAKE32 is reserved.
+With opt->split activities which share no links are built as separate
+networks, one per weakly connected component, activities without links
+are built together. Networks are joined at common start and finish
+events, so memory grows with the sum of squared component sizes.
+Components are built in parallel when opt->n_threads allows and
+opt->max_mem is not set, with a budget they are built one at a time.
+*/
+ccpmResultEn ccpm_make_aoa32(uint32_t * act_ids,
+                             uint32_t * lnk_src, uint32_t * lnk_dst, size_t n_lnk,
+                             uint32_t * act_src, uint32_t * act_dst,
+                             const ccpmOptSt * opt);
+
+/*
+Independent networks built by a pool of opt->n_threads threads, arguments
+of network k are items k of argument arrays, see ccpm_make_aoa32, its
+status is written to ret[k]. Loop lists and statistics are not reported.
+opt->max_mem is the budget of each network.
+*/
+ccpmResultEn ccpm_make_aoa32_many(size_t n_net, uint32_t ** act_ids,
+                                  uint32_t ** lnk_src, uint32_t ** lnk_dst, const size_t * n_lnk,
+                                  uint32_t ** act_src, uint32_t ** act_dst,
+                                  ccpmResultEn * ret, const ccpmOptSt * opt);
+
 /*===========================================================================*/
 ccpmResultEn ccpm_make_full_map(uint16_t * act_ids,
                                 uint16_t * lnk_src, uint16_t * lnk_dst,
                                 size_t n_lnk, size_t n_max,
                                 uint32_t * full_act_dep, uint8_t * full_dep_map);
+
+ccpmResultEn ccpm_make_full_map32(uint32_t * act_ids,
+                                  uint32_t * lnk_src, uint32_t * lnk_dst,
+                                  size_t n_lnk, size_t n_max,
+                                  uint32_t * full_act_dep, uint8_t * full_dep_map);
+
+/*
+Packed full dependency map: n_act rows of CCPM_BITS_BYTES(n_act) bytes in
+numpy.packbits bit order, links are translated to positions in place.
+ccpm_full_bits_csr converts it to compressed sparse rows, full_dep_off
+must hold n_act + 1 items, full_dep_idx may be 0 to count items only.
+*/
+#define CCPM_BITS_BYTES(n) (((n) + 7) >> 3)
+
+ccpmResultEn ccpm_make_full_bits32(uint32_t * act_ids,
+                                   uint32_t * lnk_src, uint32_t * lnk_dst, size_t n_lnk,
+                                   uint8_t  * full_dep_bits);
+
+ccpmResultEn ccpm_full_bits_csr(const uint8_t * full_dep_bits, size_t n_act,
+                                uint32_t * full_dep_off, uint32_t * full_dep_idx);
+
+/*===========================================================================*/
+/*Items of time triplets*/
+#define CCPM_T_RES 0 /*Value*/
+#define CCPM_T_VAR 1 /*Variance*/
+#define CCPM_T_ERR 2 /*Error bound*/
+
+/*Time parameters, triplets take 3 items per event or activity*/
+typedef struct {
+    uint32_t * evt_stage;   /*Event stages*/
+    double *   evt_early;   /*Event triplets*/
+    double *   evt_late;
+    double *   evt_reserve;
+    double *   evt_opt;     /*Event optimistic and pessimistic times*/
+    double *   evt_pes;
+    double *   early_start; /*Activity triplets*/
+    double *   early_end;
+    double *   late_start;
+    double *   late_end;
+    double *   reserve;
+    double *   opt_start;   /*Activity optimistic and pessimistic times*/
+    double *   opt_end;
+    double *   pes_start;
+    double *   pes_end;
+}ccpmTimesSt;
+
+/*
+CPM and PERT time parameters of an AoA network with durations equal
+to efforts. Events are numbered from 0, expected holds effort triplets,
+optimistic and pessimistic times are computed when is_pert is set,
+they are zero otherwise. Returns CCPM_EINVAL when the network has
+several start or finish events, CCPM_ELOOP when it has loops and
+CCPM_EUNK on negative time reserves.
+*/
+ccpmResultEn ccpm_compute_times(size_t n_evt, size_t n_act,
+                                const uint32_t * act_src, const uint32_t * act_dst,
+                                const double * expected,
+                                const double * optimistic, const double * pessimistic,
+                                bool is_pert, ccpmTimesSt * times);
 #endif // CCMP_H
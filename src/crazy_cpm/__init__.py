@@ -30,6 +30,6 @@ management.
 """
 #==============================================================================
 
-from _ccpm import (make_aoa, make_full_map,
-                   EINVAL, ELOOP, ENOMEM, ELIM, EUNK, OK)
-from .net_model import NetworkModel, fit_beta, calc_ppf, calc_cdf
+from _ccpm import (make_aoa, make_aoa_np, make_aoa_many, make_aoa_mem, make_full_map, make_full_map_np,
+                   compute_times, max_threads, Workspace, LoopError, EINVAL, ELOOP, ENOMEM, ELIM, EUNK, OK)
+from .net_model import NetworkModel, ReachabilityIndex, fit_beta, calc_ppf, calc_cdf, clear_topology_cache
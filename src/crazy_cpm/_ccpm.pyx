@@ -10,10 +10,21 @@ mapping for Critical Path Method calculations.
     This module requires Cython and a C compiler for building.
     The C backend provides significant performance improvements
     for large network models.
+    The C backend has no shared state and runs without the GIL.
 
 Functions:
     compute_aoa: Generate Activity-on-Arrow network from activity dependencies
+    make_aoa_mem: Estimate peak memory of network generation
+    max_threads: Number of threads used by network generation
+    make_aoa_np: NumPy version of make_aoa, arrays are used without copying
+    make_aoa_many: Build many independent networks on a pool of native threads
     make_full_map: Create complete dependency matrix for network analysis
+    make_full_map_np: NumPy version of make_full_map
+    compute_times: Compute CPM/PERT time parameters of AoA network
+
+Classes:
+    Workspace: Reusable C workspace for repeated network builds
+    LoopError: Links form a loop, lists activity IDs on the loop
 
 Constants:
     OK: Operation completed successfully
@@ -52,15 +63,20 @@ Exceptions:
 #distutils: language=c
 
 from libc cimport stdint
+from libc.string cimport memset
 from libcpp cimport bool
 import numpy as np
+import operator
 cimport numpy as cnp
 
 ctypedef stdint.uint8_t  _uint8_t
 ctypedef stdint.uint16_t _uint16_t
 ctypedef stdint.uint32_t _uint32_t
 
-cdef extern from "ccpm.c":
+cdef extern from "ccpm.c" nogil:
+    const _uint32_t CCPM_FAKE16
+    const _uint32_t CCPM_FAKE32
+
     ctypedef enum ccpmResultEn:
         CCPM_OK=0
         CCPM_EINVAL
@@ -69,6 +85,62 @@ cdef extern from "ccpm.c":
         CCPM_ELIM
         CCPM_EUNK
 
+    ctypedef enum ccpmDepsEn:
+        CCPM_DEPS_DENSE=0
+        CCPM_DEPS_SPARSE
+
+    ctypedef enum ccpmClosureEn:
+        CCPM_CLOSURE_ITER=0
+        CCPM_CLOSURE_TOPO
+
+    ctypedef enum ccpmSortEn:
+        CCPM_SORT_RADIX=0
+        CCPM_SORT_MERGE
+
+    ctypedef enum ccpmLevelEn:
+        CCPM_LEVEL_FAST=0
+        CCPM_LEVEL_DEPS
+        CCPM_LEVEL_FULL
+
+    ctypedef struct ccpmCtxSt:
+        pass
+
+    enum: CCPM_PHASE_NUM
+
+    ctypedef struct ccpmStatSt:
+        double time[CCPM_PHASE_NUM]
+        size_t iter[CCPM_PHASE_NUM]
+        size_t n_full
+        size_t n_min
+        size_t n_dummy
+        size_t n_evt
+        size_t mem
+        size_t n_comp
+
+    cdef ccpmCtxSt * ccpm_ctx_new()
+    cdef void        ccpm_ctx_free(ccpmCtxSt * ctx)
+    cdef void        ccpm_ctx_shrink(ccpmCtxSt * ctx)
+    cdef size_t      ccpm_ctx_size(const ccpmCtxSt * ctx)
+
+    ctypedef struct ccpmOptSt:
+        ccpmDepsEn    deps
+        ccpmClosureEn closure
+        bool          dedup
+        ccpmCtxSt *   ctx
+        size_t        max_mem
+        ccpmSortEn    sort
+        _uint32_t *   loop
+        size_t        n_threads
+        ccpmStatSt *  stat
+        bool          split
+        ccpmLevelEn   level
+
+    cdef void ccpm_opt_init(ccpmOptSt * opt)
+    cdef size_t ccpm_n_threads(size_t n_threads)
+
+    cdef size_t ccpm_make_aoa_mem(size_t n_act, size_t n_lnk, const ccpmOptSt * opt)
+    cdef size_t ccpm_make_aoa32_mem(size_t n_act, size_t n_lnk, const ccpmOptSt * opt)
+
     cdef ccpmResultEn ccpm_make_aoa(_uint16_t * act_ids,
                                     _uint16_t * lnk_src,
                                     _uint16_t * lnk_dst,
@@ -77,6 +149,35 @@ cdef extern from "ccpm.c":
                                     _uint16_t * act_dst
                                     )
 
+    cdef ccpmResultEn ccpm_make_aoa_ex(_uint16_t * act_ids,
+                                       _uint16_t * lnk_src,
+                                       _uint16_t * lnk_dst,
+                                       size_t      n_lnk,
+                                       _uint16_t * act_src,
+                                       _uint16_t * act_dst,
+                                       const ccpmOptSt * opt
+                                       )
+
+    cdef ccpmResultEn ccpm_make_aoa32(_uint32_t * act_ids,
+                                      _uint32_t * lnk_src,
+                                      _uint32_t * lnk_dst,
+                                      size_t      n_lnk,
+                                      _uint32_t * act_src,
+                                      _uint32_t * act_dst,
+                                      const ccpmOptSt * opt
+                                      )
+
+    cdef ccpmResultEn ccpm_make_aoa32_many(size_t              n_net,
+                                           _uint32_t **        act_ids,
+                                           _uint32_t **        lnk_src,
+                                           _uint32_t **        lnk_dst,
+                                           const size_t *      n_lnk,
+                                           _uint32_t **        act_src,
+                                           _uint32_t **        act_dst,
+                                           ccpmResultEn *      ret,
+                                           const ccpmOptSt *   opt
+                                           )
+
     cdef ccpmResultEn ccpm_make_full_map(_uint16_t * act_ids,
                                          _uint16_t * lnk_src,
                                          _uint16_t * lnk_dst,
@@ -86,6 +187,55 @@ cdef extern from "ccpm.c":
                                          _uint8_t  * full_dep_map
                                          )
 
+    cdef ccpmResultEn ccpm_make_full_map32(_uint32_t * act_ids,
+                                           _uint32_t * lnk_src,
+                                           _uint32_t * lnk_dst,
+                                           size_t      n_lnk,
+                                           size_t      n_max,
+                                           _uint32_t * full_act_dep,
+                                           _uint8_t  * full_dep_map
+                                           )
+
+    cdef ccpmResultEn ccpm_make_full_bits32(_uint32_t * act_ids,
+                                            _uint32_t * lnk_src,
+                                            _uint32_t * lnk_dst,
+                                            size_t      n_lnk,
+                                            _uint8_t  * full_dep_bits
+                                            )
+
+    cdef ccpmResultEn ccpm_full_bits_csr(const _uint8_t * full_dep_bits,
+                                         size_t           n_act,
+                                         _uint32_t *      full_dep_off,
+                                         _uint32_t *      full_dep_idx
+                                         )
+
+    ctypedef struct ccpmTimesSt:
+        _uint32_t * evt_stage
+        double *    evt_early
+        double *    evt_late
+        double *    evt_reserve
+        double *    evt_opt
+        double *    evt_pes
+        double *    early_start
+        double *    early_end
+        double *    late_start
+        double *    late_end
+        double *    reserve
+        double *    opt_start
+        double *    opt_end
+        double *    pes_start
+        double *    pes_end
+
+    cdef ccpmResultEn ccpm_compute_times(size_t n_evt, size_t n_act,
+                                         const _uint32_t * act_src,
+                                         const _uint32_t * act_dst,
+                                         const double * expected,
+                                         const double * optimistic,
+                                         const double * pessimistic,
+                                         bool is_pert,
+                                         ccpmTimesSt * times
+                                         )
+
 # Define constants
 OK     = CCPM_OK
 EINVAL = CCPM_EINVAL
@@ -94,51 +244,436 @@ ELOOP  = CCPM_ELOOP
 ELIM   = CCPM_ELIM
 EUNK   = CCPM_EUNK
 
+class LoopError(ValueError):
+    """
+    Links form a loop.
+
+    Attributes:
+        loop: list of activity IDs on the loop in link order,
+              each activity depends on the previous one
+              and the first one depends on the last one.
+    """
+    def __init__(self, loop):
+        self.loop = list(loop)
+        path = ' -> '.join(str(a) for a in self.loop + self.loop[:1])
+        super().__init__(f"Links form a loop: {path}")
+
+# Dependency storage modes
+_STORAGE = {
+    'dense':  CCPM_DEPS_DENSE,
+    'sparse': CCPM_DEPS_SPARSE,
+}
+
+# Transitive closure and reduction algorithms
+_CLOSURE = {
+    'iter': CCPM_CLOSURE_ITER,
+    'topo': CCPM_CLOSURE_TOPO,
+}
+
+# Sort algorithms
+_SORT = {
+    'radix': CCPM_SORT_RADIX,
+    'merge': CCPM_SORT_MERGE,
+}
+
+# Network optimization levels
+_LEVEL = {
+    0: CCPM_LEVEL_FAST,
+    1: CCPM_LEVEL_DEPS,
+    2: CCPM_LEVEL_FULL,
+}
+
+# Network generation phases in ccpmPhaseEn order
+_PHASES = ('check', 'alloc', 'deps', 'closure', 'nested', 'overlapping',
+           'network', 'stage_1', 'stage_2', 'dummies', 'finalize')
+
+# Full dependency map formats
+_MAP_OUTPUT = ('dense', 'packed', 'csr')
+
+# Identifier widths: (buffer dtype, maximal ID value)
+# 32-bit IDs reserve CCPM_FAKE32 for dummies, so it is not a valid ID
+_ID_BITS = {
+    16: (np.uint16, CCPM_FAKE16),
+    32: (np.uint32, CCPM_FAKE32 - 1),
+}
+
 # Helper to validate iterable of integers
-def _validate_int_iterable(iterable, name):
-    """Check that iterable is a sequence of non-negative integers < 65536."""
+def _validate_int_iterable(iterable, name, limit=65535):
+    """Check that iterable is a sequence of non-negative integers <= limit."""
     if not hasattr(iterable, '__len__') and not hasattr(iterable, '__iter__'):
         raise TypeError(f"'{name}' must be an iterable, got {type(iterable)}")
     for idx, val in enumerate(iterable):
         if val < 0:
             raise ValueError(f"Element {idx} of '{name}' is negative ({val})")
-        if val > 65535:
-            raise ValueError(f"Element {idx} of '{name}' exceeds uint16 limit ({val} > 65535)")
+        if val > limit:
+            raise ValueError(f"Element {idx} of '{name}' exceeds ID limit ({val} > {limit})")
     return True
 
+def _check_ids(arr, name, limit):
+    """Vectorized range check of an integer array, same errors as _validate_int_iterable."""
+    if 0 == arr.size:
+        return
+    if 'i' == arr.dtype.kind and arr.min() < 0:
+        idx = int(np.argmax(arr < 0))
+        raise ValueError(f"Element {idx} of '{name}' is negative ({arr[idx]})")
+    if arr.max() > limit:
+        idx = int(np.argmax(arr > limit))
+        raise ValueError(f"Element {idx} of '{name}' exceeds ID limit ({arr[idx]} > {limit})")
+
+def _id_array(arr, name, dtype, limit):
+    """Check a 1-D integer array, it is not copied when it is C-contiguous, writable and has the dtype."""
+    arr = np.asarray(arr)
+    if 1 == arr.ndim and 0 == arr.size:
+        return np.zeros(0, dtype=dtype)  # Empty lists are float arrays
+    if arr.ndim != 1 or arr.dtype.kind not in 'iu':
+        raise TypeError(f"'{name}' must be a 1-D integer array, got {arr.dtype} array of shape {arr.shape}")
+    _check_ids(arr, name, limit)
+    return np.require(arr, dtype, ['C', 'W'])  # C functions take non-const pointers
+
+def _seq_array(seq, name, dtype, limit):
+    """Convert a sequence of integers to an ID array, integer arrays and lists are checked vectorized."""
+    try:
+        arr = np.asarray(seq)
+    except (TypeError, ValueError, OverflowError):
+        arr = None
+    if arr is not None and 1 == arr.ndim and arr.dtype.kind in 'iu':
+        _check_ids(arr, name, limit)
+        return np.require(arr, dtype, ['C', 'W'])
+    # Empty, float or mixed sequences, check element by element
+    _validate_int_iterable(seq, name, limit)
+    return np.array([seq[i] for i in range(len(seq))], dtype=dtype)
+
+def _id_bits_info(id_bits):
+    """Buffer dtype and maximal ID value for given identifier width."""
+    if id_bits not in _ID_BITS:
+        raise ValueError(f"id_bits must be one of {list(_ID_BITS)}, got {id_bits!r}")
+    return _ID_BITS[id_bits]
+
+###############################################################################
+cdef class Workspace:
+    """
+    Reusable C workspace for repeated make_aoa calls.
+
+    Buffers are taken from one memory arena sized for the largest network
+    built so far, so batch runs of similar networks avoid allocator churn.
+    A workspace must not be used by several threads at once, use one
+    workspace per thread, concurrent use raises RuntimeError.
+    """
+    cdef ccpmCtxSt * _ctx
+    cdef bint        _busy
+
+    def __cinit__(self):
+        self._ctx = ccpm_ctx_new()
+        if self._ctx is NULL:
+            raise MemoryError("Could not allocate workspace")
+        self._busy = False
+
+    def __dealloc__(self):
+        ccpm_ctx_free(self._ctx)
+
+    cdef ccpmCtxSt * _acquire(self) except NULL:
+        # The flag is checked and set under the GIL
+        if self._busy:
+            raise RuntimeError("Workspace is used by another thread")
+        self._busy = True
+        return self._ctx
+
+    cdef void _release(self):
+        self._busy = False
+
+    def shrink(self):
+        """Release all memory reserved by the workspace."""
+        self._acquire()
+        ccpm_ctx_shrink(self._ctx)
+        self._release()
+
+    @property
+    def size(self):
+        """Reserved memory in bytes."""
+        return ccpm_ctx_size(self._ctx)
+
+###############################################################################
+def make_aoa_mem(n_act, n_lnk, storage='dense', closure='topo', id_bits=16, level=2):
+    """
+    Estimate peak memory used by make_aoa
+
+    Args:
+        n_act: Number of activities
+        n_lnk: Number of links
+        storage: Dependency storage mode, see make_aoa
+        closure: Transitive closure and reduction algorithm, see make_aoa
+        id_bits: Identifier width, see make_aoa
+        level: Network optimization level, see make_aoa
+
+    Returns:
+        int: Estimated peak number of bytes allocated by the C library.
+             Sparse storage grows with the number of dependencies,
+             so for 'sparse' the estimate is a lower bound.
+             Links are assumed to connect all activities, networks of
+             several components built with split need less memory.
+
+    Raises:
+        ValueError: If n_act or n_lnk is negative
+                    or if storage, closure, id_bits or level is unknown.
+    """
+    _id_bits_info(id_bits)
+
+    if n_act < 0 or n_lnk < 0:
+        raise ValueError(f"n_act and n_lnk must be non-negative, got {n_act} and {n_lnk}")
+    if storage not in _STORAGE:
+        raise ValueError(f"storage must be one of {list(_STORAGE)}, got {storage!r}")
+    if closure not in _CLOSURE:
+        raise ValueError(f"closure must be one of {list(_CLOSURE)}, got {closure!r}")
+    if level not in _LEVEL:
+        raise ValueError(f"level must be one of {list(_LEVEL)}, got {level!r}")
+
+    cdef ccpmOptSt opt
+    ccpm_opt_init(&opt)
+    opt.deps    = _STORAGE[storage]
+    opt.closure = _CLOSURE[closure]
+    opt.level   = _LEVEL[level]
+
+    if 32 == id_bits:
+        return ccpm_make_aoa32_mem(n_act, n_lnk, &opt)
+    return ccpm_make_aoa_mem(n_act, n_lnk, &opt)
+
+###############################################################################
+cdef dict _stat_dict(ccpmStatSt * stat):
+    """Convert network generation statistics to dict."""
+    return {
+        'time'    : {ph: stat.time[i] for i, ph in enumerate(_PHASES)},
+        'iter'    : {ph: stat.iter[i] for i, ph in enumerate(_PHASES)},
+        'n_full'  : stat.n_full,
+        'n_min'   : stat.n_min,
+        'n_dummy' : stat.n_dummy,
+        'n_evt'   : stat.n_evt,
+        'mem'     : stat.mem,
+        'n_comp'  : stat.n_comp,
+    }
+
+###############################################################################
+def max_threads(n_threads=0):
+    """
+    Number of threads make_aoa uses for given n_threads
+
+    Args:
+        n_threads: Requested number of threads, 0 - all available cores.
+
+    Returns:
+        int: Number of threads, 1 if the extension is built without OpenMP.
+    """
+    return ccpm_n_threads(_n_threads(n_threads))
+
+def _n_threads(n_threads):
+    """Check the number of threads, integers of any type are accepted."""
+    try:
+        n = operator.index(n_threads)
+    except TypeError:
+        n = -1
+    if n < 0:
+        raise ValueError(f"n_threads must be a non-negative integer, got {n_threads!r}")
+    return n
+
 ###############################################################################
-def make_aoa(act_ids, lnk_src, lnk_dst):
+def make_aoa(act_ids, lnk_src, lnk_dst, storage='dense', closure='topo', dedup=False,
+             id_bits=16, Workspace workspace=None, max_memory=None, sort='radix',
+             n_threads=1, stats=False, split=False, level=2):
     """
     Cython wrapper for ccpm_make_aoa - converts Python lists to C arrays and back
 
     Args:
-        act_ids: List of activity IDs (non‑negative integers < 65536)
-        lnk_src: List of link source activity IDs (non‑negative integers < 65536)
-        lnk_dst: List of link destination activity IDs (non‑negative integers < 65536)
+        act_ids: List of activity IDs (non‑negative integers < 65536, see id_bits)
+        lnk_src: List of link source activity IDs (non‑negative integers < 65536, see id_bits)
+        lnk_dst: List of link destination activity IDs (non‑negative integers < 65536, see id_bits)
+        storage: Dependency storage mode:
+                 'dense'  - n_max * n_max dependency lists and maps (default),
+                 'sparse' - per activity sorted sets, memory grows with the
+                            number of dependencies instead of n_max ** 2.
+                 Both modes give the same network.
+        closure: Transitive closure and reduction algorithm:
+                 'topo' - single pass in topological order (default),
+                 'iter' - grow full dependencies, then remove redundant ones.
+                 Both algorithms give the same network.
+        dedup: If True, repeated links are removed instead of being
+               reported as an error.
+        id_bits: Identifier width:
+                 16 - 16-bit IDs, activity and event numbers (default),
+                 32 - 32-bit IDs, activity and event numbers,
+                      IDs must be less than 0xffffffff.
+        workspace: Optional Workspace to take C buffers from,
+                   reuse it for repeated calls, one per thread.
+        max_memory: Optional memory budget in bytes, see make_aoa_mem.
+                    If 'dense' storage does not fit, 'sparse' one is used,
+                    if it does not fit either, ENOMEM is returned
+                    before any large allocation. Sparse rows grow with
+                    the dependency closure, ENOMEM is also returned when
+                    they would exceed the budget.
+        sort: Sort algorithm used for activity and event ordering:
+              'radix' - stable LSD radix sort, O(n) (default),
+              'merge' - stable merge sort, O(n log(n)).
+              Both algorithms give the same network.
+        n_threads: Number of threads for 'dense' closure and reduction,
+                   0 - all available cores, 1 - single thread (default).
+                   The network does not depend on the number of threads,
+                   it is 1 when the extension is built without OpenMP,
+                   see max_threads.
+        stats: If True, network generation statistics are returned.
+        split: If True, weakly connected components of the link graph
+               are built separately, in parallel when n_threads allows,
+               and joined at common start and finish events,
+               so memory grows with the sum of squared component sizes
+               instead of the squared number of activities.
+               Activities without links are built together.
+               Dependencies, dummy and event counts are the same as
+               without split, event numbers and activity order differ.
+        level: Network optimization level:
+               0 - near-linear construction: a node per activity end and
+                   a dummy per link, nodes are merged with union-find where
+                   dependencies are kept, redundant links are not removed,
+                   so the network has more dummies: about 1.2 times the
+                   dummies of level 2 when most links are minimal, 2-3
+                   times on hub-shaped and dense random link graphs and
+                   up to 4.5 times on chains with many redundant links,
+                   events grow by up to 10 %. A network which does not
+                   fit output lists is built with level 1,
+               1 - minimal dependencies with nested and overlapping
+                   dependency processing,
+               2 - also network optimization stages (default).
+               All levels give networks with the same activity dependencies.
 
     Returns:
         tuple: (status_code, act_ids, act_src, act_dst)
+               or (status_code, act_ids, act_src, act_dst, stats) if stats is True
         where:
           status_code: integer status code (0 = success) — unused, errors raise exception
           act_ids: resulting activity IDs (same as input but may be reordered)
           act_src: resulting activity source event IDs
           act_dst: resulting activity destination event IDs
+          stats: dict with keys:
+                 'time'    - dict of wall times of phases in seconds,
+                 'iter'    - dict of main loop iterations of phases,
+                 'n_full'  - number of full dependencies,
+                 'n_min'   - number of minimal dependencies,
+                 'n_dummy' - number of dummy activities,
+                 'n_evt'   - number of events,
+                 'mem'     - peak bytes allocated by the C library,
+                 'n_comp'  - number of components built separately.
+                 Values of components are summed, so are phase times
+                 of components built in parallel.
+                 Phases are 'check', 'alloc', 'deps', 'closure', 'nested',
+                 'overlapping', 'network', 'stage_1', 'stage_2', 'dummies'
+                 and 'finalize', phases after an error have zero values.
 
     Raises:
         TypeError: If any input is not an iterable or contains non‑integer elements.
-        ValueError: If element values are out of range (negative or > 65535)
-                    or if lnk_src and lnk_dst have different lengths.
-        RuntimeError: If the C library returns an error (e.g., circular dependency).
+        ValueError: If element values are out of range (negative or over the ID limit),
+                    if lnk_src and lnk_dst have different lengths
+                    if storage, closure, id_bits, sort or level is unknown,
+                    if max_memory is not positive
+                    or if n_threads is negative.
+        LoopError: If links form a loop, checked in O(n_act + n_lnk)
+                   before large allocations, its loop attribute lists
+                   activity IDs on the loop.
+        RuntimeError: If workspace is used by another thread.
 
     .. note::
         The C function may also return error codes for memory allocation failure
         or loop detection; these are translated into RuntimeError with a
         descriptive message.
+        The GIL is released while the network is built, so networks may be
+        built concurrently from several threads.
+    """
+    id_dtype, id_limit = _id_bits_info(id_bits)
+
+    # Input validation
+    act_ids = _seq_array(act_ids, "act_ids", id_dtype, id_limit)
+    lnk_src = _seq_array(lnk_src, "lnk_src", id_dtype, id_limit)
+    lnk_dst = _seq_array(lnk_dst, "lnk_dst", id_dtype, id_limit)
+
+    ret = _make_aoa(act_ids, lnk_src, lnk_dst, storage, closure, dedup, id_bits, workspace,
+                    max_memory, sort, n_threads, stats, split, level)
+
+    # Get output data
+    return (ret[0], list(ret[1]), list(ret[2]), list(ret[3])) + ret[4:]
+
+###############################################################################
+def make_aoa_np(act_ids, lnk_src, lnk_dst, storage='dense', closure='topo', dedup=False,
+                id_bits=16, Workspace workspace=None, max_memory=None, sort='radix',
+                n_threads=1, stats=False, split=False, level=2):
+    """
+    NumPy version of make_aoa, takes and returns arrays
+
+    Args:
+        act_ids: 1-D integer array of activity IDs, or a sequence of integers
+        lnk_src: 1-D integer array of link source activity IDs, or a sequence of integers
+        lnk_dst: 1-D integer array of link destination activity IDs, or a sequence of integers
+        Other arguments are the same as in make_aoa.
+
+        Contiguous writable arrays of uint16 (uint32 for id_bits=32) are
+        used without copying, other integer arrays are converted. IDs are
+        checked with vectorized operations. 16-bit links are passed to the
+        C library as is, 32-bit ones are copied because the C library
+        renumbers them in place, input arrays are never modified.
+
+    Returns:
+        tuple: (status_code, act_ids, act_src, act_dst)
+               or (status_code, act_ids, act_src, act_dst, stats) if stats is True,
+        see make_aoa, act_ids, act_src and act_dst are 1-D arrays
+        of uint16 (uint32 for id_bits=32).
+
+    Raises:
+        TypeError: If any input is not a 1-D array of integers.
+        ValueError, LoopError, RuntimeError: See make_aoa.
     """
+    id_dtype, id_limit = _id_bits_info(id_bits)
+
     # Input validation
-    _validate_int_iterable(act_ids, "act_ids")
-    _validate_int_iterable(lnk_src, "lnk_src")
-    _validate_int_iterable(lnk_dst, "lnk_dst")
+    act_ids = _id_array(act_ids, "act_ids", id_dtype, id_limit)
+    lnk_src = _id_array(lnk_src, "lnk_src", id_dtype, id_limit)
+    lnk_dst = _id_array(lnk_dst, "lnk_dst", id_dtype, id_limit)
+
+    return _make_aoa(act_ids, lnk_src, lnk_dst, storage, closure, dedup, id_bits, workspace,
+                     max_memory, sort, n_threads, stats, split, level)
+
+###############################################################################
+cdef void _make_opt(ccpmOptSt * opt, storage, closure, dedup, max_memory, sort, n_threads,
+                    split, level) except *:
+    """Check make_aoa options and fill C options."""
+    if storage not in _STORAGE:
+        raise ValueError(f"storage must be one of {list(_STORAGE)}, got {storage!r}")
+    if closure not in _CLOSURE:
+        raise ValueError(f"closure must be one of {list(_CLOSURE)}, got {closure!r}")
+    if sort not in _SORT:
+        raise ValueError(f"sort must be one of {list(_SORT)}, got {sort!r}")
+    if level not in _LEVEL:
+        raise ValueError(f"level must be one of {list(_LEVEL)}, got {level!r}")
+
+    ccpm_opt_init(opt)
+    opt.deps    = _STORAGE[storage]
+    opt.closure = _CLOSURE[closure]
+    opt.dedup   = dedup
+    opt.sort    = _SORT[sort]
+    if max_memory is not None:
+        if max_memory <= 0:
+            raise ValueError(f"max_memory must be positive, got {max_memory}")
+        opt.max_mem = max_memory
+    opt.n_threads = _n_threads(n_threads)
+    opt.split     = split
+    opt.level     = _LEVEL[level]
+
+###############################################################################
+cdef tuple _make_aoa(act_ids, lnk_src, lnk_dst, storage, closure, dedup, id_bits, Workspace workspace,
+                     max_memory, sort, n_threads, stats, split, level):
+    """Build the network of checked contiguous ID arrays, see make_aoa_np."""
+    id_dtype = _id_bits_info(id_bits)[0]
+
+    cdef ccpmOptSt opt
+    _make_opt(&opt, storage, closure, dedup, max_memory, sort, n_threads, split, level)
+
+    cdef ccpmStatSt stat
+    memset(&stat, 0, sizeof(stat))
+    if stats:
+        opt.stat = &stat
 
     cdef size_t n_act = len(act_ids)
     cdef size_t n_lnk = len(lnk_src)
@@ -148,122 +683,512 @@ def make_aoa(act_ids, lnk_src, lnk_dst):
     cdef size_t n_max = n_act + (n_lnk if n_lnk > n_act else n_act)
     cdef size_t n_lnk_plus = n_lnk if n_lnk > 0 else 1 # Zero links is valid case
 
-    # Create buffer arrays
-    act_ids_arr = np.zeros(n_max + 1, dtype=np.uint16)
-    lnk_src_arr = np.zeros(n_lnk_plus, dtype=np.uint16)
-    lnk_dst_arr = np.zeros(n_lnk_plus, dtype=np.uint16)
-    act_src_arr = np.zeros(n_max + 1, dtype=np.uint16)
-    act_dst_arr = np.zeros(n_max + 1, dtype=np.uint16)
+    # Create buffer arrays, act_ids are both input and output with the length in the first item
+    act_ids_arr = np.empty(n_max + 1, dtype=id_dtype)
+    act_src_arr = np.zeros(n_max + 1, dtype=id_dtype)
+    act_dst_arr = np.zeros(n_max + 1, dtype=id_dtype)
+
+    loop_arr    = np.zeros(n_act + 1, dtype=np.uint32)
 
     # Prepare input data
     act_ids_arr[0] = n_act
-    for i in range(n_act):
-        act_ids_arr[i + 1] = act_ids[i]
+    act_ids_arr[1:n_act + 1] = act_ids
 
-    for i in range(n_lnk):
-        lnk_src_arr[i] = lnk_src[i]
-        lnk_dst_arr[i] = lnk_dst[i]
+    if 0 == n_lnk:
+        lnk_src_arr = np.zeros(n_lnk_plus, dtype=id_dtype)
+        lnk_dst_arr = np.zeros(n_lnk_plus, dtype=id_dtype)
+    elif 32 == id_bits:
+        # 32-bit links are renumbered in place
+        lnk_src_arr = lnk_src.copy()
+        lnk_dst_arr = lnk_dst.copy()
+    else:
+        lnk_src_arr = lnk_src
+        lnk_dst_arr = lnk_dst
 
     # Memory views
-    cdef _uint16_t[:] act_ids_view = act_ids_arr
-    cdef _uint16_t[:] lnk_src_view = lnk_src_arr
-    cdef _uint16_t[:] lnk_dst_view = lnk_dst_arr
-    cdef _uint16_t[:] act_src_view = act_src_arr
-    cdef _uint16_t[:] act_dst_view = act_dst_arr
-
-    # Make AoA network
-    cdef ccpmResultEn result = ccpm_make_aoa(&act_ids_view[0],
-                                             &lnk_src_view[0],
-                                             &lnk_dst_view[0],
-                                             n_lnk,
-                                             &act_src_view[0],
-                                             &act_dst_view[0]
-                                             )
+    cdef _uint32_t[:] loop_view = loop_arr
+    opt.loop = &loop_view[0]
+
+    cdef _uint16_t[:] act_ids_view
+    cdef _uint16_t[:] lnk_src_view
+    cdef _uint16_t[:] lnk_dst_view
+    cdef _uint16_t[:] act_src_view
+    cdef _uint16_t[:] act_dst_view
+
+    cdef _uint32_t[:] act_ids_view32
+    cdef _uint32_t[:] lnk_src_view32
+    cdef _uint32_t[:] lnk_dst_view32
+    cdef _uint32_t[:] act_src_view32
+    cdef _uint32_t[:] act_dst_view32
+
+    # Make AoA network, the C code touches no Python objects
+    cdef ccpmResultEn result
+    if workspace is not None:
+        opt.ctx = workspace._acquire()
+    try:
+        if 32 == id_bits:
+            act_ids_view32 = act_ids_arr
+            lnk_src_view32 = lnk_src_arr
+            lnk_dst_view32 = lnk_dst_arr
+            act_src_view32 = act_src_arr
+            act_dst_view32 = act_dst_arr
+
+            with nogil:
+                result = ccpm_make_aoa32(&act_ids_view32[0],
+                                         &lnk_src_view32[0],
+                                         &lnk_dst_view32[0],
+                                         n_lnk,
+                                         &act_src_view32[0],
+                                         &act_dst_view32[0],
+                                         &opt
+                                         )
+        else:
+            act_ids_view = act_ids_arr
+            lnk_src_view = lnk_src_arr
+            lnk_dst_view = lnk_dst_arr
+            act_src_view = act_src_arr
+            act_dst_view = act_dst_arr
+
+            with nogil:
+                result = ccpm_make_aoa_ex(&act_ids_view[0],
+                                          &lnk_src_view[0],
+                                          &lnk_dst_view[0],
+                                          n_lnk,
+                                          &act_src_view[0],
+                                          &act_dst_view[0],
+                                          &opt
+                                          )
+    finally:
+        if workspace is not None:
+            workspace._release()
+
+    if CCPM_ELOOP == result:
+        raise LoopError(int(a) for a in loop_arr[1:loop_arr[0] + 1])
 
     # Get output data
-    py_act_ids = []
-    for i in range(act_ids_arr[0]):
-        py_act_ids.append(act_ids_arr[i + 1])
+    n_out = act_src_arr[0]
+    out_act_ids = act_ids_arr[1:act_ids_arr[0] + 1]
+    out_act_src = act_src_arr[1:n_out + 1]
+    out_act_dst = act_dst_arr[1:n_out + 1]
+
+    if stats:
+        return result, out_act_ids, out_act_src, out_act_dst, _stat_dict(&stat)
+    return result, out_act_ids, out_act_src, out_act_dst
+
+###############################################################################
+def make_aoa_many(networks, storage='dense', closure='topo', dedup=False, id_bits=16,
+                  max_memory=None, sort='radix', n_threads=1, split=False, level=2):
+    """
+    Build many independent networks on a pool of native threads
+
+    Args:
+        networks: Iterable of (act_ids, lnk_src, lnk_dst) tuples of 1-D integer
+                  arrays or sequences of integers, see make_aoa_np.
+        n_threads: Number of threads in the pool, 0 - all available cores,
+                   1 - networks are built one by one (default),
+                   it is 1 when the extension is built without OpenMP,
+                   see max_threads. Each network is built in one thread,
+                   the GIL is released while networks are built.
+        Other arguments are the same as in make_aoa and apply to every
+        network, max_memory is a budget of each network.
+
+    Returns:
+        list: (status_code, act_ids, act_src, act_dst) tuples in network order
+        where:
+          status_code: OK, or an error of this network (ELOOP, ENOMEM,
+                       EINVAL, ELIM), errors of a network do not stop other ones
+          act_ids, act_src, act_dst: 1-D arrays of uint16 (uint32 for id_bits=32)
+                       as returned by make_aoa_np, empty on error
+
+    Raises:
+        TypeError: If any network is not a tuple of three ID arrays.
+        ValueError: If IDs of a network are out of range, if lnk_src and lnk_dst
+                    of a network have different lengths or if options are invalid.
+    """
+    id_dtype, id_limit = _id_bits_info(id_bits)
+
+    cdef ccpmOptSt opt
+    _make_opt(&opt, storage, closure, dedup, max_memory, sort, n_threads, split, level)
+
+    # Input validation, networks are copied to 32-bit buffers which are renumbered in place
+    nets = []
+    for k, net in enumerate(networks):
+        try:
+            act_ids, lnk_src, lnk_dst = net
+        except (TypeError, ValueError):
+            raise TypeError(f"Network {k} must be a tuple of act_ids, lnk_src and lnk_dst, got {type(net)}") from None
+        act_ids = _id_array(act_ids, f"networks[{k}] act_ids", id_dtype, id_limit)
+        lnk_src = _id_array(lnk_src, f"networks[{k}] lnk_src", id_dtype, id_limit)
+        lnk_dst = _id_array(lnk_dst, f"networks[{k}] lnk_dst", id_dtype, id_limit)
+        if len(lnk_src) != len(lnk_dst):
+            raise ValueError(f"lnk_src and lnk_dst of network {k} must have same length, "
+                             f"got {len(lnk_src)} and {len(lnk_dst)}")
+        nets.append((act_ids, lnk_src, lnk_dst))
 
-    py_act_src = []
-    py_act_dst = []
-    for i in range(act_src_arr[0]):
-        py_act_src.append(act_src_arr[i + 1])
-        py_act_dst.append(act_dst_arr[i + 1])
+    cdef size_t n_net = len(nets)
+    cdef size_t n_ptr = n_net if n_net > 0 else 1
+    cdef size_t n_act
+    cdef size_t n_max
 
-    return result, py_act_ids, py_act_src, py_act_dst
+    # Pointer tables, numpy arrays keep the buffers
+    ids_ptr = np.zeros(n_ptr, dtype=np.uintp)
+    src_ptr = np.zeros(n_ptr, dtype=np.uintp)
+    dst_ptr = np.zeros(n_ptr, dtype=np.uintp)
+    out_src = np.zeros(n_ptr, dtype=np.uintp)
+    out_dst = np.zeros(n_ptr, dtype=np.uintp)
+    lnk_num = np.zeros(n_ptr, dtype=np.uintp)
+    ret_arr = np.full(n_ptr, CCPM_EINVAL, dtype=np.intc)
+    bufs = []
+    lim = set()
+    for k, (act_ids, lnk_src, lnk_dst) in enumerate(nets):
+        n_act = len(act_ids)
+        n_lnk = len(lnk_src)
+        n_max = n_act + (n_lnk if n_lnk > n_act else n_act)
+
+        buf = (np.empty(n_max + 1, dtype=np.uint32),
+               np.zeros(n_lnk + 1, dtype=np.uint32),
+               np.zeros(n_lnk + 1, dtype=np.uint32),
+               np.zeros(n_max + 1, dtype=np.uint32),
+               np.zeros(n_max + 1, dtype=np.uint32))
+        buf[0][0] = n_act
+        buf[0][1:n_act + 1] = act_ids
+        buf[1][:n_lnk] = lnk_src
+        buf[2][:n_lnk] = lnk_dst
+        bufs.append(buf)
+
+        ids_ptr[k] = buf[0].ctypes.data
+        src_ptr[k] = buf[1].ctypes.data
+        dst_ptr[k] = buf[2].ctypes.data
+        out_src[k] = buf[3].ctypes.data
+        out_dst[k] = buf[4].ctypes.data
+        lnk_num[k] = n_lnk
+
+        # Limits of 16-bit builds, see ccpm_make_aoa_ex, empty networks are skipped by the C library
+        if 16 == id_bits and (n_act >= CCPM_FAKE16 or (not dedup and n_lnk >= CCPM_FAKE16)):
+            lim.add(k)
+            buf[0][0] = 0
+
+    cdef size_t[:]       ids_view = ids_ptr
+    cdef size_t[:]       src_view = src_ptr
+    cdef size_t[:]       dst_view = dst_ptr
+    cdef size_t[:]       asr_view = out_src
+    cdef size_t[:]       ads_view = out_dst
+    cdef size_t[:]       num_view = lnk_num
+    cdef int[:]          ret_view = ret_arr
+
+    with nogil:
+        ccpm_make_aoa32_many(n_net,
+                             <_uint32_t **>&ids_view[0],
+                             <_uint32_t **>&src_view[0],
+                             <_uint32_t **>&dst_view[0],
+                             &num_view[0],
+                             <_uint32_t **>&asr_view[0],
+                             <_uint32_t **>&ads_view[0],
+                             <ccpmResultEn *>&ret_view[0],
+                             &opt
+                             )
+
+    # Get output data
+    results = []
+    empty = np.zeros(0, dtype=id_dtype)
+    for k, (ids_arr, _, _, src_arr, dst_arr) in enumerate(bufs):
+        status = CCPM_ELIM if k in lim else int(ret_arr[k])
+        if 16 == id_bits and CCPM_OK == status:
+            # Dummies may push activity and event numbers over the 16-bit limit
+            n_out = src_arr[0]
+            if n_out >= CCPM_FAKE16 or (n_out and max(src_arr[1:n_out + 1].max(),
+                                                      dst_arr[1:n_out + 1].max()) >= CCPM_FAKE16):
+                status = CCPM_ELIM
+        if CCPM_OK != status:
+            results.append((status, empty, empty, empty))
+            continue
+        n_out = src_arr[0]
+        results.append((status,
+                        ids_arr[1:ids_arr[0] + 1].astype(id_dtype, copy=False),
+                        src_arr[1:n_out + 1].astype(id_dtype, copy=False),
+                        dst_arr[1:n_out + 1].astype(id_dtype, copy=False)))
+    return results
 
 ###############################################################################
-def make_full_map(act_ids, lnk_src, lnk_dst):
+def make_full_map(act_ids, lnk_src, lnk_dst, id_bits=16, output='dense'):
     """
     Build full dependency map for activities
 
     Args:
-        act_ids: List of activity IDs (non‑negative integers < 65536)
-        lnk_src: List of link source activity IDs (non‑negative integers < 65536)
-        lnk_dst: List of link destination activity IDs (non‑negative integers < 65536)
+        act_ids: List of activity IDs (non‑negative integers < 65536, see id_bits)
+        lnk_src: List of link source activity IDs (non‑negative integers < 65536, see id_bits)
+        lnk_dst: List of link destination activity IDs (non‑negative integers < 65536, see id_bits)
+        id_bits: Identifier width, 16 (default) or 32, see make_aoa.
+        output: Dependency map format:
+                'dense'  - n_act x n_act bool array (default),
+                'packed' - n_act x ((n_act + 7) // 8) uint8 array of rows
+                           packed like numpy.packbits, n_act ** 2 / 8 bytes,
+                'csr'    - n_act x n_act bool scipy.sparse.csr_matrix with
+                           sorted column indices, memory grows with the
+                           number of dependencies.
+                All formats are built in C from packed bit sets in
+                O(n_lnk * n_act / 64), item [i, j] is set when activity
+                i depends on activity j.
 
     Returns:
         tuple: (status_code, full_dep_map)
         where:
-          status_code: integer status code (0 = success) — unused, errors raise exception
-          full_dep_map: 2D numpy array with dtype=bool representing the full dependency matrix
+          status_code: integer status code (0 = success), the map is empty on error
+          full_dep_map: full dependency matrix in the output format
 
     Raises:
         TypeError: If any input is not an iterable or contains non‑integer elements.
-        ValueError: If element values are out of range (negative or > 65535)
-                    or if lnk_src and lnk_dst have different lengths.
-        RuntimeError: If the C library returns an error (e.g., circular dependency).
+        ValueError: If element values are out of range (negative or over the ID limit),
+                    if lnk_src and lnk_dst have different lengths
+                    or if id_bits or output is unknown.
+        ImportError: If output is 'csr' and scipy is not installed.
+    """
+    id_dtype, id_limit = _id_bits_info(id_bits)
+
+    # Input validation
+    act_ids = _seq_array(act_ids, "act_ids", id_dtype, id_limit)
+    lnk_src = _seq_array(lnk_src, "lnk_src", id_dtype, id_limit)
+    lnk_dst = _seq_array(lnk_dst, "lnk_dst", id_dtype, id_limit)
+
+    return _make_full_map(act_ids, lnk_src, lnk_dst, output)
+
+###############################################################################
+def make_full_map_np(act_ids, lnk_src, lnk_dst, id_bits=16, output='dense'):
+    """
+    NumPy version of make_full_map
+
+    Args:
+        act_ids: 1-D integer array of activity IDs, or a sequence of integers
+        lnk_src: 1-D integer array of link source activity IDs, or a sequence of integers
+        lnk_dst: 1-D integer array of link destination activity IDs, or a sequence of integers
+        id_bits: Identifier width, 16 (default) or 32, see make_aoa.
+        output: Dependency map format, see make_full_map.
+
+        Arrays are checked as in make_aoa_np.
+
+    Returns:
+        tuple: (status_code, full_dep_map), see make_full_map.
+
+    Raises:
+        TypeError: If any input is not a 1-D array of integers.
+        ValueError, ImportError, RuntimeError: See make_full_map.
     """
+    id_dtype, id_limit = _id_bits_info(id_bits)
+
     # Input validation
-    _validate_int_iterable(act_ids, "act_ids")
-    _validate_int_iterable(lnk_src, "lnk_src")
-    _validate_int_iterable(lnk_dst, "lnk_dst")
+    act_ids = _id_array(act_ids, "act_ids", id_dtype, id_limit)
+    lnk_src = _id_array(lnk_src, "lnk_src", id_dtype, id_limit)
+    lnk_dst = _id_array(lnk_dst, "lnk_dst", id_dtype, id_limit)
+
+    return _make_full_map(act_ids, lnk_src, lnk_dst, output)
+
+###############################################################################
+cdef tuple _make_full_map(act_ids, lnk_src, lnk_dst, output):
+    """Build full dependency map of checked ID arrays, see make_full_map."""
+    if output not in _MAP_OUTPUT:
+        raise ValueError(f"output must be one of {list(_MAP_OUTPUT)}, got {output!r}")
+    if 'csr' == output:
+        # SciPy is needed for CSR output only, check it before the build
+        try:
+            from scipy.sparse import csr_matrix
+        except ImportError as e:
+            raise ImportError("output='csr' needs scipy >= 1.13.1, install it or use output='packed'") from e
 
     cdef size_t n_act = len(act_ids)
     cdef size_t n_lnk = len(lnk_src)
     if len(lnk_dst) != n_lnk:
         raise ValueError(f"lnk_src and lnk_dst must have same length, got {n_lnk} and {len(lnk_dst)}")
 
-    cdef size_t n_max = n_act
+    cdef size_t n_b = (n_act + 7) >> 3
 
-    # Create buffer arrays
-    act_ids_arr      = np.zeros(n_act + 1, dtype=np.uint16)
-    lnk_src_arr      = np.zeros(n_lnk, dtype=np.uint16)
-    lnk_dst_arr      = np.zeros(n_lnk, dtype=np.uint16)
-    full_act_dep_arr = np.zeros(n_max * n_max, dtype=np.uint32)
-    full_dep_map_arr = np.zeros(n_max * n_max, dtype=np.uint8)
+    # Create buffer arrays, act_ids have the length in the first item, links are renumbered in place
+    act_ids_arr = np.empty(n_act + 1, dtype=np.uint32)
+    lnk_src_arr = np.zeros(n_lnk + 1, dtype=np.uint32)
+    lnk_dst_arr = np.zeros(n_lnk + 1, dtype=np.uint32)
+    bits_arr    = np.zeros((n_act, n_b), dtype=np.uint8)
+    off_arr     = np.zeros(n_act + 1, dtype=np.uint32)
 
     # Prepare input data
     act_ids_arr[0] = n_act
-    for i in range(n_act):
-        act_ids_arr[i + 1] = act_ids[i]
+    act_ids_arr[1:] = act_ids
+    lnk_src_arr[:n_lnk] = lnk_src
+    lnk_dst_arr[:n_lnk] = lnk_dst
+
+    # Memory views
+    cdef _uint32_t[:] act_ids_view = act_ids_arr
+    cdef _uint32_t[:] lnk_src_view = lnk_src_arr
+    cdef _uint32_t[:] lnk_dst_view = lnk_dst_arr
+    cdef _uint8_t[:]  bits_view    = bits_arr.reshape(-1) if n_act else np.zeros(1, dtype=np.uint8)
+    cdef _uint32_t[:] off_view     = off_arr
+    cdef _uint32_t[:] idx_view
+
+    # Compute packed dependency map
+    cdef ccpmResultEn result
+    with nogil:
+        result = ccpm_make_full_bits32(&act_ids_view[0],
+                                       &lnk_src_view[0],
+                                       &lnk_dst_view[0],
+                                       n_lnk,
+                                       &bits_view[0]
+                                       )
+    if CCPM_OK != result:
+        bits_arr[:] = 0
+
+    if 'packed' == output:
+        return result, bits_arr
+    if 'dense' == output:
+        return result, np.unpackbits(bits_arr, axis=1, count=n_act).view(np.bool_)
+
+    # Count dependencies, then fill column indices
+    with nogil:
+        ccpm_full_bits_csr(&bits_view[0], n_act, &off_view[0], NULL)
+    idx_arr = np.zeros(off_arr[n_act] + 1, dtype=np.uint32)
+    idx_view = idx_arr
+    with nogil:
+        ccpm_full_bits_csr(&bits_view[0], n_act, &off_view[0], &idx_view[0])
+
+    n_dep = off_arr[n_act]
+    return result, csr_matrix((np.ones(n_dep, dtype=np.bool_), idx_arr[:n_dep], off_arr), shape=(n_act, n_act))
+
+###############################################################################
+def compute_times(act_src, act_dst, n_evt, expected, optimistic, pessimistic, is_pert=True):
+    """
+    Compute CPM/PERT time parameters of AoA network with durations equal to efforts
+
+    Args:
+        act_src: Activity source event indexes (0 ... n_evt - 1)
+        act_dst: Activity destination event indexes (0 ... n_evt - 1)
+        n_evt: Number of events
+        expected: Activity efforts, array of shape (n_act, 3): value, variance, error bound
+        optimistic: Activity optimistic efforts
+        pessimistic: Activity pessimistic efforts
+        is_pert: Compute optimistic and pessimistic times, they are zero otherwise
+
+    Returns:
+        tuple: (evt, act)
+        where:
+          evt: dict of event arrays: 'stage', 'early', 'late', 'reserve',
+               'optimistic', 'pessimistic'
+          act: dict of activity arrays: 'early_start', 'early_end', 'late_start',
+               'late_end', 'reserve', 'opt_start', 'opt_end', 'pes_start', 'pes_end'
+          Time triplets have shape (n, 3), other arrays have shape (n,).
+
+    Raises:
+        TypeError: If event indexes are not 1-D integer arrays or sequences.
+        ValueError: If input arrays have wrong shapes or event indexes are out of range.
+        RuntimeError: If the network has several starting or finishing events, loops
+                      or negative time reserves.
+    """
+    if not 1 <= n_evt <= 2**32:
+        raise ValueError(f"n_evt must be in 1 ... 2**32 (event indexes are 32-bit), got {n_evt}")
+
+    # Negative and large indexes would wrap on the cast, check them first
+    src_arr = _id_array(act_src, 'act_src', np.uint32, n_evt - 1)
+    dst_arr = _id_array(act_dst, 'act_dst', np.uint32, n_evt - 1)
+    exp_arr = np.ascontiguousarray(expected, dtype=np.float64)
+    opt_arr = np.ascontiguousarray(optimistic, dtype=np.float64)
+    pes_arr = np.ascontiguousarray(pessimistic, dtype=np.float64)
 
-    for i in range(n_lnk):
-        lnk_src_arr[i] = lnk_src[i]
-        lnk_dst_arr[i] = lnk_dst[i]
+    cdef size_t n_act = len(src_arr)
+    if (dst_arr.shape != (n_act,) or exp_arr.shape != (n_act, 3)
+            or opt_arr.shape != (n_act,) or pes_arr.shape != (n_act,)):
+        raise ValueError(f"Activity arrays must have {n_act} items")
+
+    cdef size_t n = n_evt
+    cdef size_t m = n_act if n_act > 0 else 1 # Zero activities is valid case
+
+    evt = {
+        'stage':       np.zeros(n, dtype=np.uint32),
+        'early':       np.zeros((n, 3), dtype=np.float64),
+        'late':        np.zeros((n, 3), dtype=np.float64),
+        'reserve':     np.zeros((n, 3), dtype=np.float64),
+        'optimistic':  np.zeros(n, dtype=np.float64),
+        'pessimistic': np.zeros(n, dtype=np.float64),
+    }
+    act = {
+        'early_start': np.zeros((m, 3), dtype=np.float64),
+        'early_end':   np.zeros((m, 3), dtype=np.float64),
+        'late_start':  np.zeros((m, 3), dtype=np.float64),
+        'late_end':    np.zeros((m, 3), dtype=np.float64),
+        'reserve':     np.zeros((m, 3), dtype=np.float64),
+        'opt_start':   np.zeros(m, dtype=np.float64),
+        'opt_end':     np.zeros(m, dtype=np.float64),
+        'pes_start':   np.zeros(m, dtype=np.float64),
+        'pes_end':     np.zeros(m, dtype=np.float64),
+    }
+
+    if 0 == n_act:
+        src_arr = np.zeros(1, dtype=np.uint32)
+        dst_arr = np.zeros(1, dtype=np.uint32)
+        exp_arr = np.zeros((1, 3), dtype=np.float64)
+        opt_arr = np.zeros(1, dtype=np.float64)
+        pes_arr = np.zeros(1, dtype=np.float64)
 
     # Memory views
-    cdef _uint16_t[:] act_ids_view      = act_ids_arr
-    cdef _uint16_t[:] lnk_src_view      = lnk_src_arr
-    cdef _uint16_t[:] lnk_dst_view      = lnk_dst_arr
-    cdef _uint32_t[:] full_act_dep_view = full_act_dep_arr
-    cdef _uint8_t[:]  full_dep_map_view = full_dep_map_arr
-
-    # Compute dependency map
-    cdef ccpmResultEn result = ccpm_make_full_map(&act_ids_view[0],
-                                                  &lnk_src_view[0],
-                                                  &lnk_dst_view[0],
-                                                  n_lnk,
-                                                  n_max,
-                                                  &full_act_dep_view[0],
-                                                  &full_dep_map_view[0]
-                                                  )
-
-    # Convert result to numpy bool array using explicit loops (as requested)
-    full_dep_map_np = np.zeros((n_act, n_act), dtype=np.bool_)
-    for i in range(n_act):
-        for j in range(n_act):
-            full_dep_map_np[i, j] = full_dep_map_arr[i * n_max + j]
-
-    return result, full_dep_map_np
+    cdef _uint32_t[:]   src_view = src_arr
+    cdef _uint32_t[:]   dst_view = dst_arr
+    cdef double[:, ::1] exp_view = exp_arr
+    cdef double[:]      opt_view = opt_arr
+    cdef double[:]      pes_view = pes_arr
+
+    cdef _uint32_t[:]   evt_stage_view   = evt['stage']
+    cdef double[:, ::1] evt_early_view   = evt['early']
+    cdef double[:, ::1] evt_late_view    = evt['late']
+    cdef double[:, ::1] evt_reserve_view = evt['reserve']
+    cdef double[:]      evt_opt_view     = evt['optimistic']
+    cdef double[:]      evt_pes_view     = evt['pessimistic']
+
+    cdef double[:, ::1] early_start_view = act['early_start']
+    cdef double[:, ::1] early_end_view   = act['early_end']
+    cdef double[:, ::1] late_start_view  = act['late_start']
+    cdef double[:, ::1] late_end_view    = act['late_end']
+    cdef double[:, ::1] reserve_view     = act['reserve']
+    cdef double[:]      opt_start_view   = act['opt_start']
+    cdef double[:]      opt_end_view     = act['opt_end']
+    cdef double[:]      pes_start_view   = act['pes_start']
+    cdef double[:]      pes_end_view     = act['pes_end']
+
+    cdef ccpmTimesSt times
+    times.evt_stage   = &evt_stage_view[0]
+    times.evt_early   = &evt_early_view[0, 0]
+    times.evt_late    = &evt_late_view[0, 0]
+    times.evt_reserve = &evt_reserve_view[0, 0]
+    times.evt_opt     = &evt_opt_view[0]
+    times.evt_pes     = &evt_pes_view[0]
+    times.early_start = &early_start_view[0, 0]
+    times.early_end   = &early_end_view[0, 0]
+    times.late_start  = &late_start_view[0, 0]
+    times.late_end    = &late_end_view[0, 0]
+    times.reserve     = &reserve_view[0, 0]
+    times.opt_start   = &opt_start_view[0]
+    times.opt_end     = &opt_end_view[0]
+    times.pes_start   = &pes_start_view[0]
+    times.pes_end     = &pes_end_view[0]
+
+    cdef bool c_is_pert = is_pert
+    cdef ccpmResultEn result
+    with nogil:
+        result = ccpm_compute_times(n, n_act,
+                                    &src_view[0],
+                                    &dst_view[0],
+                                    &exp_view[0, 0],
+                                    &opt_view[0],
+                                    &pes_view[0],
+                                    c_is_pert,
+                                    &times
+                                    )
+
+    if CCPM_EINVAL == result:
+        raise RuntimeError("The network must have exactly one starting and one finishing event")
+    if CCPM_ELOOP == result:
+        raise RuntimeError("The network has loops")
+    if CCPM_EUNK == result:
+        raise RuntimeError("The network has negative time reserves")
+    if CCPM_OK != result:
+        raise RuntimeError(f"Time computation failed with code {result}")
+
+    if 0 == n_act:
+        for k in act:
+            act[k] = act[k][:0]
+
+    return evt, act
@@ -81,11 +81,15 @@ Advanced usage with resource-aware duration:
 """
 
 #==============================================================================
+import copy
+from collections import OrderedDict
 import graphviz
 import numpy as np
+import operator
 import pandas as pd
 import scipy
 import os
+import threading
 
 import _ccpm
 
@@ -97,6 +101,18 @@ RES = 0  # Result of time computation
 VAR = 1  # Result variance estimation (used for PERT)
 ERR = 2  # Computation error upper limit
 
+# AoA topologies of recent constructions with their build statistics keyed by
+# activity IDs, links and options, models are built in many threads, so the cache
+# is accessed under the lock
+_TOPOLOGY_CACHE = OrderedDict()
+_TOPOLOGY_CACHE_SIZE = 32
+_TOPOLOGY_LOCK = threading.Lock()
+
+def clear_topology_cache():
+    """Drop cached AoA topologies of previous NetworkModel constructions."""
+    with _TOPOLOGY_LOCK:
+        _TOPOLOGY_CACHE.clear()
+
 #==============================================================================
 def fit_beta(M, D, a, b, err):
     """
@@ -458,10 +474,10 @@ class _Activity:
         Activity letter/code for visualization
     model : NetworkModel
         Parent network model instance
-    src : _Event
-        Source event of the activity
-    dst : _Event
-        Destination event of the activity
+    src : _Event or None
+        Source event of the activity, None in AoN mode
+    dst : _Event or None
+        Destination event of the activity, None in AoN mode
     expected : float
         Activity expected resource effort (mathematical expectation)
     exp_var : float
@@ -483,9 +499,9 @@ class _Activity:
         Activity letter/code
     model : NetworkModel
         Parent network model
-    src : _Event
+    src : _Event or None
         Source event
-    dst : _Event
+    dst : _Event or None
         Destination event
     expected : numpy.ndarray
         Array containing [effort_value, variance, error_bound]
@@ -539,10 +555,10 @@ class _Activity:
             raise TypeError(f"letter must be str, got {type(letter)}")
         if not isinstance(model, NetworkModel):
             raise TypeError(f"model must be NetworkModel, got {type(model)}")
-        if not isinstance(src, _Event):
-            raise TypeError(f"src must be _Event, got {type(src)}")
-        if not isinstance(dst, _Event):
-            raise TypeError(f"dst must be _Event, got {type(dst)}")
+        if src is not None and not isinstance(src, _Event):
+            raise TypeError(f"src must be _Event or None, got {type(src)}")
+        if dst is not None and not isinstance(dst, _Event):
+            raise TypeError(f"dst must be _Event or None, got {type(dst)}")
         if not isinstance(expected, float):
             raise TypeError(f"expected must be float, got {type(expected)}")
         if expected < 0.0:
@@ -694,8 +710,8 @@ class _Activity:
             - ``id``: Activity ID
             - ``wbs_id``: WBS ID
             - ``letter``: Activity letter
-            - ``src_id``: Source event ID
-            - ``dst_id``: Destination event ID
+            - ``src_id``: Source event ID, None in AoN mode
+            - ``dst_id``: Destination event ID, None in AoN mode
             - ``expected``: Activity expected resource effort
             - ``duration``: Actual duration
             - ``early_start``, ``late_start``, ``early_end``, ``late_end``: Timing parameters
@@ -713,8 +729,8 @@ class _Activity:
             'id': self.id,
             'wbs_id': self.wbs_id,
             'letter': self.letter,
-            'src_id': self.src.id,
-            'dst_id': self.dst.id,
+            'src_id': self.src.id if self.src else None,
+            'dst_id': self.dst.id if self.dst else None,
             'expected': self.expected[RES],  # Resource effort estimate
             'duration': duration[RES],       # Actual duration
 
@@ -1028,6 +1044,486 @@ def _calculate_action_time_params(work_data, default_risk=0.3):
     else:
         raise ValueError(f"Insufficient data for determining action effort parameters. Available keys: {list(work_data.keys())}")
 
+#==============================================================================
+def _contract_groups(act_ids, lnk_src, lnk_dst, dedup):
+    """
+    Contract series chains and parallel groups of activities.
+
+    A chain is a path of links where every activity but the last one has
+    the only successor and every activity but the first one has the only
+    predecessor. A parallel group is a set of activities with the same
+    only predecessor and the same only successor. Both are replaced with
+    super activities while anything changes, so nested series-parallel
+    parts of the link graph are contracted too.
+
+    Parameters
+    ----------
+    act_ids : list
+        Activity IDs
+    lnk_src : list
+        Source activity IDs
+    lnk_dst : list
+        Destination activity IDs
+    dedup : bool
+        Drop repeated links, nothing is contracted otherwise
+
+    Returns
+    -------
+    tuple or None
+        (act_ids, lnk_src, lnk_dst, groups) of the contracted link graph.
+        Super activities keep the ID of their first activity, ``groups``
+        maps these IDs to ``('s', items)`` series or ``('p', items)``
+        parallel groups of activity IDs and other groups.
+        None if nothing is contracted or links are invalid,
+        ``_ccpm.make_aoa`` reports errors of the original links then.
+    """
+    try:
+        known = set(act_ids)
+        if len(known) != len(act_ids):
+            return None
+
+        # Ordered sets of successors and predecessors
+        succ = {a: {} for a in act_ids}
+        pred = {a: {} for a in act_ids}
+        for s, d in zip(lnk_src, lnk_dst):
+            if s not in known or d not in known or s == d:
+                return None
+            if d in succ[s]:
+                if not dedup:
+                    return None
+                continue
+            succ[s][d] = None
+            pred[d][s] = None
+    except TypeError:
+        return None  # Unhashable IDs
+
+    def _items(kind, members):
+        # Nested groups of the same kind are flattened
+        items = []
+        for a in members:
+            g = groups.pop(a, a)
+            if isinstance(g, tuple) and kind == g[0]:
+                items.extend(g[1])
+            else:
+                items.append(g)
+        return (kind, items)
+
+    groups = {}
+    changed = True
+    while changed:
+        changed = False
+
+        # Series chains from their first activities
+        for a in list(succ):
+            if a not in succ:
+                continue
+            if 1 == len(pred[a]) and 1 == len(succ[next(iter(pred[a]))]):
+                continue  # Inside a chain or on a loop of chain links
+
+            chain = [a]
+            while 1 == len(succ[chain[-1]]):
+                b = next(iter(succ[chain[-1]]))
+                if 1 != len(pred[b]):
+                    break
+                chain.append(b)
+            if len(chain) < 2:
+                continue
+
+            groups[a] = _items('s', chain)
+            last = chain[-1]
+            succ[a] = succ[last]
+            for d in succ[a]:
+                del pred[d][last]
+                pred[d][a] = None
+            for b in chain[1:]:
+                del succ[b], pred[b]
+            changed = True
+
+        # Parallel groups between the same activities
+        par = {}
+        for a in succ:
+            if 1 == len(pred[a]) and 1 == len(succ[a]):
+                par.setdefault((next(iter(pred[a])), next(iter(succ[a]))), []).append(a)
+
+        for (p, q), same in par.items():
+            if len(same) < 2:
+                continue
+
+            groups[same[0]] = _items('p', same)
+            for b in same[1:]:
+                del succ[p][b], pred[q][b], succ[b], pred[b]
+            changed = True
+
+    if not groups:
+        return None
+
+    return (list(succ),
+            [s for s in succ for _ in succ[s]],
+            [d for s in succ for d in succ[s]],
+            groups)
+
+def _expand_groups(groups, act_ids, net_src, net_dst):
+    """
+    Expand super activities of a contracted AoA network.
+
+    Activities of a series group get new events between them. The first
+    single activity of a parallel group takes the arc of the group, other
+    single activities end with dummies, series members have own events.
+
+    Parameters
+    ----------
+    groups : dict
+        Groups of super activities, see ``_contract_groups``
+    act_ids : list
+        Activity IDs of the contracted network
+    net_src : list
+        Source events of real and dummy activities
+    net_dst : list
+        Destination events of real and dummy activities
+
+    Returns
+    -------
+    tuple
+        (act_ids, net_src, net_dst, n_evt, n_dummy) - network of all
+        activities with real ones first, changes of event and dummy counts
+        relative to the contracted network, they may be negative
+    """
+    n_act = len(act_ids)
+    n_evt = int(max(net_dst))
+    n_old = n_evt
+    n_old_dummy = len(net_src) - n_act
+
+    ids, src, dst = [], [], []
+    dummy_src = [int(e) for e in net_src[n_act:]]
+    dummy_dst = [int(e) for e in net_dst[n_act:]]
+    touched = set()
+
+    for a, s, e in zip(act_ids, net_src, net_dst):
+        stack = [(groups.get(a, a), int(s), int(e))]
+        while stack:
+            g, s, e = stack.pop()
+            if not isinstance(g, tuple):
+                ids.append(g)
+                src.append(s)
+                dst.append(e)
+            elif 's' == g[0]:
+                touched.update((s, e))
+                evt = [s] + list(range(n_evt + 1, n_evt + len(g[1]))) + [e]
+                n_evt += len(g[1]) - 1
+                stack.extend(reversed(list(zip(g[1], evt[:-1], evt[1:]))))
+            else:
+                touched.update((s, e))
+                items = []
+                direct = True
+                for c in g[1]:
+                    if isinstance(c, tuple):
+                        items.append((c, s, e))
+                    elif direct:
+                        items.append((c, s, e))
+                        direct = False
+                    else:
+                        n_evt += 1
+                        items.append((c, s, n_evt))
+                        dummy_src.append(n_evt)
+                        dummy_dst.append(e)
+                stack.extend(reversed(items))
+
+    src += dummy_src
+    dst += dummy_dst
+
+    # Groups may need dummies the original activities do not, e.g. a chain
+    # parallel to an activity, drop dummies which are the only arc leaving
+    # or entering an event on group arcs by merging their events
+    out = [set() for _ in range(n_evt + 1)]
+    inc = [set() for _ in range(n_evt + 1)]
+    for i, (s, e) in enumerate(zip(src, dst)):
+        out[s].add(i)
+        inc[e].add(i)
+
+    def _merge(u, v, arcs, ends, other, fwd):
+        # Move arcs of event u to event v unless some of them become parallel
+        busy = {other[i] for i in (out[v] if fwd else inc[v])}
+        if any(other[i] in busy for i in arcs):
+            return False
+        for i in arcs:
+            ends[i] = v
+            (out[v] if fwd else inc[v]).add(i)
+        arcs.clear()
+        return True
+
+    drop = set()
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(ids), len(src)):
+            s, e = src[i], dst[i]
+            if i in drop or (s <= n_old and e <= n_old and s not in touched and e not in touched):
+                continue
+            if 1 == len(out[s]):
+                out[s].clear()
+                inc[e].discard(i)
+                if _merge(s, e, inc[s], dst, src, False):
+                    drop.add(i)
+                    changed = True
+                    continue
+                out[s].add(i)
+                inc[e].add(i)
+            if 1 == len(inc[e]):
+                out[s].discard(i)
+                inc[e].clear()
+                if _merge(e, s, out[e], src, dst, True):
+                    drop.add(i)
+                    changed = True
+                    continue
+                out[s].add(i)
+                inc[e].add(i)
+
+    if drop:
+        src = [s for i, s in enumerate(src) if i not in drop]
+        dst = [e for i, e in enumerate(dst) if i not in drop]
+        used = sorted(set(src) | set(dst))
+        num = {e: i for i, e in enumerate(used, 1)}
+        src = [num[e] for e in src]
+        dst = [num[e] for e in dst]
+        n_evt = len(used)
+
+    return ids, src, dst, n_evt - n_old, len(src) - len(ids) - n_old_dummy
+
+def _group_path(groups, a):
+    """Activity IDs on a path of links through a super activity."""
+    path = []
+    stack = [groups.get(a, a)]
+    while stack:
+        g = stack.pop()
+        if not isinstance(g, tuple):
+            path.append(g)
+        elif 's' == g[0]:
+            stack.extend(reversed(g[1]))
+        else:
+            stack.append(g[1][0])
+    return path
+
+def _kahn(n, nxt, prv):
+    """
+    Topological order of graph nodes in O(nodes + edges).
+
+    Nodes without previous ones start the order in input order,
+    nodes on loops and after them are left with positive ``deg``.
+
+    Returns
+    -------
+    tuple
+        (order, deg) - node indexes in topological order and numbers
+        of previous nodes not in the order
+    """
+    deg = [len(p) for p in prv]
+    order = [i for i in range(n) if not deg[i]]
+    for i in order:
+        for j in nxt[i]:
+            deg[j] -= 1
+            if not deg[j]:
+                order.append(j)
+    return order, deg
+
+def _loop_path(prv, deg):
+    """Node indexes on a loop in link order, nodes left by ``_kahn`` have previous ones left."""
+    # Walk back until a loop closes
+    i = next(j for j in range(len(deg)) if deg[j])
+    path = {}
+    while i not in path:
+        path[i] = len(path)
+        i = next(j for j in prv[i] if deg[j])
+    return list(reversed(list(path)[path[i]:]))
+
+#==============================================================================
+class ReachabilityIndex:
+    """
+    Transitive dependency index of activities.
+
+    Ancestor and descendant sets of all activities are built once as
+    packed bit sets by the C extension in O(links * activities / 64),
+    so dependency queries do not recompute the full dependency map:
+    ``is_ancestor`` and ``closes_loop`` take O(1) per pair, ``ancestors``
+    and ``descendants`` take O(activities / 8 + result).
+
+    The index holds two maps of activities ** 2 / 8 bytes each, about
+    25 MB for 10000 activities and 2.5 GB for 100000. The maps are
+    allocated at once and are not bounded by ``max_memory`` of
+    ``NetworkModel`` or ``_ccpm.make_aoa``.
+
+    Parameters
+    ----------
+    act_ids : iterable of int
+        Activity IDs (non-negative integers < 0xffffffff)
+    lnk_src : iterable of int
+        Source activity IDs of links
+    lnk_dst : iterable of int
+        Destination activity IDs of links, activity ``lnk_dst[i]``
+        depends on activity ``lnk_src[i]``
+
+    Attributes
+    ----------
+    ids : numpy.ndarray
+        Activity IDs in input order
+
+    Raises
+    ------
+    TypeError
+        If IDs are not integers.
+    ValueError
+        If IDs are out of range, activity IDs repeat, link lengths differ
+        or links refer to unknown activities.
+    _ccpm.LoopError
+        If links form a loop.
+
+    Examples
+    --------
+    >>> idx = ReachabilityIndex([1, 2, 3], [1, 2], [2, 3])
+    >>> idx.is_ancestor(1, 3)
+    True
+    >>> idx.descendants(1)
+    array([2, 3])
+    >>> idx.closes_loop(3, 1)
+    True
+    """
+
+    def __init__(self, act_ids, lnk_src, lnk_dst):
+        act_ids = list(act_ids)
+        lnk_src = list(lnk_src)
+        lnk_dst = list(lnk_dst)
+
+        # Rows of ancestors and rows of descendants
+        status, anc = _ccpm.make_full_map_np(act_ids, lnk_src, lnk_dst, id_bits=32, output='packed')
+        if _ccpm.ELOOP == status:
+            # IDs and links are checked, find the loop on the link graph in O(activities + links)
+            index = {a: i for i, a in enumerate(act_ids)}
+            pred = [[] for _ in act_ids]
+            succ = [[] for _ in act_ids]
+            for a, b in zip(lnk_src, lnk_dst):
+                pred[index[b]].append(index[a])
+                succ[index[a]].append(index[b])
+            _, deg = _kahn(len(act_ids), succ, pred)
+            raise _ccpm.LoopError(act_ids[j] for j in _loop_path(pred, deg))
+        if status != _ccpm.OK:
+            raise ValueError("Activity IDs must be unique and links must refer to known activities")
+        _, dsc = _ccpm.make_full_map_np(act_ids, lnk_dst, lnk_src, id_bits=32, output='packed')
+
+        self.ids = np.asarray(act_ids, dtype=np.int64)
+        self._anc = anc
+        self._dsc = dsc
+
+        # Positions of IDs by binary search
+        self._order = np.argsort(self.ids, kind='stable')
+        self._sorted = self.ids[self._order]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __repr__(self):
+        return f"ReachabilityIndex(activities={len(self.ids)})"
+
+    def _pos(self, act_ids):
+        """Positions of activity IDs, ValueError for unknown ones."""
+        ids = np.asarray(act_ids)
+        if 0 == ids.size:
+            ids = ids.astype(np.int64)
+        if ids.dtype.kind not in 'iu':
+            raise TypeError(f"Activity IDs must be integers, got {ids.dtype}")
+        if 0 == len(self._sorted):
+            k = np.zeros(ids.shape, dtype=np.intp)
+            bad = np.ones(ids.shape, dtype=bool)
+        else:
+            k = np.minimum(np.searchsorted(self._sorted, ids), len(self._sorted) - 1)
+            bad = self._sorted[k] != ids
+        if np.any(bad):
+            raise ValueError(f"Activity {ids[bad].flat[0]} not found in the index")
+        return self._order[k] if len(self._order) else k
+
+    @staticmethod
+    def _has(rows, i, j):
+        """Bits j of rows i of a packed map, numpy.packbits order."""
+        return ((rows[i, j >> 3] >> (7 - (j & 7))) & 1).astype(bool)
+
+    def _members(self, rows, act_id):
+        i = self._pos(act_id)
+        if np.ndim(i):
+            raise TypeError("Activity ID must be a scalar")
+        return self.ids[np.flatnonzero(np.unpackbits(rows[i], count=len(self.ids)))]
+
+    def is_ancestor(self, src, dst):
+        """
+        Check if activity dst depends on activity src directly or transitively.
+
+        Parameters
+        ----------
+        src, dst : int or array-like of int
+            Activity IDs, arrays are broadcast for batch queries
+
+        Returns
+        -------
+        bool or numpy.ndarray
+            True where dst depends on src, an activity is not its own ancestor
+        """
+        res = self._has(self._anc, self._pos(dst), self._pos(src))
+        return bool(res) if 0 == np.ndim(res) else res
+
+    def is_descendant(self, src, dst):
+        """
+        Check if activity src depends on activity dst, see ``is_ancestor``.
+        """
+        return self.is_ancestor(dst, src)
+
+    def closes_loop(self, src, dst):
+        """
+        Check if a new link src -> dst would close a loop.
+
+        Parameters
+        ----------
+        src, dst : int or array-like of int
+            Activity IDs of new links, arrays are broadcast for batch queries
+
+        Returns
+        -------
+        bool or numpy.ndarray
+            True where src is dst or src already depends on dst
+        """
+        s = self._pos(src)
+        d = self._pos(dst)
+        res = (s == d) | self._has(self._anc, s, d)
+        return bool(res) if 0 == np.ndim(res) else res
+
+    def ancestors(self, act_id):
+        """
+        Activities an activity depends on directly or transitively.
+
+        Parameters
+        ----------
+        act_id : int
+            Activity ID
+
+        Returns
+        -------
+        numpy.ndarray
+            Activity IDs in input order
+        """
+        return self._members(self._anc, act_id)
+
+    def descendants(self, act_id):
+        """
+        Activities which depend on an activity directly or transitively.
+
+        Parameters
+        ----------
+        act_id : int
+            Activity ID
+
+        Returns
+        -------
+        numpy.ndarray
+            Activity IDs in input order
+        """
+        return self._members(self._dsc, act_id)
+
 #==============================================================================
 class NetworkModel:
     """
@@ -1083,27 +1579,126 @@ class NetworkModel:
         Starting ID for automatically generated activities (used internally)
     debug : bool, default=False
         Enable debug mode to include computation error bounds
+    storage : str, default='dense'
+        Dependency storage mode used by the C backend:
+        - ``'dense'``: n x n dependency lists and maps, fast for small projects
+        - ``'sparse'``: per activity sorted sets, memory grows with the number
+          of dependencies, suitable for large sparse projects
+        Both modes produce the same network.
+    dedup : bool, default=False
+        Remove repeated links instead of raising an error, useful for
+        link exports which contain the same dependency several times
+    id_bits : int, default=16
+        Identifier width used by the C backend:
+        - ``16``: activity IDs, activity and event numbers below 65535
+        - ``32``: 32-bit IDs for merged programme schedules which exceed
+          the 16-bit limits, activity IDs must be below 0xffffffff
+    workspace : _ccpm.Workspace, optional
+        Reusable C workspace for network construction, pass the same
+        workspace to many models to avoid repeated buffer allocations
+    max_memory : int, optional
+        Memory budget in bytes for network construction, see
+        ``_ccpm.make_aoa_mem``. Dense storage is replaced with sparse one
+        when it does not fit, ``MemoryError`` is raised before any large
+        allocation when neither fits
+    n_threads : int, default=1
+        Number of threads for dense dependency closure and reduction,
+        ``0`` uses all available cores, the network does not depend on it,
+        see ``_ccpm.max_threads``
+    split : bool, default=False
+        Build independent sub-projects, weakly connected components of
+        the link graph, separately and join them at common start and
+        finish events, see ``_ccpm.make_aoa``
+    level : int, default=2
+        Network optimization level, see ``_ccpm.make_aoa``:
+        - ``0``: near-linear construction for very large networks,
+          time parameters are the same, but the network has 1.2 to 4.5
+          times the dummies of level 2 depending on the number of
+          redundant links
+        - ``1``: minimal dependencies without network optimization stages
+        - ``2``: fully optimized network
+    mode : str, default='aoa'
+        Computation mode:
+        - ``'aoa'``: build the Activity-on-Arrow network with events and
+          dummies, needed for events and ``viz``
+        - ``'aon'``: Activity-on-Node, compute time parameters directly on
+          the activity/link graph in O(activities + links) without network
+          construction, for schedules of tens of thousands of activities.
+          Activity times and reserves are the ones of an AoA network of
+          any ``level`` with the same dependencies up to floating point
+          rounding, durations are summed along other paths, so the last
+          bits may differ for non-integer durations. ``events`` is empty,
+          activities have no source and destination events and network
+          construction options are not used
+    contract : bool, default=False
+        Contract series chains of activities and parallel groups of
+        activities with the same only predecessor and successor before
+        network construction, the C extension builds a smaller network
+        and the groups are expanded back. Dependencies and time parameters
+        are the same, but dummies, event numbers and the order of dummy
+        activities may differ from the ones of the full network
+    cache : bool, default=True
+        Take the AoA topology from the cache of recent constructions with
+        the same activity IDs, links, dedup, id_bits, split, level and
+        contract, see ``clear_topology_cache``. ``False`` always builds
+        a fresh network and does not store it. Models with ``max_memory``
+        are always built, so the memory budget is checked, their
+        networks are stored for models without a budget
 
     Raises
     ------
     ValueError
         If insufficient link data is provided or links format is invalid,
         or if network construction fails (e.g., circular dependencies).
+        Circular dependencies raise ``_ccpm.LoopError`` which is a
+        ``ValueError`` subclass, its ``loop`` attribute lists activity
+        IDs on the loop.
     TypeError
         If input types are incorrect.
     RuntimeError
         If internal network consistency checks fail.
+    MemoryError
+        If network construction does not fit in memory or in max_memory.
 
     Attributes
     ----------
     activities : list
         List of _Activity objects in the network
     events : list
-        List of _Event objects in the network
+        List of _Event objects in the network, empty in AoN mode
     is_pert : bool
         True if PERT analysis is enabled (variance > 0 for any activity)
     debug : bool
         Debug mode flag
+    storage : str
+        Dependency storage mode
+    dedup : bool
+        Repeated links removal flag
+    id_bits : int
+        Identifier width
+    max_memory : int or None
+        Memory budget for network construction
+    n_threads : int
+        Number of threads for network construction
+    split : bool
+        Independent sub-projects are built separately
+    level : int
+        Network optimization level
+    mode : str
+        Computation mode, ``'aoa'`` or ``'aon'``
+    contract : bool
+        Series and parallel groups are contracted before network construction
+    cache : bool
+        Topology cache use flag
+    build_stats : dict or None
+        Network construction statistics: wall time and main loop
+        iterations per phase, dependency, dummy and event counts and
+        peak memory, see ``_ccpm.make_aoa``, and ``n_contracted``, the number
+        of activities removed from the link graph by contraction. Phases
+        and dependency counts are ones of the contracted graph. ``cached``
+        is True when the topology was taken from the cache, statistics
+        are then a copy of the ones of the build which stored it, see
+        ``cache``. None in AoN mode
     p : float
         Probability level for PERT
 
@@ -1160,7 +1755,10 @@ class NetworkModel:
 
     def __init__(self, wbs_dict, lnk_src=None, lnk_dst=None, links=None,
                  duration=_default_duration, p=0.95, default_risk=0.3,
-                 next_act_id=1, debug=False):
+                 next_act_id=1, debug=False, storage='dense',
+                 dedup=False, id_bits=16, workspace=None, max_memory=None,
+                 n_threads=1, split=False, level=2, mode='aoa', contract=False,
+                 cache=True):
         # Validate wbs_dict
         if not isinstance(wbs_dict, dict):
             raise TypeError(f"wbs_dict must be dict, got {type(wbs_dict)}")
@@ -1187,24 +1785,89 @@ class NetworkModel:
             raise ValueError(f"next_act_id must be positive int, got {next_act_id}")
         if not isinstance(debug, bool):
             raise TypeError(f"debug must be bool, got {type(debug)}")
+        if storage not in ('dense', 'sparse'):
+            raise ValueError(f"storage must be 'dense' or 'sparse', got {storage!r}")
+        if not isinstance(dedup, bool):
+            raise TypeError(f"dedup must be bool, got {type(dedup)}")
+        if id_bits not in (16, 32):
+            raise ValueError(f"id_bits must be 16 or 32, got {id_bits!r}")
+        if workspace is not None and not isinstance(workspace, _ccpm.Workspace):
+            raise TypeError(f"workspace must be _ccpm.Workspace, got {type(workspace)}")
+        if max_memory is not None and (not isinstance(max_memory, int) or max_memory <= 0):
+            raise ValueError(f"max_memory must be positive int, got {max_memory!r}")
+        try:
+            n_threads = operator.index(n_threads)  # NumPy integers too
+        except TypeError:
+            raise ValueError(f"n_threads must be non-negative int, got {n_threads!r}") from None
+        if n_threads < 0:
+            raise ValueError(f"n_threads must be non-negative int, got {n_threads!r}")
+        if not isinstance(split, bool):
+            raise TypeError(f"split must be bool, got {type(split)}")
+        if level not in (0, 1, 2):
+            raise ValueError(f"level must be 0, 1 or 2, got {level!r}")
+        if mode not in ('aoa', 'aon'):
+            raise ValueError(f"mode must be 'aoa' or 'aon', got {mode!r}")
+        if not isinstance(contract, bool):
+            raise TypeError(f"contract must be bool, got {type(contract)}")
+        if not isinstance(cache, bool):
+            raise TypeError(f"cache must be bool, got {type(cache)}")
 
         self.debug = debug
-        self.is_pert = False
+        self.storage = storage
+        self.dedup = dedup
+        self.id_bits = id_bits
+        self._workspace = workspace
+        self.max_memory = max_memory
+        self.n_threads = n_threads
+        self.split = split
+        self.level = level
+        self.mode = mode
+        self.contract = contract
+        self.cache = cache
         self.p = p
         self._duration = duration  # Resource-aware duration callback
 
         # Parse links into standard format
         lnk_src, lnk_dst = self._parse_links(lnk_src, lnk_dst, links)
 
+        # Keep model inputs for incremental edits
+        self._wbs = dict(wbs_dict)
+        self._lnk_src = list(lnk_src)
+        self._lnk_dst = list(lnk_dst)
+        self._default_risk = default_risk
+        self._next_act_id = next_act_id
+
+        self._build()
+
+    def _build(self):
+        """
+        Build the network from stored WBS data and links.
+
+        Creates events and activities, computes stages, renumerates events
+        and computes time parameters. In AoN mode only activities are created.
+        """
+        self.is_pert = False
+        self._reach = None  # Built on demand by reachability()
+
         # Create network model
-        self._create_model(wbs_dict, lnk_src, lnk_dst, default_risk, next_act_id)
+        self._create_model(self._wbs, self._lnk_src, self._lnk_dst,
+                           self._default_risk, self._next_act_id)
+
+        # AoN model has no events, time parameters are computed on the link graph
+        if 'aon' == self.mode:
+            self._compute_time_params()
+            return
 
         # After _create_model, events must be non-empty
         if len(self.events) == 0:
             raise RuntimeError("Network construction resulted in no events. Check input data.")
 
-        # Compute stages of project
-        self._compute_target('stage')
+        # Compute stages of project, the C extension computes time parameters too
+        native = _default_duration == self._duration
+        if native:
+            self._compute_native()
+        else:
+            self._compute_target('stage')
 
         # Renumerate events according to the rules of network modeling
         self.events.sort(key=lambda e: e.stage)
@@ -1212,7 +1875,8 @@ class NetworkModel:
             e.id = i
 
         # Compute Event and Activity time parameters
-        self._compute_time_params()
+        if not native:
+            self._compute_time_params()
 
     def _parse_links(self, lnk_src, lnk_dst, links):
         """
@@ -1330,28 +1994,31 @@ class NetworkModel:
 
         act_ids = list(wbs_dict.keys())
 
-        # Generate network graph using C extension
-        status, act_ids, net_src, net_dst = _ccpm.make_aoa(act_ids, lnk_src, lnk_dst)
-        if status != _ccpm.OK:
-            # Should not happen because make_aoa raises on error, but keep for safety
-            raise RuntimeError(f"Network generation failed with status {status}")
+        if 'aon' == self.mode:
+            # Activities are nodes of the link graph, no network is built
+            self._aon = self._make_aon(act_ids, lnk_src, lnk_dst)
+            self.build_stats = None
+            net_src = net_dst = ()
+        else:
+            self._aon = None
+            act_ids, net_src, net_dst = self._make_aoa(act_ids, lnk_src, lnk_dst)
 
         self.events = []
         self.next_act = next_act_id
         self.activities = []
 
-        # Create events
-        if len(net_dst) == 0:
-            raise RuntimeError("No destination events generated. Check input links.")
-        max_event = max(net_dst)
-        for i in range(max_event):
-            self._add_event(int(i + 1))
+        # Create events, AoN model has none
+        if 'aoa' == self.mode:
+            if len(net_dst) == 0:
+                raise RuntimeError("No destination events generated. Check input links.")
+            max_event = max(net_dst)
+            for i in range(max_event):
+                self._add_event(int(i + 1))
 
         # Create activities (real and dummy)
         na = len(act_ids)  # Number of actions
         nd = 0  # Number of dummy actions
-        dsrc = []  # Dummy event sources
-        for i in range(len(net_src)):
+        for i in range(max(na, len(net_src))):
             if i < na:
                 # Real activity - get data from WBS
                 act_id = act_ids[i]
@@ -1375,7 +2042,9 @@ class NetworkModel:
                 # Create data dict without fields stored as separate attributes
                 data_without_duplicates = self._remove_duplicate_fields(wbs_data, expected, exp_var, letter)
 
-                self._add_activity(int(act_id), int(net_src[i]), int(net_dst[i]),
+                # AoN activities have no events
+                src_id, dst_id = (int(net_src[i]), int(net_dst[i])) if 'aoa' == self.mode else (None, None)
+                self._add_activity(int(act_id), src_id, dst_id,
                                    expected, exp_var, optimistic, pessimistic,
                                    letter, data_without_duplicates)
             else:
@@ -1383,10 +2052,163 @@ class NetworkModel:
                 nd += 1  # One more dummy work
                 self._add_activity(0, int(net_src[i]), int(net_dst[i]),
                                    0., 0., 0., 0., '#' + str(nd), {})
-                dsrc.append(int(net_src[i]))
 
         # Network postprocessing
-        # Make sure that activities with largest efforts are on straight paths between events
+        self._place_max_duration()
+
+    def _make_aoa(self, act_ids, lnk_src, lnk_dst):
+        """
+        Get AoA network topology from the cache or from the C extension.
+
+        Returns
+        -------
+        tuple
+            (act_ids, net_src, net_dst) - activity IDs in network order,
+            source and destination event IDs of real and dummy activities
+        """
+        # Network topology depends on activity IDs, links and these options only
+        key = None
+        if self.cache:
+            key = (tuple(act_ids), tuple(lnk_src), tuple(lnk_dst), self.dedup, self.id_bits, self.split,
+                   self.level, self.contract)
+            try:
+                hash(key)
+            except TypeError:
+                key = None  # Invalid IDs, make_aoa_np will report them
+
+        # Memory budget is checked by the C extension, so budgeted models are built
+        cached = None
+        if key is not None and self.max_memory is None:
+            with _TOPOLOGY_LOCK:
+                cached = _TOPOLOGY_CACHE.get(key)
+                if cached is not None:
+                    _TOPOLOGY_CACHE.move_to_end(key)
+
+        if cached is not None:
+            act_ids, net_src, net_dst, stats = cached
+            self.build_stats = copy.deepcopy(stats)
+            self.build_stats['cached'] = True
+        else:
+            # Chains and parallel groups need no closure and dummy search, build the rest only
+            n_act = len(act_ids)
+            groups = {}
+            if self.contract:
+                contracted = _contract_groups(act_ids, lnk_src, lnk_dst, self.dedup)
+                if contracted is not None:
+                    act_ids, lnk_src, lnk_dst, groups = contracted
+
+            # Generate network graph using C extension
+            try:
+                status, act_ids, net_src, net_dst, self.build_stats = _ccpm.make_aoa_np(act_ids, lnk_src, lnk_dst,
+                                                                                        storage=self.storage,
+                                                                                        dedup=self.dedup,
+                                                                                        id_bits=self.id_bits,
+                                                                                        workspace=self._workspace,
+                                                                                        max_memory=self.max_memory,
+                                                                                        n_threads=self.n_threads,
+                                                                                        split=self.split,
+                                                                                        level=self.level,
+                                                                                        stats=True)
+            except _ccpm.LoopError as e:
+                if not groups:
+                    raise
+                raise _ccpm.LoopError(a for g in e.loop for a in _group_path(groups, g)) from None
+            if status == _ccpm.ENOMEM:
+                raise MemoryError("Network generation needs more memory than available or allowed by max_memory")
+            if status != _ccpm.OK:
+                # Should not happen because make_aoa raises on error, but keep for safety
+                raise RuntimeError(f"Network generation failed with status {status}")
+
+            self.build_stats['n_contracted'] = n_act - len(act_ids)
+            if groups:
+                act_ids, net_src, net_dst, n_evt, n_dummy = _expand_groups(groups, act_ids, net_src, net_dst)
+                self.build_stats['n_evt'] += n_evt
+                self.build_stats['n_dummy'] += n_dummy
+            self.build_stats['cached'] = False
+
+            # Builds run without the lock, a concurrent one may store the same topology
+            if key is not None:
+                with _TOPOLOGY_LOCK:
+                    _TOPOLOGY_CACHE[key] = (tuple(act_ids), tuple(net_src), tuple(net_dst),
+                                            copy.deepcopy(self.build_stats))
+                    _TOPOLOGY_CACHE.move_to_end(key)
+                    while len(_TOPOLOGY_CACHE) > _TOPOLOGY_CACHE_SIZE:
+                        _TOPOLOGY_CACHE.popitem(last=False)
+
+        return act_ids, net_src, net_dst
+
+    def _make_aon(self, act_ids, lnk_src, lnk_dst):
+        """
+        Check links and prepare the activity/link graph for AoN mode.
+
+        Links are kept in input order as pairs of activity indexes,
+        activities are sorted topologically for forward and backward
+        passes, all in O(activities + links).
+
+        Returns
+        -------
+        tuple
+            ((src, dst), pred, succ, (fwd, bck)) - link source and
+            destination activity indexes, predecessor and successor lists
+            of activities in link order, forward and backward pass orders
+
+        Raises
+        ------
+        ValueError
+            If links contain unknown activities, repeat and dedup is False,
+            or form a loop (``_ccpm.LoopError``).
+        """
+        index = {a: i for i, a in enumerate(act_ids)}
+        n = len(act_ids)
+
+        src, dst = [], []
+        seen = set()
+        for s, d in zip(lnk_src, lnk_dst):
+            for a in (s, d):
+                if a not in index:
+                    raise ValueError(f"Link {s} -> {d}: activity {a} not found in wbs_dict")
+            if s == d:
+                raise _ccpm.LoopError([s])
+            if (s, d) in seen:
+                if self.dedup:
+                    continue
+                raise ValueError(f"Link {s} -> {d} is repeated")
+            seen.add((s, d))
+            src.append(index[s])
+            dst.append(index[d])
+
+        pred = [[] for _ in range(n)]
+        succ = [[] for _ in range(n)]
+        for i, j in zip(src, dst):
+            pred[j].append(i)
+            succ[i].append(j)
+
+        order, deg = _kahn(n, succ, pred)
+        if len(order) < n:
+            raise _ccpm.LoopError(act_ids[j] for j in _loop_path(pred, deg))
+
+        return (src, dst), pred, succ, (order, _kahn(n, pred, succ)[0])
+
+    def _place_max_duration(self):
+        """
+        Make sure that activities with largest efforts are on straight paths between events.
+
+        Activities of a triangle group share source and destination events,
+        all of them but one end with a dummy, the one with maximal duration
+        is moved to the straight path. Groups keep their shape, so this may
+        be repeated when estimates change.
+        """
+        if 'aoa' != self.mode:
+            return  # AoN activities have no events
+
+        dsrc = {a.src.id for a in self.activities[len(self._wbs):]}  # Dummy event sources
+
+        # Event adjacency in activity order, same as in_activities and out_activities
+        ins, outs = {}, {}
+        for a in self.activities:
+            ins.setdefault(a.dst.id, []).append(a)
+            outs.setdefault(a.src.id, []).append(a)
+
         grpoi = {}
         # Find groups of triangles on dummies
         for e in self.events:
@@ -1394,15 +2216,15 @@ class NetworkModel:
             if e.id not in dsrc:
                 continue
 
-            bck = e.in_activities
-            fwd = e.out_activities
+            bck = ins.get(e.id, [])
+            fwd = outs.get(e.id, [])
             # Watch only events with one incoming and one outgoing action
             if 1 < len(bck) or 1 < len(fwd):
                 continue
 
             key = (bck[0].src.id, fwd[0].dst.id)
             if key not in grpoi.keys():
-                for a in bck[0].src.out_activities:
+                for a in outs[bck[0].src.id]:
                     if a.dst.id == fwd[0].dst.id:
                         grpoi[key] = (a, [bck[0]])
                         break
@@ -1475,10 +2297,20 @@ class NetworkModel:
 
         For PERT models, additional optimistic and pessimistic scenarios
         are computed to provide statistical analysis.
+
+        With the default duration callback all passes are done by
+        :meth:`_compute_native`, in AoN mode passes are done by
+        :meth:`_compute_aon` otherwise.
         """
-        self._compute_target('early')
+        if _default_duration == self._duration:
+            self._compute_native()
+            return
+
+        compute = self._compute_aon if 'aon' == self.mode else self._compute_target
+
+        compute('early')
 
-        # Set late times starting from project completion
+        # Set late times starting from project completion, AoN model has no events
         late = np.zeros((3,), dtype=float)
         for e in self.events:
             if e.early[RES] > late[RES]:
@@ -1487,7 +2319,7 @@ class NetworkModel:
         for e in self.events:
             e.late = late
 
-        self._compute_target('late')
+        compute('late')
 
         # Compute reserves
         for e in self.events:
@@ -1547,8 +2379,242 @@ class NetworkModel:
 
         if self.is_pert:
             # For PERT models we must compute optimistic and pessimistic scenarios
-            self._compute_target('optimistic')
-            self._compute_target('pessimistic')
+            compute('optimistic')
+            compute('pessimistic')
+
+    def _compute_native(self):
+        """
+        Compute stages and all time parameters with the C extension.
+
+        Durations must be equal to efforts, results are the same as
+        ones of :meth:`_compute_target` passes and reserve computations.
+        In AoN mode the C extension gets a network where every activity
+        has start and end events of its own, links and links from the
+        project start and to the project finish are dummies, it takes
+        O(activities + links) to make and is computed the same way as
+        :meth:`_compute_aon` passes do.
+
+        Raises
+        ------
+        RuntimeError
+            If network has more than one starting event, contains cycles
+            or has negative time reserves.
+        """
+        n_act = len(self.activities)
+        if 'aon' == self.mode:
+            # Events: project start and finish, then start and end of each activity
+            (src, dst), pred, succ, _ = self._aon
+            first = [i for i, p in enumerate(pred) if not p]
+            last = [i for i, s in enumerate(succ) if not s]
+            start = np.arange(2, 2 * n_act + 2, 2)
+            end = start + 1
+            act_src = np.concatenate((start, end[src], np.zeros(len(first), dtype=int), end[last]))
+            act_dst = np.concatenate((end, start[dst], start[first], np.ones(len(last), dtype=int)))
+            n_evt = 2 * n_act + 2
+        else:
+            index = {e: i for i, e in enumerate(self.events)}
+            act_src = [index[a.src] for a in self.activities]
+            act_dst = [index[a.dst] for a in self.activities]
+            n_evt = len(self.events)
+
+        # Dummies have zero efforts
+        expected = np.zeros((len(act_src), 3), dtype=float)
+        optimistic = np.zeros(len(act_src), dtype=float)
+        pessimistic = np.zeros(len(act_src), dtype=float)
+        for i, a in enumerate(self.activities):
+            expected[i] = a.expected
+            optimistic[i] = a.optimistic
+            pessimistic[i] = a.pessimistic
+
+        evt, act = _ccpm.compute_times(act_src, act_dst, n_evt, expected,
+                                       optimistic, pessimistic, self.is_pert)
+
+        # Triplets are rows of result arrays, other values are Python scalars,
+        # AoN events and dummies are dropped by zip
+        for e, stage, early, late, reserve, optimistic, pessimistic in zip(
+                self.events, evt['stage'].tolist(), evt['early'], evt['late'],
+                evt['reserve'], evt['optimistic'].tolist(), evt['pessimistic'].tolist()):
+            e.stage = stage
+            e.early = early
+            e.late = late
+            e.reserve = reserve
+            e.optimistic = optimistic
+            e.pessimistic = pessimistic
+
+        for a, early_start, early_end, late_start, late_end, reserve, \
+                opt_start, opt_end, pes_start, pes_end in zip(
+                self.activities, act['early_start'], act['early_end'],
+                act['late_start'], act['late_end'], act['reserve'],
+                act['opt_start'].tolist(), act['opt_end'].tolist(),
+                act['pes_start'].tolist(), act['pes_end'].tolist()):
+            a.early_start = early_start
+            a.early_end = early_end
+            a.late_start = late_start
+            a.late_end = late_end
+            a.reserve = reserve
+            a.opt_start = opt_start
+            a.opt_end = opt_end
+            a.pes_start = pes_start
+            a.pes_end = pes_end
+
+    def _compute_aon(self, target):
+        """
+        Compute CPM parameters of activities on the activity/link graph.
+
+        AoN counterpart of :meth:`_compute_target`: activity start is chosen
+        among ends of its predecessors, activity end among starts of its
+        successors, the project finish among ends of all activities, so
+        a pass takes O(activities + links).
+
+        Parameters
+        ----------
+        target : str
+            What to compute: 'early', 'late', 'optimistic', or 'pessimistic'
+
+        Raises
+        ------
+        ValueError
+            If target parameter is invalid.
+        """
+        def _choice_early(old, new):
+            return _choice(old, new, new[RES] - old[RES])
+
+        def _choice_late(old, new):
+            return _choice(old, new, old[RES] - new[RES])
+
+        def _delta_late(a):
+            ret = a.expected.copy()
+            ret[RES] = -a.expected[RES]
+            return ret
+
+        _, pred, succ, (fwd, bck) = self._aon
+
+        if 'early' == target:
+            order = fwd
+            act_next = succ
+            act_base = 'early_start'
+            act_new = 'early_end'
+            choice = _choice_early
+            delta = lambda a: a.expected
+            process_delta = self._duration_vec
+            init = np.zeros((3,), dtype=float)
+
+        elif 'late' == target:
+            order = bck
+            act_next = pred
+            act_base = 'late_end'
+            act_new = 'late_start'
+            choice = _choice_late
+            delta = _delta_late
+            process_delta = self._duration_vec
+            # Start from project completion
+            init = np.zeros((3,), dtype=float)
+            for a in self.activities:
+                if a.early_end[RES] > init[RES]:
+                    init = a.early_end.copy()
+
+        elif 'optimistic' == target:
+            order = fwd
+            act_next = succ
+            act_base = 'opt_start'
+            act_new = 'opt_end'
+            choice = max
+            delta = lambda a: a.optimistic
+            process_delta = self._duration
+            init = 0.
+
+        elif 'pessimistic' == target:
+            order = fwd
+            act_next = succ
+            act_base = 'pes_start'
+            act_new = 'pes_end'
+            choice = max
+            delta = lambda a: a.pessimistic
+            process_delta = self._duration
+            init = 0.
+        else:
+            raise ValueError(f"Unknown 'target' value: {target}")
+
+        # Base values of activities, all predecessors are processed before
+        base = [init] * len(self.activities)
+        for i in order:
+            a = self.activities[i]
+            base_val = base[i]
+            new_val = base_val + process_delta(delta(a), a, base_val)
+
+            setattr(a, act_base, base_val)
+            setattr(a, act_new, new_val)
+
+            for j in act_next[i]:
+                base[j] = choice(base[j], new_val)
+
+    def _duration_vec(self, effort, activity, base_time):
+        """
+        Compute duration vector with variance propagation for PERT analysis.
+
+        This function handles the conversion from resource effort to actual
+        duration while properly propagating variance through the network.
+
+        Parameters
+        ----------
+        effort : numpy.ndarray
+            Resource effort array [value, variance, error_bound]
+        activity : _Activity
+            Activity object for context
+        base_time : numpy.ndarray or None
+            Base time array [value, variance, error_bound] for time computations,
+            or None for network post-processing
+
+        Returns
+        -------
+        numpy.ndarray
+            Duration array [value, variance, error_bound]
+        """
+        # Optimize for default duration function
+        if _default_duration == self._duration:
+            return effort
+
+        dur = np.zeros((3,), dtype=float)
+
+        # Compute duration value and error bound
+        # effort[RES] is float: positive for forward pass, negative for backward pass
+        dur[RES] = self._duration(effort[RES], activity, base_time[RES])
+        dur[ERR] = EPS * abs(dur[RES])  # Error bound based on absolute duration
+
+        if 0. == effort[VAR] or not self.is_pert:
+            # Deterministic or fake activity
+            # VAR is zero already
+            return dur
+
+        # Compute shape parameter for modified PERT distribution
+        alpha, beta = fit_beta(activity.expected[RES], activity.expected[VAR],
+                               activity.optimistic, activity.pessimistic,
+                               activity.expected[ERR])
+
+        if not alpha:
+            # Deterministic activity
+            return dur
+
+        # Model is PERT and activity is not deterministic,
+        # will compute duration variance using modified PERT formula
+
+        # Compute optimistic and pessimistic duration estimates
+        # For variance calculation, use base_time=None to get estimates
+        # without time-based constraints
+        if effort[RES] >= 0.:
+            # Forward pass: use positive effort values
+            a = self._duration(activity.optimistic, activity, base_time[RES])
+            b = self._duration(activity.pessimistic, activity, base_time[RES])
+        else:
+            # Backward pass: use negative effort values
+            a = self._duration(-activity.optimistic, activity, base_time[RES])
+            b = self._duration(-activity.pessimistic, activity, base_time[RES])
+
+        # Use beta-distribution formula for variance calculation:
+        var_beta = alpha * beta / (alpha + beta + 1) / ((alpha + beta) ** 2)
+        dur[VAR] = var_beta * ((b - a) ** 2)
+
+        return dur
 
     def _compute_target(self, target=None):
         """
@@ -1586,74 +2652,6 @@ class NetworkModel:
             ret[RES] = -a.expected[RES]
             return ret
 
-        def _duration_vec(effort, activity, base_time):
-            """
-            Compute duration vector with variance propagation for PERT analysis.
-
-            This function handles the conversion from resource effort to actual
-            duration while properly propagating variance through the network.
-
-            Parameters
-            ----------
-            effort : numpy.ndarray
-                Resource effort array [value, variance, error_bound]
-            activity : _Activity
-                Activity object for context
-            base_time : numpy.ndarray or None
-                Base time array [value, variance, error_bound] for time computations,
-                or None for network post-processing
-
-            Returns
-            -------
-            numpy.ndarray
-                Duration array [value, variance, error_bound]
-            """
-            # Optimize for default duration function
-            if _default_duration == self._duration:
-                return effort
-
-            dur = np.zeros((3,), dtype=float)
-
-            # Compute duration value and error bound
-            # effort[RES] is float: positive for forward pass, negative for backward pass
-            dur[RES] = self._duration(effort[RES], activity, base_time[RES])
-            dur[ERR] = EPS * abs(dur[RES])  # Error bound based on absolute duration
-
-            if 0. == effort[VAR] or not self.is_pert:
-                # Deterministic or fake activity
-                # VAR is zero already
-                return dur
-
-            # Compute shape parameter for modified PERT distribution
-            alpha, beta = fit_beta(activity.expected[RES], activity.expected[VAR],
-                                   activity.optimistic, activity.pessimistic,
-                                   activity.expected[ERR])
-
-            if not alpha:
-                # Deterministic activity
-                return dur
-
-            # Model is PERT and activity is not deterministic,
-            # will compute duration variance using modified PERT formula
-
-            # Compute optimistic and pessimistic duration estimates
-            # For variance calculation, use base_time=None to get estimates
-            # without time-based constraints
-            if effort[RES] >= 0.:
-                # Forward pass: use positive effort values
-                a = self._duration(activity.optimistic, activity, base_time[RES])
-                b = self._duration(activity.pessimistic, activity, base_time[RES])
-            else:
-                # Backward pass: use negative effort values
-                a = self._duration(-activity.optimistic, activity, base_time[RES])
-                b = self._duration(-activity.pessimistic, activity, base_time[RES])
-
-            # Use beta-distribution formula for variance calculation:
-            var_beta = alpha * beta / (alpha + beta + 1) / ((alpha + beta) ** 2)
-            dur[VAR] = var_beta * ((b - a) ** 2)
-
-            return dur
-
         if 'stage' == target:
             act_base = None
             act_new = None
@@ -1672,7 +2670,7 @@ class NetworkModel:
             rev = 'in_activities'
             choice = _choice_early
             delta = lambda a: a.expected
-            process_delta = _duration_vec
+            process_delta = self._duration_vec
 
         elif 'late' == target:
             act_base = 'late_end'
@@ -1682,7 +2680,7 @@ class NetworkModel:
             rev = 'out_activities'
             choice = _choice_late
             delta = _delta_late
-            process_delta = _duration_vec
+            process_delta = self._duration_vec
 
         elif 'optimistic' == target:
             act_base = 'opt_start'
@@ -1772,10 +2770,10 @@ class NetworkModel:
         ----------
         wbs_id : int
             Work Breakdown Structure identifier (0 for dummy activities)
-        src_id : int
-            Source event ID
-        dst_id : int
-            Destination event ID
+        src_id : int or None
+            Source event ID, None in AoN mode
+        dst_id : int or None
+            Destination event ID, None in AoN mode
         expected : float
             Activity expected resource effort
         exp_var : float
@@ -1798,10 +2796,10 @@ class NetworkModel:
         """
         if not isinstance(wbs_id, int):
             raise TypeError(f"wbs_id must be int, got {type(wbs_id)}")
-        if not isinstance(src_id, int):
-            raise TypeError(f"src_id must be int, got {type(src_id)}")
-        if not isinstance(dst_id, int):
-            raise TypeError(f"dst_id must be int, got {type(dst_id)}")
+        if src_id is not None and not isinstance(src_id, int):
+            raise TypeError(f"src_id must be int or None, got {type(src_id)}")
+        if dst_id is not None and not isinstance(dst_id, int):
+            raise TypeError(f"dst_id must be int or None, got {type(dst_id)}")
         if not isinstance(expected, float):
             raise TypeError(f"expected must be float, got {type(expected)}")
         if expected < 0.0:
@@ -1819,12 +2817,614 @@ class NetworkModel:
         if not isinstance(data, dict):
             raise TypeError(f"data must be dict, got {type(data)}")
 
-        act = _Activity(self.next_act, wbs_id, letter, self,
-                        self.events[src_id - 1], self.events[dst_id - 1],
+        src = None if src_id is None else self.events[src_id - 1]
+        dst = None if dst_id is None else self.events[dst_id - 1]
+        act = _Activity(self.next_act, wbs_id, letter, self, src, dst,
                         expected, exp_var, optimistic, pessimistic, data)
         self.activities.append(act)
         self.next_act += 1
 
+    def _precedes(self, src, dst):
+        """
+        Check if activity src precedes activity dst.
+
+        The reachability index of links is built on the first call,
+        so checks take O(1) until the network changes.
+
+        Parameters
+        ----------
+        src, dst : int
+            Activity IDs
+
+        Returns
+        -------
+        bool
+            True if dst depends on src directly or transitively
+        """
+        return self.reachability().is_ancestor(src, dst)
+
+    def _rebuild(self, wbs, lnk_src, lnk_dst):
+        """
+        Rebuild the network from new inputs, restore the model on failure.
+        """
+        saved = (self._wbs, self._lnk_src, self._lnk_dst,
+                 self.events, self.activities, self.next_act,
+                 self.is_pert, self.build_stats, self._aon, self._reach)
+
+        self._wbs, self._lnk_src, self._lnk_dst = wbs, lnk_src, lnk_dst
+        try:
+            self._build()
+        except BaseException:
+            (self._wbs, self._lnk_src, self._lnk_dst,
+             self.events, self.activities, self.next_act,
+             self.is_pert, self.build_stats, self._aon, self._reach) = saved
+            raise
+
+    def _reset_times(self):
+        """
+        Reset time parameters, they are accumulated by passes.
+        """
+        for e in self.events:
+            e.early = np.zeros((3,), dtype=float)
+            e.late = np.zeros((3,), dtype=float)
+            e.reserve = np.zeros((3,), dtype=float)
+            e.optimistic = 0.0
+            e.pessimistic = 0.0
+
+        for a in self.activities:
+            a.early_start = np.zeros_like(a.expected)
+            a.late_start = np.zeros_like(a.expected)
+            a.early_end = np.zeros_like(a.expected)
+            a.late_end = np.zeros_like(a.expected)
+            a.reserve = np.zeros_like(a.expected)
+            a.opt_start = a.opt_end = 0.
+            a.pes_start = a.pes_end = 0.
+
+    def _refresh(self):
+        """
+        Finish a local edit of the network.
+
+        Activities and dummy letters are numbered in list order, events are
+        renumbered by stages and time parameters are recomputed as after
+        a build. Statistics and the reachability index are dropped.
+        """
+        self._reach = None
+        self.build_stats = None
+
+        nd = 0
+        for i, a in enumerate(self.activities):
+            a.id = self._next_act_id + i
+            if 0 == a.wbs_id:
+                nd += 1
+                a.letter = '#' + str(nd)
+        self.next_act = self._next_act_id + len(self.activities)
+
+        self.is_pert = any(a.expected[VAR] > 0.0 for a in self.activities)
+        self._place_max_duration()
+
+        # The C extension sets all stages and times
+        native = _default_duration == self._duration
+        if native:
+            self._compute_native()
+        else:
+            self._reset_times()
+            for e in self.events:
+                e.stage = 0
+            self._compute_target('stage')
+
+        self.events.sort(key=lambda e: e.stage)
+        for i, e in enumerate(self.events, 1):
+            e.id = i
+
+        if not native:
+            self._compute_time_params()
+
+    def _add_leaf(self, act_id, act_data, preds):
+        """
+        Add an activity without successors to the network in place.
+
+        The activity ends at the finish event. It starts at the end event of
+        its only minimal predecessor, or at a new event with dummies from
+        end events of minimal predecessors. A predecessor which end event
+        requires other activities too, or is the finish event, gets a new
+        end event with a dummy to the old one. Takes O(activities) and
+        O(1) reachability index queries per activity checked.
+        """
+        try:
+            expected, exp_var, optimistic, _, pessimistic = \
+                _calculate_action_time_params(act_data, self._default_risk)
+        except ValueError as e:
+            raise ValueError(f"Error processing activity {act_id} ({act_data['letter']}): {e}") from e
+        letter = act_data['letter']
+        data = self._remove_duplicate_fields(act_data, expected, exp_var, letter)
+
+        # Predecessors which other ones depend on are not minimal
+        idx = self.reachability()
+        mins = []
+        if preds:
+            p = np.asarray(preds, dtype=np.int64)
+            redundant = idx.is_ancestor(p[:, None], p[None, :]).any(axis=1)
+            mins = [a for a, r in zip(preds, redundant) if not r]
+
+        real = {a.wbs_id: a for a in self.activities[:len(self._wbs)]}
+        ins = {}
+        for a in self.activities:
+            ins.setdefault(a.dst, []).append(a)
+        start, finish = self.events[0], self.events[-1]
+
+        def _required(e):
+            # Activities which end before e are minimal predecessors or their ancestors
+            stack, seen = [e], {e}
+            while stack:
+                for a in ins.get(stack.pop(), []):
+                    if a.wbs_id:
+                        if a.wbs_id not in mins and not idx.is_ancestor(a.wbs_id, mins).any():
+                            return False
+                    elif a.src not in seen:
+                        seen.add(a.src)
+                        stack.append(a.src)
+            return True
+
+        def _new_event():
+            self._add_event(len(self.events) + 1)
+            return self.events[-1]
+
+        def _dummy(src, dst):
+            self._add_activity(0, src.id, dst.id, 0., 0., 0., 0., '', {})
+
+        ends = []
+        for m in mins:
+            a = real[m]
+            if a.dst is finish or not _required(a.dst):
+                e = _new_event()
+                if a.dst is not finish:
+                    _dummy(e, a.dst)
+                a.dst = e
+            if a.dst not in ends:
+                ends.append(a.dst)
+
+        if not ends:
+            src = start
+        elif 1 == len(ends):
+            src = ends[0]
+        else:
+            src = _new_event()
+            for e in ends:
+                _dummy(e, src)
+
+        # Parallel activities need a dummy
+        dst = finish
+        if any(a.src is src for a in ins.get(finish, [])):
+            dst = _new_event()
+            _dummy(dst, finish)
+
+        self._add_activity(act_id, src.id, dst.id, expected, exp_var,
+                           optimistic, pessimistic, letter, data)
+        self.activities.insert(len(self._wbs), self.activities.pop())
+
+        self._wbs[act_id] = act_data
+        self._lnk_src += preds
+        self._lnk_dst += [act_id] * len(preds)
+        self._refresh()
+
+    def _remove_leaf(self, act_id):
+        """
+        Remove an activity without successors from the network in place.
+
+        Events around the removed activity are cleaned up by a worklist:
+        events nothing enters are dropped with their dummies, events nothing
+        leaves get a dummy to the finish, events with a single dummy out
+        or in are merged with its other end unless that makes parallel
+        activities, and dummies to the finish from events with other
+        activities out are dropped. Takes O(activities).
+        """
+        n_real = len(self._wbs)
+        x = next(a for a in self.activities[:n_real] if a.wbs_id == act_id)
+        start, finish = self.events[0], self.events[-1]
+
+        ins, outs = {}, {}
+        for a in self.activities:
+            if a is not x:
+                ins.setdefault(a.dst, []).append(a)
+                outs.setdefault(a.src, []).append(a)
+
+        gone = {x}
+        dead = set()
+
+        def _drop(a):
+            gone.add(a)
+            ins[a.dst].remove(a)
+            outs[a.src].remove(a)
+
+        def _move(a, src=None, dst=None):
+            if src is not None:
+                outs[a.src].remove(a)
+                a.src = src
+                outs.setdefault(src, []).append(a)
+            if dst is not None:
+                ins[a.dst].remove(a)
+                a.dst = dst
+                ins.setdefault(dst, []).append(a)
+
+        def _dummy(src, dst):
+            a = _Activity(0, 0, '', self, src, dst, 0., 0., 0., 0., {})
+            self.activities.append(a)
+            ins.setdefault(dst, []).append(a)
+            outs.setdefault(src, []).append(a)
+
+        work = [x.src, x.dst]
+        while work:
+            v = work.pop()
+            if v in dead or v is start:
+                continue
+            vin, vout = ins.get(v, []), outs.get(v, [])
+
+            # Dummies to the finish are redundant when other activities leave
+            if v is finish:
+                for a in list(vin):
+                    if not a.wbs_id and 1 < len(outs[a.src]):
+                        _drop(a)
+                        work.append(a.src)
+                continue
+
+            if not vin:
+                dead.add(v)
+                for a in list(vout):
+                    _drop(a)
+                    work.append(a.dst)
+            elif not vout:
+                _dummy(v, finish)
+                work += [v, finish]
+            elif 1 == len(vout) and not vout[0].wbs_id:
+                w = vout[0].dst
+                if not any(b.dst is w for a in vin for b in outs.get(a.src, [])):
+                    dead.add(v)
+                    _drop(vout[0])
+                    for a in list(vin):
+                        _move(a, dst=w)
+                        work.append(a.src)
+                    work.append(w)
+            elif 1 == len(vin) and not vin[0].wbs_id:
+                u = vin[0].src
+                if not any(b.dst is a.dst for a in vout for b in outs.get(u, [])):
+                    dead.add(v)
+                    _drop(vin[0])
+                    for a in list(vout):
+                        _move(a, src=u)
+                        work.append(a.dst)
+                    work.append(u)
+
+        self.activities = [a for a in self.activities if a not in gone]
+        self.events = [e for e in self.events if e not in dead]
+
+        del self._wbs[act_id]
+        links = [(s, d) for s, d in zip(self._lnk_src, self._lnk_dst) if d != act_id]
+        self._lnk_src = [s for s, _ in links]
+        self._lnk_dst = [d for _, d in links]
+        self._refresh()
+
+    def reachability(self):
+        """
+        Get the reachability index of activity dependencies.
+
+        The index is built on the first call and kept until the network is
+        rebuilt, links which do not change dependencies keep it valid.
+        Link edits use it to check for redundant links in O(1).
+
+        Returns
+        -------
+        ReachabilityIndex
+            Index of transitive dependencies between activities
+
+        Raises
+        ------
+        MemoryError
+            If bit sets of 2 * n * n bits can't be allocated.
+        """
+        if self._reach is None:
+            self._reach = ReachabilityIndex(list(self._wbs), self._lnk_src, self._lnk_dst)
+        return self._reach
+
+    def _check_link(self, src, dst):
+        for a in (src, dst):
+            if not isinstance(a, int):
+                raise TypeError(f"Activity ID must be int, got {type(a)}")
+            if a not in self._wbs:
+                raise ValueError(f"Activity {a} not found in the model")
+
+    def add_link(self, src, dst):
+        """
+        Add a dependency: activity dst starts after activity src.
+
+        When dst already depends on src transitively, minimal dependencies
+        and so the network do not change, the link is only recorded.
+        Otherwise the network is rebuilt. AoN model is always rebuilt,
+        it takes O(activities + links).
+
+        Parameters
+        ----------
+        src : int
+            Predecessor activity ID
+        dst : int
+            Successor activity ID
+
+        Returns
+        -------
+        bool
+            True if the network was rebuilt
+
+        Raises
+        ------
+        TypeError
+            If activity IDs are not integers.
+        ValueError
+            If activities are unknown, the link exists and dedup is False,
+            or the link closes a loop (``_ccpm.LoopError``).
+            The model is left unchanged on errors.
+        """
+        self._check_link(src, dst)
+
+        exists = any(s == src and d == dst for s, d in zip(self._lnk_src, self._lnk_dst))
+        if exists and not self.dedup:
+            raise ValueError(f"Link {src} -> {dst} already exists")
+
+        if 'aoa' == self.mode and (exists or (src != dst and self._precedes(src, dst))):
+            self._lnk_src.append(src)
+            self._lnk_dst.append(dst)
+            return False
+
+        self._rebuild(self._wbs, self._lnk_src + [src], self._lnk_dst + [dst])
+        return True
+
+    def remove_link(self, src, dst):
+        """
+        Remove a dependency between activities src and dst.
+
+        When dst still depends on src through other links, the link was
+        redundant and the network does not change. Otherwise the network
+        is rebuilt. AoN model is always rebuilt, it takes O(activities + links).
+
+        Parameters
+        ----------
+        src : int
+            Predecessor activity ID
+        dst : int
+            Successor activity ID
+
+        Returns
+        -------
+        bool
+            True if the network was rebuilt
+
+        Raises
+        ------
+        TypeError
+            If activity IDs are not integers.
+        ValueError
+            If the link does not exist.
+        """
+        self._check_link(src, dst)
+
+        links = list(zip(self._lnk_src, self._lnk_dst))
+        if (src, dst) not in links:
+            raise ValueError(f"Link {src} -> {dst} not found")
+        i = links.index((src, dst))
+
+        lnk_src = self._lnk_src[:i] + self._lnk_src[i + 1:]
+        lnk_dst = self._lnk_dst[:i] + self._lnk_dst[i + 1:]
+
+        # A path from src to dst can't pass the removed link
+        for s, d in zip(lnk_src, lnk_dst):
+            if 'aoa' == self.mode and d == dst and (s == src or self._precedes(src, s)):
+                self._lnk_src, self._lnk_dst = lnk_src, lnk_dst
+                return False
+
+        self._rebuild(self._wbs, lnk_src, lnk_dst)
+        return True
+
+    def add_activity(self, act_id, act_data, preds=(), succs=()):
+        """
+        Add an activity with its dependencies.
+
+        An activity without successors is added to the AoA network in place,
+        it takes O(activities). Otherwise the network is rebuilt.
+
+        Parameters
+        ----------
+        act_id : int
+            New activity ID
+        act_data : dict
+            WBS data of the activity, see ``wbs_dict``
+        preds : iterable of int, optional
+            Activities the new one depends on
+        succs : iterable of int, optional
+            Activities which depend on the new one
+
+        Returns
+        -------
+        bool
+            True if the network was rebuilt
+
+        Raises
+        ------
+        TypeError
+            If input types are incorrect.
+        ValueError
+            If the activity exists, its data is invalid, linked activities
+            are unknown, or links form a loop (``_ccpm.LoopError``).
+            The model is left unchanged on errors.
+        """
+        if not isinstance(act_id, int):
+            raise TypeError(f"Activity ID must be int, got {type(act_id)}")
+        if act_id in self._wbs:
+            raise ValueError(f"Activity {act_id} already exists")
+        if not isinstance(act_data, dict):
+            raise TypeError(f"Activity data must be dict, got {type(act_data)} for activity {act_id}")
+        if 'letter' not in act_data:
+            raise ValueError(f"Activity {act_id} missing required 'letter' field")
+        if not isinstance(act_data['letter'], str):
+            raise TypeError(f"Activity {act_id} 'letter' must be str, got {type(act_data['letter'])}")
+
+        preds = list(preds)
+        succs = list(succs)
+
+        wbs = dict(self._wbs)
+        wbs[act_id] = act_data
+        for a in preds + succs:
+            if a not in wbs:
+                raise ValueError(f"Activity {a} not found in the model")
+
+        # Loops and repeated links are reported by the builder
+        if 'aoa' == self.mode and not succs and act_id not in preds and len(set(preds)) == len(preds):
+            self._add_leaf(act_id, act_data, preds)
+            return False
+
+        self._rebuild(wbs,
+                      self._lnk_src + preds + [act_id] * len(succs),
+                      self._lnk_dst + [act_id] * len(preds) + succs)
+        return True
+
+    def remove_activity(self, act_id):
+        """
+        Remove an activity with its links.
+
+        An activity without successors is removed from the AoA network
+        in place, it takes O(activities). Otherwise the network is rebuilt.
+
+        Parameters
+        ----------
+        act_id : int
+            Activity ID
+
+        Returns
+        -------
+        bool
+            True if the network was rebuilt
+
+        Raises
+        ------
+        TypeError
+            If act_id is not an integer.
+        ValueError
+            If the activity is unknown or it is the only one.
+        """
+        if not isinstance(act_id, int):
+            raise TypeError(f"Activity ID must be int, got {type(act_id)}")
+        if act_id not in self._wbs:
+            raise ValueError(f"Activity {act_id} not found in the model")
+        if 1 == len(self._wbs):
+            raise ValueError(f"Activity {act_id} is the only one in the model")
+
+        if 'aoa' == self.mode and act_id not in self._lnk_src:
+            self._remove_leaf(act_id)
+            return False
+
+        wbs = {a: v for a, v in self._wbs.items() if a != act_id}
+        links = [(s, d) for s, d in zip(self._lnk_src, self._lnk_dst) if act_id not in (s, d)]
+        self._rebuild(wbs, [s for s, _ in links], [d for _, d in links])
+        return True
+
+    def update_estimates(self, wbs_update):
+        """
+        Replace effort estimates of activities and recompute time parameters.
+
+        Links do not change, so the network topology, event numbering and
+        dummies are kept, the C builder is not called. Activities with
+        maximal effort are placed on straight paths of triangle groups again.
+
+        Parameters
+        ----------
+        wbs_update : dict
+            New WBS data of existing activities, see ``wbs_dict``,
+            activities not listed here keep their estimates
+
+        Raises
+        ------
+        TypeError
+            If input types are incorrect.
+        ValueError
+            If activities are unknown or their data is invalid.
+            The model is left unchanged on errors.
+        """
+        if not isinstance(wbs_update, dict):
+            raise TypeError(f"wbs_update must be dict, got {type(wbs_update)}")
+
+        params = {}
+        for act_id, act_data in wbs_update.items():
+            if not isinstance(act_id, int):
+                raise TypeError(f"Activity ID must be int, got {type(act_id)} for key {act_id}")
+            if act_id not in self._wbs:
+                raise ValueError(f"Activity {act_id} not found in the model")
+            if not isinstance(act_data, dict):
+                raise TypeError(f"Activity data must be dict, got {type(act_data)} for activity {act_id}")
+            if 'letter' not in act_data:
+                raise ValueError(f"Activity {act_id} missing required 'letter' field")
+            if not isinstance(act_data['letter'], str):
+                raise TypeError(f"Activity {act_id} 'letter' must be str, got {type(act_data['letter'])}")
+            try:
+                params[act_id] = _calculate_action_time_params(act_data, self._default_risk)
+            except ValueError as e:
+                raise ValueError(f"Error processing activity {act_id} ({act_data['letter']}): {e}") from e
+
+        real = {a.wbs_id: a for a in self.activities[:len(self._wbs)]}
+        for act_id, (expected, exp_var, optimistic, _, pessimistic) in params.items():
+            a = real[act_id]
+            a.letter = wbs_update[act_id]['letter']
+            a.expected[RES] = expected
+            a.expected[VAR] = exp_var
+            a.expected[ERR] = EPS * expected
+            a.optimistic = optimistic
+            a.pessimistic = pessimistic
+            a.data = self._remove_duplicate_fields(wbs_update[act_id], expected, exp_var, a.letter)
+            self._wbs[act_id] = wbs_update[act_id]
+
+        self.is_pert = any(a.expected[VAR] > 0.0 for a in real.values())
+        self._place_max_duration()
+        self._reset_times()
+        self._compute_time_params()
+
+    def with_estimates(self, wbs_dict):
+        """
+        Create a model with the same activities and links but new estimates.
+
+        The network topology is taken from the topology cache, so the
+        C builder is not called unless the cache is not used, see ``cache``.
+
+        Parameters
+        ----------
+        wbs_dict : dict
+            WBS data of all activities of this model, see ``wbs_dict``
+
+        Returns
+        -------
+        NetworkModel
+            New model, this one is not changed
+
+        Raises
+        ------
+        TypeError
+            If input types are incorrect.
+        ValueError
+            If activity IDs differ from the ones of this model or their data
+            is invalid.
+        """
+        if not isinstance(wbs_dict, dict):
+            raise TypeError(f"wbs_dict must be dict, got {type(wbs_dict)}")
+        if wbs_dict.keys() != self._wbs.keys():
+            raise ValueError("wbs_dict must contain the same activities as the model")
+
+        # Same activity order gives the same topology cache key
+        wbs = {act_id: wbs_dict[act_id] for act_id in self._wbs}
+        return NetworkModel(wbs, list(self._lnk_src), list(self._lnk_dst),
+                            duration=self._duration, p=self.p,
+                            default_risk=self._default_risk,
+                            next_act_id=self._next_act_id, debug=self.debug,
+                            storage=self.storage, dedup=self.dedup,
+                            id_bits=self.id_bits, workspace=self._workspace,
+                            max_memory=self.max_memory, n_threads=self.n_threads,
+                            split=self.split, level=self.level, mode=self.mode,
+                            contract=self.contract, cache=self.cache)
+
     def __repr__(self):
         """String representation of the network model."""
         _repr = 'Events:{\n'
@@ -1925,6 +3525,8 @@ class NetworkModel:
         ------
         TypeError
             If get_style is not callable.
+        RuntimeError
+            If the model is built in AoN mode, it has no events.
 
         Notes
         -----
@@ -1944,6 +3546,8 @@ class NetworkModel:
         """
         if not callable(get_style):
             raise TypeError(f"Parameter get_style must be callable, got {type(get_style)}")
+        if 'aon' == self.mode:
+            raise RuntimeError("Visualization needs a model built in 'aoa' mode")
 
         dot = graphviz.Digraph(node_attr={'shape': 'record', 'style': 'rounded'})
         dot.graph_attr['rankdir'] = 'LR'
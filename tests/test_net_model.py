@@ -55,13 +55,527 @@ Usage Example:
 
 #==============================================================================
 from betapert import mpert
+from concurrent.futures import ThreadPoolExecutor
 import graphviz
 import numpy as np
 import pandas as pd
+import pytest
 import os
-from crazy_cpm import NetworkModel
+import sys
+from crazy_cpm import (NetworkModel, ReachabilityIndex, Workspace, LoopError, compute_times, make_aoa,
+                       make_aoa_np, make_aoa_many, make_aoa_mem, make_full_map, make_full_map_np,
+                       clear_topology_cache, EINVAL, ELOOP, ENOMEM, OK)
 
+#==============================================================================
+def _random_links(seed, n_act, p):
+    rng = np.random.default_rng(seed)
+    act_ids = [int(a) for a in rng.permutation(n_act) + 1]
+    src, dst = [], []
+    for i in range(n_act):
+        for j in range(i + 1, n_act):
+            if rng.random() < p:
+                src.append(act_ids[i])
+                dst.append(act_ids[j])
+    return act_ids, src, dst
+
+def test_concurrent_make_aoa():
+    cases = [_random_links(seed, 60, 0.1) for seed in range(32)]
+    serial = [make_aoa(*c) for c in cases]
+
+    # C code runs without the GIL, results must not depend on threads
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert list(pool.map(lambda c: make_aoa(*c), cases)) == serial
+        assert list(pool.map(lambda c: make_aoa(*c, workspace=Workspace()), cases)) == serial
+
+    # More topologies than the cache holds, threads hit, insert and evict at once
+    cases += [_random_links(seed, 60, 0.1) for seed in range(32, 48)]
+    wbs = {a: {'letter': str(a), 'expected': 1.} for a in cases[0][0]}
+    def build(i):
+        net = NetworkModel(wbs, cases[i][1], cases[i][2])
+        return [(a.src.id, a.dst.id) for a in net.activities], net.build_stats['cached']
+
+    # Serial builds leave the last topologies cached, threads hit them first
+    clear_topology_cache()
+    serial = [build(i)[0] for i in range(len(cases))]
+    order = [i for _ in range(4) for i in reversed(range(len(cases)))]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        nets = list(pool.map(build, order))
+    assert [n for n, _ in nets] == [serial[i] for i in order]
+    assert any(hit for _, hit in nets)
+
+def test_topology_cache():
+    act_ids, src, dst = _random_links(3, 60, 0.1)
+    wbs = {a: {'letter': str(a), 'expected': 1.} for a in act_ids}
+    clear_topology_cache()
+    built = NetworkModel(wbs, src, dst)
+    assert not built.build_stats['cached']
+
+    # Hits return a copy of the statistics of the build
+    hit = NetworkModel(wbs, src, dst)
+    assert hit.build_stats['cached']
+    assert {k: v for k, v in hit.build_stats.items() if k != 'cached'} == \
+           {k: v for k, v in built.build_stats.items() if k != 'cached'}
+    hit.build_stats['iter']['closure'] = -1
+    assert NetworkModel(wbs, src, dst).build_stats['iter']['closure'] != -1
+
+    # Fresh builds on request and on a memory budget
+    assert not NetworkModel(wbs, src, dst, cache=False).build_stats['cached']
+    assert not NetworkModel(wbs, src, dst, max_memory=1 << 30).build_stats['cached']
+    with pytest.raises(MemoryError):
+        NetworkModel(wbs, src, dst, max_memory=100)
+    with pytest.raises(TypeError):
+        NetworkModel(wbs, src, dst, cache=1)
+
+def test_stats_on_early_errors():
+    # Checks which fail before the build must not leave garbage in statistics
+    for id_bits in (16, 32):
+        for args, kw in ((([], [], []), {}), (([1, 2], [1], [2]), {'max_memory': 10})):
+            ret = make_aoa(*args, id_bits=id_bits, stats=True, **kw)
+            assert ret[0] in (EINVAL, ENOMEM)
+            stat = ret[-1]
+            assert all(0.0 == v for v in stat['time'].values())
+            assert all(0 == v for v in stat['iter'].values())
+            assert 0 == stat['mem'] and 0 == stat['n_dummy'] and 0 == stat['n_evt']
+
+def _window_links(seed, n_act, win, hub=False):
+    # Two predecessors among the previous win activities or on the hub pair 2, 3
+    rng = np.random.default_rng(seed)
+    src, dst = [], []
+    for j in range(2, n_act + 1):
+        if hub and j > 3 and rng.random() < 0.5:
+            pred = {2, 3}
+        else:
+            pred = {int(a) for a in rng.integers(max(1, j - win), j, 2)}
+        src += sorted(pred)
+        dst += [j] * len(pred)
+    return list(range(1, n_act + 1)), src, dst
+
+def test_nested_overlap_scaling():
+    # Main loop iteration counts of nested and overlapping phases per link must not grow
+    # with network size, the counts do not depend on machine load unlike phase times
+    for hub in (False, True):
+        per_link = {'nested': [], 'overlapping': []}
+        for n_act in (1000, 2000, 4000):
+            case = _window_links(1, n_act, 30, hub)
+            ret = make_aoa(*case, id_bits=32, stats=True)
+            assert 0 == ret[0]
+            for ph, counts in per_link.items():
+                counts.append(ret[-1]['iter'][ph] / len(case[1]))
+        for counts in per_link.values():
+            assert 0 < counts[0] and max(counts) < 1.2 * min(counts)
+
+def test_max_memory_sparse_rows():
+    # Closure rows outgrow the estimate, the budget must hold anyway
+    case = _window_links(2, 400, 30)
+    n_lnk = len(case[1])
+    for id_bits in (16, 32):
+        est = make_aoa_mem(400, n_lnk, storage='sparse', id_bits=id_bits)
+        free = make_aoa(*case, storage='sparse', id_bits=id_bits, stats=True)
+        peak = free[-1]['mem']
+        assert 0 == free[0] and peak > est
+
+        ret = make_aoa(*case, storage='sparse', id_bits=id_bits, max_memory=(est + peak) // 2)
+        assert ENOMEM == ret[0]
+
+        ret = make_aoa(*case, storage='sparse', id_bits=id_bits, max_memory=peak, stats=True)
+        assert ret[:4] == free[:4] and ret[-1]['mem'] <= peak
+
+def test_target_size():
+    # 10k activities and 20k links, the build took 1.07 GB before
+    act_ids, src, dst = _window_links(1, 10000, 30)
+    wbs = {a: {'letter': str(a), 'expected': 1.} for a in act_ids}
+
+    net = NetworkModel(wbs, src, dst, storage='sparse', id_bits=32, cache=False)
+    stats = net.build_stats
+    assert stats['mem'] < 400 * 2**20
+    assert stats['n_min'] <= len(src) and stats['n_dummy'] <= stats['n_min']
+    assert len(net.activities) == 10000 + stats['n_dummy']
+    assert len(net.events) == stats['n_evt']
+
+    # Every activity starts after the ends of its predecessors
+    act = {a.wbs_id: a for a in net.activities if a.wbs_id}
+    assert all(act[d].early_start[0] >= act[s].early_end[0] for s, d in zip(src, dst))
+
+def _chain_links(seed, n_act):
+    # Mostly series chains and parallel groups with some cross links
+    rng = np.random.default_rng(seed)
+    src, dst = [], []
+    for j in range(2, n_act + 1):
+        if rng.random() < 0.6:
+            src.append(j - 1)
+        else:
+            src.append(int(rng.integers(max(1, j - 4), j)))
+        dst.append(j)
+        if rng.random() < 0.15 and j > 2:
+            i = int(rng.integers(1, j - 1))
+            if i != src[-1]:
+                src.append(i)
+                dst.append(j)
+    wbs = {a: {'letter': str(a), 'expected': float(rng.integers(1, 9))} for a in range(1, n_act + 1)}
+    return wbs, src, dst
+
+def test_contract():
+    for seed in range(20):
+        wbs, src, dst = _chain_links(seed, 80)
+        plain = NetworkModel(wbs, src, dst)
+        assert 0 == plain.build_stats['n_contracted']
+
+        net = NetworkModel(wbs, src, dst, contract=True)
+        assert net.build_stats['n_contracted'] > 0
+
+        # Statistics describe the expanded network
+        for m in (plain, net):
+            assert m.build_stats['n_dummy'] == sum(0 == a.wbs_id for a in m.activities)
+            assert m.build_stats['n_evt'] == len(m.events)
+
+        # Same schedule as without contraction
+        times = {a.wbs_id: (a.early_start[0], a.late_end[0]) for a in plain.activities if a.wbs_id}
+        assert times == {a.wbs_id: (a.early_start[0], a.late_end[0]) for a in net.activities if a.wbs_id}
+
+def _schedule(net):
+    return {a.wbs_id: (a.early_start[0], a.late_end[0]) for a in net.activities if a.wbs_id}
+
+def test_leaf_edits():
+    rng = np.random.default_rng(0)
+    for seed in range(10):
+        wbs, src, dst = _chain_links(seed, 40)
+        net = NetworkModel(wbs, src, dst)
+        for _ in range(10):
+            # Leaves are patched in place, the schedule is the same as after a build
+            leaf = int(rng.choice([a for a in net._wbs if a not in net._lnk_src]))
+            assert net.remove_activity(leaf) is False
+            assert _schedule(net) == _schedule(NetworkModel(dict(net._wbs), net._lnk_src, net._lnk_dst))
+
+            ids = list(net._wbs)
+            preds = [int(a) for a in rng.choice(ids, size=int(rng.integers(0, 4)), replace=False)]
+            assert net.add_activity(max(ids) + 1, {'letter': 'N', 'expected': 2.}, preds=preds) is False
+            assert _schedule(net) == _schedule(NetworkModel(dict(net._wbs), net._lnk_src, net._lnk_dst))
+
+    # Activities with successors need a rebuild
+    wbs, src, dst = _chain_links(0, 40)
+    net = NetworkModel(wbs, src, dst)
+    assert net.remove_activity(src[0]) is True
+    assert net.add_activity(100, {'letter': 'N', 'expected': 2.}, succs=[dst[-1]]) is True
+
+def test_leaf_edit_in_place(monkeypatch):
+    # Leaves of large networks are edited without a network build
+    act_ids, src, dst = _window_links(1, 3000, 30)
+    net = NetworkModel({a: {'letter': str(a), 'expected': 1.} for a in act_ids}, src, dst)
+    before = (_schedule(net), len(net.events))
+
+    def rebuild(*args):
+        raise AssertionError("leaf edits must not rebuild the network")
+    monkeypatch.setattr(net, '_rebuild', rebuild)
+    monkeypatch.setattr('crazy_cpm.net_model._ccpm.make_aoa_np', rebuild)
+
+    assert net.add_activity(3001, {'letter': 'X', 'expected': 2.}, preds=[2990, 2500]) is False
+    assert net.build_stats is None and 3001 in _schedule(net)
+    assert net.remove_activity(3001) is False
+    assert before == (_schedule(net), len(net.events))
+
+def test_compute_times_indexes():
+    args = (np.ones((2, 3)), np.ones(2), np.ones(2))
+    evt, _ = compute_times([0, 1], [1, 2], 3, *args)
+    assert [0, 1, 2] == evt['stage'].tolist()
+
+    # Indexes must not wrap around on the cast to 32 bits
+    for src, dst in (([0, -1], [1, 2]), ([0, 1], [1, 3]), ([0, 1], [1, 2**32 + 2])):
+        with pytest.raises(ValueError):
+            compute_times(np.array(src), np.array(dst), 3, *args)
+    with pytest.raises(TypeError):
+        compute_times([0., 1.], [1., 2.], 3, *args)
+
+def _closure(act_ids, src, dst):
+    # Reference full dependency map, item [i, j] is set when activity i depends on activity j
+    pos = {a: i for i, a in enumerate(act_ids)}
+    full = np.zeros((len(act_ids), len(act_ids)), dtype=bool)
+    full[[pos[d] for d in dst], [pos[s] for s in src]] = True
+    for k in range(len(act_ids)):
+        full |= full[:, [k]] & full[[k], :]
+    return full
+
+def test_make_aoa_np():
+    for seed in range(8):
+        case = _random_links(seed, 40, 0.1)
+        ref = make_aoa(*case)
+        for conv in (list, np.array, lambda x: np.array(x, dtype=np.uint16)):
+            args = [conv(x) for x in case]
+            copies = [np.array(x) for x in args]
+            ret = make_aoa_np(*args)
+            assert OK == ret[0] and [list(x) for x in ret[1:]] == [list(x) for x in ref[1:]]
+            assert all((np.array(x) == c).all() for x, c in zip(args, copies))
+
+        # 32-bit IDs over the 16-bit limit give the same network
+        ret = make_aoa_np(*[np.array(x) + 100000 for x in case], id_bits=32)
+        assert np.uint32 == ret[1].dtype
+        assert list(ret[1] - 100000) == list(ref[1]) and [list(x) for x in ret[2:]] == [list(x) for x in ref[2:]]
+
+    with pytest.raises(TypeError):
+        make_aoa_np(np.array([1., 2.]), [1], [2])
+    with pytest.raises(ValueError):
+        make_aoa_np([1, 70000], [1], [70000])
+
+def test_equivalent_options():
+    # Storage, closure, sort, threads and ID width don't change the network
+    options = [{'storage': 'sparse'}, {'closure': 'iter'}, {'sort': 'merge'}, {'n_threads': 4},
+               {'n_threads': np.int64(2)}, {'id_bits': 32}, {'storage': 'sparse', 'closure': 'iter', 'sort': 'merge'}]
+    for seed in range(8):
+        case = _random_links(seed, 50, 0.08)
+        ref = make_aoa(*case)
+        for kw in options:
+            assert make_aoa(*case, **kw) == ref
+
+    wbs = {a: {'letter': str(a), 'expected': 1.} for a in case[0]}
+    assert 2 == NetworkModel(wbs, case[1], case[2], n_threads=np.int32(2)).n_threads
+    for n_threads in (-1, 1.5, '2'):
+        with pytest.raises(ValueError):
+            make_aoa(*case, n_threads=n_threads)
+        with pytest.raises(ValueError):
+            NetworkModel(wbs, case[1], case[2], n_threads=n_threads)
+
+def test_make_aoa_many():
+    cases = [_random_links(seed, 40, 0.1) for seed in range(6)]
+    cases.insert(2, ([1, 2, 3], [1, 2, 3], [2, 3, 1]))
+    for n_threads in (1, 4):
+        rets = make_aoa_many(cases, n_threads=n_threads)
+        assert len(cases) == len(rets)
+
+        # A loop fails its own network only
+        assert ELOOP == rets[2][0] and all(0 == len(x) for x in rets[2][1:])
+        for case, ret in zip(cases[:2] + cases[3:], rets[:2] + rets[3:]):
+            ref = make_aoa_np(*case)
+            assert OK == ret[0] and all((x == r).all() for x, r in zip(ret[1:], ref[1:]))
+
+def test_full_map_outputs():
+    for seed in range(6):
+        case = _random_links(seed, 45, 0.08)
+        full = _closure(*case)
+        status, dense = make_full_map(*case)
+        assert OK == status and (dense == full).all()
+
+        status, packed = make_full_map_np(*[np.array(x) for x in case], output='packed')
+        assert OK == status and packed.shape == (45, 6)
+        assert (np.unpackbits(packed, axis=1, count=45).astype(bool) == full).all()
+
+        status, csr = make_full_map(*case, id_bits=32, output='csr')
+        assert OK == status and (csr.toarray() == full).all()
+
+def test_full_map_csr_without_scipy(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'scipy.sparse', None)
+    with pytest.raises(ImportError, match="output='csr'"):
+        make_full_map([1, 2], [1], [2], output='csr')
+    assert OK == make_full_map([1, 2], [1], [2], output='packed')[0]
+
+def test_reachability_index():
+    act_ids, src, dst = _random_links(3, 40, 0.08)
+    full = _closure(act_ids, src, dst)
+    idx = ReachabilityIndex(act_ids, src, dst)
+    assert len(act_ids) == len(idx)
+
+    ids = np.array(act_ids)
+    assert (idx.is_ancestor(ids[None, :], ids[:, None]) == full).all()
+    assert (idx.is_descendant(ids[:, None], ids[None, :]) == full).all()
+    assert (idx.closes_loop(ids[:, None], ids[None, :]) == (full | np.eye(len(ids), dtype=bool))).all()
+    for i, a in enumerate(act_ids):
+        assert list(idx.ancestors(a)) == list(ids[full[i]])
+        assert list(idx.descendants(a)) == list(ids[full[:, i]])
+
+    with pytest.raises(ValueError):
+        idx.is_ancestor(act_ids[0], 1000)
+    links = {(1, 2), (2, 3), (3, 4), (4, 2), (1, 5), (5, 5)}
+    for lnk in (links - {(5, 5)}, links - {(4, 2)}):
+        with pytest.raises(LoopError) as err:
+            ReachabilityIndex([1, 2, 3, 4, 5], *zip(*sorted(lnk)))
+        loop = err.value.loop
+        assert all((s, d) in lnk for s, d in zip(loop, loop[1:] + loop[:1]))
+
+def test_workspace_reuse():
+    ws = Workspace()
+    assert 0 == ws.size
+    for seed, n_act in ((0, 60), (1, 20), (2, 80), (3, 40)):
+        case = _random_links(seed, n_act, 0.1)
+        assert make_aoa(*case, workspace=ws) == make_aoa(*case)
+        assert ws.size > 0
+    ws.shrink()
+    assert 0 == ws.size
+
+def test_loop_error():
+    with pytest.raises(LoopError) as err:
+        make_aoa([1, 2, 3, 4], [1, 2, 3, 4], [2, 3, 4, 2])
+    loop = err.value.loop
+    assert sorted(loop) == [2, 3, 4]
+    links = {(1, 2), (2, 3), (3, 4), (4, 2)}
+    assert all((s, d) in links for s, d in zip(loop, loop[1:] + loop[:1]))
+
+    # Edits closing a loop leave the model unchanged
+    wbs, src, dst = _chain_links(0, 30)
+    net = NetworkModel(wbs, src, dst)
+    before = (_schedule(net), list(net._lnk_src), list(net._lnk_dst))
+    with pytest.raises(LoopError):
+        net.add_link(dst[-1], src[0])
+    assert before == (_schedule(net), net._lnk_src, net._lnk_dst)
+
+def test_link_edits():
+    wbs, src, dst = _chain_links(1, 40)
+    net = NetworkModel(wbs, src, dst)
+    idx = ReachabilityIndex(list(wbs), src, dst)
+    links = set(zip(src, dst))
+
+    # Transitive dependencies are redundant, new ones rebuild the network
+    a, b = next((a, b) for a in wbs for b in wbs if idx.is_ancestor(a, b) and (a, b) not in links)
+    assert net.add_link(a, b) is False
+    c, d = next((c, d) for c in wbs for d in wbs if c != d and not idx.closes_loop(c, d) and not idx.is_ancestor(c, d))
+    assert net.add_link(c, d) is True
+    assert _schedule(net) == _schedule(NetworkModel(wbs, src + [a, c], dst + [b, d]))
+
+    assert net.remove_link(a, b) is False
+    assert net.remove_link(c, d) is True
+    assert _schedule(net) == _schedule(NetworkModel(wbs, src, dst))
+    with pytest.raises(ValueError):
+        net.remove_link(c, d)
+
+def test_estimates():
+    wbs, src, dst = _chain_links(2, 40)
+    new = {a: {'letter': v['letter'], 'optimistic': 1., 'most_likely': v['expected'], 'pessimistic': 9.}
+           for a, v in wbs.items()}
+    ref = _schedule(NetworkModel(new, src, dst))
+
+    net = NetworkModel(wbs, src, dst)
+    topology = [(a.src.id, a.dst.id) for a in net.activities]
+    net.update_estimates(new)
+    assert net.is_pert and _schedule(net) == ref
+    assert topology == [(a.src.id, a.dst.id) for a in net.activities]
+
+    # The topology comes from the cache
+    other = NetworkModel(wbs, src, dst).with_estimates(new)
+    assert other.build_stats['cached'] and _schedule(other) == ref
+
+    with pytest.raises(ValueError):
+        net.update_estimates({1000: new[1]})
+
+def test_aon_mode():
+    for seed in range(6):
+        wbs, src, dst = _chain_links(seed, 50)
+        aoa = NetworkModel(wbs, src, dst)
+        aon = NetworkModel(wbs, src, dst, mode='aon')
+        assert _schedule(aon) == _schedule(aoa)
+        assert _schedule(NetworkModel(wbs, src, dst, mode='aon', contract=True)) == _schedule(aoa)
+
+        # Edits rebuild AoN models
+        assert aon.add_activity(100, {'letter': 'N', 'expected': 1.}, preds=[1]) is True
+
+def _times(net):
+    acts = sorted((a for a in net.activities if a.wbs_id), key=lambda a: a.wbs_id)
+    return np.array([[a.early_start, a.early_end, a.late_start, a.late_end, a.reserve] for a in acts])
+
+def test_aon_random():
+    # AoN sums durations along other paths than AoA, times match up to rounding
+    for seed in range(30):
+        act_ids, src, dst = _random_links(seed, 40, 0.15)
+        rng = np.random.default_rng(seed)
+        wbs = {a: {'letter': str(a), 'expected': float(rng.uniform(0.1, 10.))} for a in act_ids}
+        aon = _times(NetworkModel(wbs, src, dst, mode='aon'))
+        for level in (0, 2):
+            aoa = _times(NetworkModel(wbs, src, dst, level=level))
+            assert np.allclose(aon, aoa, rtol=1e-12, atol=1e-9)
+
+def test_native_times():
+    # A copy of the default duration makes the model compute times in Python
+    def duration(effort, activity, base_time):
+        return effort
+
+    for seed in range(12):
+        act_ids, src, dst = _random_links(seed, 40, 0.12)
+        rng = np.random.default_rng(seed)
+        cpm = {a: {'letter': str(a), 'expected': float(rng.uniform(0.5, 9.))} for a in act_ids}
+        pert = {a: {'letter': v['letter'], 'optimistic': 0.5 * v['expected'], 'most_likely': v['expected'],
+                    'pessimistic': 2. * v['expected']} for a, v in cpm.items()}
+        for wbs in (cpm, pert):
+            native = NetworkModel(wbs, src, dst)
+            python = NetworkModel(wbs, src, dst, duration=duration)
+            assert native.is_pert == (wbs is pert)
+            assert np.allclose(_times(native), _times(python), rtol=1e-12, atol=1e-9)
+            for name in ('optimistic', 'pessimistic'):
+                assert np.allclose([getattr(a, name) or 0. for a in native.activities],
+                                   [getattr(a, name) or 0. for a in python.activities], rtol=1e-12, atol=1e-9)
+            assert np.allclose([(e.early, e.late, e.reserve) for e in native.events],
+                               [(e.early, e.late, e.reserve) for e in python.events], rtol=1e-12, atol=1e-9)
+
+def test_split():
+    cases = []
+    for seed in range(10):
+        # Several sub-projects with activities without links and one connected project
+        act_ids, src, dst = [], [], []
+        for k in range(4):
+            ids, s, d = _random_links(seed * 4 + k, 15, 0.3)
+            act_ids += [a + 100 * k for a in ids]
+            src += [a + 100 * k for a in s]
+            dst += [a + 100 * k for a in d]
+        cases.append((act_ids + [1000, 1001], src, dst))
+        cases.append(_random_links(seed, 30, 0.3))
+
+    for act_ids, src, dst in cases:
+        ret = make_aoa(act_ids, src, dst, stats=True)
+        ret_split = make_aoa(act_ids, src, dst, split=True, stats=True)
+        assert (_aoa_deps(act_ids, *ret_split[1:4]) == _aoa_deps(act_ids, *ret[1:4])).all()
+        for k in ('n_dummy', 'n_evt'):
+            assert ret_split[-1][k] == ret[-1][k]
+
+        wbs = {a: {'letter': str(a), 'expected': float(a % 7 + 1)} for a in act_ids}
+        assert _schedule(NetworkModel(wbs, src, dst, split=True)) == _schedule(NetworkModel(wbs, src, dst))
+    assert ret_split[-1]['n_comp'] == 1 and make_aoa(*cases[0], split=True, stats=True)[-1]['n_comp'] > 1
+
+def _random_model(seed, n_act, p):
+    act_ids, src, dst = _random_links(seed, n_act, p)
+    rng = np.random.default_rng(seed)
+    return {a: {'letter': str(a), 'expected': float(rng.integers(1, 9))} for a in act_ids}, src, dst
+
+def _aoa_deps(order, act_ids, act_src, act_dst):
+    # Dependency map of an AoA network in the same layout as _closure,
+    # activity i depends on activity j when the start of i is reachable from the end of j
+    n_evt = max(act_dst) + 1
+    reach = np.eye(n_evt, dtype=bool)
+    reach[act_src, act_dst] = True
+    for k in range(n_evt):
+        reach |= reach[:, [k]] & reach[[k], :]
+    pos = {int(a): i for i, a in enumerate(act_ids)}
+    idx = [pos[a] for a in order]
+    full = reach[np.ix_(np.asarray(act_dst)[idx], np.asarray(act_src)[idx])].T
+    np.fill_diagonal(full, False)
+    return full
+
+def test_levels():
+    # Overlapping sets which form a ring used to end some activities at wrong events
+    ring = ([28, 6, 33, 8, 7, 19, 15, 23], [28, 28, 6, 6, 33, 33, 8, 8], [19, 23, 7, 15, 19, 15, 7, 23])
+    for case in [ring] + [_random_links(seed, 35, 0.15) for seed in range(40)]:
+        ref = _closure(*case)
+        for level in (0, 1, 2):
+            assert (_aoa_deps(case[0], *make_aoa(*case, level=level)[1:4]) == ref).all()
+
+    for seed in range(10):
+        wbs, src, dst = _random_model(seed, 40, 0.15)
+        ref = _schedule(NetworkModel(wbs, src, dst, level=0))
+        assert all(_schedule(NetworkModel(wbs, src, dst, level=level)) == ref for level in (1, 2))
+
+    for level in (-1, 3, 'fast'):
+        with pytest.raises(ValueError):
+            make_aoa([1, 2], [1], [2], level=level)
+        with pytest.raises(ValueError):
+            make_aoa_mem(2, 1, level=level)
+        with pytest.raises(ValueError):
+            NetworkModel({1: {'letter': 'A', 'expected': 1.}}, [], [], level=level)
+
+def test_level_0_fallback():
+    # K3,3 has a dummy per link, with activities without links the network does not fit output lists
+    src = [a for a in (1, 2, 3) for _ in (4, 5, 6)]
+    dst = [b for _ in (1, 2, 3) for b in (4, 5, 6)]
+    ret = make_aoa(list(range(1, 7)), src, dst, level=0, stats=True)
+    assert 0 == ret[-1]['n_min']
 
+    act_ids = list(range(1, 12))
+    ret = make_aoa(act_ids, src, dst, level=0, stats=True)
+    assert ret[-1]['n_min'] > 0  # Built with dependency processing
+    assert (_aoa_deps(act_ids, *ret[1:4]) == _closure(act_ids, src, dst)).all()
 
 #==============================================================================
 if __name__ == '__main__':